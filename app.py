@@ -12,13 +12,25 @@ from google_auth_oauthlib.flow import Flow
 from flask_cors import CORS
 import logging
 
-from flask import Flask, redirect, render_template, request, jsonify, session
+from flask import Flask, Response, redirect, render_template, request, jsonify, session
 from flask_socketio import SocketIO, emit, join_room, leave_room as sio_leave_room
 import uuid
 import os
 
 from games.texas_holdem.logic import TexasHoldemGame
 from games.black_jack.logic import BlackJackGame
+from games.texas_holdem.tournament import Tournament
+from games.texas_holdem.fast_fold import FastFoldPool
+from games.bots import BotRunner, STRATEGIES as BOT_STRATEGIES
+from games.event_sink import SocketIOSink
+from games.metrics import REGISTRY, PROMETHEUS_CONTENT_TYPE, instrument_socketio, observe_handler
+from games.profiler import SLOW_ACTIONS, MAX_PROFILE_SECONDS, profile_for
+from games.room_store import RoomStore
+from games.admission import AdmissionControl, seat_limit
+from games.matchmaking import Matchmaker
+from games.scheduler import get_scheduler
+from games.wallet import configure_wallet
+from games.leaderboard import configure_leaderboards
 
 # 設置日誌
 logging.basicConfig(level=logging.DEBUG)
@@ -39,21 +51,136 @@ app.config.update(
 CORS(app, resources={r"/*": {"origins": "http://localhost:5173"}}, supports_credentials=True)
 
 socketio = SocketIO(app, cors_allowed_origins="http://localhost:5173", logger=True, engineio_logger=False)
+instrument_socketio(socketio)
+# 遊戲引擎只透過事件介面送出事件 (games/event_sink.py)
+game_events = SocketIOSink(socketio)
 
 CLIENT_SECRETS_FILE = "client_secret.json"
 SCOPES = ['openid', 'https://www.googleapis.com/auth/userinfo.email', 'https://www.googleapis.com/auth/userinfo.profile']
 REDIRECT_URI = 'http://localhost:4000/callback'
 FRONTEND_URL = 'http://localhost:5173/'
-
-active_rooms = {}
+ADMIN_EMAILS = {e.strip() for e in os.getenv('ADMIN_EMAILS', '').split(',') if e.strip()}
+# 離線壓力測試 (loadtest.py) 用的免 OAuth 登入，只有設定 DEV_LOGIN=1 時才存在，正式環境絕不可開啟
+DEV_LOGIN_ENABLED = os.getenv('DEV_LOGIN') == '1'
+
+# 玩家的籌碼錢包 (games/wallet.py)，必須在喚醒任何房間之前設定
+wallet = configure_wallet()
+# 跨房間的排行榜 (games/leaderboard.py)，每局結束時更新並定期寫入檢查點
+leaderboards = configure_leaderboards()
+# 閒置或超過常駐上限的房間休眠到磁碟，下次存取時喚醒 (games/room_store.py)
+active_rooms = RoomStore(game_events)
+active_rooms.start()
+# 建立房間與加入牌桌的容量控制 (games/admission.py)
+admission = AdmissionControl(active_rooms.room_count)
+active_tournaments = {}
+active_fast_fold_pools = {}
+bot_runner = None  # 第一次有管理員補機器人時才建立 (決策在行程池中計算)
 email_to_sid = {}
 sid_to_email = {}
 
+# 管理員檢查裝飾器
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user' not in session:
+            return jsonify({'success': False, 'message': '請先登入'}), 401
+        if session['user'].get('email') not in ADMIN_EMAILS:
+            return jsonify({'success': False, 'message': '需要管理員權限。'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+def _room_removed(room_id):
+    # 房間關閉: 仍在桌上的籌碼移回錢包，歸還建立者的額度，候補中的玩家收到取消通知
+    wallet.close_room(room_id)
+    for email in admission.room_closed(room_id):
+        sid = email_to_sid.get(email)
+        if sid:
+            socketio.emit('join_queue_cancelled', {'room_id': room_id, 'message': "房間已關閉，候補已取消。"}, to=sid)
+
+active_rooms.on_remove = _room_removed
+
+def _insufficient_chips(email):
+    # 錢包餘額為 0 的玩家無法買入新的牌桌
+    if wallet.balance(email) > 0:
+        return None
+    return jsonify({'success': False, 'message': '籌碼不足，無法買入。'}), 409
+
+def _admission_response(decision):
+    # 202 (候補中) / 429 / 503 附上建議的重試秒數
+    body = {'success': False, 'message': decision.message, 'retry_after': decision.retry_after}
+    if decision.status == 202:
+        body.update(queued=True, position=decision.position)
+    response = jsonify(body)
+    if decision.retry_after is not None:
+        response.headers['Retry-After'] = str(decision.retry_after)
+    return response, decision.status
+
 REGISTERED_GAME_LOGIC = {
     "texas_holdem": TexasHoldemGame,
     "black_jack": BlackJackGame,
 }
 
+# --- 監控指標 (在抓取 /metrics 時才計算) ---
+def _count_by_game_type(value_fn):
+    counts = {(game_type,): 0 for game_type in REGISTERED_GAME_LOGIC}
+    for game in list(active_rooms.values()):
+        if game:
+            key = (game.get_game_type(),)
+            counts[key] = counts.get(key, 0) + value_fn(game)
+    return counts
+
+REGISTRY.gauge_func('cnl_active_rooms', '常駐記憶體的房間數。',
+                    lambda: _count_by_game_type(lambda game: 1), ('game_type',))
+REGISTRY.gauge_func('cnl_dormant_rooms', '休眠到磁碟的房間數 (不計入 cnl_active_rooms)。',
+                    lambda: active_rooms.dormant_count())
+REGISTRY.gauge_func('cnl_active_players', '所有房間內的玩家數。',
+                    lambda: _count_by_game_type(lambda game: game.get_player_count()), ('game_type',))
+REGISTRY.gauge_func('cnl_active_timers', '尚未觸發的行動計時器數。',
+                    lambda: _count_by_game_type(lambda game: game.get_active_timer_count()), ('game_type',))
+REGISTRY.gauge_func('cnl_scheduler_pending_timers', '共用排程器中尚未觸發的計時器數 (所有房間)。',
+                    lambda: get_scheduler().pending_count())
+REGISTRY.gauge_func('cnl_hands_per_hour', '最近一小時內結束的局數 (所有房間合計)。',
+                    lambda: _count_by_game_type(lambda game: game.get_hands_per_hour()), ('game_type',))
+REGISTRY.gauge_func('cnl_connected_users', '已登記 SID 的使用者數。', lambda: len(email_to_sid))
+REGISTRY.gauge_func('cnl_join_queue_waiting', '所有牌桌候補中的玩家數。', lambda: admission.waiting_count)
+REGISTRY.gauge_func('cnl_matchmaking_queued', '配對佇列中的玩家數。', lambda: len(matchmaker.players))
+REGISTRY.gauge_func('cnl_wallet_pending', '錢包中尚未寫入 SQLite 的異動筆數。', lambda: wallet.stats()['pending'])
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype=None, content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route('/admin/profile', methods=['POST'])
+@admin_required
+def admin_profile():
+    """取樣伺服器 greenthread 指定秒數，返回 flamegraph 相容的 collapsed-stack 檔案。"""
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval_ms = float(request.args.get('interval_ms', 5))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'seconds 與 interval_ms 必須為數字。'}), 400
+    if not 0 < seconds <= MAX_PROFILE_SECONDS or not 1 <= interval_ms <= 1000:
+        return jsonify({'success': False, 'message': f"seconds 需介於 0 與 {MAX_PROFILE_SECONDS} 之間，interval_ms 需介於 1 與 1000 之間。"}), 400
+    include_idle = request.args.get('include_idle', 'false').lower() == 'true'
+    try:
+        collapsed = profile_for(seconds, interval=interval_ms / 1000.0, include_idle=include_idle)
+    except RuntimeError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    logger.info(f"Admin {session['user']['email']} captured a {seconds}s profile.")
+    return Response(collapsed, content_type='text/plain; charset=utf-8',
+                    headers={'Content-Disposition': 'attachment; filename="profile.collapsed"'})
+
+@app.route('/admin/slow_actions', methods=['GET', 'DELETE'])
+@admin_required
+def admin_slow_actions():
+    if request.method == 'DELETE':
+        SLOW_ACTIONS.clear()
+        return jsonify({'success': True})
+    return jsonify({
+        'threshold_ms': SLOW_ACTIONS.threshold * 1000,
+        'records': SLOW_ACTIONS.snapshot(),
+    })
+
 # Google 登入路由
 @app.route('/')
 def index():
@@ -100,6 +227,17 @@ def callback():
         logger.error(f"Callback error: {str(e)}")
         return jsonify({'error': f'登錄失敗：{str(e)}'}), 500
 
+@app.route('/dev/login', methods=['POST'])
+def dev_login():
+    if not DEV_LOGIN_ENABLED:
+        return jsonify({'error': 'Not found'}), 404
+    data = request.get_json(silent=True) or {}
+    email = data.get('email')
+    if not email or email in ADMIN_EMAILS:
+        return jsonify({'success': False, 'message': '需要 email，且不能以管理員身分登入。'}), 400
+    session['user'] = {'email': email, 'name': data.get('name') or email.split('@')[0]}
+    return jsonify({'success': True, 'user': session['user']}), 200
+
 @app.route('/logout', methods=['POST'])
 def logout():
     if 'user' in session:
@@ -116,7 +254,7 @@ def get_user():
 
 @app.route('/api/lobby/rooms', methods=['GET'])
 def get_lobby_rooms_api():
-    lobby_data = {'rooms': {r_id: game.get_game_type() for r_id, game in active_rooms.items() if game}}
+    lobby_data = {'rooms': active_rooms.game_types()}
     return jsonify(lobby_data), 200
 
 @app.route('/api/rooms', methods=['POST'])
@@ -133,19 +271,27 @@ def create_room_api():
         return jsonify({'success': False, 'message': 'Email not registered or missing.'}), 400
     if not game_type or game_type not in REGISTERED_GAME_LOGIC:
         return jsonify({'success': False, 'message': f"Invalid game type: {game_type}"}), 400
+    rejection = _insufficient_chips(email)
+    if rejection:
+        return rejection
+    decision = admission.admit_room(email)
+    if decision.status != 200:
+        return _admission_response(decision)
 
     sid = email_to_sid[email]
     room_id = str(uuid.uuid4())[:8]
     game_class = REGISTERED_GAME_LOGIC[game_type]
-    game_instance = game_class(room_id, [email], socketio, options)
-    game_instance.add_player(email, {'name': player_name})
+    game_instance = game_class(room_id, [email], game_events, options)
+    game_instance.add_player(email, {'name': player_name, 'request_id': data.get('request_id')})
 
     active_rooms[room_id] = game_instance
+    admission.room_opened(room_id, email)
+    matchmaker.offer_table(room_id, game_instance)
     join_room(room_id, sid=sid, namespace='/')
 
     # 發送 lobby_update 事件給所有連線的客戶端
     socketio.emit('lobby_update',
-                  {'rooms': {r_id: g.get_game_type() for r_id, g in active_rooms.items()}},
+                  {'rooms': active_rooms.game_types()},
                   namespace='/')  # 省略 to 參數表示廣播給所有客戶端
 
     # 發送 room_created_socket_event 給房間創建者（或房間內所有客戶端）
@@ -169,6 +315,223 @@ def create_room_api():
         'message': f"房間 {room_id} 已創建。"
     }), 201
 
+# --- 錦標賽 ---
+def _emit_lobby_update():
+    socketio.emit('lobby_update', {'rooms': active_rooms.game_types()}, namespace='/')
+
+def _tournament_table_opened(tournament, table):
+    active_rooms[table.room_id] = table
+
+def _move_socket_room(email, old_room_id, new_room_id, **extra):
+    # 可能在排程器的 greenthread 中呼叫 (沒有 request context)，直接操作 Socket.IO 伺服器的房間
+    sid = email_to_sid.get(email)
+    if not sid:
+        return
+    if old_room_id:
+        socketio.server.leave_room(sid, old_room_id, namespace='/')
+    if new_room_id:
+        socketio.server.enter_room(sid, new_room_id, namespace='/')
+        socketio.emit('joined_room_success_socket_event', dict({
+            'room_id': new_room_id, 'game_type': 'texas_holdem',
+        }, **extra), to=sid)
+
+def _tournament_seat_changed(tournament, email, old_room_id, new_room_id):
+    _move_socket_room(email, old_room_id, new_room_id, tournament_id=tournament.tournament_id)
+
+def _tournament_table_closed(tournament, table):
+    active_rooms.pop(table.room_id, None)
+    _emit_lobby_update()
+
+@app.route('/admin/tournaments', methods=['POST'])
+@admin_required
+def create_tournament_api():
+    data = request.get_json(silent=True) or {}
+    tournament_id = f"tour-{str(uuid.uuid4())[:8]}"
+    try:
+        tournament = Tournament(tournament_id, game_events, data.get('options', {}),
+                                on_table_opened=_tournament_table_opened,
+                                on_seat_change=_tournament_seat_changed,
+                                on_table_closed=_tournament_table_closed)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'message': f"錦標賽選項無效: {e}"}), 400
+    active_tournaments[tournament_id] = tournament
+    logger.info(f"Admin {session['user']['email']} created tournament {tournament_id}.")
+    return jsonify({'success': True, 'tournament': tournament.get_summary()}), 201
+
+@app.route('/admin/tournaments/<tournament_id>/start', methods=['POST'])
+@admin_required
+def start_tournament_api(tournament_id):
+    tournament = active_tournaments.get(tournament_id)
+    if not tournament:
+        return jsonify({'success': False, 'message': '找不到錦標賽。'}), 404
+    ok, message = tournament.start()
+    if not ok:
+        return jsonify({'success': False, 'message': message}), 409
+    _emit_lobby_update()
+    return jsonify({'success': True, 'message': message, 'tournament': tournament.get_summary()}), 200
+
+@app.route('/api/tournaments', methods=['GET'])
+def list_tournaments_api():
+    return jsonify({'tournaments': [t.get_summary() for t in active_tournaments.values()]}), 200
+
+@app.route('/api/tournaments/<tournament_id>', methods=['GET'])
+def get_tournament_api(tournament_id):
+    tournament = active_tournaments.get(tournament_id)
+    if not tournament:
+        return jsonify({'success': False, 'message': '找不到錦標賽。'}), 404
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'limit 必須為整數。'}), 400
+    return jsonify(dict(tournament.get_summary(), **tournament.get_standings(limit=limit))), 200
+
+@app.route('/api/tournaments/<tournament_id>/register', methods=['POST', 'DELETE'])
+def register_tournament_api(tournament_id):
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': '請先登入'}), 401
+    tournament = active_tournaments.get(tournament_id)
+    if not tournament:
+        return jsonify({'success': False, 'message': '找不到錦標賽。'}), 404
+    email = session['user']['email']
+    if request.method == 'DELETE':
+        if not tournament.unregister(email):
+            return jsonify({'success': False, 'message': '無法取消報名 (未報名或已開賽)。'}), 409
+        return jsonify({'success': True, 'message': '已取消報名。'}), 200
+    ok, message = tournament.register(email, session['user']['name'])
+    return jsonify({'success': ok, 'message': message}), 200 if ok else 409
+
+# --- 機器人補位 ---
+@app.route('/admin/rooms/<room_id>/bots', methods=['POST', 'DELETE'])
+@admin_required
+def room_bots_api(room_id):
+    global bot_runner
+    game = active_rooms.get(room_id)
+    if not game:
+        return jsonify({'success': False, 'message': '找不到房間。'}), 404
+    if bot_runner is None:
+        bot_runner = BotRunner()
+    if request.method == 'DELETE':
+        bots = list(bot_runner.tables.get(room_id, {}).get('bots', {}))
+        for bot_sid in bots:
+            bot_runner.remove_bot(game, bot_sid)
+        return jsonify({'success': True, 'removed': len(bots)}), 200
+    data = request.get_json(silent=True) or {}
+    strategy = data.get('strategy', 'rule')
+    if strategy not in BOT_STRATEGIES[game.get_game_type()]:
+        return jsonify({'success': False, 'message': f"未知的機器人策略: {strategy}。"}), 400
+    try:
+        count = int(data.get('count', 1))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'count 必須為整數。'}), 400
+    if not 1 <= count <= 9:
+        return jsonify({'success': False, 'message': 'count 必須介於 1 到 9。'}), 400
+    bots = bot_runner.fill_table(game, count, strategy)
+    logger.info(f"Admin {session['user']['email']} added {count} {strategy} bots to room {room_id}.")
+    return jsonify({'success': True, 'bots': bots, 'summary': bot_runner.get_summary()}), 201
+
+# --- 快速棄牌玩家池 ---
+def _fast_fold_table_opened(pool, table):
+    active_rooms[table.room_id] = table
+    _emit_lobby_update()
+
+def _fast_fold_seat_changed(pool, email, old_room_id, new_room_id):
+    _move_socket_room(email, old_room_id, new_room_id, fast_fold_pool_id=pool.pool_id)
+
+@app.route('/admin/fast_fold_pools', methods=['POST'])
+@admin_required
+def create_fast_fold_pool_api():
+    data = request.get_json(silent=True) or {}
+    pool_id = f"ff-{str(uuid.uuid4())[:8]}"
+    try:
+        pool = FastFoldPool(pool_id, game_events, data.get('options', {}),
+                            on_table_opened=_fast_fold_table_opened,
+                            on_seat_change=_fast_fold_seat_changed)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'message': f"玩家池選項無效: {e}"}), 400
+    active_fast_fold_pools[pool_id] = pool
+    logger.info(f"Admin {session['user']['email']} created fast-fold pool {pool_id}.")
+    return jsonify({'success': True, 'pool': pool.get_summary()}), 201
+
+@app.route('/api/fast_fold_pools', methods=['GET'])
+def list_fast_fold_pools_api():
+    return jsonify({'pools': [p.get_summary() for p in active_fast_fold_pools.values()]}), 200
+
+@app.route('/api/fast_fold_pools/<pool_id>/seat', methods=['POST', 'DELETE'])
+def fast_fold_seat_api(pool_id):
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': '請先登入'}), 401
+    pool = active_fast_fold_pools.get(pool_id)
+    if not pool:
+        return jsonify({'success': False, 'message': '找不到玩家池。'}), 404
+    email = session['user']['email']
+    if request.method == 'DELETE':
+        chips = pool.leave(email)
+        if chips is None:
+            return jsonify({'success': False, 'message': '您不在玩家池中。'}), 409
+        return jsonify({'success': True, 'chips': chips, 'message': '已離開玩家池。'}), 200
+    if email not in email_to_sid:
+        return jsonify({'success': False, 'message': '需要註冊 Email 才能加入玩家池。'}), 400
+    ok, message = pool.join(email, session['user']['name'])
+    return jsonify({'success': ok, 'message': message}), 200 if ok else 409
+
+# --- 自動配桌 ---
+def _matchmaking_table_opened(mm, table):
+    active_rooms[table.room_id] = table
+
+def _matchmaking_seated(mm, email, table):
+    _move_socket_room(email, None, table.room_id, game_type=table.get_game_type(), matchmaking=True)
+
+matchmaker = Matchmaker(game_events, active_rooms.peek, can_open_table=admission.has_room_capacity,
+                        on_table_opened=_matchmaking_table_opened, on_seated=_matchmaking_seated)
+
+@app.route('/api/matchmaking', methods=['GET', 'POST', 'DELETE'])
+def matchmaking_api():
+    if request.method == 'GET':
+        return jsonify(matchmaker.get_summary()), 200
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': '請先登入'}), 401
+    email = session['user']['email']
+    if request.method == 'DELETE':
+        if not matchmaker.cancel(email):
+            return jsonify({'success': False, 'message': '您不在配對佇列中。'}), 409
+        return jsonify({'success': True, 'message': '已取消配對。'}), 200
+    if email not in email_to_sid:
+        return jsonify({'success': False, 'message': '需要註冊 Email 才能配對。'}), 400
+    rejection = _insufficient_chips(email)
+    if rejection:
+        return rejection
+    data = request.get_json(silent=True) or {}
+    decision = matchmaker.enqueue(email, session['user']['name'], data.get('game_type'),
+                                  data.get('min_stake'), data.get('max_stake'))
+    if decision.status in (400, 409):
+        return jsonify({'success': False, 'message': decision.message}), decision.status
+    # 202: 入座時收到 joined_room_success_socket_event (matchmaking=True)
+    return _admission_response(decision)
+
+@app.route('/api/wallet', methods=['GET'])
+def wallet_api():
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': '請先登入'}), 401
+    email = session['user']['email']
+    return jsonify({'balance': wallet.balance(email), 'table_chips': wallet.table_chips(email)}), 200
+
+@app.route('/api/leaderboards', methods=['GET'])
+def list_leaderboards_api():
+    return jsonify({'boards': leaderboards.summary(), 'page_size': leaderboards.page_size}), 200
+
+@app.route('/api/leaderboards/<board>', methods=['GET'])
+def leaderboard_page_api(board):
+    if board not in leaderboards.boards:
+        return jsonify({'success': False, 'message': f"找不到排行榜: {board}"}), 404
+    page = request.args.get('page', 0, type=int)
+    if page < 0:
+        return jsonify({'success': False, 'message': 'page 必須是非負整數。'}), 400
+    # 頁面是所有人共用的快取，登入玩家自己的名次另外查詢
+    response = dict(leaderboards.page(board, page))
+    if 'user' in session:
+        response['me'] = leaderboards.standing(board, session['user']['email'])
+    return jsonify(response), 200
+
 @app.route('/api/rooms/<room_id>/join', methods=['POST'])
 def join_room_api(room_id):
     email = session['user']['email']
@@ -182,17 +545,22 @@ def join_room_api(room_id):
     sid = email_to_sid[email]
     game_instance = active_rooms[room_id]
 
+    if game_instance.options.get('tournament_id'):
+        return jsonify({'success': False, 'message': '錦標賽牌桌由系統安排座位，請先報名錦標賽。'}), 403
+    if game_instance.options.get('fast_fold_pool_id'):
+        return jsonify({'success': False, 'message': '快速棄牌牌桌由玩家池配對，請加入玩家池。'}), 403
     if game_instance.is_game_in_progress and not game_instance.options.get('allow_join_in_progress', False):
         return jsonify({'success': False, 'message': '遊戲正在進行中，不允許新玩家加入。'}), 403
-    join_room(room_id, sid=sid, namespace='/')
-    game_instance.add_player(email, {'name': player_name})
-
-    socketio.emit('joined_room_success_socket_event', {
-        'room_id': room_id,
-        'game_type': game_instance.get_game_type()
-    }, to=sid)
-
-    game_instance.broadcast_state(specific_sid=sid)
+    if email not in game_instance.players:
+        rejection = _insufficient_chips(email)
+        if rejection:
+            return rejection
+    # request_id: 用戶端為每次加入產生的 ID，重送同一個請求不會重複從錢包買入
+    info = {'name': player_name, 'request_id': (request.get_json(silent=True) or {}).get('request_id')}
+    decision = admission.admit_join(room_id, email, game_instance, info)
+    if decision.status != 200:
+        return _admission_response(decision)
+    _seat_player(room_id, game_instance, email, sid, info)
 
     return jsonify({
         'success': True,
@@ -200,9 +568,34 @@ def join_room_api(room_id):
         'message': f"成功加入房間 {room_id}。"
     }), 200
 
+def _seat_player(room_id, game, email, sid, info):
+    socketio.server.enter_room(sid, room_id, namespace='/')
+    game.add_player(email, info)
+
+    socketio.emit('joined_room_success_socket_event', {
+        'room_id': room_id,
+        'game_type': game.get_game_type()
+    }, to=sid)
+
+    game.broadcast_state(specific_sid=sid)
+
+def _seat_waiting_players(room_id, game):
+    # 有空位時讓候補依序入座；進行中不允許加入的牌桌等下次有人離座，或候補者依 retry_after 重送加入請求
+    if game.is_game_in_progress and not game.options.get('allow_join_in_progress', False):
+        return
+    while game.get_player_count() < seat_limit(game):
+        waiting = admission.next_waiting(room_id)
+        if waiting is None:
+            return
+        email, info = waiting
+        sid = email_to_sid.get(email)
+        if sid:
+            _seat_player(room_id, game, email, sid, info)
+
 # --- Socket.IO Event Handlers ---
 @socketio.on('connect')
-def handle_connect():
+@observe_handler('connect')
+def handle_connect(auth=None):
     logger.debug(f"Connect attempt with SID={request.sid}, Session={session}")
     if 'user' not in session:
         logger.error(f"Connect failed: No user in session for SID={request.sid}")
@@ -222,12 +615,12 @@ def handle_connect():
     logger.debug(f"Updated mappings: email_to_sid[{email}] = {sid}, sid_to_email[{sid}] = {email}")
 
     rejoined_a_room = False
-    for room_id, game in active_rooms.items():
+    for room_id in active_rooms.rooms_of(email):
+        game = active_rooms[room_id]  # 休眠的房間在此喚醒
         if email in game.players:
             logger.info(f"User {email} was in room {room_id}. Attempting to rejoin with new SID {sid}.")
             join_room(room_id, sid=sid, namespace='/')
-            if email in game.players and isinstance(game.players[email], dict):
-                game.players[email]['name'] = player_name
+            game.players[email].name = player_name
 
             game.broadcast_state()
 
@@ -247,6 +640,7 @@ def handle_connect():
 
 
 @socketio.on('register_email')
+@observe_handler('register_email')
 def handle_register_email():
     if 'user' not in session:
         return jsonify({'success': False, 'message': '請先登入'}), 401
@@ -268,7 +662,8 @@ def handle_register_email():
     emit('email_registered', {'email': email, 'sid': sid})
 
 @socketio.on('disconnect')
-def handle_disconnect():
+@observe_handler('disconnect')
+def handle_disconnect(reason=None):
     sid = request.sid
     email = sid_to_email.pop(sid, None) # Remove current SID from reverse mapping
 
@@ -284,7 +679,15 @@ def handle_disconnect():
     if not email:
         return
 
+    # 斷線即離開玩家池、候補名單與配對佇列；玩家池的牌桌由玩家池自行回收，不在下面刪除
+    admission.leave_queue(email)
+    matchmaker.cancel(email)
+    for pool in active_fast_fold_pools.values():
+        pool.leave(email)
+
     for r_id, game in list(active_rooms.items()):
+        if game.options.get('fast_fold_pool_id'):
+            continue
         if email in game.players:
             logger.info(f"Processing disconnect for user {email} in room {r_id}.")
             result = game.disconnect_player(email)
@@ -292,16 +695,17 @@ def handle_disconnect():
                 logger.info(f"Room {r_id} is now empty or game logic determined cleanup after {email} left.")
                 if not game.is_game_in_progress:
                     logger.info(f"Game in room {r_id} was not in progress. Deleting room.")
+                    game.stop_auto_deal()
                     if r_id in active_rooms: del active_rooms[r_id]
                 else:
-                    logger.info(f"Game in room {r_id} was in progress. Ending game and deleting room due to all players leaving.")
-                    if hasattr(game, 'end_game'):
-                        game.end_game({"message": "所有玩家已離開或斷線，遊戲結束。"})
+                    logger.info(f"Game in room {r_id} was in progress. Aborting the hand and deleting room due to all players leaving.")
+                    game.abort_game("所有玩家已離開或斷線，本局中止。")
                     if r_id in active_rooms: del active_rooms[r_id]
     socketio.emit('lobby_update',
-                  {'rooms': {r_id: g.get_game_type() for r_id, g in active_rooms.items()}},
+                  {'rooms': active_rooms.game_types()},
                   namespace='/')
 @socketio.on('leave_room_request')
+@observe_handler('leave_room_request')
 def handle_leave_room_request(data):
     sid = request.sid
     email = sid_to_email.get(sid)
@@ -312,22 +716,37 @@ def handle_leave_room_request(data):
         return
 
     game = active_rooms[room_id]
+    pool = active_fast_fold_pools.get(game.options.get('fast_fold_pool_id'))
+    if pool is not None:
+        # 離開玩家池的牌桌即離開玩家池，牌桌本身留給玩家池重複使用
+        pool.leave(email)
+        sio_leave_room(room_id, sid=sid)
+        emit('left_room_success', {'room_id': room_id}, room=sid)
+        return
     if email not in game.players:
         sio_leave_room(room_id, sid=sid)
+        if admission.waiting_room.get(email) == room_id:
+            admission.leave_queue(email)
+            emit('left_room_success', {'room_id': room_id}, room=sid)
+            return
         emit('message', {'text': "您並未活躍在此遊戲房間中。"})
         return
 
-    result = game.remove_player(email)
+    game.remove_player(email)
     sio_leave_room(room_id, sid=sid)
     emit('left_room_success', {'room_id': room_id}, room=sid)
+    _seat_waiting_players(room_id, game)
 
-    if result == "ROOM_EMPTY" or game.get_player_count() == 0:
-        if not game.is_game_in_progress:
-            del active_rooms[room_id]
+    if game.get_player_count() == 0 and not game.is_game_in_progress:
+        game.stop_auto_deal()
+        del active_rooms[room_id]
+    else:
+        matchmaker.offer_table(room_id, game)
 
-    socketio.emit('lobby_update', {'rooms': {r_id: g.get_game_type() for r_id, g in active_rooms.items()}}, namespace='/')
+    socketio.emit('lobby_update', {'rooms': active_rooms.game_types()}, namespace='/')
 
 @socketio.on('start_game_request')
+@observe_handler('start_game_request')
 def handle_start_game_request(data):
     sid = request.sid
     email = sid_to_email.get(sid)
@@ -337,11 +756,17 @@ def handle_start_game_request(data):
         emit('error_message', {'message': "找不到房間。"})
         return
 
+    if not email:
+        # start_game(None) 代表系統自動開始，未登記的連線不能以此繞過房主檢查
+        emit('error_message', {'message': "請先登記 Email 才能開始遊戲。"})
+        return
+
     game = active_rooms[room_id]
     game.start_game(triggering_player_sid=email)
     return {'success': True}
 
 @socketio.on('game_action')
+@observe_handler('game_action')
 def on_game_action(data):
     sid = request.sid
     email = sid_to_email.get(sid)
@@ -362,6 +787,8 @@ def on_game_action(data):
 
 if __name__ == '__main__':
     print("正在啟動多遊戲 Flask-SocketIO 伺服器...")
+    if DEV_LOGIN_ENABLED:
+        logger.warning("DEV_LOGIN=1: /dev/login 允許不經 Google OAuth 登入，只能用於本機壓力測試。")
     try:
         logger.debug("Starting Flask-SocketIO server on 127.0.0.1:4000")
         socketio.run(app, host='127.0.0.1', port=4000, debug=True, use_reloader=False)
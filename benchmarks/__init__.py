@@ -0,0 +1,4 @@
+# benchmarks/__init__.py
+"""
+遊戲熱路徑的微基準測試 (見 benchmarks/cases.py 與 python -m benchmarks)。
+"""
@@ -0,0 +1,156 @@
+# benchmarks/__main__.py
+"""
+執行遊戲熱路徑的微基準測試，並與 JSON 基準線比較。
+
+每個項目先以 timeit 的 autorange 決定每輪呼叫次數 (約 0.2 秒)，再重複 --repeat 輪取最快的一輪
+(最不受其他行程干擾的量測)。比基準線慢超過 --threshold 的項目視為回歸，結束碼為 1。
+
+基準線與機器相關: 換機器或換 Python 版本後先以 --save 重新記錄，再開始比較。
+
+用法:
+    python -m benchmarks                       # 執行全部並與 benchmarks/baseline.json 比較
+    python -m benchmarks --filter texas.       # 只跑名稱包含 texas. 的項目
+    python -m benchmarks --save                # 把這次的結果寫成新的基準線
+    python -m benchmarks --json result.json    # 另外輸出這次的結果
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+from games.profiler import batch_run
+
+from .cases import BENCHMARKS
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(setup, ops, repeat):
+    """
+    Returns:
+        float: 每單位的秒數 (最快的一輪)。
+    """
+    run = setup()
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / (number * ops)
+
+
+def run_benchmarks(names, repeat=5):
+    """
+    Returns:
+        dict: {name: 每單位的秒數}
+    """
+    results = {}
+    for name in names:
+        setup, ops = BENCHMARKS[name]
+        with batch_run():
+            results[name] = measure(setup, ops, repeat)
+        print(f"  {name:<40} {_format_seconds(results[name])}", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline):
+    """
+    Returns:
+        list[tuple]: [(name, 目前, 基準線, 變化比例)]，只含有基準線的項目。
+    """
+    rows = []
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base:
+            rows.append((name, seconds, base, seconds / base - 1))
+    return rows
+
+
+def _format_seconds(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:10.2f} µs"
+    return f"{seconds * 1e3:10.2f} ms"
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _environment():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="遊戲熱路徑微基準測試")
+    parser.add_argument('--filter', default='', help="只執行名稱包含此字串的項目")
+    parser.add_argument('--repeat', type=int, default=5, help="每個項目的量測輪數")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基準線 JSON 檔")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="比基準線慢超過此比例視為回歸 (預設 0.25 = 25%%)")
+    parser.add_argument('--save', action='store_true', help="把這次的結果寫入基準線 (只更新有執行的項目)")
+    parser.add_argument('--json', metavar='PATH', help="另外把這次的結果寫成 JSON")
+    parser.add_argument('--list', action='store_true', help="列出所有項目")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if args.list:
+        print('\n'.join(names))
+        return 0
+    if not names:
+        parser.error(f"沒有名稱包含 {args.filter!r} 的項目")
+
+    print(f"執行 {len(names)} 個項目 (每個 {args.repeat} 輪):", file=sys.stderr)
+    results = run_benchmarks(names, args.repeat)
+    stored = load_baseline(args.baseline)
+    baseline = stored.get('results', {})
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'environment': _environment(), 'results': results}, f, indent=2, ensure_ascii=False)
+
+    if args.save:
+        merged = dict(baseline, **results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'environment': _environment(), 'results': dict(sorted(merged.items()))},
+                      f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"已更新基準線 {args.baseline} ({len(results)} 個項目)")
+        return 0
+
+    if not baseline:
+        print(f"沒有基準線 ({args.baseline})，請先以 --save 記錄。")
+        return 0
+    environment = stored.get('environment', {})
+    if environment.get('python') != platform.python_version():
+        print(f"注意: 基準線記錄於 Python {environment.get('python')}，目前為 {platform.python_version()}")
+
+    regressions = []
+    print(f"{'項目':<40} {'目前':>13} {'基準線':>13} {'變化':>8}")
+    for name, seconds, base, change in compare(results, baseline):
+        flag = ''
+        if change > args.threshold:
+            flag = '  <-- 回歸'
+            regressions.append(name)
+        print(f"{name:<40} {_format_seconds(seconds)} {_format_seconds(base)} {change:+8.1%}{flag}")
+    missing = [name for name in results if name not in baseline]
+    if missing:
+        print(f"沒有基準線的項目: {', '.join(missing)}")
+    if regressions:
+        print(f"{len(regressions)} 個項目比基準線慢超過 {args.threshold:.0%}")
+        return 1
+    print("沒有回歸")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# benchmarks/cases.py
+"""
+基準測試項目。
+
+每個項目以 @benchmark(name, ops) 註冊一個 setup 函式: setup 建好固定的資料 (固定種子，每次執行都相同)
+後回傳一個不帶參數的函式，計時器重複呼叫它；ops 是每次呼叫處理的單位數 (例如一次評估 200 手牌)，
+報告中的時間都是「每單位」的時間，批次處理只是為了讓計時本身的成本可以忽略。
+"""
+import random
+
+from games.black_jack.simulate import create_simulation_game, play_round, strategy_mimic_dealer
+from games.black_jack.utils import calculate_hand_value, compare_hands
+from games.cards import CARD_TABLE, CARDS_PER_DECK
+from games.event_sink import EventSink, NullSink
+from games.scheduler import ManualScheduler
+from games.texas_holdem.logic import TexasHoldemGame
+from games.texas_holdem.utils import evaluate_5_card_hand, evaluate_hand
+
+BENCHMARKS = {}  # name -> (setup, ops)
+
+BATCH = 200
+
+
+def benchmark(name, ops=1):
+    def register(setup):
+        BENCHMARKS[name] = (setup, ops)
+        return setup
+    return register
+
+
+class CountingSink(EventSink):
+    """只計數的事件介面: 和線上一樣組裝每位玩家的狀態，但不經過 Socket.IO。"""
+
+    def __init__(self):
+        self.count = 0
+
+    def emit(self, event, data=None, to=None):
+        self.count += 1
+
+
+def _random_hands(size, count, seed):
+    rng = random.Random(seed)
+    return [[CARD_TABLE[code] for code in rng.sample(range(CARDS_PER_DECK), size)] for _ in range(count)]
+
+
+def _texas_table(seats, sink=None, seed=0):
+    """seats 人、已發完手牌 (翻牌前) 的德州撲克牌桌。"""
+    game = TexasHoldemGame(f"bench-{seats}", [], sink or NullSink(),
+                           {'hand_history': False, 'outcome_hints': False, 'seed': seed})
+    game.scheduler = ManualScheduler()
+    for seat in range(seats):
+        game.add_player(f"bench-player-{seat}", {'name': f"Seat {seat}"})
+    game.host_sid = 'bench-player-0'
+    game.start_game(None)
+    return game
+
+
+# --- 德州撲克牌力 ---
+
+@benchmark('texas.evaluate_hand', ops=BATCH)
+def bench_evaluate_hand():
+    hands = [(cards[:2], cards[2:]) for cards in _random_hands(7, BATCH, seed=1)]
+
+    def run():
+        for hole, board in hands:
+            evaluate_hand(hole, board)
+    return run
+
+
+@benchmark('texas.evaluate_5_card_hand', ops=BATCH)
+def bench_evaluate_5_card_hand():
+    hands = _random_hands(5, BATCH, seed=2)
+
+    def run():
+        for cards in hands:
+            evaluate_5_card_hand(cards)
+    return run
+
+
+# --- 21點點數 ---
+
+@benchmark('black_jack.calculate_hand_value', ops=BATCH)
+def bench_calculate_hand_value():
+    rng = random.Random(3)
+    hands = [[CARD_TABLE[code] for code in rng.sample(range(CARDS_PER_DECK), rng.randint(2, 5))]
+             for _ in range(BATCH)]
+
+    def run():
+        for cards in hands:
+            calculate_hand_value(cards)
+    return run
+
+
+@benchmark('black_jack.compare_hands', ops=BATCH)
+def bench_compare_hands():
+    rng = random.Random(4)
+    pairs = []
+    for _ in range(BATCH):
+        cards = [CARD_TABLE[code] for code in rng.sample(range(CARDS_PER_DECK), 7)]
+        split = rng.randint(2, 4)
+        pairs.append((cards[:split], cards[split:]))
+
+    def run():
+        for player_hand, dealer_hand in pairs:
+            compare_hands(player_hand, dealer_hand)
+    return run
+
+
+# --- 狀態組裝與廣播 ---
+
+def _register_state_benchmarks(seats):
+    @benchmark(f"texas.get_state_for_player.{seats}_seats")
+    def bench_get_state():
+        game = _texas_table(seats, seed=seats)
+        sid = game.game_state['current_turn_sid']
+        return lambda: game.get_state_for_player(sid)
+
+    @benchmark(f"texas.broadcast_state.{seats}_seats")
+    def bench_broadcast():
+        game = _texas_table(seats, CountingSink(), seed=seats)
+        return game.broadcast_state
+
+
+for _seats in (2, 6, 9):
+    _register_state_benchmarks(_seats)
+
+
+# --- 整局模擬 ---
+
+@benchmark('texas.full_hand.6_seats')
+def bench_texas_full_hand():
+    """6 人全部跟注/過牌打到攤牌 (每局重設籌碼，牌序由局數決定)。"""
+    game = _texas_table(6)
+    while game.is_game_in_progress:
+        _texas_passive_action(game)
+    hand_counter = [0]
+
+    def run():
+        for player in game.players.values():
+            player['chips'] = 1000
+        hand_counter[0] += 1
+        game.next_hand_seed = hand_counter[0]
+        game.start_game(None)
+        while game.is_game_in_progress:
+            _texas_passive_action(game)
+    return run
+
+
+def _texas_passive_action(game):
+    sid = game.game_state['current_turn_sid']
+    player = game.players[sid]
+    to_call = game.game_state['current_street_bet_to_match'] - player['bet_in_current_street']
+    game.handle_action(sid, 'call' if to_call > 0 else 'check', {})
+
+
+@benchmark('black_jack.full_round')
+def bench_black_jack_full_round():
+    """一位模擬玩家照莊家規則要牌 (games/black_jack/simulate.py 的 play_round)。"""
+    game = create_simulation_game({'hand_history': False, 'outcome_hints': False}, seed=5)
+    return lambda: play_round(game, strategy_mimic_dealer, 10)
@@ -0,0 +1,189 @@
+# games/admission.py
+"""
+建立房間與加入牌桌的容量控制。
+
+過去只要登入就一定能建立房間、加入任何牌桌，單一客戶端或瞬間湧入的流量就能把記憶體與 greenlet 用光。
+AdmissionControl 在 app.py 的路由處理前做決定，回傳 Decision(status, message, retry_after):
+    - 200: 放行 (建立房間 / 立刻入座)。
+    - 202: 牌桌已滿，已排入該桌的候補佇列 (position 為順位)；有人離座時依序入座，客戶端也可在
+      retry_after 秒後重送加入請求查詢。
+    - 429: 這位使用者建立的房間已達上限，或該桌的候補佇列已滿。
+    - 503: 整個行程的房間數或候補人數已達上限 (過載)。
+app.py 把 retry_after 同時放進 JSON 與 Retry-After 標頭。
+
+所有計數都是 O(1): 每位使用者建立的房間數、每桌與整個行程的候補人數都以計數器維護。
+候補佇列是 deque，每桌長度不超過 queue_size，取消候補時直接從佇列中移除。
+"""
+import os
+from collections import deque, namedtuple
+
+from games.metrics import ADMISSION_REJECTIONS_TOTAL
+
+MAX_ROOMS = int(os.getenv('MAX_ROOMS', 5000))                      # 整個行程的房間數上限 (含休眠的房間)
+MAX_ROOMS_PER_USER = int(os.getenv('MAX_ROOMS_PER_USER', 3))       # 每位使用者同時建立的房間數上限
+JOIN_QUEUE_SIZE = int(os.getenv('JOIN_QUEUE_SIZE', 10))            # 每桌的候補人數上限
+MAX_WAITING = int(os.getenv('MAX_WAITING', 2000))                  # 整個行程的候補人數上限
+TABLE_SEATS = {'texas_holdem': 9, 'black_jack': 7}                 # 各遊戲的座位數 (房間選項 max_players 只能調低)
+
+# 建議的重試間隔 (秒)
+RETRY_OVERLOADED = 30
+RETRY_ROOM_QUOTA = 60
+RETRY_QUEUE_FULL = 15
+RETRY_QUEUED = 5
+
+Decision = namedtuple('Decision', ['status', 'message', 'retry_after', 'position'], defaults=(None, None))
+
+
+def seat_limit(game):
+    """牌桌的座位數: 遊戲的座位數，房間選項 max_players 可以調低。"""
+    seats = TABLE_SEATS.get(game.get_game_type(), max(TABLE_SEATS.values()))
+    try:
+        requested = int(game.options.get('max_players', seats))
+    except (TypeError, ValueError):
+        return seats
+    return max(1, min(seats, requested))
+
+
+class AdmissionControl:
+    def __init__(self, room_count, max_rooms=MAX_ROOMS, max_rooms_per_user=MAX_ROOMS_PER_USER,
+                 queue_size=JOIN_QUEUE_SIZE, max_waiting=MAX_WAITING):
+        """
+        Args:
+            room_count (callable): 回傳目前房間數 (O(1))。
+            max_rooms (int): 整個行程的房間數上限；0 表示不限制 (以下皆同)。
+            max_rooms_per_user (int): 每位使用者同時建立的房間數上限。
+            queue_size (int): 每桌的候補人數上限。
+            max_waiting (int): 整個行程的候補人數上限。
+        """
+        self.room_count = room_count
+        self.max_rooms = max_rooms
+        self.max_rooms_per_user = max_rooms_per_user
+        self.queue_size = queue_size
+        self.max_waiting = max_waiting
+        self.room_owner = {}         # room_id -> 建立者
+        self.rooms_per_owner = {}    # 建立者 -> 房間數
+        self.queues = {}             # room_id -> deque[使用者]
+        self.waiting_room = {}       # 使用者 -> 候補中的 room_id (同一時間只候補一桌)
+        self.waiting_info = {}       # 使用者 -> 入座時需要的資料 (名稱)
+        self.waiting_count = 0
+
+    def _reject(self, status, reason, message, retry_after):
+        ADMISSION_REJECTIONS_TOTAL.labels(reason).inc()
+        return Decision(status, message, retry_after)
+
+    # --- 建立房間 ---
+
+    def admit_room(self, owner):
+        """
+        Returns:
+            Decision: 200 表示可以建立 (建立後呼叫 room_opened)。
+        """
+        if not self.has_room_capacity():
+            return self._reject(503, 'max_rooms', "伺服器房間數已達上限，請稍後再試。", RETRY_OVERLOADED)
+        if self.max_rooms_per_user and self.rooms_per_owner.get(owner, 0) >= self.max_rooms_per_user:
+            return self._reject(429, 'rooms_per_user', f"每位玩家最多同時建立 {self.max_rooms_per_user} 個房間。",
+                                RETRY_ROOM_QUOTA)
+        return Decision(200, None)
+
+    def has_room_capacity(self):
+        """行程的房間數是否還沒達到上限 (配對器開新桌前也會檢查)。"""
+        return not self.max_rooms or self.room_count() < self.max_rooms
+
+    def room_opened(self, room_id, owner):
+        self.room_owner[room_id] = owner
+        self.rooms_per_owner[owner] = self.rooms_per_owner.get(owner, 0) + 1
+
+    def room_closed(self, room_id):
+        """
+        房間被刪除: 歸還建立者的額度並清空候補佇列。
+        Returns:
+            list: 被取消候補的使用者。
+        """
+        owner = self.room_owner.pop(room_id, None)
+        if owner is not None:
+            remaining = self.rooms_per_owner[owner] - 1
+            if remaining:
+                self.rooms_per_owner[owner] = remaining
+            else:
+                del self.rooms_per_owner[owner]
+        cancelled = list(self.queues.pop(room_id, ()))
+        for user in cancelled:
+            del self.waiting_room[user]
+            self.waiting_info.pop(user, None)
+        self.waiting_count -= len(cancelled)
+        return cancelled
+
+    # --- 加入牌桌 ---
+
+    def admit_join(self, room_id, user, game, info=None):
+        """
+        Args:
+            info (dict, optional): 排入候補時保存，輪到時由 next_waiting 交還 (例如 {'name': ...})。
+        Returns:
+            Decision: 200 立刻入座；202 已排入候補 (position 為順位)；429 / 503 拒絕。
+        """
+        if user in game.players:
+            return Decision(200, None)  # 已在牌桌上 (重新加入)
+        free_seats = seat_limit(game) - game.get_player_count()
+        queue = self.queues.get(room_id, ())
+        if self.waiting_room.get(user) == room_id:
+            position = self.position(room_id, user)
+            if position <= free_seats:
+                self.leave_queue(user)
+                return Decision(200, None)
+            return Decision(202, f"牌桌已滿，您是第 {position} 位候補。", RETRY_QUEUED, position)
+        if free_seats > len(queue):
+            return Decision(200, None)
+        if self.queue_size and len(queue) >= self.queue_size:
+            return self._reject(429, 'queue_full', "牌桌與候補名單都已額滿，請稍後再試或選擇其他牌桌。", RETRY_QUEUE_FULL)
+        if self.max_waiting and self.waiting_count >= self.max_waiting:
+            return self._reject(503, 'max_waiting', "伺服器忙碌中，請稍後再試。", RETRY_OVERLOADED)
+        self.leave_queue(user)
+        queue = self.queues.setdefault(room_id, deque())
+        queue.append(user)
+        self.waiting_room[user] = room_id
+        self.waiting_info[user] = info
+        self.waiting_count += 1
+        position = len(queue)
+        return Decision(202, f"牌桌已滿，您是第 {position} 位候補。", RETRY_QUEUED, position)
+
+    def position(self, room_id, user):
+        """候補順位 (從 1 開始)，不在候補中時為 None。"""
+        if self.waiting_room.get(user) != room_id:
+            return None
+        return self.queues[room_id].index(user) + 1
+
+    def leave_queue(self, user):
+        """取消候補。"""
+        room_id = self.waiting_room.pop(user, None)
+        if room_id is None:
+            return False
+        self.waiting_info.pop(user, None)
+        queue = self.queues[room_id]
+        queue.remove(user)
+        if not queue:
+            del self.queues[room_id]
+        self.waiting_count -= 1
+        return True
+
+    def next_waiting(self, room_id):
+        """
+        取出下一位候補 (有空位時由 app.py 呼叫並讓他入座)。
+        Returns:
+            tuple: (使用者, info)，沒有人候補時為 None。
+        """
+        queue = self.queues.get(room_id)
+        if not queue:
+            return None
+        user = queue[0]
+        info = self.waiting_info.get(user)
+        self.leave_queue(user)
+        return user, info
+
+    def stats(self):
+        return {
+            'rooms_with_owner': len(self.room_owner),
+            'waiting': self.waiting_count,
+            'rooms_with_queue': len(self.queues),
+        }
+
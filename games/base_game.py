@@ -1,21 +1,83 @@
+import random
+import time
 from abc import ABC, abstractmethod
+from collections import deque
+
+from games.event_sink import as_event_sink
+from games.hand_history import HISTORY_ENABLED, HandHistoryLog
+from games.leaderboard import get_leaderboards
+from games.metrics import instrument_game_method
+from games.profiler import SLOW_ACTIONS, track_slow_actions
+from games.scheduler import get_scheduler
+from games.wallet import get_wallet
+
+# 會被自動加上延遲指標的生命週期方法
+INSTRUMENTED_METHODS = ('add_player', 'remove_player', 'handle_action', 'start_game', 'broadcast_state', 'end_game',
+                        'abort_game')
+
+HANDS_PER_HOUR_WINDOW = 3600  # 計算每小時局數的滑動視窗 (秒)
 
 class BaseGame(ABC):
-    def __init__(self, room_id, players_sids, socketio_instance, options=None):
+    def __init_subclass__(cls, **kwargs):
+        """為子類別的生命週期方法加上計時包裝 (每個方法在繼承鏈上只包裝一次)。"""
+        super().__init_subclass__(**kwargs)
+        for method_name in INSTRUMENTED_METHODS:
+            method = getattr(cls, method_name, None)
+            if method is None or getattr(method, '__isabstractmethod__', False):
+                continue
+            if getattr(method, '_metrics_instrumented', False):
+                continue
+            if method_name == 'handle_action':
+                method = track_slow_actions(method)
+            setattr(cls, method_name, instrument_game_method(method_name, method))
+
+    def __init__(self, room_id, players_sids, event_sink, options=None):
         """
         初始化遊戲實例。
         Args:
             room_id (str): 遊戲房間的唯一ID。
             players_sids (list): 初始玩家的 session ID 列表。
-            socketio_instance: Flask-SocketIO 的實例，用於廣播。
+            event_sink (EventSink): 送出狀態與結果的事件介面 (games/event_sink.py)；
+                傳入 Flask-SocketIO 實例時會包裝成 SocketIOSink，None 則為 NullSink。
             options (dict, optional): 遊戲的特定選項 (例如，賭注大小、牌組數量等)。
         """
         self.room_id = room_id
-        self.players = {} # sid: player_data (例如 {'name': 'Alice', 'chips': 1000, ...})
-        self.socketio = socketio_instance
+        self.players = {} # sid: 玩家狀態 (games/player_state.py 的 PlayerState 子類別)
+        self.events = as_event_sink(event_sink)
         self.game_state = {} # 存放遊戲內部狀態，例如牌堆、當前回合等
         self.is_game_in_progress = False
         self.options = options if options is not None else {}
+        # 所有計時器都交給行程共用的排程器；無頭模擬可換成 scheduler.ManualScheduler
+        self.scheduler = get_scheduler()
+
+        # 自動發牌: 每局結算後經過 auto_deal_delay 秒自動開始下一局，不需要房主操作
+        self.auto_deal = bool(self.options.get('auto_deal', False))
+        self.auto_deal_delay = float(self.options.get('auto_deal_delay', 5))
+        self.auto_deal_timer = None
+        self.auto_deal_instance_id = 0
+        self.next_hand_at = None  # 下一局預定開始時間 (epoch 秒)
+        self.hand_completion_times = deque()  # 最近一小時內每局結束的時間，用於計算每小時局數
+        # 每局結束 (結果廣播後、排程下一局前) 依序呼叫 listener(game, results)；
+        # 錦標賽在這裡淘汰玩家、調整盲注與搬移座位，下一局就會使用新的狀態
+        self.hand_end_listeners = []
+
+        # 每局洗牌使用自己的種子 (記錄在牌局紀錄中，可用 games/replay.py 重播)。
+        # 選項 seed 讓整張牌桌的種子序列固定 (測試、機器人)，否則種子來自作業系統的亂數。
+        self.hand_seed_source = random.Random(self.options['seed']) if self.options.get('seed') is not None else random.SystemRandom()
+        self.next_hand_seed = None  # 指定下一局的種子 (重播用)，使用後清除
+        self.current_hand_seed = None  # 不可放進 game_state，否則玩家能從狀態推算牌序
+
+        # 牌局紀錄: 每局的座位、牌序、動作與結果附加寫入 hand_history/<遊戲>/<房間>.hhl
+        # (選項 hand_history，預設依環境變數 HAND_HISTORY=1 開啟，見 games/hand_history.py)
+        self.hand_history = HandHistoryLog(self.get_game_type(), room_id) if self.options.get('hand_history', HISTORY_ENABLED) else None
+
+        # 籌碼錢包 (games/wallet.py，app.py 啟動時設定)：新玩家從餘額買入、每局結算、離桌時移回餘額
+        self.wallet = get_wallet()
+        self.settled_hands = 0
+        # 本局開始時各玩家的籌碼 (排行榜以結束時的差額計算淨贏籌碼)
+        self.hand_start_chips = {}
+        # 自帶籌碼入座的玩家 (錦標賽、玩家池、機器人)：籌碼不是從錢包買入，不計入排行榜
+        self.unfunded_players = set()
 
         # 可以在這裡初始化初始玩家
         # for sid in players_sids:
@@ -62,6 +124,8 @@ class BaseGame(ABC):
         向房間內的玩家廣播遊戲狀態。
         可以被所有遊戲子類別使用。
         """
+        if self.events.discards_broadcasts:
+            return # 無頭執行 (模擬、重播) 時沒有人接收狀態
         if event_name is None:
             event_name = f"{self.get_game_type()}_update" # 例如 "texas_holdem_update"
 
@@ -69,20 +133,20 @@ class BaseGame(ABC):
             player_state = self.get_state_for_player(specific_sid)
             if message:
                 player_state['message'] = message
-            self.socketio.emit(event_name, player_state, to=specific_sid)
+            self.events.emit(event_name, player_state, to=specific_sid)
         else: # 廣播給房間內所有玩家
             # 確保每個玩家都收到他們應該看到的狀態
             for sid in list(self.players.keys()):
                 player_state = self.get_state_for_player(sid)
                 if message: # 可以附加一個通用訊息
                     player_state['message'] = message
-                self.socketio.emit(event_name, player_state, to=self.room_id)
+                self.events.emit(event_name, player_state, to=self.room_id)
         print(f"Game '{self.get_game_type()}' Room '{self.room_id}': State broadcasted via {event_name}.")
 
     def send_error_to_player(self, player_sid, error_message):
         """向特定玩家發送錯誤訊息"""
         error_event_name = f"{self.get_game_type()}_error"
-        self.socketio.emit(error_event_name, {'message': error_message}, to=player_sid)
+        self.events.emit(error_event_name, {'message': error_message}, to=player_sid)
         print(f"Game '{self.get_game_type()}' Room '{self.room_id}': Error sent to {player_sid}: {error_message}")
 
     @abstractmethod
@@ -93,9 +157,181 @@ class BaseGame(ABC):
     def get_player_count(self):
         return len(self.players)
 
+    def _run_timer_callback(self, label, callback, *args):
+        """執行計時器回呼；超過門檻時會被慢動作紀錄器記錄為 'timer:<label>'。"""
+        with SLOW_ACTIONS.track(self.room_id, f"timer:{label}"):
+            return callback(*args)
+
+    def get_active_timer_count(self):
+        """返回目前尚未觸發的計時器數量，供監控使用。子類別應加上自己的計時器數。"""
+        return 1 if self.auto_deal_timer is not None else 0
+
+    def get_hands_per_hour(self):
+        """返回最近一小時內結束的局數。"""
+        cutoff = time.time() - HANDS_PER_HOUR_WINDOW
+        while self.hand_completion_times and self.hand_completion_times[0] < cutoff:
+            self.hand_completion_times.popleft()
+        return len(self.hand_completion_times)
+
+    def get_table_stats(self):
+        """自動發牌設定與牌桌節奏，附在狀態中給客戶端顯示。"""
+        return {
+            'auto_deal': self.auto_deal,
+            'auto_deal_delay': self.auto_deal_delay,
+            'next_hand_at': self.next_hand_at,
+            'hands_per_hour': self.get_hands_per_hour(),
+        }
+
+    def _buy_in_chips(self, player_sid, player_info=None):
+        """
+        新玩家入座的籌碼: player_info['chips'] (錦標賽、玩家池、機器人自帶籌碼)，
+        否則有錢包時從餘額買入 buy_in (餘額不足時買入全部餘額)，沒有錢包時直接給 buy_in。
+        player_info['request_id'] 為用戶端加入請求的 ID，重送同一個請求不會重複買入。
+        """
+        if player_info and 'chips' in player_info:
+            self.unfunded_players.add(player_sid)
+            return player_info['chips']
+        self.unfunded_players.discard(player_sid)
+        buy_in = self.options.get('buy_in', 1000)
+        if self.wallet is None:
+            return buy_in
+        request_id = player_info.get('request_id') if player_info else None
+        return self.wallet.buy_in(player_sid, self.room_id, buy_in, request_id)
+
+    def _cash_out(self, player_sid):
+        """玩家離開牌桌前呼叫: 把目前的籌碼移回錢包 (沒有從錢包買入的玩家不受影響)。"""
+        self.unfunded_players.discard(player_sid)
+        if self.wallet is not None and player_sid in self.players:
+            self.wallet.cash_out(player_sid, self.room_id, self.players[player_sid].chips)
+
+    def _new_hand_seed(self):
+        """取得本局的 64 位元洗牌種子 (優先使用 next_hand_seed)。"""
+        if self.next_hand_seed is not None:
+            seed, self.next_hand_seed = self.next_hand_seed, None
+        else:
+            seed = self.hand_seed_source.getrandbits(64)
+        self.current_hand_seed = seed
+        return seed
+
+    def _history_table_config(self):
+        """重播本局所需的牌桌規則 (盲注、賠率等)，子類別覆寫。必須能轉成 JSON。"""
+        return {}
+
+    def _history_begin_hand(self, seat_sids, seed=None, deck=None, deal_offset=0):
+        """開始記錄新的一局。seat_sids 為本局的座位順序，籌碼以此刻的數量記錄。"""
+        self.hand_start_chips = {sid: self.players[sid].chips for sid in seat_sids if sid in self.players}
+        if self.hand_history is None:
+            return
+        seats = [(sid, self.players[sid].name, self.players[sid].chips)
+                 for sid in seat_sids if sid in self.players]
+        table = dict(self._history_table_config(), room_id=self.room_id)
+        self.hand_history.begin_hand(seats, seed=seed, deck=deck, deal_offset=deal_offset, table=table)
+
+    def _history_action(self, player_sid, action, amount=0, auto=False):
+        """記錄一個已生效的動作。auto=True 表示由系統代為執行 (超時、斷線等)。"""
+        if self.hand_history is not None:
+            self.hand_history.record(player_sid, action, amount, auto)
+
+    def _hand_winnings(self, results):
+        """本局每位贏家贏得的金額 {sid: 金額}，供排行榜使用。預設讀取 results['winners']，子類別可覆寫。"""
+        winnings = {}
+        for winner in results.get('winners', ()):
+            winnings[winner['sid']] = winnings.get(winner['sid'], 0) + winner.get('amount_won', 0)
+        return winnings
+
+    def _record_leaderboards(self, results):
+        leaderboards = get_leaderboards()
+        # 錦標賽與玩家池的籌碼不是真實籌碼，整桌略過；其他牌桌只計入從錢包買入的玩家 (機器人自帶籌碼)。
+        # 本局中途離開的玩家已不在 players 中，不計入淨贏籌碼
+        if leaderboards is None or self.options.get('tournament_id') or self.options.get('fast_fold_pool_id'):
+            return
+        net = {sid: self.players[sid].chips - chips
+               for sid, chips in self.hand_start_chips.items()
+               if sid in self.players and sid not in self.unfunded_players}
+        if net:
+            names = {sid: self.players[sid].name for sid in net}
+            winnings = {sid: amount for sid, amount in self._hand_winnings(results).items() if sid in net}
+            leaderboards.record_hand(net, winnings, names)
+        self.hand_start_chips = {}
+
+    def _schedule_next_hand(self):
+        """在 auto_deal_delay 秒後自動開始下一局。"""
+        self.stop_auto_deal()
+        self.auto_deal_instance_id += 1
+        self.next_hand_at = time.time() + self.auto_deal_delay
+        self.auto_deal_timer = self.scheduler.call_later(
+            self.auto_deal_delay, self._run_timer_callback, 'auto_deal',
+            self._auto_start_next_hand, self.auto_deal_instance_id, label=f"{self.room_id}:auto_deal"
+        )
+        print(f"Game '{self.get_game_type()}' Room '{self.room_id}': 下一局將在 {self.auto_deal_delay} 秒後自動開始。")
+
+    def stop_auto_deal(self):
+        """取消尚未觸發的自動發牌 (例如房間即將被刪除時)。"""
+        timer_to_cancel = self.auto_deal_timer
+        self.auto_deal_timer = None
+        self.next_hand_at = None
+        if timer_to_cancel:
+            timer_to_cancel.cancel()
+
+    def suspend(self):
+        """
+        房間即將休眠 (寫入快照後移出記憶體，見 games/room_store.py)：取消所有計時器。
+        子類別覆寫時取消自己的計時器並呼叫 super()。
+        """
+        self.stop_auto_deal()
+
+    def resume(self):
+        """
+        房間從快照喚醒後重新排程計時器 (休眠期間的時間不計入任何期限)。
+        子類別覆寫時依目前階段重新開始行動計時並呼叫 super()。
+        """
+        if self.auto_deal and not self.is_game_in_progress and self.get_player_count() > 0:
+            self._schedule_next_hand()
+
+    def _auto_start_next_hand(self, expected_instance_id):
+        if expected_instance_id != self.auto_deal_instance_id:
+            return
+        self.auto_deal_timer = None
+        self.next_hand_at = None
+        if not self.auto_deal or self.is_game_in_progress or self.get_player_count() == 0:
+            return
+        # triggering_player_sid 為 None 表示由系統開始；斷線或沒有籌碼的玩家由 start_game 排除
+        if not self.start_game(None):
+            print(f"Game '{self.get_game_type()}' Room '{self.room_id}': 自動開始下一局失敗，等待房主手動開始。")
+
+    def abort_game(self, message):
+        """
+        中止進行中的一局 (例如所有玩家都已離開或斷線)：本局作廢，仍在座位上的玩家拿回開局時的籌碼
+        (與錢包中最後結算的牌桌籌碼相同)。不結算錢包、不寫入牌局紀錄與排行榜，也不自動開始下一局。
+        子類別覆寫時取消自己的計時器並呼叫 super()。
+        """
+        self.is_game_in_progress = False
+        for sid, chips in self.hand_start_chips.items():
+            if sid in self.players:
+                self.players[sid].chips = chips
+        self.hand_start_chips = {}
+        if self.hand_history is not None:
+            self.hand_history.discard_hand()
+        self.stop_auto_deal()
+        self.events.emit(f"{self.get_game_type()}_game_over", {'message': message, 'aborted': True}, to=self.room_id)
+        print(f"Game '{self.get_game_type()}' Room '{self.room_id}': 本局中止: {message}")
+
     def end_game(self, results):
-        """結束遊戲並廣播結果"""
+        """一局正常結束 (已分配底池或結算)：結算錢包、記錄牌局與排行榜並廣播結果"""
         self.is_game_in_progress = False
+        self.hand_completion_times.append(time.time())
+        if self.hand_history is not None:
+            self.hand_history.finish_hand(results)
+        if self.wallet is not None:
+            self.settled_hands += 1
+            # 局數加上發牌種子: 重新啟動後重複的房間 ID 也不會得到相同的冪等鍵
+            self.wallet.settle_hand(self.room_id, f"{self.settled_hands}:{self.current_hand_seed}",
+                                    {sid: player.chips for sid, player in self.players.items()})
+        self._record_leaderboards(results)
         event_name = f"{self.get_game_type()}_game_over"
-        self.socketio.emit(event_name, results, room=self.room_id)
-        print(f"Game '{self.get_game_type()}' Room '{self.room_id}': Game over. Results: {results}")
\ No newline at end of file
+        self.events.emit(event_name, results, to=self.room_id)
+        print(f"Game '{self.get_game_type()}' Room '{self.room_id}': Game over. Results: {results}")
+        for listener in list(self.hand_end_listeners):
+            listener(self, results)
+        if self.auto_deal and self.get_player_count() > 0:
+            self._schedule_next_hand()
\ No newline at end of file
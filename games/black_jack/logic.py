@@ -1,13 +1,69 @@
 # games/black_jack/logic.py
 import random
+import time
 from games.base_game import BaseGame
-from .utils import create_deck, shuffle_deck, deal_cards, calculate_hand_value, is_blackjack, is_bust, compare_hands
+from games.player_state import PlayerState
+from .utils import calculate_hand_value, is_blackjack, is_bust, compare_hands
+from .shoe import Shoe, RANK_CLASS, CARD_TABLE, SINGLE_DECK_RANK_COUNTS
+from .odds import dealer_outcome_distribution, insurance_odds
+from .strategy import get_strategy_table
+
+class BlackJackPlayer(PlayerState):
+    FIELDS = {
+        'name': '', 'chips': 0, 'hand': [], 'hand_value': 0, 'bet': 0,
+        'is_active_in_round': False, 'has_acted_this_round': False, 'is_busted': False, 'has_blackjack': False,
+        'has_doubled_down': False, 'has_insurance': False,  # None 表示保險階段尚未決定
+        'insurance_bet': 0, 'disconnected': False,
+    }
+    __slots__ = tuple(FIELDS)
+
+    def reset_round(self, is_active):
+        """新的一局開始時清除上一局的手牌與下注。"""
+        self.hand = []
+        self.hand_value = 0
+        self.bet = 0
+        self.is_active_in_round = is_active
+        self.has_acted_this_round = False
+        self.is_busted = False
+        self.has_blackjack = False
+        self.has_doubled_down = False
+        self.has_insurance = None  # None 表示尚未做出保險選擇
+        self.insurance_bet = 0
+
+    def public_view(self, sid, visible_hand):
+        """送給客戶端的玩家資料 (get_state_for_player 的 players 項目)；visible_hand 為可以看到的手牌。"""
+        return {
+            'sid': sid,
+            'name': self.name,
+            'chips': self.chips,
+            'bet': self.bet,
+            'is_active_in_round': self.is_active_in_round,
+            'is_busted': self.is_busted,
+            'has_blackjack': self.has_blackjack,
+            'has_doubled_down': self.has_doubled_down,
+            'has_insurance': self.has_insurance,
+            'insurance_bet': self.insurance_bet,
+            'hand_value': self.hand_value,
+            'has_acted_this_round': self.has_acted_this_round,
+            'disconnected': self.disconnected,
+            'hand': visible_hand,
+        }
+
 
 class BlackJackGame(BaseGame):
-    def __init__(self, room_id, players_sids, socketio_instance, options=None):
-        super().__init__(room_id, players_sids, socketio_instance, options)
+    def __init__(self, room_id, players_sids, event_sink, options=None):
+        super().__init__(room_id, players_sids, event_sink, options)
         # --- 遊戲狀態初始化 ---
-        self.game_state['deck'] = []
+        # 牌靴跨局保留，只有越過切牌位置後才重新洗牌
+        try:
+            self.shoe = Shoe(num_decks=int(self.options.get('num_decks', 6)),
+                             penetration=float(self.options.get('penetration', 0.75)),
+                             cut_card=self.options.get('cut_card'),
+                             rng=self.hand_seed_source,
+                             generator=self.options.get('shuffle'))
+        except (TypeError, ValueError) as e:
+            print(f"[21點房間 {self.room_id}] 牌靴選項無效 ({e})，改用預設的 6 副牌。")
+            self.shoe = Shoe(rng=self.hand_seed_source)
         self.game_state['dealer_hand'] = []
         self.game_state['dealer_hand_value'] = 0
         self.game_state['dealer_has_blackjack'] = False
@@ -15,32 +71,77 @@ class BlackJackGame(BaseGame):
         self.game_state['game_phase'] = None  # 'dealing', 'player_turns', 'dealer_turn', 'settlement'
         self.game_state['min_bet'] = self.options.get('min_bet', 10)
         self.game_state['max_bet'] = self.options.get('max_bet', 100)
+        self.game_state['blackjack_payout'] = self.options.get('blackjack_payout', 1.5)  # 自然21點賠率 (預設 3:2)
+        self.game_state['insurance_payout'] = self.options.get('insurance_payout', 2)  # 保險賠率 (預設 2:1)
         self.game_state['round_active_players_sids_in_order'] = []
+        # 所有玩家同時下注，直到全部下注或期限到 (<= 0 表示不設期限，等所有人下注)
+        self.game_state['betting_seconds'] = self.options.get('betting_seconds', 30)
+        # 保險決定與每次玩家行動的期限，逾時自動不買保險 / 停牌 (<= 0 表示不設期限)
+        self.game_state['timeout_seconds'] = self.options.get('timeout_seconds', 30)
+        self.game_state['action_deadline'] = None  # 目前階段的截止時間 (epoch 秒)
+        self.phase_timer = None  # 目前階段的期限計時器 (scheduler.TimerHandle)，同一時間只有一個
+        self.phase_timer_instance_id = 0
+        # 保險提示 (莊家明牌為 A) 與莊家最終點數的機率分布依每位玩家看得到的牌分別計算，
+        # 以 (階段, 未見牌張數) 快取，看到相同牌的玩家共用結果；每局開始時清空
+        self._outcome_hint_cache = {}
+        self.outcome_hints_enabled = bool(self.options.get('outcome_hints', True))  # 無頭模擬時可關閉機率提示
+        self._strategy_table = None  # 基本策略表，第一次需要建議動作時才載入
 
         # 初始化玩家數據
         temp_initial_players = {}
         if players_sids:
             for sid_init in players_sids:
-                temp_initial_players[sid_init] = {
-                    'name': f"玩家_{sid_init[:4]}",  # 預設名稱
-                    'chips': self.options.get('buy_in', 1000),
-                    'hand': [],
-                    'hand_value': 0,
-                    'bet': 0,
-                    'is_active_in_round': False,
-                    'has_acted_this_round': False,
-                    'is_busted': False,
-                    'has_blackjack': False,
-                    'has_doubled_down': False,
-                    'has_insurance': False,
-                    'insurance_bet': 0
-                }
+                temp_initial_players[sid_init] = BlackJackPlayer(
+                    name=f"玩家_{sid_init[:4]}", chips=self._buy_in_chips(sid_init))  # 預設名稱
         self.players = temp_initial_players  # 設置初始玩家數據
         print(f"[21點房間 {self.room_id}] 遊戲實例已創建。初始玩家: {list(self.players.keys())}, 選項: {self.options}")
 
     def get_game_type(self):
         return "black_jack"
 
+    def suspend(self):
+        self._cancel_phase_timer()
+        self._strategy_table = None  # 喚醒後第一次需要建議動作時再載入
+        super().suspend()
+
+    def resume(self):
+        # 依目前階段重新開始期限 (休眠期間的時間不計入)
+        if self.is_game_in_progress:
+            phase = self.game_state['game_phase']
+            if phase == 'betting':
+                self._start_phase_timer(self.game_state['betting_seconds'], 'betting_deadline', self._betting_deadline_expired)
+            elif phase == 'insurance':
+                self._start_phase_timer(self.game_state['timeout_seconds'], 'insurance_deadline', self._insurance_deadline_expired)
+            elif phase == 'player_turns' and self.game_state.get('current_turn_sid'):
+                self._start_turn_timer(self.game_state['current_turn_sid'])
+        super().resume()
+
+    def abort_game(self, message):
+        self._cancel_phase_timer()
+        self.game_state['game_phase'] = None
+        self.game_state['current_turn_sid'] = None
+        super().abort_game(message)
+
+    def _hand_winnings(self, results):
+        # 每位玩家對莊家的輸贏各自結算: 主注贏得的金額 (payout > 0) 即為贏得的一局
+        return {sid: result['payout'] for sid, result in results.get('results', {}).items() if result['payout'] > 0}
+
+    def _history_table_config(self):
+        return {
+            'num_decks': self.shoe.num_decks,
+            'cut_card': self.shoe.cut_card_position,
+            'shuffle': self.shoe.generator,
+            'blackjack_payout': self.game_state['blackjack_payout'],
+            'insurance_payout': self.game_state['insurance_payout'],
+            'min_bet': self.game_state['min_bet'],
+            'max_bet': self.game_state['max_bet'],
+            'betting_seconds': self.game_state['betting_seconds'],
+            'timeout_seconds': self.game_state['timeout_seconds'],
+        }
+
+    def get_active_timer_count(self):
+        return (1 if self.phase_timer is not None else 0) + super().get_active_timer_count()
+
     def add_player(self, player_sid, player_info):
         """添加玩家到遊戲中，或更新已存在玩家的資訊（例如名稱）。"""
         player_name_from_info = player_info.get('name')
@@ -48,46 +149,54 @@ class BlackJackGame(BaseGame):
         player_name_to_set = player_name_from_info if player_name_from_info and player_name_from_info.strip() else f"玩家_{player_sid[:4]}"
 
         if player_sid not in self.players:
-            self.players[player_sid] = {
-                'name': player_name_to_set,
-                'chips': self.options.get('buy_in', 1000),
-                'hand': [],
-                'hand_value': 0,
-                'bet': 0,
-                'is_active_in_round': False,
-                'has_acted_this_round': False,
-                'is_busted': False,
-                'has_blackjack': False,
-                'has_doubled_down': False,
-                'has_insurance': False,
-                'insurance_bet': 0
-            }
+            self.players[player_sid] = BlackJackPlayer(name=player_name_to_set, chips=self._buy_in_chips(player_sid, player_info))
             print(f"[21點房間 {self.room_id}] 玩家 {player_name_to_set} ({player_sid}) 新加入。")
             self.broadcast_state(message=f"玩家 {player_name_to_set} 加入了牌桌。")
             return True
         else:
+            if self.players[player_sid].disconnected:
+                self.players[player_sid].disconnected = False
+                print(f"[21點房間 {self.room_id}] 玩家 {self.players[player_sid].name} ({player_sid}) 重新連線。")
             # 玩家已存在，可能只是更新名稱
-            if self.players[player_sid].get('name') != player_name_to_set:
-                old_name = self.players[player_sid].get('name')
-                self.players[player_sid]['name'] = player_name_to_set
+            if self.players[player_sid].name != player_name_to_set:
+                old_name = self.players[player_sid].name
+                self.players[player_sid].name = player_name_to_set
                 print(f"[21點房間 {self.room_id}] 玩家 {old_name} ({player_sid}) 更新名稱為 {player_name_to_set}。")
             else:
-                print(f"[21點房間 {self.room_id}] 玩家 {self.players[player_sid]['name']} ({player_sid}) 已在房間中。")
+                print(f"[21點房間 {self.room_id}] 玩家 {self.players[player_sid].name} ({player_sid}) 已在房間中。")
             
-            self.broadcast_state(message=f"玩家 {self.players[player_sid]['name']} 已在牌桌。")
+            self.broadcast_state(message=f"玩家 {self.players[player_sid].name} 已在牌桌。")
             return True
 
     def remove_player(self, player_sid):
         """將玩家從遊戲中移除"""
         if player_sid in self.players:
-            player_name = self.players[player_sid]['name']
+            player_name = self.players[player_sid].name
+            self._cash_out(player_sid)
             del self.players[player_sid]
             print(f"[21點房間 {self.room_id}] 玩家 {player_name} 離開。")
             # 如果遊戲正在進行，需要處理該玩家的退出邏輯
             if self.is_game_in_progress:
-                # 如果輪到離開的玩家行動，則移到下一位玩家
-                if self.game_state['current_turn_sid'] == player_sid:
-                    self._advance_to_next_player_or_phase()
+                if self.game_state['game_phase'] == 'betting':
+                    # 下注階段離開: 不再等待該玩家，若其餘玩家都已下注就直接發牌
+                    betting_sids = self.game_state['round_active_players_sids_in_order']
+                    if player_sid in betting_sids:
+                        betting_sids.remove(player_sid)
+                    if all(self.players[sid].bet > 0 for sid in betting_sids):
+                        self._close_betting()
+                else:
+                    # 發牌後離開: 從本局的行動順序移除 (之後的輪流與結算不再讀取已刪除的玩家)
+                    order = self.game_state['round_active_players_sids_in_order']
+                    index = order.index(player_sid) if player_sid in order else None
+                    if index is not None:
+                        order.remove(player_sid)
+                    if self.game_state['game_phase'] == 'insurance':
+                        # 其餘玩家都已決定保險時不必等到期限
+                        if all(p.has_insurance is not None for p in self.players.values() if p.is_active_in_round):
+                            self._check_dealer_blackjack()
+                    elif self.game_state['current_turn_sid'] == player_sid:
+                        # 輪到離開的玩家行動，則移到原本排在他之後的下一位玩家
+                        self._advance_to_next_player_or_phase(index)
             
             self.broadcast_state(message=f"玩家 {player_name} 離開了牌桌。")
             if self.get_player_count() == 0 and not self.is_game_in_progress:  # 如果房間沒人了且遊戲沒在進行
@@ -95,6 +204,44 @@ class BlackJackGame(BaseGame):
             return True
         return False
 
+    def disconnect_player(self, player_sid):
+        """
+        玩家斷線時保留座位與籌碼 (重新連線時由 add_player 恢復)。
+        下注階段不再等待該玩家；保險階段視為不買保險；輪到該玩家行動時視為停牌；斷線期間不參加新的牌局。
+        """
+        player = self.players.get(player_sid)
+        if not player:
+            print(f"[21點房間 {self.room_id}] 嘗試標記斷線的不存在玩家 {player_sid}。")
+            return False
+
+        player.disconnected = True
+        print(f"[21點房間 {self.room_id}] 玩家 {player.name} ({player_sid}) 已斷線。")
+        message = f"玩家 {player.name} 已斷線。"
+
+        if self.is_game_in_progress and self.game_state['game_phase'] == 'betting':
+            betting_sids = self.game_state['round_active_players_sids_in_order']
+            if player.bet == 0 and player_sid in betting_sids:
+                player.is_active_in_round = False
+                betting_sids.remove(player_sid)
+                self.broadcast_state(message=message)
+                if all(self.players[sid].bet > 0 for sid in betting_sids):
+                    self._close_betting()
+                return True
+        elif (self.is_game_in_progress and self.game_state['game_phase'] == 'insurance'
+              and player.is_active_in_round and player.has_insurance is None):
+            self.broadcast_state(message=message)
+            self.take_insurance(player_sid, False)  # 斷線視為不買保險
+            return True
+        elif (self.is_game_in_progress and self.game_state['game_phase'] == 'player_turns'
+              and self.game_state['current_turn_sid'] == player_sid):
+            self._history_action(player_sid, 'stand', auto=True)
+            self.broadcast_state(message=f"{message} 自動停牌。")
+            self._advance_to_next_player_or_phase()
+            return True
+
+        self.broadcast_state(message=message)
+        return True
+
     def place_bet(self, player_sid, bet_amount):
         """玩家下注"""
         if not self.is_game_in_progress:
@@ -105,17 +252,17 @@ class BlackJackGame(BaseGame):
             self.send_error_to_player(player_sid, "目前非下注階段。")
             return False
         
-        if self.game_state['current_turn_sid'] != player_sid:
-            self.send_error_to_player(player_sid, "還沒輪到您下注。")
-            return False
-        
         player = self.players.get(player_sid)
         if not player:
             self.send_error_to_player(player_sid, "玩家不存在。")
             return False
         
+        if player_sid not in self.game_state['round_active_players_sids_in_order']:
+            self.send_error_to_player(player_sid, "您不在本局遊戲中，請等待下一局。")
+            return False
+        
         # 輸出調試信息
-        print(f"[21點房間 {self.room_id}] 玩家 {player['name']} ({player_sid}) 嘗試下注 {bet_amount} 籌碼。當前籌碼: {player['chips']}")
+        print(f"[21點房間 {self.room_id}] 玩家 {player.name} ({player_sid}) 嘗試下注 {bet_amount} 籌碼。當前籌碼: {player.chips}")
         
         # 確保 bet_amount 是整數
         try:
@@ -128,7 +275,7 @@ class BlackJackGame(BaseGame):
             self.send_error_to_player(player_sid, "下注金額必須大於零。")
             return False
         
-        if player['bet'] > 0:
+        if player.bet > 0:
             self.send_error_to_player(player_sid, "您已經下注。")
             return False
         
@@ -140,38 +287,126 @@ class BlackJackGame(BaseGame):
             self.send_error_to_player(player_sid, f"下注金額不得高於最高限額 {self.game_state['max_bet']}。")
             return False
         
-        if bet_amount > player['chips']:
+        if bet_amount > player.chips:
             self.send_error_to_player(player_sid, "您的籌碼不足。")
             return False
         
-        player['bet'] = bet_amount
-        player['chips'] -= bet_amount
-        player['is_active_in_round'] = True
-        player['has_acted_this_round'] = True
-        
-        print(f"[21點房間 {self.room_id}] 玩家 {player['name']} 下注 {bet_amount} 成功。剩餘籌碼: {player['chips']}")
-        
-        # 移至下一位玩家或進入發牌階段
-        current_idx = self.game_state['round_active_players_sids_in_order'].index(player_sid)
-        next_player_found = False
+        player.bet = bet_amount
+        player.chips -= bet_amount
+        player.is_active_in_round = True
+        player.has_acted_this_round = True
+        self._history_action(player_sid, 'bet', bet_amount)
         
-        for i in range(current_idx + 1, len(self.game_state['round_active_players_sids_in_order'])):
-            next_sid = self.game_state['round_active_players_sids_in_order'][i]
-            if not self.players[next_sid]['has_acted_this_round']:
-                self.game_state['current_turn_sid'] = next_sid
-                next_player_found = True
-                print(f"[21點房間 {self.room_id}] 輪到玩家 {self.players[next_sid]['name']} 下注")
-                self.broadcast_state(message=f"玩家 {player['name']} 下注 {bet_amount}。輪到 {self.players[next_sid]['name']} 下注。")
-                break
+        print(f"[21點房間 {self.room_id}] 玩家 {player.name} 下注 {bet_amount} 成功。剩餘籌碼: {player.chips}")
         
-        if not next_player_found:
-            # 所有玩家都已下注，進入發牌階段
+        # 所有人同時下注: 全部下注完成就直接發牌，不必等到期限
+        betting_sids = self.game_state['round_active_players_sids_in_order']
+        num_bets = sum(1 for sid in betting_sids if self.players[sid].bet > 0)
+        if num_bets == len(betting_sids):
             print(f"[21點房間 {self.room_id}] 所有玩家都已下注，進入發牌階段")
-            self.broadcast_state(message=f"玩家 {player['name']} 下注 {bet_amount}。所有玩家都已下注，開始發牌。")
-            self._deal_initial_cards()
+            self.broadcast_state(message=f"玩家 {player.name} 下注 {bet_amount}。所有玩家都已下注，開始發牌。")
+            self._close_betting()
+        else:
+            self.broadcast_state(message=f"玩家 {player.name} 下注 {bet_amount}。({num_bets}/{len(betting_sids)} 位玩家已下注)")
         
         return True
 
+    def _start_phase_timer(self, seconds, label, callback, *args):
+        """啟動目前階段的期限計時器 (會取代前一個)。seconds <= 0 表示不設期限。"""
+        self._cancel_phase_timer()
+        if not seconds or seconds <= 0:
+            return
+        self.phase_timer_instance_id += 1
+        self.game_state['action_deadline'] = time.time() + seconds
+        self.phase_timer = self.scheduler.call_later(
+            seconds, self._run_timer_callback, label, self._phase_deadline_expired,
+            self.phase_timer_instance_id, callback, args, label=f"{self.room_id}:{label}"
+        )
+
+    def _cancel_phase_timer(self):
+        self.game_state['action_deadline'] = None
+        timer_to_cancel = self.phase_timer
+        self.phase_timer = None
+        if timer_to_cancel:
+            timer_to_cancel.cancel()
+
+    def _phase_deadline_expired(self, expected_instance_id, callback, args):
+        if expected_instance_id != self.phase_timer_instance_id:
+            print(f"[21點房間 {self.room_id}] 過期的計時器 (ID {expected_instance_id}) 觸發，忽略。")
+            return
+        self.phase_timer = None
+        self.game_state['action_deadline'] = None
+        if self.is_game_in_progress:
+            callback(*args)
+
+    def _betting_deadline_expired(self):
+        if self.game_state['game_phase'] != 'betting':
+            return
+        print(f"[21點房間 {self.room_id}] 下注時間到。")
+        self._close_betting()
+
+    def _insurance_deadline_expired(self):
+        if self.game_state['game_phase'] != 'insurance':
+            return
+        undecided = []
+        for sid in self.game_state['round_active_players_sids_in_order']:
+            player = self.players.get(sid)
+            if player and player.is_active_in_round and player.has_insurance is None:
+                player.has_insurance = False
+                self._history_action(sid, 'decline_insurance', auto=True)
+                undecided.append(player.name)
+        print(f"[21點房間 {self.room_id}] 保險時間到，未決定的玩家視為不買保險: {undecided}")
+        self.broadcast_state(message="保險決定時間到，未決定的玩家視為不買保險。")
+        self._check_dealer_blackjack()
+
+    def _start_turn_timer(self, player_sid):
+        self._start_phase_timer(self.game_state['timeout_seconds'], 'auto_stand', self._turn_deadline_expired, player_sid)
+
+    def _turn_deadline_expired(self, player_sid):
+        if self.game_state['game_phase'] != 'player_turns' or self.game_state['current_turn_sid'] != player_sid:
+            return
+        player = self.players.get(player_sid)
+        player_name = player.name if player else player_sid
+        print(f"[21點房間 {self.room_id}] 玩家 {player_name} ({player_sid}) 超時，自動停牌。")
+        self._history_action(player_sid, 'stand', auto=True)
+        self.broadcast_state(message=f"玩家 {player_name} 超時，自動停牌。")
+        self._advance_to_next_player_or_phase()
+
+    def _close_betting(self):
+        """結束下注階段: 沒有下注的玩家本局不參加，其餘玩家開始發牌。"""
+        if self.game_state['game_phase'] != 'betting':
+            return
+        self._cancel_phase_timer()
+
+        bettors = []
+        sitting_out = []
+        for sid in self.game_state['round_active_players_sids_in_order']:
+            player = self.players.get(sid)
+            if not player:
+                continue
+            if player.bet > 0:
+                bettors.append(sid)
+            else:
+                player.is_active_in_round = False
+                sitting_out.append(player.name)
+        self.game_state['round_active_players_sids_in_order'] = bettors
+
+        if not bettors:
+            # 與其他未結算的結束方式相同: 計入中止的局數、捨棄牌局紀錄並通知玩家
+            self.abort_game("沒有玩家下注，本局取消。")
+            message = "沒有玩家下注，本局取消。"
+            # 自動發牌的牌桌: 仍有可以下注的玩家時照常排程下一局 (abort_game 不會排程)，否則等待房主手動開始
+            if self.auto_deal and any(p.chips > 0 and not p.disconnected for p in self.players.values()):
+                self._schedule_next_hand()
+                message += f" 下一局將在 {self.auto_deal_delay} 秒後開始。"
+            self.broadcast_state(message=message)
+            return
+
+        if sitting_out:
+            print(f"[21點房間 {self.room_id}] 未下注的玩家本局不參加: {sitting_out}")
+            self.broadcast_state(message=f"下注結束。{', '.join(sitting_out)} 未下注，本局不參加。")
+        self._deal_initial_cards()
+
     def start_game(self, triggering_player_sid=None):
         """開始新一局遊戲"""
         if self.is_game_in_progress:
@@ -179,7 +414,8 @@ class BlackJackGame(BaseGame):
                 self.send_error_to_player(triggering_player_sid, "遊戲已在進行中。")
             return False
 
-        eligible_player_sids = [sid for sid, data in self.players.items() if data.get('chips', 0) > 0]
+        eligible_player_sids = [sid for sid, data in self.players.items()
+                                if data.chips > 0 and not data.disconnected]
         num_eligible_players = len(eligible_player_sids)
 
         if num_eligible_players < self.options.get('min_players', 1):
@@ -193,30 +429,25 @@ class BlackJackGame(BaseGame):
         print(f"[21點房間 {self.room_id}] 準備開始新牌局。符合資格的玩家 ({num_eligible_players}): {eligible_player_sids}")
         self.is_game_in_progress = True
         self.game_state['game_phase'] = 'betting'
-        self.game_state['deck'] = shuffle_deck(create_deck())
+        if self.shoe.begin_round():
+            print(f"[21點房間 {self.room_id}] 牌靴已到切牌位置，重新洗牌 ({self.shoe.num_decks} 副牌)。")
         self.game_state['dealer_hand'] = []
         self.game_state['dealer_hand_value'] = 0
         self.game_state['dealer_has_blackjack'] = False
-        self.game_state['current_turn_sid'] = eligible_player_sids[0] if eligible_player_sids else None
+        self._outcome_hint_cache = {}
+        self.game_state['current_turn_sid'] = None  # 下注階段沒有輪流，所有人同時下注
 
         # 重設所有玩家的狀態
         for sid in self.players:
-            self.players[sid].update({
-                'hand': [],
-                'hand_value': 0,
-                'bet': 0,
-                'is_active_in_round': sid in eligible_player_sids,
-                'has_acted_this_round': False,
-                'is_busted': False,
-                'has_blackjack': False,
-                'has_doubled_down': False,
-                'has_insurance': False,
-                'insurance_bet': 0
-            })
+            self.players[sid].reset_round(sid in eligible_player_sids)
         
         self.game_state['round_active_players_sids_in_order'] = eligible_player_sids.copy()
+        # 牌靴跨局保留: 本局的牌序由目前牌靴的洗牌種子與本局開始時的游標決定
+        self.current_hand_seed = self.shoe.seed
+        self._history_begin_hand(eligible_player_sids, seed=self.shoe.seed, deal_offset=self.shoe.position)
+        self._start_phase_timer(self.game_state['betting_seconds'], 'betting_deadline', self._betting_deadline_expired)
         
-        print(f"[21點房間 {self.room_id}] 新牌局已開始。等待玩家下注。當前玩家: {self.game_state['current_turn_sid']}")
+        print(f"[21點房間 {self.room_id}] 新牌局已開始。等待玩家同時下注，期限 {self.game_state['betting_seconds']} 秒。")
         self.broadcast_state(message="新牌局開始！請各位玩家下注。")
         return True
 
@@ -227,19 +458,19 @@ class BlackJackGame(BaseGame):
         
         # 發牌給玩家，每人兩張牌
         for sid in self.game_state['round_active_players_sids_in_order']:
-            if self.players[sid]['is_active_in_round']:
-                self.players[sid]['hand'] = deal_cards(self.game_state['deck'], 2)
-                self.players[sid]['hand_value'] = calculate_hand_value(self.players[sid]['hand'])
-                self.players[sid]['has_blackjack'] = is_blackjack(self.players[sid]['hand'])
+            if self.players[sid].is_active_in_round:
+                self.players[sid].hand = self.shoe.deal(2)
+                self.players[sid].hand_value = calculate_hand_value(self.players[sid].hand)
+                self.players[sid].has_blackjack = is_blackjack(self.players[sid].hand)
                 
                 # 如果玩家有自然21點，記錄這個資訊
-                if self.players[sid]['has_blackjack']:
-                    player_name = self.players[sid]['name']
+                if self.players[sid].has_blackjack:
+                    player_name = self.players[sid].name
                     print(f"[21點房間 {self.room_id}] 玩家 {player_name} 獲得自然21點！")
                     self.broadcast_state(message=f"玩家 {player_name} 獲得自然21點！")
         
         # 發牌給莊家，兩張牌（一張明牌，一張暗牌）
-        self.game_state['dealer_hand'] = deal_cards(self.game_state['deck'], 2)
+        self.game_state['dealer_hand'] = self.shoe.deal(2)
         self.game_state['dealer_hand_value'] = calculate_hand_value(self.game_state['dealer_hand'])
         self.game_state['dealer_has_blackjack'] = is_blackjack(self.game_state['dealer_hand'])
         
@@ -247,6 +478,7 @@ class BlackJackGame(BaseGame):
         dealer_up_card = self.game_state['dealer_hand'][0]
         if dealer_up_card['rank'] == 'A':
             self.game_state['game_phase'] = 'insurance'
+            self._start_phase_timer(self.game_state['timeout_seconds'], 'insurance_deadline', self._insurance_deadline_expired)
             print(f"[21點房間 {self.room_id}] 莊家明牌為A，進入保險階段。")
             self.broadcast_state(message="莊家明牌為A，玩家可以選擇是否購買保險。")
         else:
@@ -256,6 +488,7 @@ class BlackJackGame(BaseGame):
 
     def _check_dealer_blackjack(self):
         """檢查莊家是否有21點"""
+        self._cancel_phase_timer()  # 保險階段 (若有) 到此結束
         if self.game_state['dealer_has_blackjack']:
             print(f"[21點房間 {self.room_id}] 莊家有21點。")
             self.broadcast_state(message="莊家有21點！")
@@ -268,13 +501,15 @@ class BlackJackGame(BaseGame):
             next_player_found = False
             if self.game_state['round_active_players_sids_in_order']:
                 for next_sid in self.game_state['round_active_players_sids_in_order']:
-                    if (self.players[next_sid]['is_active_in_round'] and 
-                        not self.players[next_sid]['is_busted'] and 
-                        not self.players[next_sid]['has_blackjack'] and
-                        self.players[next_sid]['hand_value'] < 21):
+                    if (self.players[next_sid].is_active_in_round and 
+                        not self.players[next_sid].is_busted and 
+                        not self.players[next_sid].has_blackjack and
+                        not self.players[next_sid].disconnected and
+                        self.players[next_sid].hand_value < 21):
                         self.game_state['current_turn_sid'] = next_sid
                         next_player_found = True
-                        player_name = self.players[next_sid]['name']
+                        self._start_turn_timer(next_sid)
+                        player_name = self.players[next_sid].name
                         print(f"[21點房間 {self.room_id}] 輪到玩家 {player_name} 行動。")
                         self.broadcast_state(message=f"輪到玩家 {player_name} 行動。")
                         break
@@ -288,6 +523,57 @@ class BlackJackGame(BaseGame):
                 # 沒有活躍玩家，直接進入莊家回合
                 self._dealer_turn()
 
+    def _unseen_rank_counts(self, player_sid):
+        """
+        該玩家看不到的牌的各點數類別張數: 整個牌靴的組成減去本局的明牌 (莊家明牌、其他玩家的第一張牌)
+        與自己的手牌。可見範圍與 get_state_for_player 在保險與玩家回合階段相同，
+        莊家暗牌、其他玩家的後續手牌與牌靴剩餘的牌都不會影響結果。
+        """
+        counts = [count * self.shoe.num_decks for count in SINGLE_DECK_RANK_COUNTS]
+        visible = self.game_state['dealer_hand'][:1]
+        for sid, player in self.players.items():
+            visible = visible + (player.hand if sid == player_sid else player.hand[:1])
+        for card in visible:
+            counts[RANK_CLASS[card['rank']]] -= 1
+        return tuple(counts)
+
+    def _outcome_hints(self, player_sid):
+        """
+        該玩家的機率提示。
+        Returns:
+            tuple: (insurance_hint, dealer_outcome_probabilities)，不適用的階段為 None。
+        """
+        phase = self.game_state.get('game_phase')
+        if not self.outcome_hints_enabled or phase not in ('insurance', 'player_turns') or not self.game_state['dealer_hand']:
+            return None, None
+        key = (phase, self._unseen_rank_counts(player_sid))
+        hint = self._outcome_hint_cache.get(key)
+        if hint is None:
+            if phase == 'insurance':
+                hint = insurance_odds(key[1])
+            else:
+                hint = dealer_outcome_distribution(self.game_state['dealer_hand'][0], key[1], peeked=True)
+            self._outcome_hint_cache[key] = hint
+        return (hint, None) if phase == 'insurance' else (None, hint)
+
+    def _recommended_action(self, player_sid):
+        """輪到該玩家行動時，依基本策略表返回建議動作 ('hit'、'stand'、'double')，否則返回 None。"""
+        if (not self.outcome_hints_enabled or self.game_state['game_phase'] != 'player_turns'
+                or self.game_state['current_turn_sid'] != player_sid or not self.game_state['dealer_hand']):
+            return None
+        player = self.players[player_sid]
+        if self._strategy_table is None:
+            self._strategy_table = get_strategy_table(self.shoe.num_decks, self.game_state['blackjack_payout'])
+        can_double = len(player.hand) == 2 and player.bet <= player.chips
+        return self._strategy_table.recommend(player.hand, self.game_state['dealer_hand'][0], can_double)
+
+    def _can_act(self, player_sid):
+        if self.game_state.get('game_phase') == 'betting':
+            # 下注階段所有尚未下注的本局玩家都可以行動
+            return (player_sid in self.game_state['round_active_players_sids_in_order']
+                    and self.players[player_sid].bet == 0)
+        return player_sid == self.game_state.get('current_turn_sid')
+
     def take_insurance(self, player_sid, take=False, amount=0):
         """玩家決定是否購買保險"""
         if not self.is_game_in_progress or self.game_state['game_phase'] != 'insurance':
@@ -295,32 +581,34 @@ class BlackJackGame(BaseGame):
             return False
         
         player = self.players.get(player_sid)
-        if not player or not player['is_active_in_round']:
+        if not player or not player.is_active_in_round:
             self.send_error_to_player(player_sid, "您不在本局遊戲中。")
             return False
         
-        if player['has_insurance'] is not None:  # 已經做出選擇
+        if player.has_insurance is not None:  # 已經做出選擇
             self.send_error_to_player(player_sid, "您已經做出保險選擇。")
             return False
         
         if take:
-            insurance_amount = amount if amount > 0 else player['bet'] / 2
-            if insurance_amount > player['chips']:
+            insurance_amount = amount if amount > 0 else player.bet / 2
+            if insurance_amount > player.chips:
                 self.send_error_to_player(player_sid, "您的籌碼不足以購買保險。")
                 return False
             
-            player['has_insurance'] = True
-            player['insurance_bet'] = insurance_amount
-            player['chips'] -= insurance_amount
-            print(f"[21點房間 {self.room_id}] 玩家 {player['name']} 購買了保險，金額 {insurance_amount}。")
-            self.broadcast_state(message=f"玩家 {player['name']} 購買了保險。")
+            player.has_insurance = True
+            player.insurance_bet = insurance_amount
+            player.chips -= insurance_amount
+            self._history_action(player_sid, 'insurance', amount)
+            print(f"[21點房間 {self.room_id}] 玩家 {player.name} 購買了保險，金額 {insurance_amount}。")
+            self.broadcast_state(message=f"玩家 {player.name} 購買了保險。")
         else:
-            player['has_insurance'] = False
-            print(f"[21點房間 {self.room_id}] 玩家 {player['name']} 拒絕購買保險。")
-            self.broadcast_state(message=f"玩家 {player['name']} 拒絕購買保險。")
+            player.has_insurance = False
+            self._history_action(player_sid, 'decline_insurance')
+            print(f"[21點房間 {self.room_id}] 玩家 {player.name} 拒絕購買保險。")
+            self.broadcast_state(message=f"玩家 {player.name} 拒絕購買保險。")
         
         # 檢查是否所有玩家都已做出保險選擇
-        all_players_decided = all(p['has_insurance'] is not None for p in self.players.values() if p['is_active_in_round'])
+        all_players_decided = all(p.has_insurance is not None for p in self.players.values() if p.is_active_in_round)
         if all_players_decided:
             self._check_dealer_blackjack()
         
@@ -398,63 +686,68 @@ class BlackJackGame(BaseGame):
             return False
         
         player = self.players.get(player_sid)
-        if not player or not player['is_active_in_round']:
+        if not player or not player.is_active_in_round:
             self.send_error_to_player(player_sid, "您不在本局遊戲中。")
             return False
         
-        if player['is_busted'] or player['has_blackjack'] or player['hand_value'] == 21:
+        if player.is_busted or player.has_blackjack or player.hand_value == 21:
             self.send_error_to_player(player_sid, "您已經爆牌或有21點，無法繼續行動。")
             return False
         
-        action_message = f"玩家 {player['name']}"
+        action_message = f"玩家 {player.name}"
         action_processed_successfully = False
         
         if action_type == 'hit':  # 要牌
-            new_card = deal_cards(self.game_state['deck'], 1)[0]
-            player['hand'].append(new_card)
-            player['hand_value'] = calculate_hand_value(player['hand'])
+            self._history_action(player_sid, 'hit')
+            new_card = self.shoe.deal(1)[0]
+            player.hand.append(new_card)
+            player.hand_value = calculate_hand_value(player.hand)
             
             action_message += f" 要了一張牌：{new_card['rank']}{new_card['suit']}。"
             
-            if is_bust(player['hand']):
-                player['is_busted'] = True
-                action_message += f" 爆牌了！手牌點數：{player['hand_value']}。"
+            if is_bust(player.hand):
+                player.is_busted = True
+                action_message += f" 爆牌了！手牌點數：{player.hand_value}。"
                 self._advance_to_next_player_or_phase()
-            elif player['hand_value'] == 21:
+            elif player.hand_value == 21:
                 action_message += f" 達到21點！"
                 self._advance_to_next_player_or_phase()
+            else:
+                self._start_turn_timer(player_sid)  # 仍輪到該玩家，重新計算行動期限
             
             action_processed_successfully = True
         
         elif action_type == 'stand':  # 停牌
+            self._history_action(player_sid, 'stand')
             action_message += " 選擇停牌。"
             action_processed_successfully = True
             self._advance_to_next_player_or_phase()
         
         elif action_type == 'double':  # 雙倍下注
-            if len(player['hand']) != 2:
+            if len(player.hand) != 2:
                 self.send_error_to_player(player_sid, "只有初始兩張牌時才能雙倍下注。")
                 return False
             
-            if player['bet'] > player['chips']:
+            if player.bet > player.chips:
                 self.send_error_to_player(player_sid, "您的籌碼不足以雙倍下注。")
                 return False
             
             # 雙倍下注並再要一張牌
-            player['chips'] -= player['bet']
-            player['bet'] *= 2
-            player['has_doubled_down'] = True
+            self._history_action(player_sid, 'double', player.bet)
+            player.chips -= player.bet
+            player.bet *= 2
+            player.has_doubled_down = True
             
-            new_card = deal_cards(self.game_state['deck'], 1)[0]
-            player['hand'].append(new_card)
-            player['hand_value'] = calculate_hand_value(player['hand'])
+            new_card = self.shoe.deal(1)[0]
+            player.hand.append(new_card)
+            player.hand_value = calculate_hand_value(player.hand)
             
-            action_message += f" 雙倍下注，總下注為 {player['bet']}，並要了一張牌：{new_card['rank']}{new_card['suit']}。"
+            action_message += f" 雙倍下注，總下注為 {player.bet}，並要了一張牌：{new_card['rank']}{new_card['suit']}。"
             
-            if is_bust(player['hand']):
-                player['is_busted'] = True
-                action_message += f" 爆牌了！手牌點數：{player['hand_value']}。"
-            elif player['hand_value'] == 21:
+            if is_bust(player.hand):
+                player.is_busted = True
+                action_message += f" 爆牌了！手牌點數：{player.hand_value}。"
+            elif player.hand_value == 21:
                 action_message += f" 達到21點！"
             
             action_processed_successfully = True
@@ -467,26 +760,35 @@ class BlackJackGame(BaseGame):
         
         return False
 
-    def _advance_to_next_player_or_phase(self):
-        """移至下一個玩家行動或進入下一階段"""
+    def _advance_to_next_player_or_phase(self, start_idx=None):
+        """
+        移至下一個玩家行動或進入下一階段。
+        Args:
+            start_idx (int, optional): 從行動順序的這個位置開始尋找 (目前行動的玩家已從順序中移除時使用)，
+                預設為目前行動玩家的下一位。
+        """
         if self.game_state['game_phase'] != 'player_turns':
             return
         
-        current_idx = -1
-        if self.game_state['current_turn_sid'] in self.game_state['round_active_players_sids_in_order']:
-            current_idx = self.game_state['round_active_players_sids_in_order'].index(self.game_state['current_turn_sid'])
+        if start_idx is None:
+            current_idx = -1
+            if self.game_state['current_turn_sid'] in self.game_state['round_active_players_sids_in_order']:
+                current_idx = self.game_state['round_active_players_sids_in_order'].index(self.game_state['current_turn_sid'])
+            start_idx = current_idx + 1
         
         next_player_found = False
-        for i in range(current_idx + 1, len(self.game_state['round_active_players_sids_in_order'])):
+        for i in range(start_idx, len(self.game_state['round_active_players_sids_in_order'])):
             next_sid = self.game_state['round_active_players_sids_in_order'][i]
             # Skip players who: are busted, have blackjack, or have exactly 21 points
-            if (self.players[next_sid]['is_active_in_round'] and 
-                not self.players[next_sid]['is_busted'] and 
-                not self.players[next_sid]['has_blackjack'] and
-                self.players[next_sid]['hand_value'] < 21):
+            if (self.players[next_sid].is_active_in_round and 
+                not self.players[next_sid].is_busted and 
+                not self.players[next_sid].has_blackjack and
+                not self.players[next_sid].disconnected and
+                self.players[next_sid].hand_value < 21):
                 self.game_state['current_turn_sid'] = next_sid
                 next_player_found = True
-                player_name = self.players[next_sid]['name']
+                self._start_turn_timer(next_sid)
+                player_name = self.players[next_sid].name
                 print(f"[21點房間 {self.room_id}] 輪到玩家 {player_name} 行動。")
                 self.broadcast_state(message=f"輪到玩家 {player_name} 行動。")
                 break
@@ -497,18 +799,19 @@ class BlackJackGame(BaseGame):
 
     def _dealer_turn(self):
         """莊家回合"""
+        self._cancel_phase_timer()
         self.game_state['game_phase'] = 'dealer_turn'
         print(f"[21點房間 {self.room_id}] 進入莊家回合。")
         self.broadcast_state(message="進入莊家回合。")
         
         # 檢查是否所有玩家都爆牌，如果是，莊家不需要要牌
-        all_players_busted = all(p['is_busted'] or not p['is_active_in_round'] for p in self.players.values())
+        all_players_busted = all(p.is_busted or not p.is_active_in_round for p in self.players.values())
         
         if not all_players_busted:
             # 莊家按規則要牌（17點以下必須要牌，17點及以上必須停牌）
             dealer_action_message = "莊家："
             while self.game_state['dealer_hand_value'] < 17:
-                new_card = deal_cards(self.game_state['deck'], 1)[0]
+                new_card = self.shoe.deal(1)[0]
                 self.game_state['dealer_hand'].append(new_card)
                 self.game_state['dealer_hand_value'] = calculate_hand_value(self.game_state['dealer_hand'])
                 dealer_action_message += f" 要了一張牌：{new_card['rank']}{new_card['suit']}。"
@@ -527,6 +830,10 @@ class BlackJackGame(BaseGame):
     def _settle_round(self):
         """結算本局遊戲"""
         self.game_state['game_phase'] = 'settlement'
+        self._cancel_phase_timer()
+        if self.hand_history is not None:
+            # 牌靴跨局保留，本局的牌序就是本局發出的牌
+            self.hand_history.set_deck([CARD_TABLE[code] for code in self.shoe.dealt_this_round()])
         print(f"[21點房間 {self.room_id}] 開始結算本局遊戲。")
         
         dealer_has_blackjack = self.game_state['dealer_has_blackjack']
@@ -536,81 +843,81 @@ class BlackJackGame(BaseGame):
         results = {}
         
         for sid, player in self.players.items():
-            if not player['is_active_in_round']:
+            if not player.is_active_in_round:
                 continue
             
-            result_message = f"玩家 {player['name']}："
+            result_message = f"玩家 {player.name}："
             result = {
                 'outcome': '',
                 'payout': 0,
-                'hand_value': player['hand_value'],
+                'hand_value': player.hand_value,
                 'dealer_hand_value': self.game_state['dealer_hand_value']
             }
             
             # 處理保險賠付
-            if player['has_insurance']:
+            if player.has_insurance:
                 if dealer_has_blackjack:
-                    insurance_win = player['insurance_bet'] * 2  # 保險賠付2:1
-                    player['chips'] += insurance_win
+                    insurance_win = player.insurance_bet * self.game_state['insurance_payout']  # 保險賠付 (預設 2:1)
+                    player.chips += insurance_win
                     result_message += f" 保險贏得 {insurance_win}。"
                     result['insurance_outcome'] = 'win'
                     result['insurance_payout'] = insurance_win
                 else:
-                    result_message += f" 保險輸了 {player['insurance_bet']}。"
+                    result_message += f" 保險輸了 {player.insurance_bet}。"
                     result['insurance_outcome'] = 'lose'
-                    result['insurance_payout'] = -player['insurance_bet']
+                    result['insurance_payout'] = -player.insurance_bet
             
             # 處理主要賭注
-            if player['is_busted']:
+            if player.is_busted:
                 # 玩家爆牌
-                result_message += f" 爆牌，損失 {player['bet']}。"
+                result_message += f" 爆牌，損失 {player.bet}。"
                 result['outcome'] = 'bust'
-                result['payout'] = -player['bet']
-            elif player['has_blackjack']:
+                result['payout'] = -player.bet
+            elif player.has_blackjack:
                 if dealer_has_blackjack:
                     # 雙方都有21點，平局
-                    player['chips'] += player['bet']
-                    result_message += f" 和莊家都有21點，平局，返還 {player['bet']}。"
+                    player.chips += player.bet
+                    result_message += f" 和莊家都有21點，平局，返還 {player.bet}。"
                     result['outcome'] = 'push'
                     result['payout'] = 0
                 else:
-                    # 玩家有21點，莊家沒有，賠付3:2
-                    win_amount = player['bet'] * 1.5
-                    player['chips'] += player['bet'] + win_amount
+                    # 玩家有21點，莊家沒有，賠付 blackjack_payout (預設 3:2)
+                    win_amount = player.bet * self.game_state['blackjack_payout']
+                    player.chips += player.bet + win_amount
                     result_message += f" 21點獲勝，贏得 {win_amount}。"
                     result['outcome'] = 'blackjack'
                     result['payout'] = win_amount
             elif dealer_has_blackjack:
                 # 莊家有21點，玩家沒有
-                result_message += f" 莊家有21點，損失 {player['bet']}。"
+                result_message += f" 莊家有21點，損失 {player.bet}。"
                 result['outcome'] = 'lose_to_blackjack'
-                result['payout'] = -player['bet']
+                result['payout'] = -player.bet
             elif dealer_busted:
                 # 莊家爆牌
-                win_amount = player['bet']
-                player['chips'] += player['bet'] * 2
+                win_amount = player.bet
+                player.chips += player.bet * 2
                 result_message += f" 莊家爆牌，贏得 {win_amount}。"
                 result['outcome'] = 'win_dealer_busted'
                 result['payout'] = win_amount
             else:
                 # 比點數
-                compare_result = compare_hands(player['hand'], self.game_state['dealer_hand'])
+                compare_result = compare_hands(player.hand, self.game_state['dealer_hand'])
                 if compare_result > 0:
                     # 玩家贏
-                    win_amount = player['bet']
-                    player['chips'] += player['bet'] * 2
+                    win_amount = player.bet
+                    player.chips += player.bet * 2
                     result_message += f" 點數較高，贏得 {win_amount}。"
                     result['outcome'] = 'win_higher'
                     result['payout'] = win_amount
                 elif compare_result < 0:
                     # 莊家贏
-                    result_message += f" 點數較低，損失 {player['bet']}。"
+                    result_message += f" 點數較低，損失 {player.bet}。"
                     result['outcome'] = 'lose_lower'
-                    result['payout'] = -player['bet']
+                    result['payout'] = -player.bet
                 else:
                     # 平局
-                    player['chips'] += player['bet']
-                    result_message += f" 點數相同，平局，返還 {player['bet']}。"
+                    player.chips += player.bet
+                    result_message += f" 點數相同，平局，返還 {player.bet}。"
                     result['outcome'] = 'push'
                     result['payout'] = 0
             
@@ -634,17 +941,17 @@ class BlackJackGame(BaseGame):
             'players': [
                 {
                     'sid': sid,
-                    'name': player['name'],
-                    'hand': player['hand'],
-                    'hand_value': player['hand_value'],
-                    'bet': player['bet'],
-                    'chips': player['chips'],
-                    'is_busted': player['is_busted'],
-                    'has_blackjack': player['has_blackjack'],
-                    'has_insurance': player['has_insurance'],
-                    'insurance_bet': player['insurance_bet']
+                    'name': player.name,
+                    'hand': player.hand,
+                    'hand_value': player.hand_value,
+                    'bet': player.bet,
+                    'chips': player.chips,
+                    'is_busted': player.is_busted,
+                    'has_blackjack': player.has_blackjack,
+                    'has_insurance': player.has_insurance,
+                    'insurance_bet': player.insurance_bet
                 }
-                for sid, player in self.players.items() if player['is_active_in_round']
+                for sid, player in self.players.items() if player.is_active_in_round
             ],
             'results': results,
             'message': "\n".join(settlement_messages)
@@ -664,38 +971,12 @@ class BlackJackGame(BaseGame):
         if player_sid not in self.players:
             return None  # 玩家已離開
 
-        public_players_data = []
-        for sid, p_data in self.players.items():
-            player_view = {
-                'sid': sid,
-                'name': p_data['name'],
-                'chips': p_data['chips'],
-                'bet': p_data['bet'],
-                'is_active_in_round': p_data['is_active_in_round'],
-                'is_busted': p_data['is_busted'],
-                'has_blackjack': p_data['has_blackjack'],
-                'has_doubled_down': p_data['has_doubled_down'],
-                'has_insurance': p_data['has_insurance'],
-                'insurance_bet': p_data['insurance_bet'],
-                'hand_value': p_data['hand_value'],
-                'has_acted_this_round': p_data['has_acted_this_round']
-            }
-            
-            # 隱藏特定玩家資訊
-            if sid == player_sid:
-                # 當前玩家，可以看到自己的手牌
-                player_view['hand'] = p_data.get('hand', [])
-            elif self.game_state['game_phase'] in ['settlement', 'dealer_turn']:
-                # 結算階段或莊家回合，顯示所有玩家的手牌
-                player_view['hand'] = p_data.get('hand', [])
-            else:
-                # 其他情況玩家只能看到其他人的第一張牌
-                if p_data.get('hand') and len(p_data['hand']) > 0:
-                    player_view['hand'] = [p_data['hand'][0]]
-                else:
-                    player_view['hand'] = []
-            
-            public_players_data.append(player_view)
+        # 自己的手牌一律可見；結算階段或莊家回合顯示所有玩家的手牌，其他情況只能看到其他人的第一張牌
+        show_all = self.game_state['game_phase'] in ['settlement', 'dealer_turn']
+        public_players_data = [
+            p_data.public_view(sid, p_data.hand if sid == player_sid or show_all else p_data.hand[:1])
+            for sid, p_data in self.players.items()
+        ]
 
         # 準備莊家資訊
         dealer_view = {
@@ -712,6 +993,7 @@ class BlackJackGame(BaseGame):
             # 其他階段只顯示莊家的第一張牌
             dealer_view['hand'] = [self.game_state['dealer_hand'][0]]
 
+        insurance_hint, dealer_outcome_probabilities = self._outcome_hints(player_sid)
         state_for_player = {
             'room_id': self.room_id,
             'game_type': self.get_game_type(),
@@ -722,8 +1004,19 @@ class BlackJackGame(BaseGame):
             'game_phase': self.game_state.get('game_phase'),
             'min_bet': self.game_state.get('min_bet'),
             'max_bet': self.game_state.get('max_bet'),
+            'betting_deadline': self.game_state.get('action_deadline') if self.game_state.get('game_phase') == 'betting' else None,
+            'action_deadline': self.game_state.get('action_deadline'),
+            'insurance_hint': insurance_hint,
+            'dealer_outcome_probabilities': dealer_outcome_probabilities,
+            'recommended_action': self._recommended_action(player_sid),
+            'shoe': {
+                'num_decks': self.shoe.num_decks,
+                'cards_remaining': self.shoe.remaining,
+                'cut_card_reached': self.shoe.needs_shuffle
+            },
             'options': self.options,
-            'can_act': player_sid == self.game_state.get('current_turn_sid')
+            'table_stats': self.get_table_stats(),
+            'can_act': self._can_act(player_sid)
         }
         
         return state_for_player
\ No newline at end of file
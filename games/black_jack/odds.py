@@ -0,0 +1,137 @@
+# games/black_jack/odds.py
+"""
+莊家最終點數的精確機率分布。
+
+牌組組成以 10 個點數類別的張數 tuple 表示 (A, 2..9, 10)，見 shoe.BJ_RANKS。
+莊家規則與 BlackJackGame._dealer_turn 相同: 17 點以下要牌，所有 17 點 (含軟 17) 停牌。
+遞迴以 (硬點數, 是否有 A, 剩餘組成) 為鍵並用 LRU 快取記憶，
+同一牌靴狀態的重複查詢 (例如每次廣播) 幾乎不需要重算。
+"""
+from functools import lru_cache
+
+from .shoe import RANK_CLASS, SINGLE_DECK_RANK_COUNTS
+
+# 分布向量的欄位順序
+OUTCOMES = ('17', '18', '19', '20', '21', 'bust', 'blackjack')
+_BUST = 5
+_BLACKJACK = 6
+_TEN = 9
+_ACE = 0
+
+_BUST_VECTOR = (0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0)
+_STAND_VECTORS = {
+    total: tuple(1.0 if i == total - 17 else 0.0 for i in range(len(OUTCOMES)))
+    for total in range(17, 22)
+}
+
+
+def _best_total(hard_total, has_ace):
+    if has_ace and hard_total + 10 <= 21:
+        return hard_total + 10
+    return hard_total
+
+
+@lru_cache(maxsize=1 << 16)
+def _dealer_final(hard_total, has_ace, counts):
+    """從目前的莊家手牌繼續要牌，返回最終結果的機率向量 (不含 blackjack 欄)。"""
+    if hard_total > 21:
+        return _BUST_VECTOR
+    best = _best_total(hard_total, has_ace)
+    if best >= 17:
+        return _STAND_VECTORS[best]
+
+    remaining = sum(counts)
+    if remaining == 0:
+        # 牌靴用盡時 BlackJackGame 會把棄牌重新洗入，以一副新牌近似
+        counts = SINGLE_DECK_RANK_COUNTS
+        remaining = sum(counts)
+
+    result = [0.0] * len(OUTCOMES)
+    for rank_class, count in enumerate(counts):
+        if not count:
+            continue
+        probability = count / remaining
+        next_counts = counts[:rank_class] + (count - 1,) + counts[rank_class + 1:]
+        sub = _dealer_final(hard_total + rank_class + 1, has_ace or rank_class == _ACE, next_counts)
+        for i, p in enumerate(sub):
+            if p:
+                result[i] += probability * p
+    return tuple(result)
+
+
+def dealer_outcome_vector(up_rank_class, counts, peeked=False):
+    """
+    計算莊家在指定明牌下的最終結果機率向量 (順序見 OUTCOMES)。
+    Args:
+        up_rank_class (int): 莊家明牌的點數類別 (0 = A, 9 = 10 點牌)。
+        counts (tuple): 莊家暗牌與之後要牌可能來自的牌 (未見牌) 的各類別張數。
+        peeked (bool): 是否已知莊家沒有 blackjack (本遊戲在玩家行動前一定會先檢查)。
+    Returns:
+        tuple: 各結果的機率，總和為 1。
+    """
+    counts = tuple(counts)
+    remaining = sum(counts)
+    if remaining == 0:
+        counts = SINGLE_DECK_RANK_COUNTS
+        remaining = sum(counts)
+
+    result = [0.0] * len(OUTCOMES)
+    excluded = 0.0
+    for hole_class, count in enumerate(counts):
+        if not count:
+            continue
+        probability = count / remaining
+        is_natural = {up_rank_class, hole_class} == {_ACE, _TEN}
+        if is_natural:
+            if peeked:
+                excluded += probability
+            else:
+                result[_BLACKJACK] += probability
+            continue
+        next_counts = counts[:hole_class] + (count - 1,) + counts[hole_class + 1:]
+        sub = _dealer_final(up_rank_class + hole_class + 2,
+                            up_rank_class == _ACE or hole_class == _ACE, next_counts)
+        for i, p in enumerate(sub):
+            if p:
+                result[i] += probability * p
+
+    if peeked and excluded:
+        scale = 1.0 / (1.0 - excluded)
+        result = [p * scale for p in result]
+    return tuple(result)
+
+
+def dealer_outcome_distribution(up_card, counts, peeked=False):
+    """
+    dealer_outcome_vector 的 dict 版本。
+    Args:
+        up_card (dict): 莊家明牌，例如 {'rank': 'A', 'suit': 'S'}。
+        counts (tuple): 未見牌的各類別張數。
+        peeked (bool): 是否已知莊家沒有 blackjack。
+    Returns:
+        dict: 例如 {'17': 0.14, ..., 'bust': 0.21, 'blackjack': 0.0}
+    """
+    vector = dealer_outcome_vector(RANK_CLASS[up_card['rank']], counts, peeked)
+    return {outcome: round(p, 6) for outcome, p in zip(OUTCOMES, vector)}
+
+
+def insurance_odds(counts):
+    """
+    莊家明牌為 A 時的保險資訊。保險賠率 2:1，每單位保險的期望值為 3p - 1。
+    Args:
+        counts (tuple): 未見牌 (含莊家暗牌) 的各類別張數。
+    Returns:
+        dict: {'dealer_blackjack_probability': p, 'insurance_ev_per_unit': ev, 'recommended': bool}
+    """
+    remaining = sum(counts)
+    p = counts[_TEN] / remaining if remaining else SINGLE_DECK_RANK_COUNTS[_TEN] / 52
+    ev = 3 * p - 1
+    return {
+        'dealer_blackjack_probability': round(p, 6),
+        'insurance_ev_per_unit': round(ev, 6),
+        'recommended': ev > 0,
+    }
+
+
+def cache_info():
+    return _dealer_final.cache_info()
@@ -0,0 +1,155 @@
+# games/black_jack/shoe.py
+import random
+from array import array
+
+from games.cards import CARD_CODES, CARD_TABLE as CARD_TABLE_BY_CODE, DEFAULT_SHUFFLE, shuffle_codes, validate_generator
+
+# 牌靴牌碼 -> 牌 的對照表，順序與 21點 utils.create_deck() 相同 (牌碼 = 花色索引 * 13 + 點數索引，點數 2..A)。
+# 牌本身是 games/cards.py 預建的不可變 Card；保留原本的順序，同一個種子洗出的牌序與既有紀錄相同
+CARD_TABLE = tuple(CARD_TABLE_BY_CODE[CARD_CODES[(rank, suit)]]
+                   for suit in 'HDCS' for rank in '23456789TJQKA')
+CARDS_PER_DECK = len(CARD_TABLE)
+MAX_DECKS = 8
+
+# 點數類別: 0 = A, 1..8 = 2..9, 9 = 10/J/Q/K
+BJ_RANKS = ('A', '2', '3', '4', '5', '6', '7', '8', '9', 'T')
+RANK_CLASS = {'A': 0, '2': 1, '3': 2, '4': 3, '5': 4, '6': 5, '7': 6, '8': 7, '9': 8,
+              'T': 9, 'J': 9, 'Q': 9, 'K': 9}
+CODE_TO_RANK_CLASS = tuple(RANK_CLASS[card['rank']] for card in CARD_TABLE)
+SINGLE_DECK_RANK_COUNTS = (4, 4, 4, 4, 4, 4, 4, 4, 4, 16)
+
+
+class Shoe:
+    """
+    多副牌的牌靴。
+    以 array('B') 存放牌碼並用游標表示發牌位置，發牌只是切片讀取，
+    不會每局重建牌組。只有在游標越過切牌位置 (cut card) 後，下一局開始前才重新洗牌。
+
+    每次洗牌都使用新的 64 位元種子，牌序只由 (種子, 游標) 決定，
+    因此任何一局都能以 Shoe.from_seed 重建 (見 games/replay.py)。
+    """
+
+    def __init__(self, num_decks=6, penetration=0.75, cut_card=None, rng=None, seed=None, generator=None):
+        """
+        Args:
+            num_decks (int): 牌副數 (1 ~ MAX_DECKS)。
+            penetration (float): 發到多少比例的牌後重新洗牌 (0 < penetration <= 1)。
+            cut_card (int, optional): 直接指定切牌位置 (第幾張牌)，優先於 penetration。
+            rng (random.Random, optional): 產生洗牌種子的亂數產生器，預設為 random.SystemRandom()。
+            seed (int, optional): 第一次洗牌的種子。
+            generator (str, optional): 洗牌產生器 'fast' / 'secure' (見 games/cards.py)。
+        """
+        if not 1 <= num_decks <= MAX_DECKS:
+            raise ValueError(f"num_decks 必須介於 1 與 {MAX_DECKS} 之間。")
+        total_cards = CARDS_PER_DECK * num_decks
+        if cut_card is None:
+            if not 0 < penetration <= 1:
+                raise ValueError("penetration 必須介於 0 與 1 之間。")
+            cut_card = int(total_cards * penetration)
+        if not 0 < cut_card <= total_cards:
+            raise ValueError(f"cut_card 必須介於 1 與 {total_cards} 之間。")
+
+        self.num_decks = num_decks
+        self.cut_card_position = cut_card
+        self.rng = rng if rng is not None else random.SystemRandom()
+        self.generator = validate_generator(generator or DEFAULT_SHUFFLE)
+        self.cards = array('B')
+        self.seed = None       # 目前牌序的洗牌種子
+        self.position = 0      # 下一張要發的牌
+        self.round_start = 0   # 本局第一張牌的位置，之前的都是棄牌
+        self.shuffle_count = 0
+        self._exhausted = False  # 局中牌不夠而把棄牌洗回後，下一局開始前要重新洗整個牌靴
+        self._remaining_counts = []  # 尚未發出的牌在各點數類別的張數，隨發牌遞減
+        self.shuffle(seed)
+
+    @classmethod
+    def from_seed(cls, seed, position=0, num_decks=6, cut_card=None, generator=None):
+        """
+        重建以 seed 洗牌、已發到 position 的牌靴。
+        Returns:
+            Shoe
+        """
+        shoe = cls(num_decks=num_decks, cut_card=cut_card, seed=seed, generator=generator)
+        shoe.position = shoe.round_start = position
+        for code in shoe.cards[:position]:
+            shoe._remaining_counts[CODE_TO_RANK_CLASS[code]] -= 1
+        return shoe
+
+    def __len__(self):
+        return len(self.cards)
+
+    @property
+    def remaining(self):
+        return len(self.cards) - self.position
+
+    @property
+    def needs_shuffle(self):
+        return self.position >= self.cut_card_position or self._exhausted
+
+    def shuffle(self, seed=None):
+        """
+        將整個牌靴重新洗牌並把游標歸零。
+        Args:
+            seed (int, optional): 洗牌種子，未指定時由 self.rng 產生。
+        """
+        self.seed = seed if seed is not None else self.rng.getrandbits(64)
+        self.cards = array('B', range(CARDS_PER_DECK)) * self.num_decks
+        shuffle_codes(self.cards, self.seed, self.generator)
+        self._exhausted = False
+        self.position = 0
+        self.round_start = 0
+        self.shuffle_count += 1
+        self._remaining_counts = [count * self.num_decks for count in SINGLE_DECK_RANK_COUNTS]
+
+    def begin_round(self):
+        """
+        每局開始時呼叫。若已越過切牌位置則先重新洗牌。
+        Returns:
+            bool: 本次是否重新洗牌。
+        """
+        reshuffled = False
+        if self.needs_shuffle:
+            self.shuffle()
+            reshuffled = True
+        self.round_start = self.position
+        return reshuffled
+
+    def deal(self, num_cards):
+        """
+        從牌靴發出指定張數的牌。
+        若剩餘牌數不足 (切牌位置設得太深)，會把棄牌與剩餘的牌一起重新洗牌，
+        本局已發出的牌保持不動。
+        Returns:
+            list: 發出的牌 (dict)。
+        """
+        if self.remaining < num_cards:
+            self._reshuffle_discards()
+        start = self.position
+        self.position = start + num_cards
+        dealt_codes = self.cards[start:self.position]
+        remaining_counts = self._remaining_counts
+        for code in dealt_codes:
+            remaining_counts[CODE_TO_RANK_CLASS[code]] -= 1
+        return [CARD_TABLE[code] for code in dealt_codes]
+
+    def _reshuffle_discards(self):
+        in_play = self.cards[self.round_start:self.position]
+        rest = array('B', sorted(self.cards[:self.round_start] + self.cards[self.position:]))
+        # 以 (種子, 游標) 導出洗牌順序並從排序後的棄牌開始洗，重播時可得到相同的結果
+        shuffle_codes(rest, f"{self.seed}:{self.position}", self.generator)
+        self._exhausted = True
+        self.cards = in_play + rest
+        self.round_start = 0
+        self.position = len(in_play)
+        self.shuffle_count += 1
+        self._remaining_counts = [count * self.num_decks for count in SINGLE_DECK_RANK_COUNTS]
+        for code in in_play:
+            self._remaining_counts[CODE_TO_RANK_CLASS[code]] -= 1
+
+    def dealt_this_round(self):
+        """返回本局目前為止發出的牌碼。"""
+        return self.cards[self.round_start:self.position]
+
+    def remaining_rank_counts(self):
+        """返回尚未發出的牌在各點數類別 (A, 2..9, 10) 的張數 tuple。"""
+        return tuple(self._remaining_counts)
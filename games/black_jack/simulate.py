@@ -0,0 +1,220 @@
+# games/black_jack/simulate.py
+"""
+21點無頭模擬器。
+
+直接驅動 BlackJackGame (start_game / handle_action / _dealer_turn / _settle_round)，
+因此量測到的期望值與線上遊戲使用同一份規則程式碼。
+工作以 ProcessPoolExecutor 分散到多個行程，每個區塊有自己獨立播種的亂數串流。
+
+用法:
+    python -m games.black_jack.simulate --rounds 1000000 --decks 6 --strategy mimic_dealer --workers 8
+"""
+import argparse
+import functools
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from games.event_sink import NullSink
+from games.profiler import batch_run
+from games.scheduler import ManualScheduler
+from .logic import BlackJackGame
+from .shoe import Shoe
+from .strategy import get_strategy_table
+from .utils import calculate_hand_value, is_soft_hand
+
+SIM_SID = 'sim-player'
+SIM_CHIPS = 10 ** 12
+
+
+# --- 玩家策略: (手牌, 莊家明牌, 可否加倍) -> 'hit' / 'stand' / 'double' ---
+
+def strategy_always_stand(hand, dealer_up_card, can_double):
+    return 'stand'
+
+
+def strategy_mimic_dealer(hand, dealer_up_card, can_double):
+    """與莊家相同: 17 點以下要牌。"""
+    return 'hit' if calculate_hand_value(hand) < 17 else 'stand'
+
+
+def strategy_never_bust(hand, dealer_up_card, can_double):
+    """硬牌 12 點以上停牌，軟牌 18 點以上停牌。"""
+    value = calculate_hand_value(hand)
+    if is_soft_hand(hand):
+        return 'hit' if value < 18 else 'stand'
+    return 'hit' if value < 12 else 'stand'
+
+
+def strategy_basic(hand, dealer_up_card, can_double, table=None):
+    """依 strategy.py 的基本策略表行動 (run_chunk 會綁定對應規則的表)。"""
+    table = table or get_strategy_table()
+    return table.recommend(hand, dealer_up_card, can_double)
+
+
+STRATEGIES = {
+    'stand': strategy_always_stand,
+    'mimic_dealer': strategy_mimic_dealer,
+    'never_bust': strategy_never_bust,
+    'basic': strategy_basic,
+}
+
+
+def derive_seed(base_seed, stream_index):
+    """由主種子與串流編號導出 64 位元子種子，各區塊的亂數串流互不相關。"""
+    digest = hashlib.sha256(f"{base_seed}:{stream_index}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def create_simulation_game(options, seed):
+    """建立一個只有模擬玩家、使用獨立亂數串流牌靴的 BlackJackGame。"""
+    game = BlackJackGame(f"sim-{seed:x}", [], NullSink(), options)
+    game.scheduler = ManualScheduler()  # 模擬不推進時間，行動期限永遠不會觸發
+    game.shoe = Shoe(num_decks=game.shoe.num_decks, cut_card=game.shoe.cut_card_position,
+                     rng=random.Random(seed))
+    game.add_player(SIM_SID, {'name': 'Simulator'})
+    game.players[SIM_SID]['chips'] = SIM_CHIPS
+    return game
+
+
+def play_round(game, strategy, bet):
+    """
+    以線上相同的介面打一局。
+    Returns:
+        float: 以初始下注為單位的淨輸贏。
+    """
+    player = game.players[SIM_SID]
+    chips_before = player['chips']
+    game.start_game(SIM_SID)
+    game.handle_action(SIM_SID, 'bet', {'amount': bet})
+    if game.game_state['game_phase'] == 'insurance':
+        game.handle_action(SIM_SID, 'decline_insurance')
+    while game.is_game_in_progress and game.game_state['game_phase'] == 'player_turns' \
+            and game.game_state['current_turn_sid'] == SIM_SID:
+        action = strategy(player['hand'], game.game_state['dealer_hand'][0], len(player['hand']) == 2)
+        if not game.handle_action(SIM_SID, action):
+            game.handle_action(SIM_SID, 'stand')
+    return (player['chips'] - chips_before) / bet
+
+
+def run_chunk(task):
+    """
+    在子行程中模擬一個區塊。
+    Args:
+        task (tuple): (rounds, strategy_name, options, bet, seed)
+    Returns:
+        tuple: (局數, 淨輸贏總和, 淨輸贏平方和, 耗時秒數)
+    """
+    rounds, strategy_name, options, bet, seed = task
+    strategy = STRATEGIES[strategy_name]
+    if strategy is strategy_basic:
+        table = get_strategy_table(options.get('num_decks', 6), options.get('blackjack_payout', 1.5))
+        strategy = functools.partial(strategy_basic, table=table)
+    total = 0.0
+    total_sq = 0.0
+    start = time.perf_counter()
+    with batch_run():
+        game = create_simulation_game(options, seed)
+        for _ in range(rounds):
+            result = play_round(game, strategy, bet)
+            total += result
+            total_sq += result * result
+    return rounds, total, total_sq, time.perf_counter() - start
+
+
+def simulate(rounds, strategy='mimic_dealer', num_decks=6, penetration=0.75, blackjack_payout=1.5,
+             bet=10, workers=None, seed=None, chunk_size=50000):
+    """
+    執行模擬並彙總結果。
+    Returns:
+        dict: rounds, ev, variance, std_dev, std_error, hands_per_second 等欄位。
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"未知的策略: {strategy}。可用: {', '.join(sorted(STRATEGIES))}")
+    workers = workers or os.cpu_count() or 1
+    seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+    options = {
+        'num_decks': num_decks, 'penetration': penetration,
+        'blackjack_payout': blackjack_payout,
+        'min_bet': bet, 'max_bet': bet, 'buy_in': SIM_CHIPS,
+        'outcome_hints': False,  # 模擬不需要每局計算莊家機率提示
+        'betting_seconds': 0,    # 只有一位玩家，不需要下注期限計時器
+        'timeout_seconds': 0,
+        'hand_history': False,   # 模擬局不寫牌局紀錄
+    }
+    tasks = []
+    remaining = rounds
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        tasks.append((size, strategy, options, bet, derive_seed(seed, len(tasks))))
+        remaining -= size
+
+    start = time.perf_counter()
+    if workers == 1:
+        chunk_results = [run_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk_results = list(pool.map(run_chunk, tasks))
+    wall_time = time.perf_counter() - start
+
+    n = sum(r[0] for r in chunk_results)
+    total = sum(r[1] for r in chunk_results)
+    total_sq = sum(r[2] for r in chunk_results)
+    mean = total / n if n else 0.0
+    variance = (total_sq / n - mean * mean) * n / (n - 1) if n > 1 else 0.0
+    std_dev = math.sqrt(max(variance, 0.0))
+    return {
+        'rounds': n,
+        'strategy': strategy,
+        'num_decks': num_decks,
+        'penetration': penetration,
+        'blackjack_payout': blackjack_payout,
+        'seed': seed,
+        'workers': workers,
+        'ev': mean,
+        'house_edge': -mean,
+        'variance': variance,
+        'std_dev': std_dev,
+        'std_error': std_dev / math.sqrt(n) if n else 0.0,
+        'wall_seconds': wall_time,
+        'hands_per_second': n / wall_time if wall_time > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="21點規則模擬器 (使用線上 BlackJackGame 的規則程式碼)")
+    parser.add_argument('--rounds', type=int, default=100000, help="模擬局數")
+    parser.add_argument('--strategy', default='mimic_dealer', choices=sorted(STRATEGIES), help="玩家策略")
+    parser.add_argument('--decks', type=int, default=6, help="牌靴副數")
+    parser.add_argument('--penetration', type=float, default=0.75, help="洗牌前發牌比例")
+    parser.add_argument('--payout', type=float, default=1.5, help="自然21點賠率")
+    parser.add_argument('--bet', type=int, default=10, help="每局下注")
+    parser.add_argument('--workers', type=int, default=None, help="行程數 (預設為 CPU 數)")
+    parser.add_argument('--seed', type=int, default=None, help="主亂數種子")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="每個工作區塊的局數")
+    parser.add_argument('--json', action='store_true', help="以 JSON 輸出結果")
+    args = parser.parse_args(argv)
+
+    result = simulate(args.rounds, strategy=args.strategy, num_decks=args.decks, penetration=args.penetration,
+                      blackjack_payout=args.payout, bet=args.bet, workers=args.workers, seed=args.seed,
+                      chunk_size=args.chunk_size)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+        return
+    print(f"局數:          {result['rounds']}")
+    print(f"策略:          {result['strategy']} ({result['num_decks']} 副牌, 穿透率 {result['penetration']}, 21點賠率 {result['blackjack_payout']})")
+    print(f"種子:          {result['seed']}")
+    print(f"期望值 (EV):   {result['ev']:+.5f} ± {result['std_error']:.5f} 單位/局")
+    print(f"莊家優勢:      {result['house_edge'] * 100:.3f}%")
+    print(f"變異數:        {result['variance']:.5f} (標準差 {result['std_dev']:.5f})")
+    print(f"速度:          {result['hands_per_second']:.0f} 局/秒 ({result['workers']} 個行程, {result['wall_seconds']:.2f} 秒)")
+
+
+if __name__ == '__main__':
+    main()
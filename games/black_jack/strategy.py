@@ -0,0 +1,246 @@
+# games/black_jack/strategy.py
+"""
+21點基本策略與期望值查表。
+
+規則與 BlackJackGame 相同: 莊家所有 17 點停牌、玩家行動前莊家已先檢查 blackjack、
+只有初始兩張牌可以雙倍下注、沒有分牌與投降。
+
+表格以組合分析計算: 莊家最終點數分布來自 odds.dealer_outcome_vector (peeked=True)，
+玩家要牌的機率使用整副牌靴的組成 (不扣除已見的牌)。
+每種規則只計算一次，之後以 array 形式存到磁碟，載入後查詢為 O(1)。
+"""
+import os
+from array import array
+
+from .odds import dealer_outcome_vector
+from .shoe import RANK_CLASS, SINGLE_DECK_RANK_COUNTS
+from .utils import calculate_hand_value, is_soft_hand
+
+TABLE_VERSION = 1
+ACTIONS = ('stand', 'hit', 'double')
+_STAND, _HIT, _DOUBLE = 0, 1, 2
+
+MAX_TOTAL = 21
+_NUM_UP = 10                    # 莊家明牌的點數類別數
+_NUM_TOTALS = MAX_TOTAL + 1     # 以最佳點數 0..21 為索引
+_TABLE_SIZE = 2 * _NUM_TOTALS * _NUM_UP  # (軟/硬, 點數, 明牌)
+_ACE = 0
+_TEN = 9
+
+TABLE_DIR = os.getenv('BLACKJACK_TABLE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables'))
+
+_loaded_tables = {}
+
+
+def _index(total, soft, up_rank_class):
+    return ((1 if soft else 0) * _NUM_TOTALS + total) * _NUM_UP + up_rank_class
+
+
+class StrategyTable:
+    """
+    一種規則下的基本策略表。
+    evs 依序存放停牌、要牌、雙倍下注的期望值 (以初始下注為單位)，
+    actions 存放可雙倍與不可雙倍兩種情況下的最佳動作代碼。
+    """
+    __slots__ = ('num_decks', 'blackjack_payout', 'evs', 'actions', 'round_ev')
+
+    def __init__(self, num_decks, blackjack_payout, evs, actions, round_ev):
+        self.num_decks = num_decks
+        self.blackjack_payout = blackjack_payout
+        self.evs = evs          # array('d')，長度 3 * _TABLE_SIZE
+        self.actions = actions  # array('B')，長度 2 * _TABLE_SIZE
+        self.round_ev = round_ev  # 依本表打法，每局 (下注前) 的期望值
+
+    def action(self, total, soft, up_rank_class, can_double=True):
+        """
+        Args:
+            total (int): 玩家手牌的最佳點數。
+            soft (bool): 是否為軟牌 (有 A 計為 11)。
+            up_rank_class (int): 莊家明牌點數類別 (0 = A, 9 = 10 點牌)。
+            can_double (bool): 目前是否允許雙倍下注。
+        Returns:
+            str: 'hit'、'stand' 或 'double'。
+        """
+        if total >= MAX_TOTAL:
+            return 'stand'
+        offset = 0 if can_double else _TABLE_SIZE
+        return ACTIONS[self.actions[offset + _index(total, soft, up_rank_class)]]
+
+    def expected_values(self, total, soft, up_rank_class):
+        """返回 {'stand': ev, 'hit': ev, 'double': ev}。"""
+        i = _index(min(total, MAX_TOTAL), soft, up_rank_class)
+        return {name: self.evs[k * _TABLE_SIZE + i] for k, name in enumerate(ACTIONS)}
+
+    def recommend(self, hand, dealer_up_card, can_double=True):
+        """
+        以手牌與莊家明牌 (dict) 直接查詢建議動作。
+        Returns:
+            str: 'hit'、'stand' 或 'double'。
+        """
+        return self.action(calculate_hand_value(hand), is_soft_hand(hand),
+                           RANK_CLASS[dealer_up_card['rank']], can_double)
+
+
+def _stand_ev(total, dealer_vector):
+    """玩家以 total 點停牌時的期望值。dealer_vector 依序為 17..21、爆牌的機率。"""
+    if total > MAX_TOTAL:
+        return -1.0
+    win = dealer_vector[5]
+    lose = 0.0
+    for i in range(5):
+        dealer_total = 17 + i
+        if total > dealer_total:
+            win += dealer_vector[i]
+        elif total < dealer_total:
+            lose += dealer_vector[i]
+    return win - lose
+
+
+def _best_total(hard_total, has_ace):
+    if has_ace and hard_total + 10 <= MAX_TOTAL:
+        return hard_total + 10, True
+    return hard_total, False
+
+
+def build_strategy_table(num_decks=6, blackjack_payout=1.5):
+    """
+    以組合分析計算基本策略表。
+    Returns:
+        StrategyTable
+    """
+    full_counts = tuple(count * num_decks for count in SINGLE_DECK_RANK_COUNTS)
+    full_total = sum(full_counts)
+    draw_probabilities = [count / full_total for count in full_counts]
+
+    evs = array('d', [0.0]) * (3 * _TABLE_SIZE)
+    actions = array('B', [_STAND]) * (2 * _TABLE_SIZE)
+    round_ev = 0.0
+
+    for up in range(_NUM_UP):
+        counts = list(full_counts)
+        counts[up] -= 1
+        dealer_vector = dealer_outcome_vector(up, counts, peeked=True)
+        stand_cache = [_stand_ev(total, dealer_vector) for total in range(MAX_TOTAL + 1)]
+        best_cache = {}
+
+        def stand_value(total):
+            return stand_cache[total] if total <= MAX_TOTAL else -1.0
+
+        def best_ev(hard_total, has_ace):
+            # 繼續做最佳選擇 (停牌或要牌) 的期望值；要牌後不能再雙倍
+            if hard_total > MAX_TOTAL:
+                return -1.0
+            key = (hard_total, has_ace)
+            value = best_cache.get(key)
+            if value is None:
+                total, _ = _best_total(hard_total, has_ace)
+                value = max(stand_value(total), hit_ev(hard_total, has_ace))
+                best_cache[key] = value
+            return value
+
+        def hit_ev(hard_total, has_ace):
+            total, _ = _best_total(hard_total, has_ace)
+            if total >= MAX_TOTAL:
+                return -1.0  # 達到 21 點後遊戲不允許再要牌
+            return sum(p * best_ev(hard_total + rank_class + 1, has_ace or rank_class == _ACE)
+                       for rank_class, p in enumerate(draw_probabilities))
+
+        def double_ev(hard_total, has_ace):
+            value = 0.0
+            for rank_class, p in enumerate(draw_probabilities):
+                total, _ = _best_total(hard_total + rank_class + 1, has_ace or rank_class == _ACE)
+                value += p * stand_value(total)
+            return 2.0 * value
+
+        # 每個 (最佳點數, 軟/硬) 狀態取一個代表的 (硬點數, 是否有 A)：
+        # 硬牌中即使有 A 也只能算 1，之後的發展與沒有 A 相同
+        for soft in (False, True):
+            for total in range(_NUM_TOTALS):
+                if soft and total < 12:
+                    continue
+                hard_total, has_ace = (total - 10, True) if soft else (total, False)
+                i = _index(total, soft, up)
+                stand = stand_value(total)
+                hit = hit_ev(hard_total, has_ace)
+                double = double_ev(hard_total, has_ace)
+                evs[i] = stand
+                evs[_TABLE_SIZE + i] = hit
+                evs[2 * _TABLE_SIZE + i] = double
+                no_double_action = _HIT if hit > stand else _STAND
+                no_double_value = max(hit, stand)
+                actions[_TABLE_SIZE + i] = no_double_action
+                actions[i] = _DOUBLE if double > no_double_value else no_double_action
+
+        # 整局期望值: 玩家兩張牌與莊家明牌以整副牌靴的機率近似
+        up_probability = draw_probabilities[up]
+        if up == _ACE:
+            dealer_blackjack = draw_probabilities[_TEN]
+        elif up == _TEN:
+            dealer_blackjack = draw_probabilities[_ACE]
+        else:
+            dealer_blackjack = 0.0
+        for first in range(_NUM_UP):
+            for second in range(_NUM_UP):
+                p = up_probability * draw_probabilities[first] * draw_probabilities[second]
+                if {first, second} == {_ACE, _TEN}:
+                    round_ev += p * (1 - dealer_blackjack) * blackjack_payout
+                    continue
+                total, soft = _best_total(first + second + 2, _ACE in (first, second))
+                i = _index(total, soft, up)
+                best = max(evs[i], evs[_TABLE_SIZE + i], evs[2 * _TABLE_SIZE + i])
+                round_ev += p * (dealer_blackjack * -1.0 + (1 - dealer_blackjack) * best)
+
+    return StrategyTable(num_decks, blackjack_payout, evs, actions, round_ev)
+
+
+def _table_path(num_decks, blackjack_payout):
+    payout = f"{float(blackjack_payout):g}".replace('.', '_')
+    return os.path.join(TABLE_DIR, f"basic_strategy_v{TABLE_VERSION}_d{num_decks}_bj{payout}.bin")
+
+
+def _save_table(table, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        table.evs.tofile(f)
+        array('d', [table.round_ev]).tofile(f)
+        table.actions.tofile(f)
+    os.replace(tmp_path, path)  # 原子替換，避免其他行程讀到寫一半的檔案
+
+
+def _load_table(path, num_decks, blackjack_payout):
+    evs = array('d')
+    round_ev = array('d')
+    actions = array('B')
+    with open(path, 'rb') as f:
+        evs.fromfile(f, 3 * _TABLE_SIZE)
+        round_ev.fromfile(f, 1)
+        actions.fromfile(f, 2 * _TABLE_SIZE)
+        if f.read(1):
+            raise ValueError("策略表檔案長度不符。")
+    return StrategyTable(num_decks, blackjack_payout, evs, actions, round_ev[0])
+
+
+def get_strategy_table(num_decks=6, blackjack_payout=1.5):
+    """
+    取得指定規則的基本策略表。依序使用記憶體快取、磁碟快取，最後才重新計算並寫回磁碟。
+    Returns:
+        StrategyTable
+    """
+    key = (int(num_decks), float(blackjack_payout))
+    table = _loaded_tables.get(key)
+    if table is not None:
+        return table
+
+    path = _table_path(*key)
+    try:
+        table = _load_table(path, *key)
+    except (OSError, EOFError, ValueError):
+        table = build_strategy_table(*key)
+        try:
+            _save_table(table, path)
+        except OSError as e:
+            print(f"[21點策略表] 無法寫入快取檔案 {path}: {e}")
+    _loaded_tables[key] = table
+    return table
+
@@ -70,6 +70,24 @@ def calculate_hand_value(hand):
     
     return value
 
+def is_soft_hand(hand):
+    """
+    Check if a hand is soft (contains an Ace currently counted as 11).
+    Args:
+        hand (list): A list of card dictionaries.
+    Returns:
+        bool: True if the hand is soft, False otherwise.
+    """
+    hard_value = 0
+    has_ace = False
+    for card in hand:
+        if card['rank'] == 'A':
+            has_ace = True
+            hard_value += 1
+        else:
+            hard_value += RANK_ORDER[card['rank']]
+    return has_ace and hard_value + 10 <= 21
+
 def is_blackjack(hand):
     """
     Check if a hand is a natural blackjack (A + 10-value card).
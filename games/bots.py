@@ -0,0 +1,485 @@
+# games/bots.py
+"""
+模擬玩家 (機器人)，用於補位與壓力測試。
+
+機器人和真人走同一條路: 以 add_player 入座、以 handle_action 行動，遊戲邏輯不知道對方是機器人。
+
+    - BotRunner 以共用排程器每 tick_interval 秒掃描一次有機器人的牌桌，
+      輪到機器人 (或 21 點下注/保險階段尚未決定) 時把「決策視圖」交給執行器計算，
+    - 決策在執行緒池或行程池中執行 (executor='thread' / 'process')，算勝率等耗 CPU 的策略不會卡住事件迴圈；
+      'inline' 則在 tick 中直接計算 (無頭模擬可完全重現)，
+    - 結果在之後的 tick 中 (且不早於模擬的思考時間) 才套用，套用前確認局面沒有改變，過期的決策直接丟棄。
+
+策略 (STRATEGIES[遊戲類型][名稱]) 是模組層級的函式 strategy(view, rng) -> (動作, 金額)，
+view 只包含可序列化的資料，因此可以送進子行程。
+    德州撲克: random、rule (依起手牌與成牌牌型)、equity (evaluator.estimate_equity 的蒙地卡羅勝率對比底池賠率)
+    21點:     random、rule (和莊家一樣 17 點以下要牌)、equity (strategy.py 的期望值最佳基本策略)
+
+用法 (單一行程內的浸泡測試):
+    python -m games.bots --game texas_holdem --tables 300 --strategy equity --executor process --seconds 3600
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from games.black_jack.strategy import get_strategy_table
+from games.black_jack.utils import calculate_hand_value
+from games.cards import card_code
+from games.scheduler import get_scheduler
+from games.texas_holdem.evaluator import CODE_VALUE, estimate_equity, hand_category, hand_strength
+from games.texas_holdem.utils import ONE_PAIR, TWO_PAIR
+
+BOT_EXECUTORS = ('inline', 'thread', 'process')
+DEFAULT_BOT_EXECUTOR = os.getenv('BOT_EXECUTOR', 'process')
+
+
+# --- 德州撲克策略: view -> ('fold' | 'check' | 'call' | 'raise', 加注後的街道總下注) ---
+
+def texas_random(view, rng):
+    roll = rng.random()
+    if view['to_call'] > 0 and roll < 0.3:
+        return 'fold', 0
+    if roll < 0.85:
+        return ('call' if view['to_call'] > 0 else 'check'), 0
+    return 'raise', view['min_raise_to'] + rng.randint(0, 3) * view['big_blind']
+
+
+def _preflop_score(hole):
+    high, low = sorted((CODE_VALUE[code] for code in hole), reverse=True)
+    suited = hole[0] // 13 == hole[1] // 13
+    if high == low:
+        return 3 if high >= 9 else 2
+    if high == 14 and (low >= 10 or suited):
+        return 3 if low >= 12 else 2
+    if low >= 10 or (suited and high - low == 1 and low >= 5):
+        return 2
+    if high >= 12 or suited:
+        return 1
+    return 0
+
+
+def texas_rule(view, rng):
+    to_call = view['to_call']
+    if view['board']:
+        category = hand_category(hand_strength(view['hole'] + view['board']))
+        score = 3 if category >= TWO_PAIR else 2 if category == ONE_PAIR else 0
+    else:
+        score = _preflop_score(view['hole'])
+    if score >= 3:
+        return 'raise', max(view['min_raise_to'], view['to_match'] + view['pot'] // 2)
+    if score == 2 or (score == 1 and to_call <= view['big_blind']):
+        return ('call' if to_call > 0 else 'check'), 0
+    return ('fold' if to_call > 0 else 'check'), 0
+
+
+def texas_equity(view, rng):
+    to_call = view['to_call']
+    equity = estimate_equity(view['hole'], view['board'], view['opponents'],
+                             iterations=view.get('iterations', 300), seed=rng.getrandbits(64))
+    pot_odds = to_call / (view['pot'] + to_call) if to_call > 0 else 0.0
+    # 勝率明顯高於平均 (1 / 玩家數) 時加注，高於底池賠率時跟注
+    if equity > min(0.85, 1.6 / (view['opponents'] + 1)):
+        return 'raise', max(view['min_raise_to'], view['to_match'] + view['pot'])
+    if equity >= pot_odds:
+        return ('call' if to_call > 0 else 'check'), 0
+    return ('fold' if to_call > 0 else 'check'), 0
+
+
+# --- 21點策略: view -> ('bet' | 'insurance' | 'decline_insurance' | 'hit' | 'stand' | 'double', 金額) ---
+
+def black_jack_random(view, rng):
+    if view['phase'] == 'betting':
+        return 'bet', rng.randint(view['min_bet'], view['max_bet'])
+    if view['phase'] == 'insurance':
+        return ('insurance' if rng.random() < 0.2 else 'decline_insurance'), 0
+    return rng.choice(('hit', 'stand', 'double') if view['can_double'] else ('hit', 'stand')), 0
+
+
+def black_jack_rule(view, rng):
+    if view['phase'] == 'betting':
+        return 'bet', view['min_bet']
+    if view['phase'] == 'insurance':
+        return 'decline_insurance', 0
+    return ('hit' if calculate_hand_value(view['hand']) < 17 else 'stand'), 0
+
+
+def black_jack_equity(view, rng):
+    if view['phase'] == 'betting':
+        return 'bet', view['min_bet']
+    if view['phase'] == 'insurance':
+        return 'decline_insurance', 0  # 基本策略永遠不買保險
+    table = get_strategy_table(view['num_decks'], view['blackjack_payout'])
+    return table.recommend(view['hand'], view['dealer_up_card'], view['can_double']), 0
+
+
+STRATEGIES = {
+    'texas_holdem': {'random': texas_random, 'rule': texas_rule, 'equity': texas_equity},
+    'black_jack': {'random': black_jack_random, 'rule': black_jack_rule, 'equity': black_jack_equity},
+}
+
+
+def decide(game_type, strategy, view, seed):
+    """在執行器中執行的決策 (模組層級函式，可送進子行程)。"""
+    return STRATEGIES[game_type][strategy](view, random.Random(seed))
+
+
+def _timed_decide(game_type, strategy, view, seed):
+    started = time.perf_counter()
+    decision = decide(game_type, strategy, view, seed)
+    return decision, time.perf_counter() - started
+
+
+# --- 決策視圖與動作 ---
+
+def decision_key(game, player_sid):
+    """
+    機器人目前需要決定的事 (None 表示不用行動)。同一個鍵只會送出一次決策，
+    套用結果前鍵若已改變 (換人、換局、已超時) 就丟棄該決策。
+    """
+    if not game.is_game_in_progress or player_sid not in game.players:
+        return None
+    state = game.game_state
+    player = game.players[player_sid]
+    if game.get_game_type() == 'texas_holdem':
+        if state.get('current_turn_sid') != player_sid:
+            return None
+        # 每次輪到玩家時計時器編號都會遞增
+        return (game.current_hand_seed, game.player_timer_instance_ids.get(player_sid))
+    phase = state.get('game_phase')
+    if phase == 'betting':
+        if player_sid not in state['round_active_players_sids_in_order'] or player['bet'] > 0:
+            return None
+    elif phase == 'insurance':
+        if not player['is_active_in_round'] or player['has_insurance'] is not None:
+            return None
+    elif phase != 'player_turns' or state.get('current_turn_sid') != player_sid:
+        return None
+    return (game.current_hand_seed, phase, len(player['hand']))
+
+
+def build_view(game, player_sid, equity_iterations=300):
+    """機器人決策需要的局面 (只含可序列化的資料)。"""
+    state = game.game_state
+    player = game.players[player_sid]
+    if game.get_game_type() == 'texas_holdem':
+        to_match = state['current_street_bet_to_match']
+        opponents = sum(1 for sid, p in game.players.items()
+                        if sid != player_sid and p.get('is_active_in_round'))
+        return {
+            'hole': [card_code(card) for card in player['hand']],
+            'board': [card_code(card) for card in state['community_cards']],
+            'to_match': to_match,
+            'to_call': max(0, to_match - player['bet_in_current_street']),
+            'min_raise_to': to_match + max(state.get('min_next_raise_increment') or 0, state['big_blind']),
+            'pot': state['pot'],
+            'chips': player['chips'],
+            'big_blind': state['big_blind'],
+            'opponents': opponents,
+            'iterations': equity_iterations,
+        }
+    hand = list(player['hand'])
+    return {
+        'phase': state['game_phase'],
+        'hand': hand,
+        'dealer_up_card': state['dealer_hand'][0] if state['dealer_hand'] else None,
+        'can_double': len(hand) == 2 and player['chips'] >= player['bet'],
+        'min_bet': state['min_bet'],
+        'max_bet': max(state['min_bet'], int(min(state['max_bet'], player['chips']))),
+        'num_decks': game.shoe.num_decks,
+        'blackjack_payout': state['blackjack_payout'],
+    }
+
+
+def apply_decision(game, player_sid, action, amount):
+    """把策略的決定轉成合法的 handle_action 呼叫 (例如無人下注時把 raise 換成 bet)。"""
+    if game.get_game_type() == 'texas_holdem':
+        state = game.game_state
+        player = game.players[player_sid]
+        to_match = state['current_street_bet_to_match']
+        to_call = to_match - player['bet_in_current_street']
+        max_total = player['bet_in_current_street'] + player['chips']
+        if action == 'raise' and player['chips'] > to_call:
+            amount = min(max(amount, to_match + max(state.get('min_next_raise_increment') or 0, state['big_blind'])), max_total)
+            if to_match == 0:
+                return game.handle_action(player_sid, 'bet', {'amount': amount})
+            return game.handle_action(player_sid, 'raise', {'amount': amount})
+        if action == 'fold' and to_call <= 0:
+            action = 'check'
+        elif action in ('check', 'call', 'raise'):
+            action = 'call' if to_call > 0 else 'check'
+        return game.handle_action(player_sid, action)
+
+    if action == 'bet':
+        return game.handle_action(player_sid, 'bet', {'amount': amount})
+    if action == 'insurance':
+        return game.handle_action(player_sid, 'insurance', {'take': True})
+    if action == 'double' and len(game.players[player_sid]['hand']) != 2:
+        action = 'hit'
+    return game.handle_action(player_sid, action)
+
+
+class BotRunner:
+    def __init__(self, scheduler=None, executor=None, workers=None, tick_interval=0.2,
+                 think_time=(0.5, 2.0), seed=None, equity_iterations=300):
+        """
+        Args:
+            scheduler (Scheduler, optional): 執行 tick 的排程器 (預設為行程共用的排程器)。
+            executor (str, optional): 'inline'、'thread' 或 'process' (預設為環境變數 BOT_EXECUTOR 或 'process')。
+            workers (int, optional): 執行緒/行程數。
+            tick_interval (float): 掃描牌桌與收取決策結果的間隔 (秒)。
+            think_time (tuple): 每次決策模擬的思考時間範圍 (秒)。
+            seed (optional): 決策與思考時間的亂數種子。
+            equity_iterations (int): equity 策略每次決策的模擬次數。
+        """
+        self.scheduler = scheduler or get_scheduler()
+        self.executor_kind = executor or DEFAULT_BOT_EXECUTOR
+        if self.executor_kind not in BOT_EXECUTORS:
+            raise ValueError(f"未知的機器人執行器: {self.executor_kind}。可用: {', '.join(BOT_EXECUTORS)}")
+        self.workers = workers
+        self.executor = None  # 第一次需要時才建立
+        self.tick_interval = float(tick_interval)
+        self.think_time = think_time
+        self.rng = random.Random(seed) if seed is not None else random.SystemRandom()
+        self.equity_iterations = equity_iterations
+
+        self.tables = {}   # room_id: {'game', 'bots': {sid: {'strategy', 'key', 'buy_in'}}}
+        self.pending = []  # [{'room_id', 'sid', 'key', 'future', 'ready_at', 'submitted'}]
+        self.tick_timer = None
+        self.bot_counter = 0
+        self.stats = {'decisions': 0, 'stale': 0, 'errors': 0, 'rebuys': 0,
+                      'decision_seconds_total': 0.0, 'decision_seconds_max': 0.0, 'tick_seconds_max': 0.0}
+
+    # --- 入座與離座 ---
+
+    def add_bot(self, game, player_sid, strategy='rule', name=None, chips=None):
+        """讓一個機器人以 add_player 入座。chips 未指定時使用牌桌的 buy_in。"""
+        if strategy not in STRATEGIES[game.get_game_type()]:
+            raise ValueError(f"未知的機器人策略: {strategy}。可用: {', '.join(STRATEGIES[game.get_game_type()])}")
+        buy_in = chips if chips is not None else game.options.get('buy_in', 1000)
+        game.add_player(player_sid, {'name': name or f"Bot_{player_sid[-4:]}", 'chips': buy_in})
+        table = self.tables.get(game.room_id)
+        if table is None:
+            table = self.tables[game.room_id] = {'game': game, 'bots': {}}
+            game.hand_end_listeners.append(self._on_hand_end)
+        table['bots'][player_sid] = {'strategy': strategy, 'key': None, 'buy_in': buy_in}
+        self._ensure_ticking()
+        return player_sid
+
+    def fill_table(self, game, count, strategy='rule', prefix='bot'):
+        """補 count 個機器人入座。Returns: list[str] 機器人的 sid。"""
+        sids = []
+        for _ in range(count):
+            self.bot_counter += 1
+            sids.append(self.add_bot(game, f"{prefix}-{game.room_id}-{self.bot_counter}", strategy))
+        return sids
+
+    def remove_bot(self, game, player_sid):
+        table = self.tables.get(game.room_id)
+        if table is None or table['bots'].pop(player_sid, None) is None:
+            return False
+        game.remove_player(player_sid)
+        if not table['bots']:
+            self.forget_table(game)
+        return True
+
+    def forget_table(self, game):
+        """停止管理一張牌桌 (牌桌被刪除時)；不會移除已入座的機器人。"""
+        table = self.tables.pop(game.room_id, None)
+        if table is not None and self._on_hand_end in game.hand_end_listeners:
+            game.hand_end_listeners.remove(self._on_hand_end)
+
+    def bot_count(self):
+        return sum(len(table['bots']) for table in self.tables.values())
+
+    def _on_hand_end(self, game, results):
+        # 在排程下一局之前補滿輸光的機器人，牌桌才能一直開下去
+        table = self.tables.get(game.room_id)
+        if table is None:
+            return
+        minimum = game.game_state.get('big_blind') or game.game_state.get('min_bet') or 1
+        for sid, bot in table['bots'].items():
+            player = game.players.get(sid)
+            if player is not None and player['chips'] < minimum:
+                player['chips'] = bot['buy_in']
+                self.stats['rebuys'] += 1
+
+    # --- 排程 ---
+
+    def _ensure_ticking(self):
+        if self.tick_timer is None:
+            self.tick_timer = self.scheduler.call_later(self.tick_interval, self._tick, label="bots:tick")
+
+    def stop(self):
+        """停止 tick 並關閉執行器 (尚未套用的決策直接丟棄)。"""
+        if self.tick_timer is not None:
+            self.tick_timer.cancel()
+            self.tick_timer = None
+        self.pending = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _tick(self):
+        self.tick_timer = None
+        started = time.perf_counter()
+        self.tick()
+        self.stats['tick_seconds_max'] = max(self.stats['tick_seconds_max'], time.perf_counter() - started)
+        if self.tables:
+            self._ensure_ticking()
+
+    def tick(self):
+        """收取已完成且思考時間已到的決策並套用，再替新輪到的機器人送出決策。"""
+        now = self.scheduler.now()
+        waiting = []
+        for job in self.pending:
+            if job['ready_at'] > now or not job['future'].done():
+                waiting.append(job)
+            else:
+                self._apply(job)
+        self.pending = waiting
+
+        for room_id, table in self.tables.items():
+            game = table['game']
+            if not game.is_game_in_progress:
+                continue
+            state = game.game_state
+            if game.get_game_type() == 'black_jack' and state.get('game_phase') in ('betting', 'insurance'):
+                candidates = table['bots']  # 所有人同時決定
+            else:
+                turn_sid = state.get('current_turn_sid')
+                candidates = (turn_sid,) if turn_sid in table['bots'] else ()
+            for sid in candidates:
+                bot = table['bots'][sid]
+                key = decision_key(game, sid)
+                if key is None or key == bot['key']:
+                    continue
+                bot['key'] = key
+                self._submit(room_id, game, sid, bot['strategy'], key, now)
+
+    def _submit(self, room_id, game, player_sid, strategy, key, now):
+        args = (game.get_game_type(), strategy, build_view(game, player_sid, self.equity_iterations),
+                self.rng.getrandbits(64))
+        if self.executor_kind == 'inline':
+            future = Future()
+            try:
+                future.set_result(_timed_decide(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            if self.executor is None:
+                pool_class = ThreadPoolExecutor if self.executor_kind == 'thread' else ProcessPoolExecutor
+                self.executor = pool_class(max_workers=self.workers)
+            future = self.executor.submit(_timed_decide, *args)
+        self.pending.append({'room_id': room_id, 'sid': player_sid, 'key': key, 'future': future,
+                             'ready_at': now + self.rng.uniform(*self.think_time)})
+
+    def _apply(self, job):
+        table = self.tables.get(job['room_id'])
+        if table is None or job['sid'] not in table['bots']:
+            return
+        game = table['game']
+        if decision_key(game, job['sid']) != job['key']:
+            self.stats['stale'] += 1
+            return
+        try:
+            (action, amount), elapsed = job['future'].result()
+            self.stats['decision_seconds_total'] += elapsed
+            self.stats['decision_seconds_max'] = max(self.stats['decision_seconds_max'], elapsed)
+        except Exception as e:
+            # 策略出錯時採取最保守的動作，牌桌不會因此卡住
+            self.stats['errors'] += 1
+            print(f"[機器人] {job['sid']} 的決策失敗: {e}")
+            action, amount = ('check' if game.get_game_type() == 'texas_holdem' else 'stand'), 0
+            if game.get_game_type() == 'black_jack' and game.game_state.get('game_phase') == 'betting':
+                action, amount = 'bet', game.game_state['min_bet']
+        self.stats['decisions'] += 1
+        apply_decision(game, job['sid'], action, amount)
+
+    def wait_for_decisions(self, until):
+        """
+        阻塞直到思考時間在 until 之前到期的決策都算完 (只給虛擬時間的模擬使用；
+        否則 ManualScheduler 會在執行器算完之前就把時間推過行動期限)。
+        """
+        futures = [job['future'] for job in self.pending if job['ready_at'] <= until]
+        if futures:
+            wait(futures)
+
+    def get_summary(self):
+        decisions = self.stats['decisions'] - self.stats['errors']
+        return {
+            'executor': self.executor_kind,
+            'tables': len(self.tables),
+            'bots': self.bot_count(),
+            'pending': len(self.pending),
+            'decisions': self.stats['decisions'],
+            'stale': self.stats['stale'],
+            'errors': self.stats['errors'],
+            'rebuys': self.stats['rebuys'],
+            # 決策本身的計算時間 (不含思考時間與排隊)；max_tick_ms 是每次 tick 佔用事件迴圈的最長時間
+            'avg_decision_ms': round(self.stats['decision_seconds_total'] / decisions * 1000, 2) if decisions else 0.0,
+            'max_decision_ms': round(self.stats['decision_seconds_max'] * 1000, 2),
+            'max_tick_ms': round(self.stats['tick_seconds_max'] * 1000, 2),
+        }
+
+
+def run_soak(game_type='texas_holdem', tables=100, bots_per_table=6, strategy='rule', executor='inline',
+             workers=None, seconds=600, seed=0):
+    """
+    在一個行程中以 ManualScheduler 跑 tables 張全機器人的牌桌 (虛擬時間 seconds 秒)。
+    Returns:
+        dict: 局數、決策數與耗時 (BotRunner.get_summary 加上 hands、wall_seconds、hands_per_second)。
+    """
+    from games.black_jack.logic import BlackJackGame
+    from games.event_sink import NullSink
+    from games.profiler import batch_run
+    from games.scheduler import ManualScheduler
+    from games.texas_holdem.logic import TexasHoldemGame
+
+    scheduler = ManualScheduler()
+    runner = BotRunner(scheduler, executor=executor, workers=workers, seed=seed)
+    game_class = TexasHoldemGame if game_type == 'texas_holdem' else BlackJackGame
+    hands = []
+    options = {'auto_deal': True, 'auto_deal_delay': 2, 'hand_history': False, 'outcome_hints': False,
+               'timeout_seconds': 30, 'betting_seconds': 15}
+    started = time.perf_counter()
+    with batch_run():
+        for index in range(tables):
+            game = game_class(f"soak-{index}", [], NullSink(), dict(options, seed=seed * 100003 + index))
+            game.scheduler = scheduler
+            game.hand_end_listeners.append(lambda game, results: hands.append(game.room_id))
+            runner.fill_table(game, bots_per_table, strategy)
+            game.host_sid = next(iter(game.players))
+            game.start_game(None)
+        while scheduler.now() < seconds:
+            deadline = scheduler.next_deadline()
+            if deadline is None:
+                deadline = scheduler.now() + runner.tick_interval
+            runner.wait_for_decisions(deadline)
+            scheduler.advance(max(deadline - scheduler.now(), 0))
+        runner.stop()
+    elapsed = time.perf_counter() - started
+    return dict(runner.get_summary(), hands=len(hands), wall_seconds=round(elapsed, 2),
+                hands_per_second=round(len(hands) / elapsed, 1))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="全機器人牌桌的浸泡測試")
+    parser.add_argument('--game', choices=sorted(STRATEGIES), default='texas_holdem')
+    parser.add_argument('--tables', type=int, default=100)
+    parser.add_argument('--bots', type=int, default=6, help="每桌機器人數")
+    parser.add_argument('--strategy', default='rule')
+    parser.add_argument('--executor', choices=BOT_EXECUTORS, default='inline')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seconds', type=float, default=600, help="模擬的虛擬時間 (秒)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    summary = run_soak(args.game, args.tables, args.bots, args.strategy, args.executor, args.workers,
+                       args.seconds, args.seed)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+# games/cards.py
+"""
+預先建立、不可變的撲克牌與以排列陣列實作的牌組。
+
+52 張牌在匯入時建立一次 (CARD_TABLE)，之後所有牌組、手牌、公共牌與狀態封包都共用同一批物件；
+Card 是 dict 的子類別 (card['rank']、JSON 序列化都和原本的牌 dict 相同)，但不能被修改，
+因此共用不會讓某個封包或某段邏輯改到別人的牌。
+
+Deck 只保存一個 52 個牌碼的排列陣列與發牌游標:
+    - shuffle(seed) 在同一個陣列上原地洗牌，
+    - deal(n) 移動游標並回傳對應的預建牌物件，
+每局不再建立 52 個 dict，也不會 pop 出新的串列。
+
+洗牌產生器 (牌桌選項 shuffle，預設為環境變數 DECK_SHUFFLE 或 'fast'):
+    - 'fast':   random.Random(seed) (Mersenne Twister) 的 Fisher-Yates，與既有牌局紀錄的牌序相容。
+    - 'secure': 以 SHAKE-256(seed) 一次產生整批亂數位元組，再以拒絕取樣做 Fisher-Yates，
+                沒有取模偏差，且不知道種子就無法從已發出的牌推算之後的牌。
+                批次產生亂數反而省下逐次呼叫 _randbelow 的成本，兩者每局都只需十幾微秒。
+兩種產生器都只由種子決定牌序，牌局紀錄記下種子與產生器名稱即可重播 (見 games/replay.py)。
+"""
+import hashlib
+import os
+import random
+
+RANKS = 'A23456789TJQK'
+SUITS = 'HDCS'  # Hearts, Diamonds, Clubs, Spades
+CARDS_PER_DECK = len(RANKS) * len(SUITS)
+
+SHUFFLE_GENERATORS = ('fast', 'secure')
+DEFAULT_SHUFFLE = os.getenv('DECK_SHUFFLE', 'fast')
+
+
+def _card_from_code(code):
+    return CARD_TABLE[code]
+
+
+class Card(dict):
+    """不可變的牌: {'rank': ..., 'suit': ...}，code 為 花色索引 * 13 + 點數索引。"""
+
+    __slots__ = ('code',)
+
+    def __init__(self, code, rank, suit):
+        super().__init__(rank=rank, suit=suit)
+        self.code = code
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Card 不可修改，請改用 CARD_TABLE 中的其他牌。")
+
+    __setitem__ = __delitem__ = _readonly
+    update = pop = popitem = clear = setdefault = _readonly
+
+    def __hash__(self):
+        return self.code
+
+    # 複製與序列化都回傳同一個預建物件
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (_card_from_code, (self.code,))
+
+
+CARD_TABLE = tuple(Card(suit_index * len(RANKS) + rank_index, rank, suit)
+                   for suit_index, suit in enumerate(SUITS)
+                   for rank_index, rank in enumerate(RANKS))
+CARD_CODES = {(card['rank'], card['suit']): card.code for card in CARD_TABLE}
+
+
+def card_code(card):
+    """任何 {'rank', 'suit'} 形式的牌 (包含客戶端傳回的 dict) 的牌碼。"""
+    code = getattr(card, 'code', None)
+    return code if code is not None else CARD_CODES[(card['rank'], card['suit'])]
+
+
+def validate_generator(generator):
+    if generator not in SHUFFLE_GENERATORS:
+        raise ValueError(f"未知的洗牌產生器: {generator}。可用: {', '.join(SHUFFLE_GENERATORS)}")
+    return generator
+
+
+def _secure_shuffle(codes, seed):
+    n = len(codes)
+    # 每次抽取用 2 bytes；先一次產生兩倍所需的量，拒絕取樣用完時再延長串流
+    stream = hashlib.shake_256(f"deck:{seed}".encode())
+    length = 4 * n
+    words = memoryview(stream.digest(length)).cast('H')
+    cursor = 0
+    for i in range(n - 1, 0, -1):
+        bound = i + 1
+        limit = 65536 - 65536 % bound
+        while True:
+            if cursor == len(words):
+                length *= 2
+                words = memoryview(stream.digest(length)).cast('H')
+            value = words[cursor]
+            cursor += 1
+            if value < limit:
+                break
+        j = value % bound
+        codes[i], codes[j] = codes[j], codes[i]
+
+
+def shuffle_codes(codes, seed, generator='fast', rng=None):
+    """
+    依種子原地洗亂一個牌碼序列 (array 或 list)。
+    Args:
+        codes: 要洗的序列。
+        seed (int | str): 種子，相同的種子與產生器一定得到相同的排列。
+        generator (str): 'fast' 或 'secure'。
+        rng (random.Random, optional): 'fast' 時重複使用的產生器 (重新播種，不必每次建立新物件)。
+    """
+    if generator == 'fast':
+        if rng is None:
+            rng = random.Random()
+        rng.seed(seed)
+        rng.shuffle(codes)
+    elif generator == 'secure':
+        _secure_shuffle(codes, seed)
+    else:
+        validate_generator(generator)
+
+
+_CANONICAL_ORDER = list(range(CARDS_PER_DECK))
+
+
+class Deck:
+    """
+    一副 52 張牌的排列陣列與發牌游標，整個牌桌生命期重複使用。
+    排列用 list 存放 (小整數是共用物件；random.shuffle 在 list 上比 array 快)。
+    發牌順序與舊版 shuffle_deck(create_deck(), random.Random(seed)) 後逐張 pop() 相同，
+    因此同一個種子 ('fast') 發出的牌與先前的紀錄一致。
+    """
+
+    def __init__(self, generator=None):
+        self.generator = validate_generator(generator or DEFAULT_SHUFFLE)
+        self.order = list(_CANONICAL_ORDER)
+        self.position = 0
+        self._rng = random.Random()
+        self.seed = None
+
+    def __len__(self):
+        return len(self.order) - self.position
+
+    def shuffle(self, seed):
+        """以種子原地重新洗牌並把游標歸零。"""
+        order = self.order
+        order[:] = _CANONICAL_ORDER
+        shuffle_codes(order, seed, self.generator, self._rng)
+        order.reverse()  # 舊版從串列尾端 pop 發牌，反轉後游標往前移動即為相同的順序
+        self.position = 0
+        self.seed = seed
+
+    def deal(self, num_cards):
+        """
+        發出 num_cards 張牌 (剩餘不足時發出剩下的全部)。
+        Returns:
+            list: 預建的 Card 物件。
+        """
+        start = self.position
+        end = min(start + num_cards, len(self.order))
+        self.position = end
+        return [CARD_TABLE[code] for code in self.order[start:end]]
+
+    def cards(self):
+        """返回完整的發牌順序 (牌局紀錄用)。"""
+        return [CARD_TABLE[code] for code in self.order]
+
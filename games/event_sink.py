@@ -0,0 +1,86 @@
+# games/event_sink.py
+"""
+遊戲引擎送出事件的介面 (event sink)。
+
+遊戲邏輯 (BaseGame 與其子類別、錦標賽、玩家池) 只透過 EventSink 送出事件，不直接依賴 Flask-SocketIO:
+    - SocketIOSink:  包裝 Flask-SocketIO 實例，線上伺服器使用，
+    - NullSink:      丟棄所有事件，模擬、機器人、重播與效能測試在同一個行程中全速驅動遊戲，
+    - RecordingSink: 記錄所有事件 (或指定的事件)，供測試與重播比對結果。
+
+to 為 Socket.IO 的 sid 或房間名稱；None 表示廣播給所有連線。
+"""
+
+
+class EventSink:
+    """遊戲引擎送出事件的介面。"""
+
+    # 為 True 時 BaseGame.broadcast_state 不會為每位玩家組裝狀態 (反正會被丟棄)
+    discards_broadcasts = False
+
+    def emit(self, event, data=None, to=None):
+        raise NotImplementedError
+
+    def room_members(self, room_id):
+        """目前訂閱該房間的 sid (包含觀戰者)；沒有連線層時為空。"""
+        return ()
+
+
+class SocketIOSink(EventSink):
+    def __init__(self, socketio_instance, namespace='/'):
+        self.socketio = socketio_instance
+        self.namespace = namespace
+
+    def emit(self, event, data=None, to=None):
+        self.socketio.emit(event, data, to=to, namespace=self.namespace)
+
+    def room_members(self, room_id):
+        return self.socketio.server.manager.rooms.get(self.namespace, {}).get(room_id, {})
+
+
+class NullSink(EventSink):
+    """丟棄所有事件。"""
+
+    discards_broadcasts = True
+
+    def emit(self, event, data=None, to=None):
+        pass
+
+
+class RecordingSink(EventSink):
+    def __init__(self, events=None, broadcasts=True):
+        """
+        Args:
+            events (iterable[str], optional): 只記錄這些事件 (預設記錄全部)。
+            broadcasts (bool): 是否組裝並記錄 broadcast_state 的狀態更新；只關心結果時設為 False 可省下大部分成本。
+        """
+        self.events = frozenset(events) if events is not None else None
+        self.discards_broadcasts = not broadcasts
+        self.records = []  # [(event, data, to)]
+
+    def emit(self, event, data=None, to=None):
+        if self.events is None or event in self.events:
+            self.records.append((event, data, to))
+
+    def of(self, event):
+        """某個事件的所有 data (依送出順序)。"""
+        return [data for name, data, _ in self.records if name == event]
+
+    def last(self, event):
+        """某個事件最後一次的 data，沒有時為 None。"""
+        for name, data, _ in reversed(self.records):
+            if name == event:
+                return data
+        return None
+
+    def clear(self):
+        self.records.clear()
+
+
+def as_event_sink(sink):
+    """接受 EventSink、Flask-SocketIO 實例 (包裝成 SocketIOSink) 或 None (NullSink)。"""
+    if isinstance(sink, EventSink):
+        return sink
+    if sink is None:
+        return NullSink()
+    return SocketIOSink(sink)
+
@@ -7,9 +7,9 @@ GAME_CLASSES = {
     # "blackjack": BlackjackGame,
 }
 
-def create_game_instance(game_type, room_id, players_sids, socketio_instance, options=None):
+def create_game_instance(game_type, room_id, players_sids, event_sink, options=None):
     game_class = GAME_CLASSES.get(game_type)
     if game_class:
-        return game_class(room_id, players_sids, socketio_instance, options)
+        return game_class(room_id, players_sids, event_sink, options)
     else:
         raise ValueError(f"Unsupported game type: {game_type}")
\ No newline at end of file
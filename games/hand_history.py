@@ -0,0 +1,485 @@
+# games/hand_history.py
+"""
+每個房間一份、只附加寫入的二進位牌局紀錄 (hand history)。
+
+每局在 end_game 時編碼成一筆紀錄:
+    HAND_HEADER (固定寬度) | 座位 | 牌序 (每張牌 1 byte) | 動作 (varint) | 牌桌規則與結果 (zlib 壓縮的 JSON)
+每個動作為 4 個 varint: 座位索引、(動作碼 << 1 | 是否自動)、金額 * AMOUNT_SCALE、距離開局的毫秒數，
+一般只佔 5 ~ 10 bytes。
+
+另有一份固定寬度的索引檔 (每局 INDEX_RECORD 一筆: 偏移、長度、開局時間、種子)，
+第 N 局的位置就在索引檔的 N * INDEX_RECORD.size，可以隨機讀取任一局。
+
+寫入在遊戲的熱路徑上只是把編碼好的 bytes 加到記憶體緩衝區；
+真正的檔案寫入由一條 OS 執行緒 (不受 eventlet monkey_patch 影響) 批次進行，
+每 FLUSH_INTERVAL 秒或緩衝超過 FLUSH_BYTES 時寫一次，行程結束時也會寫出剩餘資料。
+
+牌局紀錄預設關閉，以環境變數 HAND_HISTORY=1 開啟 (各牌桌也可用選項 hand_history 覆寫)。
+單一房間的紀錄超過 HAND_HISTORY_MAX_BYTES 時輪替成 <room_id>.1.hhl、<room_id>.2.hhl ...，
+只保留最近 HAND_HISTORY_KEEP 份舊檔。
+
+用法:
+    python -m games.hand_history hand_history/texas_holdem/<room_id>.hhl --hand 3
+    python -m games.hand_history hand_history/texas_holdem/<room_id>.hhl --stats
+"""
+import argparse
+import atexit
+import json
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+
+from eventlet import patcher
+
+from games.cards import CARD_TABLE, card_code
+
+_real_threading = patcher.original('threading')
+
+HISTORY_VERSION = 2
+HISTORY_ENABLED = os.getenv('HAND_HISTORY') == '1'  # 選項 hand_history 的預設值
+HISTORY_DIR = os.getenv('HAND_HISTORY_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'hand_history'))
+MAX_LOG_BYTES = int(os.getenv('HAND_HISTORY_MAX_BYTES', 64 * 1024 * 1024))  # 單一紀錄檔的大小上限，0 表示不輪替
+KEEP_ROTATED = int(os.getenv('HAND_HISTORY_KEEP', 3))  # 每個房間保留的舊紀錄檔數
+LOG_SUFFIX = '.hhl'
+INDEX_SUFFIX = '.idx'
+
+# magic, 版本, 遊戲代碼, 種子, 開局時間 (epoch 秒), 座位數, 牌數, 動作數, 結果長度, 發牌起點
+# (發牌起點: 21點牌靴跨局保留，本局第一張牌在以種子洗好的牌靴中的位置)
+HAND_HEADER = struct.Struct('<2sBBQdBHIII')
+HAND_HEADER_V1 = struct.Struct('<2sBBQdBHII')  # 版本 1 沒有發牌起點，結果區只有結果
+HAND_MAGIC = b'HH'
+# 紀錄在 .hhl 中的偏移, 紀錄長度, 開局時間, 種子
+INDEX_RECORD = struct.Struct('<QIdQ')
+
+GAME_CODES = {'texas_holdem': 1, 'black_jack': 2}
+GAME_TYPES = {code: game_type for game_type, code in GAME_CODES.items()}
+
+# 動作碼 (只能在尾端新增，已寫入的紀錄依賴這些數值)
+ACTIONS = (
+    'other', 'small_blind', 'big_blind', 'fold', 'check', 'call', 'bet', 'raise', 'leave',
+    'hit', 'stand', 'double', 'insurance', 'decline_insurance',
+)
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+# 動作的金額記錄玩家送出的數值 (加注為加注後的街道總額、保險 0 表示預設的半注)，
+# 跟注、盲注與雙倍下注記錄實際投入的籌碼；重播時送入相同的數值即可得到相同的結果
+AMOUNT_SCALE = 100  # 金額以 1/100 籌碼為單位存成整數 (21點保險、賠率可能有小數)
+
+# 牌碼與 games/cards.py 相同: 花色索引 * 13 + 點數索引
+
+FLUSH_INTERVAL = 2.0
+FLUSH_BYTES = 256 * 1024
+
+
+def encode_varint(value, out):
+    """把非負整數以 LEB128 varint 附加到 bytearray。"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, pos):
+    """
+    Returns:
+        tuple: (數值, 下一個位置)
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _encode_text(text, out):
+    raw = str(text).encode('utf-8')
+    encode_varint(len(raw), out)
+    out += raw
+
+
+def _decode_text(data, pos):
+    length, pos = decode_varint(data, pos)
+    return bytes(data[pos:pos + length]).decode('utf-8'), pos + length
+
+
+class HandHistoryLog:
+    """一個房間的牌局紀錄。遊戲執行緒呼叫 begin_hand / record / finish_hand，檔案寫入交給 HandHistoryWriter。"""
+
+    def __init__(self, game_type, room_id, directory=None, writer=None, max_bytes=None, keep_rotated=None):
+        directory = os.path.join(directory or HISTORY_DIR, game_type)
+        safe_room_id = re.sub(r'[^A-Za-z0-9_.-]', '_', str(room_id))
+        self.log_path = os.path.join(directory, safe_room_id + LOG_SUFFIX)
+        self.index_path = os.path.join(directory, safe_room_id + INDEX_SUFFIX)
+        self.game_code = GAME_CODES.get(game_type, 0)
+        self.writer = writer or get_history_writer()
+        self._buffer_lock = _real_threading.Lock()
+        self._write_lock = _real_threading.Lock()
+        self._log_buffer = bytearray()
+        self._index_buffer = bytearray()
+        self._next_offset = None  # 第一次寫入前才讀取既有檔案的大小
+        self._sealed = []  # 輪替前要寫入舊檔的緩衝 [(紀錄, 索引), ...]
+        self.max_bytes = MAX_LOG_BYTES if max_bytes is None else max_bytes
+        self.keep_rotated = KEEP_ROTATED if keep_rotated is None else keep_rotated
+        self.hands_recorded = 0
+        self.bytes_recorded = 0
+        self._hand = None
+
+    # --- 遊戲執行緒: 記錄目前這一局 ---
+
+    def begin_hand(self, seats, seed=None, deck=None, deal_offset=0, table=None):
+        """
+        開始記錄新的一局 (上一局若沒有 finish_hand 就直接丟棄)。
+        Args:
+            seats (list): [(sid, name, chips), ...]，依座位順序。
+            seed (int, optional): 本局洗牌的亂數種子。
+            deck (list, optional): 牌序 (牌 dict)。
+            deal_offset (int): 本局第一張牌在以 seed 洗好的牌組中的位置。
+            table (dict, optional): 重播所需的牌桌規則。
+        """
+        self._hand = {
+            'started_at': time.time(),
+            'started_monotonic': time.monotonic(),
+            'seed': seed or 0,
+            'deal_offset': deal_offset,
+            'table': table or {},
+            'seats': list(seats),
+            'seat_index': {sid: i for i, (sid, _, _) in enumerate(seats)},
+            'deck': bytes(card_code(card) for card in deck) if deck else b'',
+            'actions': bytearray(),
+            'action_count': 0,
+        }
+
+    def discard_hand(self):
+        """丟棄目前這一局 (牌局中止，不寫入紀錄)。"""
+        self._hand = None
+
+    def set_deck(self, cards):
+        """以實際使用的牌序取代 begin_hand 時的牌序 (21點在結算時才知道本局發了哪些牌)。"""
+        if self._hand is not None:
+            self._hand['deck'] = bytes(card_code(card) for card in cards)
+
+    def record(self, sid, action, amount=0, auto=False):
+        """記錄一個動作。不在本局座位上的玩家會被忽略。"""
+        hand = self._hand
+        if hand is None:
+            return
+        seat = hand['seat_index'].get(sid)
+        if seat is None:
+            return
+        out = hand['actions']
+        encode_varint(seat, out)
+        encode_varint(ACTION_CODES.get(action, 0) << 1 | (1 if auto else 0), out)
+        encode_varint(max(0, int(round((amount or 0) * AMOUNT_SCALE))), out)
+        encode_varint(int((time.monotonic() - hand['started_monotonic']) * 1000), out)
+        hand['action_count'] += 1
+
+    def finish_hand(self, results):
+        """把目前這一局連同結果編碼進緩衝區，交給寫入執行緒。"""
+        hand = self._hand
+        if hand is None:
+            return
+        self._hand = None
+        body = bytearray()
+        for sid, name, chips in hand['seats']:
+            _encode_text(sid, body)
+            _encode_text(name, body)
+            encode_varint(max(0, int(round(chips * AMOUNT_SCALE))), body)
+        body += hand['deck']
+        body += hand['actions']
+        payload = {'table': hand['table'], 'results': results}
+        results_raw = zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8'))
+        body += results_raw
+        header = HAND_HEADER.pack(HAND_MAGIC, HISTORY_VERSION, self.game_code, hand['seed'] & 0xFFFFFFFFFFFFFFFF,
+                                  hand['started_at'], len(hand['seats']), len(hand['deck']),
+                                  hand['action_count'], len(results_raw), hand['deal_offset'])
+        record_length = len(header) + len(body)
+        with self._buffer_lock:
+            if self._next_offset is None:
+                self._next_offset = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+            if self.max_bytes and self._next_offset and self._next_offset + record_length > self.max_bytes:
+                # 目前的檔案已滿: 先前緩衝的資料寫入舊檔後輪替，本局從新檔案的開頭開始
+                self._sealed.append((self._log_buffer, self._index_buffer))
+                self._log_buffer, self._index_buffer = bytearray(), bytearray()
+                self._next_offset = 0
+            self._index_buffer += INDEX_RECORD.pack(self._next_offset, record_length, hand['started_at'],
+                                                    hand['seed'] & 0xFFFFFFFFFFFFFFFF)
+            self._log_buffer += header
+            self._log_buffer += body
+            self._next_offset += record_length
+        self.hands_recorded += 1
+        self.bytes_recorded += record_length
+        self.writer.submit(self, record_length)
+
+    # --- 房間快照 (games/room_store.py) ---
+
+    def __getstate__(self):
+        # 先把緩衝區寫到檔案；鎖與寫入執行緒不進快照，進行中的這一局 (_hand) 保留
+        self.flush()
+        state = self.__dict__.copy()
+        for name in ('writer', '_buffer_lock', '_write_lock', '_log_buffer', '_index_buffer', '_next_offset', '_sealed'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.writer = get_history_writer()
+        self._buffer_lock = _real_threading.Lock()
+        self._write_lock = _real_threading.Lock()
+        self._log_buffer = bytearray()
+        self._index_buffer = bytearray()
+        self._next_offset = None
+        self._sealed = []
+
+    # --- 寫入執行緒 ---
+
+    def flush(self):
+        """把緩衝區寫到檔案 (先寫紀錄再寫索引，索引永遠不會指向尚未寫入的資料)。"""
+        with self._write_lock:
+            with self._buffer_lock:
+                sealed, self._sealed = self._sealed, []
+                log_data, self._log_buffer = self._log_buffer, bytearray()
+                index_data, self._index_buffer = self._index_buffer, bytearray()
+            for sealed_log, sealed_index in sealed:
+                self._append(sealed_log, sealed_index)
+                self._rotate()
+            self._append(log_data, index_data)
+
+    def _append(self, log_data, index_data):
+        if not log_data:
+            return
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        with open(self.log_path, 'ab') as f:
+            f.write(log_data)
+        with open(self.index_path, 'ab') as f:
+            f.write(index_data)
+
+    def rotated_paths(self, number):
+        """第 number 份舊檔 (1 為最新) 的 (紀錄檔, 索引檔) 路徑。"""
+        base = self.log_path[:-len(LOG_SUFFIX)]
+        return f"{base}.{number}{LOG_SUFFIX}", f"{base}.{number}{INDEX_SUFFIX}"
+
+    def _rotate(self):
+        """目前的檔案改名為 .1，較舊的依序往後移，超過 keep_rotated 份的刪除。"""
+        paths = [(self.log_path, self.index_path)] + [self.rotated_paths(n) for n in range(1, self.keep_rotated + 1)]
+        for path in paths[-1]:
+            if os.path.exists(path):
+                os.remove(path)
+        for src, dst in zip(reversed(paths[:-1]), reversed(paths[1:])):
+            for src_path, dst_path in zip(src, dst):
+                if os.path.exists(src_path):
+                    os.replace(src_path, dst_path)
+
+
+class HandHistoryWriter:
+    """在背景 OS 執行緒中批次寫出所有房間的牌局紀錄。"""
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, flush_bytes=FLUSH_BYTES):
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self._lock = _real_threading.Lock()
+        self._wakeup = _real_threading.Event()
+        self._dirty = {}  # id(log): log
+        self._pending_bytes = 0
+        self._thread = None
+        self.flush_count = 0
+        self.error_count = 0
+
+    def submit(self, log, nbytes):
+        with self._lock:
+            self._dirty[id(log)] = log
+            self._pending_bytes += nbytes
+            if self._thread is None:
+                self._thread = _real_threading.Thread(target=self._run, name='hand-history-writer', daemon=True)
+                self._thread.start()
+            if self._pending_bytes >= self.flush_bytes:
+                self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush_all()
+
+    def flush_all(self):
+        """立即寫出所有房間的緩衝資料。"""
+        with self._lock:
+            logs = list(self._dirty.values())
+            self._dirty.clear()
+            self._pending_bytes = 0
+        for log in logs:
+            try:
+                log.flush()
+            except OSError as e:
+                self.error_count += 1
+                print(f"[牌局紀錄] 寫入 {log.log_path} 失敗: {e}")
+        if logs:
+            self.flush_count += 1
+
+
+_default_writer = None
+
+
+def get_history_writer():
+    """返回行程共用的 HandHistoryWriter (第一次呼叫時建立，行程結束時寫出剩餘資料)。"""
+    global _default_writer
+    if _default_writer is None:
+        _default_writer = HandHistoryWriter()
+        atexit.register(_default_writer.flush_all)
+    return _default_writer
+
+
+# --- 讀取 ---
+
+def decode_hand(data):
+    """
+    將一筆紀錄解碼為 dict。
+    Returns:
+        dict: game_type, seed, deal_offset, started_at, seats, deck, actions, table, results
+    """
+    magic, version = struct.unpack_from('<2sB', data, 0)
+    if magic != HAND_MAGIC:
+        raise ValueError("牌局紀錄格式錯誤 (magic 不符)。")
+    if version == 1:
+        header = HAND_HEADER_V1
+        (_, _, game_code, seed, started_at, num_seats, num_cards, num_actions,
+         results_length) = header.unpack_from(data, 0)
+        deal_offset = 0
+    elif version == HISTORY_VERSION:
+        header = HAND_HEADER
+        (_, _, game_code, seed, started_at, num_seats, num_cards, num_actions,
+         results_length, deal_offset) = header.unpack_from(data, 0)
+    else:
+        raise ValueError(f"不支援的牌局紀錄版本: {version}")
+    pos = header.size
+    seats = []
+    for _ in range(num_seats):
+        sid, pos = _decode_text(data, pos)
+        name, pos = _decode_text(data, pos)
+        chips, pos = decode_varint(data, pos)
+        seats.append({'sid': sid, 'name': name, 'chips': chips / AMOUNT_SCALE})
+    deck = [CARD_TABLE[code] for code in data[pos:pos + num_cards]]
+    pos += num_cards
+    actions = []
+    for _ in range(num_actions):
+        seat, pos = decode_varint(data, pos)
+        code, pos = decode_varint(data, pos)
+        amount, pos = decode_varint(data, pos)
+        elapsed_ms, pos = decode_varint(data, pos)
+        action_code = code >> 1
+        actions.append({
+            'seat': seat,
+            'sid': seats[seat]['sid'] if seat < len(seats) else None,
+            'action': ACTIONS[action_code] if action_code < len(ACTIONS) else 'other',
+            'auto': bool(code & 1),
+            'amount': amount / AMOUNT_SCALE,
+            'ms': elapsed_ms,
+        })
+    payload = json.loads(zlib.decompress(bytes(data[pos:pos + results_length])).decode('utf-8'))
+    if version == 1:
+        payload = {'table': {}, 'results': payload}
+    return {
+        'game_type': GAME_TYPES.get(game_code),
+        'seed': seed,
+        'deal_offset': deal_offset,
+        'table': payload['table'],
+        'started_at': started_at,
+        'seats': seats,
+        'deck': deck,
+        'actions': actions,
+        'results': payload['results'],
+    }
+
+
+class HandHistoryReader:
+    """以索引檔隨機讀取 .hhl 中的任一局。"""
+
+    def __init__(self, log_path):
+        if not log_path.endswith(LOG_SUFFIX):
+            raise ValueError(f"牌局紀錄檔名應以 {LOG_SUFFIX} 結尾。")
+        self.log_path = log_path
+        self.index_path = log_path[:-len(LOG_SUFFIX)] + INDEX_SUFFIX
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.index_path) // INDEX_RECORD.size
+        except OSError:
+            return 0
+
+    def index_entry(self, hand_number):
+        """
+        Returns:
+            tuple: (偏移, 長度, 開局時間, 種子)
+        """
+        if not 0 <= hand_number < len(self):
+            raise IndexError(f"沒有第 {hand_number} 局 (共 {len(self)} 局)。")
+        with open(self.index_path, 'rb') as f:
+            f.seek(hand_number * INDEX_RECORD.size)
+            return INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))
+
+    def read_hand(self, hand_number):
+        offset, length, _, _ = self.index_entry(hand_number)
+        with open(self.log_path, 'rb') as f:
+            f.seek(offset)
+            return decode_hand(f.read(length))
+
+    def __iter__(self):
+        return self.iter_hands()
+
+    def iter_hands(self, start=0, stop=None):
+        """依序讀取第 start 到 stop - 1 局 (stop 為 None 時讀到最後一局)。"""
+        remaining = None if stop is None else max(0, stop - start)
+        with open(self.index_path, 'rb') as index_file, open(self.log_path, 'rb') as log_file:
+            index_file.seek(start * INDEX_RECORD.size)
+            while remaining is None or remaining > 0:
+                if remaining is not None:
+                    remaining -= 1
+                entry = index_file.read(INDEX_RECORD.size)
+                if len(entry) < INDEX_RECORD.size:
+                    return
+                offset, length, _, _ = INDEX_RECORD.unpack(entry)
+                log_file.seek(offset)
+                yield decode_hand(log_file.read(length))
+
+    def stats(self):
+        hands = 0
+        actions = 0
+        for hand in self:
+            hands += 1
+            actions += len(hand['actions'])
+        log_bytes = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        return {
+            'hands': hands,
+            'actions': actions,
+            'log_bytes': log_bytes,
+            'index_bytes': hands * INDEX_RECORD.size,
+            'bytes_per_hand': log_bytes / hands if hands else 0.0,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="讀取牌局紀錄 (.hhl)")
+    parser.add_argument('path', help=".hhl 檔案路徑")
+    parser.add_argument('--hand', type=int, default=None, help="只輸出第 N 局 (從 0 開始)")
+    parser.add_argument('--stats', action='store_true', help="輸出統計資料")
+    args = parser.parse_args(argv)
+
+    reader = HandHistoryReader(args.path)
+    if args.stats:
+        json.dump(reader.stats(), sys.stdout, indent=2)
+        print()
+    elif args.hand is not None:
+        json.dump(reader.read_hand(args.hand), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for hand in reader:
+            print(json.dumps(hand, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+# games/leaderboard.py
+"""
+跨房間的排行榜: 淨贏籌碼 (net_chips)、贏得局數 (hands_won)、單局最大贏額 (biggest_pot)。
+
+每局結束時 BaseGame.end_game 把本局每位玩家的籌碼變化與贏得的金額交給 Leaderboards.record_hand，
+各排行榜增量更新，不需要重新排序。每個排行榜以可索引的跳躍串列 (SkipList) 保存排序:
+節點在每一層記錄跨越的節點數 (寬度)，插入、刪除、查詢名次與取第 N 名都是 O(log n)，
+取一頁 (前 K 名) 為 O(log n + K)。
+
+排行榜每 checkpoint_interval 秒 (有異動時) 以 JSON 寫入磁碟，啟動時載入；寫入先寫暫存檔再
+os.replace，不會留下寫了一半的檔案。序列化與寫檔在一條 OS 執行緒中進行，不阻擋牌局。
+前幾頁的查詢結果快取 cache_seconds 秒，大廳頻繁查詢排行榜時不必每次走訪跳躍串列。
+
+錦標賽牌桌的籌碼不是真實籌碼，不計入排行榜。
+"""
+import atexit
+import json
+import os
+import random
+import time
+
+from eventlet import patcher
+
+from games.scheduler import get_scheduler
+
+_real_threading = patcher.original('threading')
+
+LEADERBOARD_PATH = os.getenv('LEADERBOARD_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'leaderboards.json'))
+BOARDS = ('net_chips', 'hands_won', 'biggest_pot')
+CHECKPOINT_INTERVAL = float(os.getenv('LEADERBOARD_CHECKPOINT_SECONDS', 60))
+PAGE_SIZE = 20
+CACHED_PAGES = 5        # 只快取前幾頁 (其餘頁數很少被查詢)
+CACHE_SECONDS = 2.0
+CHECKPOINT_VERSION = 1
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        self.width = [0] * level  # 到 next[i] 跨越的節點數 (next[i] 為 None 時為到串列尾端的節點數)
+
+
+class SkipList:
+    """依 key 遞增排序、可以用名次存取的跳躍串列 (key 必須互不相同)。名次從 1 開始。"""
+
+    MAX_LEVEL = 32
+    P = 0.25
+
+    def __init__(self, seed=None):
+        self.head = _Node(None, self.MAX_LEVEL)
+        self.level = 1
+        self.size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self.size
+
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and self._random.random() < self.P:
+            level += 1
+        return level
+
+    def insert(self, key):
+        update = [self.head] * self.MAX_LEVEL
+        rank = [0] * self.MAX_LEVEL
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            rank[i] = rank[i + 1] if i + 1 < self.level else 0
+            while node.next[i] is not None and node.next[i].key < key:
+                rank[i] += node.width[i]
+                node = node.next[i]
+            update[i] = node
+        level = self._random_level()
+        if level > self.level:
+            for i in range(self.level, level):
+                rank[i] = 0
+                update[i] = self.head
+                self.head.width[i] = self.size
+            self.level = level
+        new = _Node(key, level)
+        for i in range(level):
+            new.next[i] = update[i].next[i]
+            update[i].next[i] = new
+            new.width[i] = update[i].width[i] - (rank[0] - rank[i])
+            update[i].width[i] = rank[0] - rank[i] + 1
+        for i in range(level, self.level):
+            update[i].width[i] += 1
+        self.size += 1
+
+    def remove(self, key):
+        """Returns: bool: key 是否存在。"""
+        update = [None] * self.MAX_LEVEL
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            while node.next[i] is not None and node.next[i].key < key:
+                node = node.next[i]
+            update[i] = node
+        target = node.next[0]
+        if target is None or target.key != key:
+            return False
+        for i in range(self.level):
+            if update[i].next[i] is target:
+                update[i].width[i] += target.width[i] - 1
+                update[i].next[i] = target.next[i]
+            else:
+                update[i].width[i] -= 1
+        while self.level > 1 and self.head.next[self.level - 1] is None:
+            self.level -= 1
+        self.size -= 1
+        return True
+
+    def rank(self, key):
+        """key 的名次，不存在時為 None。"""
+        traversed = 0
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            while node.next[i] is not None and node.next[i].key <= key:
+                traversed += node.width[i]
+                node = node.next[i]
+            if node is not self.head and node.key == key:
+                return traversed
+        return None
+
+    def slice(self, start, count):
+        """從第 start + 1 名開始的 count 個 key。"""
+        if start < 0 or count <= 0 or start >= self.size:
+            return []
+        traversed = 0
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            while node.next[i] is not None and traversed + node.width[i] <= start + 1:
+                traversed += node.width[i]
+                node = node.next[i]
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """一個排行榜: 分數高的在前，同分依使用者排序。"""
+
+    def __init__(self, name):
+        self.name = name
+        self.scores = {}
+        self._ranking = SkipList()
+
+    def __len__(self):
+        return len(self.scores)
+
+    def set_score(self, user, score):
+        """Returns: bool: 分數是否改變。"""
+        old = self.scores.get(user)
+        if old == score:
+            return False
+        if old is not None:
+            self._ranking.remove((-old, user))
+        self._ranking.insert((-score, user))
+        self.scores[user] = score
+        return True
+
+    def add(self, user, delta):
+        return self.set_score(user, self.scores.get(user, 0) + delta)
+
+    def raise_to(self, user, value):
+        """分數只在 value 比較高時更新 (最大值類的排行榜)。"""
+        old = self.scores.get(user)
+        return (old is None or value > old) and self.set_score(user, value)
+
+    def rank(self, user):
+        """名次 (從 1 開始)，不在排行榜上時為 None。"""
+        score = self.scores.get(user)
+        return None if score is None else self._ranking.rank((-score, user))
+
+    def top(self, start=0, count=PAGE_SIZE):
+        """Returns: list[(名次, 使用者, 分數)]"""
+        return [(start + offset + 1, user, -negated)
+                for offset, (negated, user) in enumerate(self._ranking.slice(start, count))]
+
+
+class Leaderboards:
+    def __init__(self, path=None, checkpoint_interval=CHECKPOINT_INTERVAL, page_size=PAGE_SIZE,
+                 cache_seconds=CACHE_SECONDS, scheduler=None):
+        """
+        Args:
+            path (str, optional): 檢查點檔案 (預設為 LEADERBOARD_PATH)；存在時載入。
+            checkpoint_interval (float): 寫入檢查點的間隔 (秒)。
+            page_size (int): 每頁的名次數。
+            cache_seconds (float): 前 CACHED_PAGES 頁的快取時間。
+            scheduler (Scheduler, optional): 預設為行程共用的排程器。
+        """
+        self.path = path or LEADERBOARD_PATH
+        self.checkpoint_interval = checkpoint_interval
+        self.page_size = page_size
+        self.cache_seconds = cache_seconds
+        self.scheduler = scheduler or get_scheduler()
+        self.boards = {name: Leaderboard(name) for name in BOARDS}
+        self.names = {}             # 使用者 -> 最後使用的顯示名稱
+        self.dirty = False
+        self.hands_recorded = 0
+        self.checkpoint_count = 0
+        self.error_count = 0
+        self._page_cache = {}       # (排行榜, 頁) -> (到期時間, 回應)
+        self._checkpoint_timer = None
+        self._write_lock = _real_threading.Lock()
+        self._writer = None         # 最近一次寫入檢查點的 OS 執行緒
+        self.load()
+
+    # --- 更新 ---
+
+    def record_hand(self, net_by_user, winnings_by_user, names=None):
+        """
+        記錄一局的結果。
+        Args:
+            net_by_user (dict): 使用者 -> 本局籌碼變化 (開局到結束)。
+            winnings_by_user (dict): 使用者 -> 本局贏得的金額 (只含贏家)。
+            names (dict, optional): 使用者 -> 顯示名稱。
+        """
+        net_chips, hands_won, biggest_pot = (self.boards[name] for name in BOARDS)
+        for user, net in net_by_user.items():
+            if net:
+                net_chips.add(user, net)
+        for user, amount in winnings_by_user.items():
+            hands_won.add(user, 1)
+            biggest_pot.raise_to(user, amount)
+        if names:
+            self.names.update(names)
+        self.hands_recorded += 1
+        self.dirty = True
+
+    # --- 查詢 ---
+
+    def page(self, board, page=0):
+        """
+        排行榜的一頁 (前 CACHED_PAGES 頁會快取 cache_seconds 秒)。
+        Raises:
+            KeyError: 排行榜不存在。
+        """
+        leaderboard = self.boards[board]
+        cacheable = page < CACHED_PAGES
+        now = time.monotonic()
+        if cacheable:
+            cached = self._page_cache.get((board, page))
+            if cached is not None and cached[0] > now:
+                return cached[1]
+        entries = [{'rank': rank, 'name': self.names.get(user, ''), 'score': score}
+                   for rank, user, score in leaderboard.top(page * self.page_size, self.page_size)]
+        response = {'board': board, 'page': page, 'page_size': self.page_size, 'total': len(leaderboard),
+                    'entries': entries}
+        if cacheable:
+            self._page_cache[(board, page)] = (now + self.cache_seconds, response)
+        return response
+
+    def standing(self, board, user):
+        """使用者在排行榜上的名次與分數，不在排行榜上時為 None。"""
+        leaderboard = self.boards[board]
+        rank = leaderboard.rank(user)
+        if rank is None:
+            return None
+        return {'rank': rank, 'score': leaderboard.scores[user], 'page': (rank - 1) // self.page_size}
+
+    def summary(self):
+        return {name: len(leaderboard) for name, leaderboard in self.boards.items()}
+
+    # --- 檢查點 ---
+
+    def load(self):
+        """載入檢查點 (檔案不存在時從空的排行榜開始)。Returns: bool: 是否有載入。"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            print(f"[排行榜] 無法載入檢查點 {self.path}: {e}，從空的排行榜開始。")
+            return False
+        for name, scores in data.get('boards', {}).items():
+            if name in self.boards:
+                for user, score in scores.items():
+                    self.boards[name].set_score(user, score)
+        self.names.update(data.get('names', {}))
+        self.hands_recorded = data.get('hands_recorded', 0)
+        return True
+
+    def checkpoint(self):
+        """有異動時寫入檢查點 (在 OS 執行緒中序列化與寫檔)。Returns: bool: 是否開始寫入。"""
+        if not self.dirty:
+            return False
+        # 在呼叫端複製 (不會與 record_hand 交錯)，序列化與寫檔交給 OS 執行緒
+        data = {
+            'version': CHECKPOINT_VERSION, 'saved_at': time.time(), 'hands_recorded': self.hands_recorded,
+            'boards': {name: dict(leaderboard.scores) for name, leaderboard in self.boards.items()},
+            'names': dict(self.names),
+        }
+        self.dirty = False
+        self._writer = _real_threading.Thread(target=self._write_checkpoint, args=(data,),
+                                              name='leaderboard-checkpoint', daemon=True)
+        self._writer.start()
+        return True
+
+    def _write_checkpoint(self, data):
+        with self._write_lock:
+            tmp_path = f"{self.path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp_path, self.path)
+                self.checkpoint_count += 1
+            except OSError as e:
+                self.error_count += 1
+                self.dirty = True  # 下次再試
+                print(f"[排行榜] 寫入檢查點 {self.path} 失敗: {e}")
+
+    def flush(self):
+        """立即寫入檢查點並等待寫完 (行程結束時呼叫)。"""
+        if self.checkpoint():
+            self._writer.join()
+
+    def start(self):
+        """開始定期寫入檢查點。"""
+        if self._checkpoint_timer is None:
+            self._checkpoint_timer = self.scheduler.call_later(self.checkpoint_interval, self._run_checkpoint,
+                                                               label='leaderboards:checkpoint')
+
+    def stop(self):
+        if self._checkpoint_timer is not None:
+            self._checkpoint_timer.cancel()
+            self._checkpoint_timer = None
+
+    def _run_checkpoint(self):
+        self._checkpoint_timer = None
+        try:
+            self.checkpoint()
+        finally:
+            self.start()
+
+
+_default_leaderboards = None
+
+
+def configure_leaderboards(path=None, **kwargs):
+    """建立行程共用的排行榜並開始定期寫入檢查點 (app.py 啟動時呼叫)。"""
+    global _default_leaderboards
+    _default_leaderboards = Leaderboards(path, **kwargs)
+    _default_leaderboards.start()
+    atexit.register(_default_leaderboards.flush)
+    return _default_leaderboards
+
+
+def get_leaderboards():
+    """行程共用的排行榜；沒有設定時為 None (模擬、重播、基準測試不計入排行榜)。"""
+    return _default_leaderboards
+
@@ -0,0 +1,313 @@
+# games/matchmaking.py
+"""
+依遊戲與籌碼級別自動配桌。
+
+玩家不需要知道房間 ID: enqueue(玩家, 遊戲, 最低級別, 最高級別) 後由批次配對器 (每 match_interval 秒，共用排程器)
+決定座位:
+    1. 先找級別在範圍內、還有空位的既有牌桌 (大廳建立的房間也可以透過 offer_table 加入索引)。
+    2. 沒有的話在範圍內的標準級別 (STAKE_LADDER) 中挑等待人數最多的一級排隊；同一級湊滿一桌就開新桌，
+       湊不滿但最久的等待者超過 max_wait_seconds 且達到最少開局人數時開短桌。
+
+索引:
+    - 有空位的牌桌: 每個 (遊戲, 級別) 一個 heap (人數最多的牌桌在前，先把桌子坐滿)，各遊戲的級別另存一個排序串列，
+      以 bisect 找出範圍內的級別；每次配對 O(log n)。heap 中的人數可能過時，取出時才以牌桌目前的狀態驗證
+      (延遲刪除)，仍有空位就以新的人數放回。
+    - 等待中的玩家: 每個 (遊戲, 標準級別) 一個 deque；取消只做標記，出列時略過 (與快速棄牌玩家池相同)。
+
+配對器建立的牌桌使用 room_id mm-<編號>、自動發牌，並帶有選項 matchmaking=True；
+app.py 透過 on_table_opened 把牌桌放進 active_rooms，透過 on_seated 替玩家加入 Socket.IO 房間。
+"""
+import heapq
+import itertools
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+from games.admission import RETRY_OVERLOADED, Decision, seat_limit
+from games.black_jack.logic import BlackJackGame
+from games.event_sink import as_event_sink
+from games.scheduler import get_scheduler
+from games.texas_holdem.logic import TexasHoldemGame
+
+GAME_CLASSES = {'texas_holdem': TexasHoldemGame, 'black_jack': BlackJackGame}
+# 標準級別 (德州撲克為大盲注，21點為最低下注)；新牌桌只會開在這些級別
+STAKE_LADDER = {
+    'texas_holdem': (2, 4, 10, 20, 50, 100, 200, 500, 1000),
+    'black_jack': (5, 10, 25, 50, 100, 250, 500),
+}
+TABLE_SIZE = {'texas_holdem': 6, 'black_jack': 5}
+MIN_TABLE_PLAYERS = {'texas_holdem': 2, 'black_jack': 1}
+BUY_IN_MULTIPLIER = 100  # 買入 = 級別 x 100
+
+
+def stake_of(game):
+    """牌桌的級別: 德州撲克為大盲注，21點為最低下注。"""
+    if game.get_game_type() == 'texas_holdem':
+        return game.game_state['big_blind']
+    return game.game_state['min_bet']
+
+
+def table_options(game_type, stake):
+    """配對器在 stake 級別開新桌時使用的選項。"""
+    if game_type == 'texas_holdem':
+        options = {'small_blind': max(1, stake // 2), 'big_blind': stake}
+    else:
+        options = {'min_bet': stake, 'max_bet': stake * 10}
+    options.update(buy_in=stake * BUY_IN_MULTIPLIER, max_players=TABLE_SIZE[game_type], auto_deal=True, matchmaking=True)
+    return options
+
+
+class Matchmaker:
+    def __init__(self, event_sink, room_lookup, options=None, scheduler=None, can_open_table=None,
+                 on_table_opened=None, on_seated=None):
+        """
+        Args:
+            event_sink (EventSink): 新牌桌使用的事件介面。
+            room_lookup (callable): room_lookup(room_id) 回傳記憶體中的牌桌，已關閉 (或休眠) 時為 None。
+            options (dict, optional): match_interval (秒，預設 0.2)、max_wait_seconds (預設 5)、max_queued (預設 20000)、
+                hand_history、timeout_seconds、seed (新牌桌的選項)。
+            scheduler (Scheduler, optional): 配對器與新牌桌使用的排程器。
+            can_open_table (callable, optional): 回傳是否還能開新桌 (行程的房間數上限)。
+            on_table_opened (callable, optional): on_table_opened(matchmaker, game)。
+            on_seated (callable, optional): on_seated(matchmaker, player_sid, game)。
+        """
+        self.events = as_event_sink(event_sink)
+        self.options = options if options is not None else {}
+        self.scheduler = scheduler or get_scheduler()
+        self.room_lookup = room_lookup
+        self.can_open_table = can_open_table
+        self.on_table_opened = on_table_opened
+        self.on_seated = on_seated
+        self.match_interval = float(self.options.get('match_interval', 0.2))
+        self.max_wait_seconds = float(self.options.get('max_wait_seconds', 5))
+        self.max_queued = int(self.options.get('max_queued', 20000))
+
+        self.players = {}       # sid: {'name', 'game_type', 'stakes': (最低, 最高), 'level', 'seq', 'queued_at'}
+        self.arrivals = deque() # (sid, seq)，尚未處理的新玩家
+        self.waiting = {}       # (遊戲, 標準級別): deque[(sid, seq, 入列時間)]
+        self.waiting_count = {} # (遊戲, 標準級別): 實際等待人數
+        self.open_tables = {}   # (遊戲, 級別): heap[(-人數, 序號, room_id)]
+        self.table_stakes = {game_type: [] for game_type in GAME_CLASSES}  # 有空位牌桌的級別 (排序)
+        self.offered = set()    # 已在 open_tables 中的 room_id
+        self.sequence = itertools.count()
+        self.table_counter = 0
+        self.match_timer = None
+        self.matched = 0
+        self.tables_opened = 0
+
+    # --- 玩家 ---
+
+    def enqueue(self, player_sid, player_name, game_type, min_stake, max_stake):
+        """
+        Returns:
+            Decision: 202 已排隊；400 參數錯誤；409 已在佇列中；503 佇列已滿。
+        """
+        if game_type not in GAME_CLASSES:
+            return Decision(400, f"不支援的遊戲: {game_type}")
+        try:
+            min_stake, max_stake = float(min_stake), float(max_stake)
+        except (TypeError, ValueError):
+            return Decision(400, "min_stake 與 max_stake 必須為數字。")
+        ladder = STAKE_LADDER[game_type]
+        if min_stake > max_stake or bisect_left(ladder, min_stake) == bisect_right(ladder, max_stake):
+            return Decision(400, f"級別範圍內沒有可開桌的級別 (可用級別: {', '.join(map(str, ladder))})。")
+        if player_sid in self.players:
+            return Decision(409, "您已在配對佇列中。")
+        if len(self.players) >= self.max_queued:
+            return Decision(503, "配對佇列已滿，請稍後再試。", RETRY_OVERLOADED)
+        seq = next(self.sequence)
+        self.players[player_sid] = {'name': player_name, 'game_type': game_type, 'stakes': (min_stake, max_stake),
+                                    'level': None, 'seq': seq, 'queued_at': self.scheduler.now()}
+        self.arrivals.append((player_sid, seq))
+        self._schedule_match()
+        return Decision(202, "已加入配對佇列。")
+
+    def cancel(self, player_sid):
+        """取消配對 (延遲刪除)。Returns: bool: 是否在佇列中。"""
+        state = self.players.pop(player_sid, None)
+        if state is None:
+            return False
+        if state['level'] is not None:
+            self.waiting_count[(state['game_type'], state['level'])] -= 1
+        return True
+
+    # --- 牌桌索引 ---
+
+    def offer_table(self, room_id, game):
+        """把有空位的牌桌加入索引 (開房、有人離座時由 app.py 呼叫)；錦標賽與玩家池的牌桌不接受。"""
+        if room_id in self.offered or game.options.get('tournament_id') or game.options.get('fast_fold_pool_id'):
+            return
+        if game.get_game_type() not in GAME_CLASSES or seat_limit(game) <= game.get_player_count():
+            return
+        self._push_table(room_id, game)
+        self._schedule_match()
+
+    def _push_table(self, room_id, game):
+        key = (game.get_game_type(), stake_of(game))
+        heap = self.open_tables.get(key)
+        if heap is None:
+            heap = self.open_tables[key] = []
+            stakes = self.table_stakes[key[0]]
+            stakes.insert(bisect_left(stakes, key[1]), key[1])
+        heapq.heappush(heap, (-game.get_player_count(), next(self.sequence), room_id))
+        self.offered.add(room_id)
+
+    def _pop_table(self, game_type, stake, deferred):
+        """
+        取出 (遊戲, 級別) 人數最多、仍有空位的牌桌；正在進行中不能加入的牌桌放進 deferred，本輪結束後放回。
+        Returns:
+            牌桌，沒有時為 None。
+        """
+        key = (game_type, stake)
+        heap = self.open_tables.get(key)
+        while heap:
+            _, _, room_id = heapq.heappop(heap)
+            self.offered.discard(room_id)
+            game = self.room_lookup(room_id)
+            if game is None or seat_limit(game) <= game.get_player_count():
+                continue  # 房間已關閉或已坐滿 (有人離座時會重新加入索引)
+            if game.is_game_in_progress and not game.options.get('allow_join_in_progress', False) \
+                    and not game.options.get('matchmaking'):
+                deferred.append((room_id, game))
+                continue
+            if not heap:
+                self._drop_stake(key)
+            return game
+        if heap is not None:
+            self._drop_stake(key)
+        return None
+
+    def _drop_stake(self, key):
+        del self.open_tables[key]
+        stakes = self.table_stakes[key[0]]
+        del stakes[bisect_left(stakes, key[1])]
+
+    def _find_table(self, game_type, min_stake, max_stake, deferred):
+        """級別在 [min_stake, max_stake] 內、由低到高第一張有空位的牌桌。"""
+        stakes = self.table_stakes[game_type]
+        index = bisect_left(stakes, min_stake)
+        while index < len(stakes) and stakes[index] <= max_stake:
+            stake = stakes[index]
+            game = self._pop_table(game_type, stake, deferred)
+            if game is not None:
+                return game
+            if index < len(stakes) and stakes[index] == stake:
+                index += 1  # 這一級還有牌桌 (都在 deferred 中)
+        return None
+
+    # --- 配對 ---
+
+    def _schedule_match(self):
+        if self.match_timer is None:
+            self.match_timer = self.scheduler.call_later(self.match_interval, self._run_matcher, label='matchmaker:match')
+
+    def _run_matcher(self):
+        self.match_timer = None
+        deferred = []
+        # 新玩家: 有空位的既有牌桌優先，否則排進範圍內等待人數最多的標準級別
+        while self.arrivals:
+            player_sid, seq = self.arrivals.popleft()
+            state = self.players.get(player_sid)
+            if state is None or state['seq'] != seq:
+                continue
+            game = self._find_table(state['game_type'], *state['stakes'], deferred)
+            if game is not None:
+                self._seat(player_sid, game)
+                self._reoffer(game)
+            else:
+                self._wait(player_sid, state)
+        # 等待中的玩家: 先補進同級別的牌桌，再開新桌
+        now = self.scheduler.now()
+        for key, queue in self.waiting.items():
+            game_type, stake = key
+            while self.waiting_count[key]:
+                game = self._pop_table(game_type, stake, deferred)
+                if game is None:
+                    break
+                self._seat_waiting(key, queue, seat_limit(game) - game.get_player_count(), game)
+                self._reoffer(game)
+            while self.waiting_count[key] >= TABLE_SIZE[game_type] and self._open_table(key, queue):
+                pass
+            if self.waiting_count[key] >= MIN_TABLE_PLAYERS[game_type] and now - self._oldest(queue) >= self.max_wait_seconds:
+                self._open_table(key, queue)
+        for room_id, game in deferred:
+            self._push_table(room_id, game)
+        if any(self.waiting_count.values()) or self.arrivals:
+            self._schedule_match()
+
+    def _wait(self, player_sid, state):
+        # 範圍內的標準級別不多 (bisect 找出範圍)，挑等待人數最多的一級，平手時取低的
+        ladder = STAKE_LADDER[state['game_type']]
+        levels = ladder[bisect_left(ladder, state['stakes'][0]):bisect_right(ladder, state['stakes'][1])]
+        level = max(levels, key=lambda stake: (self.waiting_count.get((state['game_type'], stake), 0), -stake))
+        key = (state['game_type'], level)
+        state['level'] = level
+        self.waiting.setdefault(key, deque()).append((player_sid, state['seq'], self.scheduler.now()))
+        self.waiting_count[key] = self.waiting_count.get(key, 0) + 1
+
+    def _oldest(self, queue):
+        while queue and not self._is_waiting(*queue[0][:2]):
+            queue.popleft()
+        return queue[0][2] if queue else float('inf')
+
+    def _is_waiting(self, player_sid, seq):
+        state = self.players.get(player_sid)
+        return state is not None and state['seq'] == seq
+
+    def _seat_waiting(self, key, queue, count, game):
+        seated = 0
+        while seated < count and queue:
+            player_sid, seq, _ = queue.popleft()
+            if not self._is_waiting(player_sid, seq):
+                continue
+            self.waiting_count[key] -= 1
+            self._seat(player_sid, game)
+            seated += 1
+        return seated
+
+    def _seat(self, player_sid, game):
+        state = self.players.pop(player_sid)
+        game.add_player(player_sid, {'name': state['name']})
+        self.matched += 1
+        if self.on_seated:
+            self.on_seated(self, player_sid, game)
+        # 配對器的牌桌在沒有進行中也沒有排定下一局時 (人數不足而停下) 直接開局
+        if game.options.get('matchmaking') and not game.is_game_in_progress and game.auto_deal_timer is None \
+                and game.get_player_count() >= MIN_TABLE_PLAYERS[game.get_game_type()]:
+            game.start_game(None)
+
+    def _reoffer(self, game):
+        if game.room_id not in self.offered and seat_limit(game) > game.get_player_count():
+            self._push_table(game.room_id, game)
+
+    def _open_table(self, key, queue):
+        if self.can_open_table is not None and not self.can_open_table():
+            return False  # 行程的房間數已達上限，玩家留在佇列中
+        game_type, stake = key
+        self.table_counter += 1
+        room_id = f"mm-{self.table_counter}"
+        options = table_options(game_type, stake)
+        for name in ('hand_history', 'timeout_seconds'):
+            if name in self.options:
+                options[name] = self.options[name]
+        if self.options.get('seed') is not None:
+            options['seed'] = f"{self.options['seed']}:{room_id}"
+        game = GAME_CLASSES[game_type](room_id, [], self.events, options)
+        game.scheduler = self.scheduler
+        self.tables_opened += 1
+        if self.on_table_opened:
+            self.on_table_opened(self, game)
+        self._seat_waiting(key, queue, TABLE_SIZE[game_type], game)
+        self._reoffer(game)
+        return True
+
+    # --- 狀態 ---
+
+    def get_summary(self):
+        return {
+            'queued': len(self.players),
+            'waiting_by_stake': {f"{game_type}:{stake}": count for (game_type, stake), count in self.waiting_count.items() if count},
+            'open_tables': sum(len(heap) for heap in self.open_tables.values()),
+            'tables_opened': self.tables_opened,
+            'matched': self.matched,
+        }
+
@@ -0,0 +1,380 @@
+# games/metrics.py
+"""
+低開銷的伺服器指標收集，以 Prometheus 文字格式輸出。
+
+設計重點:
+    - 直方圖使用固定的 bucket 邊界，記錄時只做一次 bisect 與兩次加法，
+      不配置任何物件，單次記錄成本在一微秒以內。
+    - 所有計數都在事件迴圈 (eventlet greenthread) 內完成，記錄過程不會讓出執行權，
+      因此不需要鎖。
+    - 帶標籤的子指標 (labels(...)) 會被快取，熱路徑上應先取出子指標再重複使用。
+    - 房間數、玩家數、計時器數等即時數值以 GaugeFunc 在抓取 (/metrics) 時才計算。
+"""
+import os
+import resource
+import sys
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# 延遲直方圖的預設 bucket 邊界 (秒)
+DEFAULT_LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                           0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# 已知的遊戲動作；其他任意字串一律歸類為 'other'，避免客戶端輸入造成標籤爆量
+KNOWN_ACTION_TYPES = frozenset({
+    'bet', 'call', 'check', 'fold', 'raise',
+    'hit', 'stand', 'double', 'insurance', 'decline_insurance',
+})
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('_bounds', '_counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # 最後一格為 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        running = 0
+        result = []
+        for c in self._counts:
+            running += c
+            result.append(running)
+        return result
+
+
+class _Metric:
+    metric_type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *labelvalues):
+        """取得 (或建立) 對應標籤值的子指標。呼叫端應快取回傳值。"""
+        child = self._children.get(labelvalues)
+        if child is None:
+            if len(labelvalues) != len(self.labelnames):
+                raise ValueError(f"{self.name} 需要 {len(self.labelnames)} 個標籤值，收到 {len(labelvalues)} 個。")
+            child = self._new_child()
+            self._children[labelvalues] = child
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    metric_type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._children[()].value += amount
+
+    def _render_samples(self):
+        for labelvalues, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(child.value)}"
+
+
+class Histogram(_Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._children[()].observe(value)
+
+    def _render_samples(self):
+        bounds = self.buckets + (float('inf'),)
+        for labelvalues, child in list(self._children.items()):
+            for bound, cumulative in zip(bounds, child.cumulative_counts()):
+                labels = _format_labels(self.labelnames, labelvalues, ('le', _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class GaugeFunc(_Metric):
+    """
+    在抓取時才呼叫 callback 計算數值的 gauge。
+    callback 可回傳單一數值，或 {標籤值 tuple: 數值} 的 dict。
+    """
+    metric_type = 'gauge'
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        self.callback = callback
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return None
+
+    def _render_samples(self):
+        value = self.callback()
+        if isinstance(value, dict):
+            for labelvalues, v in value.items():
+                yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(v)}"
+        else:
+            yield f"{self.name} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            # 模組重新載入或重複註冊時沿用既有指標，保留已累積的數值
+            if type(existing) is not type(metric):
+                raise ValueError(f"指標 {metric.name} 已以不同類型註冊。")
+            if isinstance(metric, GaugeFunc):
+                existing.callback = metric.callback
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_func(self, name, documentation, callback, labelnames=()):
+        return self.register(GaugeFunc(name, documentation, callback, labelnames))
+
+    def render(self):
+        """以 Prometheus 文字格式 (0.0.4) 輸出所有指標。"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# --- 共用指標 ---
+SOCKET_HANDLER_SECONDS = REGISTRY.histogram(
+    'cnl_socketio_handler_seconds', 'Socket.IO 事件處理函式耗時 (秒)。', ('event',))
+GAME_METHOD_SECONDS = REGISTRY.histogram(
+    'cnl_game_method_seconds', 'BaseGame 生命週期方法耗時 (秒)。', ('game_type', 'method'))
+GAME_ACTIONS_TOTAL = REGISTRY.counter(
+    'cnl_game_actions_total', '玩家送出的遊戲動作數。', ('game_type', 'action_type'))
+HANDS_STARTED_TOTAL = REGISTRY.counter(
+    'cnl_hands_started_total', '成功開始的牌局數。', ('game_type',))
+HANDS_COMPLETED_TOTAL = REGISTRY.counter(
+    'cnl_hands_completed_total', '完成結算的牌局數 (end_game)。', ('game_type',))
+HANDS_ABORTED_TOTAL = REGISTRY.counter(
+    'cnl_hands_aborted_total', '中止而未結算的牌局數 (abort_game，例如所有玩家都已離開)。', ('game_type',))
+SHOWDOWN_SECONDS = REGISTRY.histogram(
+    'cnl_showdown_evaluation_seconds', '攤牌時牌力評估耗時 (秒)。', ('game_type',))
+EMITS_TOTAL = REGISTRY.counter(
+    'cnl_socketio_emits_total', '伺服器呼叫 emit 的次數 (使用 rate() 取得每秒數值)。', ('event',))
+PACKETS_SENT_TOTAL = REGISTRY.counter(
+    'cnl_socketio_packets_sent_total', '實際送往各客戶端的 Socket.IO 封包數。')
+BYTES_SENT_TOTAL = REGISTRY.counter(
+    'cnl_socketio_bytes_sent_total', '實際送往各客戶端的 Socket.IO 封包位元組數 (使用 rate() 取得每秒數值)。')
+ADMISSION_REJECTIONS_TOTAL = REGISTRY.counter(
+    'cnl_admission_rejections_total', '因容量限制被拒絕的建立房間 / 加入牌桌請求數。', ('reason',))
+
+
+def _resident_memory_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # 沒有 /proc 的平台只能取得峰值 (macOS 以 bytes、Linux 以 KiB 回報)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# 行程的 CPU 與記憶體 (壓力測試以前後兩次抓取的差值計算 CPU 使用率)
+PROCESS_CPU_SECONDS = REGISTRY.gauge_func(
+    'cnl_process_cpu_seconds', '伺服器行程累計使用的 CPU 時間 (user + system，秒)。', time.process_time)
+PROCESS_RESIDENT_MEMORY_BYTES = REGISTRY.gauge_func(
+    'cnl_process_resident_memory_bytes', '伺服器行程目前的常駐記憶體 (bytes)。', _resident_memory_bytes)
+
+
+def observe_handler(event_name):
+    """
+    Socket.IO handler 的計時裝飾器，須放在 @socketio.on(...) 之下。
+    Args:
+        event_name (str): 指標中的 event 標籤值。
+    """
+    child = SOCKET_HANDLER_SECONDS.labels(event_name)
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def action_label(action_type):
+    """將客戶端傳入的動作字串正規化為有限集合內的標籤值。"""
+    return action_type if action_type in KNOWN_ACTION_TYPES else 'other'
+
+
+def instrument_socketio(socketio):
+    """
+    包裝 Flask-SocketIO 實例，統計 emit 次數以及實際送出的封包數與位元組數。
+    必須在 SocketIO(app, ...) 建立 server 之後呼叫。
+    """
+    original_emit = socketio.emit
+    emit_children = {}
+
+    @wraps(original_emit)
+    def counting_emit(event, *args, **kwargs):
+        child = emit_children.get(event)
+        if child is None:
+            # 事件名稱由伺服器程式決定，數量有限
+            child = emit_children[event] = EMITS_TOTAL.labels(event)
+        child.value += 1
+        return original_emit(event, *args, **kwargs)
+
+    socketio.emit = counting_emit
+
+    eio = socketio.server.eio
+    original_send = eio.send
+    packets = PACKETS_SENT_TOTAL.labels()
+    sent_bytes = BYTES_SENT_TOTAL.labels()
+
+    @wraps(original_send)
+    def counting_send(sid, data, *args, **kwargs):
+        packets.value += 1
+        sent_bytes.value += len(data)
+        return original_send(sid, data, *args, **kwargs)
+
+    eio.send = counting_send
+    return socketio
+
+
+def instrument_game_method(method_name, func):
+    """
+    包裝 BaseGame 子類別的生命週期方法，依遊戲類型記錄耗時。
+    handle_action / start_game / end_game / abort_game 另外累計動作數與牌局數
+    (只有完成結算的牌局呼叫 end_game，中止的牌局呼叫 abort_game，兩者分開計數)。
+    """
+    children = {}
+
+    def _child(game):
+        child = children.get(game.__class__)
+        if child is None:
+            child = children[game.__class__] = GAME_METHOD_SECONDS.labels(game.get_game_type(), method_name)
+        return child
+
+    if method_name == 'handle_action':
+        @wraps(func)
+        def wrapper(self, player_sid, action_type, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(self, player_sid, action_type, *args, **kwargs)
+            finally:
+                _child(self).observe(time.perf_counter() - start)
+                GAME_ACTIONS_TOTAL.labels(self.get_game_type(), action_label(action_type)).value += 1
+    elif method_name == 'start_game':
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(self, *args, **kwargs)
+                return result
+            finally:
+                _child(self).observe(time.perf_counter() - start)
+                if result:
+                    HANDS_STARTED_TOTAL.labels(self.get_game_type()).value += 1
+    elif method_name == 'end_game':
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                _child(self).observe(time.perf_counter() - start)
+                HANDS_COMPLETED_TOTAL.labels(self.get_game_type()).value += 1
+    elif method_name == 'abort_game':
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                _child(self).observe(time.perf_counter() - start)
+                HANDS_ABORTED_TOTAL.labels(self.get_game_type()).value += 1
+    else:
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                _child(self).observe(time.perf_counter() - start)
+
+    wrapper._metrics_instrumented = True
+    return wrapper
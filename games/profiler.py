@@ -0,0 +1,211 @@
+# games/profiler.py
+"""
+線上取樣分析器與慢動作紀錄器。
+
+伺服器的所有 greenthread 都跑在同一個 OS 執行緒上 (eventlet hub)，
+因此這裡用一條「真正的」OS 執行緒 (不受 monkey_patch 影響) 週期性地讀取
+sys._current_frames() 中該執行緒的堆疊，就能取樣到當下正在佔用 CPU 的 greenthread。
+輸出為 flamegraph.pl / speedscope 可直接讀取的 collapsed-stack 格式。
+"""
+import os
+import sys
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, redirect_stdout
+from functools import wraps
+
+import eventlet
+from eventlet import patcher
+
+_real_threading = patcher.original('threading')
+_real_time = patcher.original('time')
+
+# eventlet hub 在等待 I/O 時的堆疊；預設不計入取樣結果
+_IDLE_MARKERS = (os.sep + 'eventlet' + os.sep + 'hubs' + os.sep,)
+
+MAX_PROFILE_SECONDS = 60
+
+
+def collapse_stack(frame, max_depth=128):
+    """
+    將 frame 鏈轉為 collapsed-stack 字串 (根在前，以分號分隔)。
+    Args:
+        frame: 最內層的 frame 物件。
+        max_depth (int): 最多保留的層數。
+    Returns:
+        str: 例如 "app.py:on_game_action;logic.py:handle_action"
+    """
+    parts = []
+    while frame is not None and len(parts) < max_depth:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    parts.reverse()
+    return ';'.join(parts)
+
+
+def _is_idle(frame):
+    filename = frame.f_code.co_filename
+    return any(marker in filename for marker in _IDLE_MARKERS)
+
+
+class SamplingProfiler:
+    """對單一 OS 執行緒 (預設為建立者所在的執行緒) 做定時堆疊取樣。"""
+
+    def __init__(self, interval=0.005, include_idle=False, target_thread_id=None):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.target_thread_id = target_thread_id or _real_threading.get_ident()
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = _real_threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = _real_threading.Thread(target=self._run, name='cnl-sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is not None and (self.include_idle or not _is_idle(frame)):
+                self.samples[collapse_stack(frame)] += 1
+                self.sample_count += 1
+            frame = None
+            _real_time.sleep(self.interval)
+
+    def to_collapsed(self):
+        """返回 collapsed-stack 格式文字，每行為 "堆疊 次數"。"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+_profile_in_progress = False
+
+
+def profile_for(seconds, interval=0.005, include_idle=False):
+    """
+    在不阻塞事件迴圈的情況下取樣指定秒數，返回 collapsed-stack 文字。
+    同一時間只允許一個分析工作。
+    Raises:
+        RuntimeError: 已有分析工作在進行中。
+    """
+    global _profile_in_progress
+    if _profile_in_progress:
+        raise RuntimeError("已有分析工作在進行中。")
+    seconds = max(0.0, min(float(seconds), MAX_PROFILE_SECONDS))
+    _profile_in_progress = True
+    profiler = SamplingProfiler(interval=interval, include_idle=include_idle)
+    try:
+        profiler.start()
+        eventlet.sleep(seconds)  # 讓出執行權，讓其他 greenthread 在取樣期間正常運作
+    finally:
+        profiler.stop()
+        _profile_in_progress = False
+    return profiler.to_collapsed()
+
+
+class SlowActionRecorder:
+    """
+    紀錄耗時超過門檻的遊戲動作與計時器回呼。
+
+    動作開始時只記下開始時間 (熱路徑上僅數次屬性寫入)；
+    背景的 OS 執行緒在動作進行中才會取樣堆疊，動作結束後若超過門檻，
+    就把房間 ID、動作類型、耗時與取樣到的堆疊存入固定長度的緩衝區。
+    """
+
+    def __init__(self, threshold_ms=200, capacity=100, sample_interval=0.005):
+        self.threshold = threshold_ms / 1000.0
+        self.sample_interval = sample_interval
+        self.records = deque(maxlen=capacity)
+        self._current = None  # [開始時間, 房間ID, 動作類型, 取樣 Counter]
+        self._owner_thread_id = None
+        self._watchdog = None
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def _ensure_watchdog(self):
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._owner_thread_id = _real_threading.get_ident()
+            self._watchdog = _real_threading.Thread(target=self._watch, name='cnl-slow-action-watchdog', daemon=True)
+            self._watchdog.start()
+
+    def _watch(self):
+        while True:
+            current = self._current
+            if current is not None:
+                frame = sys._current_frames().get(self._owner_thread_id)
+                if frame is not None:
+                    current[3][collapse_stack(frame)] += 1
+                    del frame
+            _real_time.sleep(self.sample_interval)
+
+    @contextmanager
+    def track(self, room_id, action_type):
+        """在 with 區塊內執行的程式若超過門檻即被記錄。巢狀呼叫只由最外層負責。"""
+        if not self.enabled or self._current is not None:
+            yield
+            return
+        self._ensure_watchdog()
+        current = [time.perf_counter(), room_id, action_type, Counter()]
+        self._current = current
+        try:
+            yield
+        finally:
+            self._current = None
+            elapsed = time.perf_counter() - current[0]
+            if elapsed >= self.threshold:
+                self.records.append({
+                    'room_id': room_id,
+                    'action_type': action_type,
+                    'duration_ms': round(elapsed * 1000, 3),
+                    'recorded_at': time.time(),
+                    'profile': ''.join(f"{stack} {count}\n" for stack, count in current[3].most_common()),
+                })
+
+    def snapshot(self):
+        return list(self.records)
+
+    def clear(self):
+        self.records.clear()
+
+
+SLOW_ACTIONS = SlowActionRecorder(
+    threshold_ms=float(os.getenv('SLOW_ACTION_THRESHOLD_MS', '200')),
+    capacity=int(os.getenv('SLOW_ACTION_BUFFER_SIZE', '100')),
+)
+
+
+@contextmanager
+def batch_run(quiet=True):
+    """
+    模擬、重播、機器人壓力測試與基準測試在行程內大量執行遊戲邏輯時使用:
+    區塊內停用慢動作紀錄 (不啟動取樣執行緒)，quiet 時丟棄遊戲邏輯的 print；離開時恢復原本的門檻，
+    同一個行程中的伺服器不受影響。
+    """
+    threshold = SLOW_ACTIONS.threshold
+    SLOW_ACTIONS.threshold = 0
+    try:
+        if quiet:
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                yield
+        else:
+            yield
+    finally:
+        SLOW_ACTIONS.threshold = threshold
+
+
+def track_slow_actions(func):
+    """包裝 BaseGame.handle_action，超過門檻的動作會被 SLOW_ACTIONS 記錄。"""
+    @wraps(func)
+    def wrapper(self, player_sid, action_type, *args, **kwargs):
+        with SLOW_ACTIONS.track(self.room_id, str(action_type)[:32]):
+            return func(self, player_sid, action_type, *args, **kwargs)
+    wrapper._slow_actions_tracked = True
+    return wrapper
@@ -0,0 +1,193 @@
+# games/replay.py
+"""
+以種子與動作清單無頭重播牌局。
+
+每局的牌序只由種子決定 (德州撲克: 每局一個種子；21點: 牌靴的洗牌種子加上本局開始時的游標)，
+因此只要有 games/hand_history.py 的一筆紀錄 (座位、種子、牌桌規則、動作)，
+就能重新建立 TexasHoldemGame / BlackJackGame、依序送入同樣的動作，並比對結算結果。
+用於除錯、爭議處理，以及在修改規則程式碼後重跑大量歷史牌局以抓出回歸。
+
+用法:
+    python -m games.replay hand_history/texas_holdem/<room_id>.hhl
+    python -m games.replay hand_history/black_jack/<room_id>.hhl --hand 12 --verbose
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from games.black_jack.logic import BlackJackGame
+from games.black_jack.shoe import Shoe
+from games.event_sink import RecordingSink
+from games.hand_history import HandHistoryReader
+from games.profiler import batch_run
+from games.scheduler import ManualScheduler
+from games.texas_holdem.logic import TexasHoldemGame
+
+
+def _chips(value):
+    return int(value) if float(value).is_integer() else value
+
+
+def build_game(hand):
+    """
+    依紀錄建立一個尚未開始的遊戲實例 (座位、籌碼、規則與下一局的種子都和原本的一局相同)。
+    Args:
+        hand (dict): hand_history.decode_hand 的輸出。
+    Returns:
+        tuple: (game, RecordingSink) — 只記錄 *_game_over 的結果，不組裝狀態廣播
+    """
+    table = hand['table']
+    # 機率提示不影響結算，重播時不計算
+    options = dict(table, hand_history=False, outcome_hints=False)
+    options.setdefault('shuffle', 'fast')  # 沒有記錄產生器的舊紀錄都是 'fast'
+    room_id = table.get('room_id', 'replay')
+    events = RecordingSink(events={f"{hand['game_type']}_game_over"}, broadcasts=False)
+    if hand['game_type'] == 'texas_holdem':
+        game = TexasHoldemGame(room_id, [], events, options)
+    elif hand['game_type'] == 'black_jack':
+        game = BlackJackGame(room_id, [], events, options)
+        game.shoe = Shoe.from_seed(hand['seed'], hand['deal_offset'],
+                                   num_decks=table.get('num_decks', 6), cut_card=table.get('cut_card'),
+                                   generator=options['shuffle'])
+    else:
+        raise ValueError(f"無法重播的遊戲類型: {hand['game_type']}")
+    game.scheduler = ManualScheduler()
+    for seat in hand['seats']:
+        game.add_player(seat['sid'], {'name': seat['name']})
+        game.players[seat['sid']]['chips'] = _chips(seat['chips'])
+    if hand['seats']:
+        game.host_sid = hand['seats'][0]['sid']
+    game.next_hand_seed = hand['seed']
+    return game, events
+
+
+def _apply_texas_action(game, action):
+    sid = action['sid']
+    name = action['action']
+    if name in ('small_blind', 'big_blind'):
+        return  # start_game 會自動下盲注
+    if name == 'leave':
+        game.remove_player(sid)
+    elif name == 'fold' and action['auto']:
+        if game.game_state.get('current_turn_sid') == sid:
+            game.scheduler.advance(game.game_state['timeout_seconds'])  # 讓自動棄牌計時器觸發
+    else:
+        game.handle_action(sid, name, {'amount': _chips(action['amount'])})
+
+
+def _apply_black_jack_action(game, action):
+    sid = action['sid']
+    name = action['action']
+    if name != 'bet' and game.game_state.get('game_phase') == 'betting':
+        game._close_betting()  # 原本的一局在這裡已經因期限到而結束下注
+    if name == 'bet':
+        game.handle_action(sid, 'bet', {'amount': _chips(action['amount'])})
+    elif name == 'insurance':
+        game.handle_action(sid, 'insurance', {'take': True, 'amount': _chips(action['amount'])})
+    elif name == 'decline_insurance' and action['auto']:
+        player = game.players.get(sid)
+        if player and player['has_insurance'] is None:
+            game._insurance_deadline_expired()  # 同一個期限會一次處理所有未決定的玩家
+    elif name == 'stand' and action['auto']:
+        game._turn_deadline_expired(sid)
+    else:
+        game.handle_action(sid, name)
+
+
+def _normalize(results):
+    return json.loads(json.dumps(results, ensure_ascii=False, default=str))
+
+
+def replay_hand(hand):
+    """
+    重播一局並比對結果。
+    Args:
+        hand (dict): hand_history.decode_hand 的輸出。
+    Returns:
+        dict: {'ok': 結果是否一致, 'results': 重播的結果, 'expected': 紀錄中的結果, 'game': 遊戲實例}
+    """
+    game, events = build_game(hand)
+    game.start_game(None)
+    apply_action = _apply_texas_action if hand['game_type'] == 'texas_holdem' else _apply_black_jack_action
+    for action in hand['actions']:
+        apply_action(game, action)
+    if isinstance(game, BlackJackGame) and game.game_state.get('game_phase') == 'betting':
+        game._close_betting()
+    game_over = events.last(f"{hand['game_type']}_game_over")
+    results = _normalize(game_over) if game_over is not None else None
+    return {
+        'ok': results == hand['results'],
+        'results': results,
+        'expected': hand['results'],
+        'game': game,
+    }
+
+
+def replay_range(task):
+    """
+    重播一個區段的牌局 (可在子行程中執行)。
+    Args:
+        task (tuple): (path, 起始局號, 結束局號 (不含), 是否隱藏遊戲輸出)
+    Returns:
+        tuple: (局數, 不一致的局號列表)
+    """
+    path, start, stop, quiet = task
+    mismatches = []
+    count = 0
+    with batch_run(quiet):
+        for number, hand in enumerate(HandHistoryReader(path).iter_hands(start, stop), start):
+            count += 1
+            if not replay_hand(hand)['ok']:
+                mismatches.append(number)
+    return count, mismatches
+
+
+def replay_file(path, hand_number=None, quiet=True, workers=1, chunk_size=2000):
+    """
+    重播 .hhl 中的所有牌局 (或指定的一局)。workers > 1 時以多個行程分段重播。
+    Returns:
+        dict: hands, mismatches (不一致的局號列表), seconds, hands_per_second
+    """
+    if hand_number is not None:
+        tasks = [(path, hand_number, hand_number + 1, quiet)]
+    else:
+        total = len(HandHistoryReader(path))
+        tasks = [(path, start, min(start + chunk_size, total), quiet) for start in range(0, total, chunk_size)]
+
+    start_time = time.perf_counter()
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk_results = list(pool.map(replay_range, tasks))
+    else:
+        chunk_results = [replay_range(task) for task in tasks]
+    elapsed = time.perf_counter() - start_time
+
+    count = sum(result[0] for result in chunk_results)
+    return {
+        'hands': count,
+        'mismatches': [number for result in chunk_results for number in result[1]],
+        'seconds': elapsed,
+        'hands_per_second': count / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="重播牌局紀錄 (.hhl) 並比對結算結果")
+    parser.add_argument('path', help=".hhl 檔案路徑")
+    parser.add_argument('--hand', type=int, default=None, help="只重播第 N 局 (從 0 開始)")
+    parser.add_argument('--verbose', action='store_true', help="顯示遊戲邏輯的輸出")
+    parser.add_argument('--workers', type=int, default=1, help="重播使用的行程數")
+    args = parser.parse_args(argv)
+
+    summary = replay_file(args.path, args.hand, quiet=not args.verbose, workers=args.workers)
+    print(f"重播 {summary['hands']} 局，{len(summary['mismatches'])} 局結果不一致，"
+          f"{summary['hands_per_second']:.0f} 局/秒")
+    if summary['mismatches']:
+        print(f"不一致的局: {summary['mismatches'][:50]}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+# games/room_store.py
+"""
+常駐房間的上限與閒置房間的休眠 (快照到磁碟、需要時再喚醒)。
+
+過去房間只有在玩家全部離開時才會從 active_rooms 刪除；所有人都不再動作的牌桌、卡在局中的遊戲
+會一直留在記憶體中。RoomStore 取代 active_rooms 這個 dict:
+    - 每 sweep_interval 秒檢查一次，超過 idle_seconds 沒有被存取、而且 Socket.IO 房間中沒有任何連線的房間
+      會休眠: 取消計時器 (BaseGame.suspend)、把整個遊戲實例 pickle 到 directory/<room_id>.room，然後移出記憶體。
+    - 常駐房間數超過 max_resident 時，依最近使用順序 (LRU) 讓最久沒有被存取、沒有連線的房間休眠。
+    - 休眠的房間仍在大廳中，store[room_id] (加入、重新連線、動作) 會從快照喚醒並重新排程計時器
+      (BaseGame.resume)，休眠期間的時間不計入任何期限。
+錦標賽、玩家池的牌桌與掛著 hand_end_listeners (機器人) 的房間由其他物件持有，永遠不會休眠。
+
+快照只在同一個行程中使用 (事件介面與排程器以 persistent id 代換，行程重新啟動時舊的快照會被清除)，
+因此修改遊戲程式碼後不需要處理舊版快照的相容性。
+
+迭代 (items / values / keys / len) 只包含常駐的房間；`in`、get 與索引也涵蓋休眠的房間。
+"""
+import io
+import os
+import pickle
+import random
+import time
+from collections import OrderedDict
+
+from games.event_sink import EventSink
+from games.scheduler import Scheduler, get_scheduler
+from games.wallet import Wallet, get_wallet
+
+ROOM_SNAPSHOT_DIR = os.getenv('ROOM_SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'room_snapshots'))
+SNAPSHOT_SUFFIX = '.room'
+DEFAULT_IDLE_SECONDS = float(os.getenv('ROOM_IDLE_SECONDS', 900))
+DEFAULT_MAX_RESIDENT = int(os.getenv('ROOM_MAX_RESIDENT', 2000))
+DEFAULT_SWEEP_INTERVAL = 60.0
+
+
+class _SnapshotPickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        # 行程共用的物件不進快照，喚醒時換成目前的實例
+        if isinstance(obj, EventSink):
+            return 'events'
+        if isinstance(obj, Scheduler):
+            return 'scheduler'
+        if isinstance(obj, Wallet):
+            return 'wallet'
+        return None
+
+    def reducer_override(self, obj):
+        # SystemRandom 沒有狀態 (也無法 pickle)，喚醒時重新建立即可
+        if type(obj) is random.SystemRandom:
+            return random.SystemRandom, ()
+        return NotImplemented
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file, events, scheduler):
+        super().__init__(file)
+        self._persistent = {'events': events, 'scheduler': scheduler, 'wallet': get_wallet()}
+
+    def persistent_load(self, pid):
+        return self._persistent[pid]
+
+
+class RoomStore:
+    """active_rooms: room_id -> 遊戲實例，閒置或超過上限的房間休眠到磁碟。"""
+
+    def __init__(self, events, directory=None, idle_seconds=DEFAULT_IDLE_SECONDS, max_resident=DEFAULT_MAX_RESIDENT,
+                 sweep_interval=DEFAULT_SWEEP_INTERVAL, scheduler=None, on_remove=None):
+        """
+        Args:
+            events (EventSink): 遊戲使用的事件介面 (喚醒的房間重新接上，並用 room_members 判斷是否有人連線)。
+            directory (str, optional): 快照目錄 (預設為 ROOM_SNAPSHOT_DIR)。
+            idle_seconds (float): 多久沒有被存取就休眠；0 表示不因閒置而休眠。
+            max_resident (int): 常駐記憶體的房間數上限；0 表示不限制。
+            sweep_interval (float): 閒置檢查的間隔 (秒)。
+            scheduler (optional): 排程器 (預設為行程共用的排程器)。
+            on_remove (callable, optional): 房間被移除 (del / pop，不含休眠) 時以 room_id 呼叫。
+        """
+        self.events = events
+        self.directory = directory or ROOM_SNAPSHOT_DIR
+        self.idle_seconds = idle_seconds
+        self.max_resident = max_resident
+        self.sweep_interval = sweep_interval
+        self.scheduler = scheduler or get_scheduler()
+        self.on_remove = on_remove
+        self._resident = OrderedDict()  # room_id -> game，最近使用的在尾端
+        self._last_used = {}            # room_id -> scheduler.now()
+        self._dormant = {}              # room_id -> {'game_type', 'players', 'path', 'bytes', 'suspended_at'}
+        self._unpicklable = set()       # 快照失敗的房間，不再嘗試
+        self._sweep_timer = None
+        self.stats = {'suspended': 0, 'resumed': 0, 'snapshot_failures': 0, 'snapshot_bytes': 0}
+        self._clear_snapshots()
+
+    # --- dict 介面 ---
+
+    def __contains__(self, room_id):
+        return room_id in self._resident or room_id in self._dormant
+
+    def __getitem__(self, room_id):
+        game = self._resident.get(room_id)
+        if game is None:
+            if room_id not in self._dormant:
+                raise KeyError(room_id)
+            game = self._resume(room_id)
+        self.touch(room_id)
+        return game
+
+    def get(self, room_id, default=None):
+        return self[room_id] if room_id in self else default
+
+    def peek(self, room_id):
+        """常駐的房間，休眠或不存在時為 None (不喚醒、不更新使用時間)。"""
+        return self._resident.get(room_id)
+
+    def __setitem__(self, room_id, game):
+        self._discard_snapshot(room_id)
+        self._resident[room_id] = game
+        self.touch(room_id)
+        self._enforce_budget()
+
+    def __delitem__(self, room_id):
+        if room_id not in self:
+            raise KeyError(room_id)
+        self.pop(room_id)
+
+    def pop(self, room_id, default=None):
+        """移除房間 (休眠的房間只刪除快照，回傳 default)。"""
+        if room_id in self and self.on_remove is not None:
+            self.on_remove(room_id)
+        self._last_used.pop(room_id, None)
+        self._unpicklable.discard(room_id)
+        self._discard_snapshot(room_id)
+        return self._resident.pop(room_id, default)
+
+    def __iter__(self):
+        return iter(list(self._resident))
+
+    def __len__(self):
+        return len(self._resident)
+
+    def keys(self):
+        return list(self._resident)
+
+    def values(self):
+        return list(self._resident.values())
+
+    def items(self):
+        return list(self._resident.items())
+
+    # --- 休眠的房間也包含在內的查詢 ---
+
+    def game_types(self):
+        """大廳清單: {room_id: game_type}，包含休眠的房間。"""
+        rooms = {room_id: game.get_game_type() for room_id, game in self._resident.items()}
+        rooms.update((room_id, info['game_type']) for room_id, info in self._dormant.items())
+        return rooms
+
+    def rooms_of(self, player_sid):
+        """玩家所在的房間 (重新連線時逐一取得即可喚醒休眠的房間)。"""
+        rooms = [room_id for room_id, game in self._resident.items() if player_sid in game.players]
+        rooms += [room_id for room_id, info in self._dormant.items() if player_sid in info['players']]
+        return rooms
+
+    def dormant_count(self):
+        return len(self._dormant)
+
+    def room_count(self):
+        """常駐與休眠的房間總數。"""
+        return len(self._resident) + len(self._dormant)
+
+    def touch(self, room_id):
+        """記錄房間剛被使用 (移到 LRU 尾端)。"""
+        if room_id in self._resident:
+            self._resident.move_to_end(room_id)
+            self._last_used[room_id] = self.scheduler.now()
+
+    # --- 休眠與喚醒 ---
+
+    def can_suspend(self, room_id, game):
+        if room_id in self._unpicklable or game.hand_end_listeners:
+            return False
+        if game.options.get('tournament_id') or game.options.get('fast_fold_pool_id'):
+            return False
+        return not self.events.room_members(room_id)
+
+    def suspend(self, room_id):
+        """
+        讓房間休眠。
+        Returns:
+            bool: 是否成功 (無法 pickle 時房間照常留在記憶體中)。
+        """
+        game = self._resident[room_id]
+        game.suspend()
+        try:
+            buffer = io.BytesIO()
+            _SnapshotPickler(buffer, pickle.HIGHEST_PROTOCOL).dump(game)
+        except Exception as e:
+            print(f"[房間快照] 房間 {room_id} 無法寫入快照，保留在記憶體中: {e}")
+            self._unpicklable.add(room_id)
+            self.stats['snapshot_failures'] += 1
+            game.resume()
+            return False
+        data = buffer.getvalue()
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._snapshot_path(room_id)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        del self._resident[room_id]
+        self._last_used.pop(room_id, None)
+        self._dormant[room_id] = {
+            'game_type': game.get_game_type(),
+            'players': frozenset(game.players),
+            'path': path,
+            'bytes': len(data),
+            'suspended_at': time.time(),
+        }
+        self.stats['suspended'] += 1
+        self.stats['snapshot_bytes'] += len(data)
+        print(f"[房間快照] 房間 {room_id} 已休眠 ({len(data)} bytes)。")
+        return True
+
+    def _resume(self, room_id):
+        info = self._dormant.pop(room_id)
+        with open(info['path'], 'rb') as f:
+            game = _SnapshotUnpickler(f, self.events, self.scheduler).load()
+        os.remove(info['path'])
+        self.stats['snapshot_bytes'] -= info['bytes']
+        self._resident[room_id] = game
+        self.touch(room_id)
+        game.resume()
+        self.stats['resumed'] += 1
+        print(f"[房間快照] 房間 {room_id} 已喚醒 (休眠 {time.time() - info['suspended_at']:.0f} 秒)。")
+        self._enforce_budget(keep=room_id)
+        return game
+
+    def _enforce_budget(self, keep=None):
+        if not self.max_resident or len(self._resident) <= self.max_resident:
+            return
+        # 從最久沒有使用的房間開始；有人連線或無法休眠的房間略過
+        for room_id, game in list(self._resident.items()):
+            if len(self._resident) <= self.max_resident:
+                break
+            if room_id != keep and self.can_suspend(room_id, game):
+                self.suspend(room_id)
+
+    def sweep(self):
+        """讓閒置的房間休眠並檢查上限。Returns: int: 本次休眠的房間數。"""
+        suspended = self.stats['suspended']
+        if self.idle_seconds:
+            cutoff = self.scheduler.now() - self.idle_seconds
+            for room_id, game in list(self._resident.items()):
+                if self._last_used.get(room_id, 0) <= cutoff and self.can_suspend(room_id, game):
+                    self.suspend(room_id)
+        self._enforce_budget()
+        return self.stats['suspended'] - suspended
+
+    def start(self):
+        """開始定期檢查閒置房間。"""
+        if self._sweep_timer is None:
+            self._sweep_timer = self.scheduler.call_later(self.sweep_interval, self._run_sweep, label='room_store:sweep')
+
+    def stop(self):
+        if self._sweep_timer is not None:
+            self._sweep_timer.cancel()
+            self._sweep_timer = None
+
+    def _run_sweep(self):
+        self._sweep_timer = None
+        try:
+            self.sweep()
+        finally:
+            self.start()
+
+    def _snapshot_path(self, room_id):
+        return os.path.join(self.directory, f"{room_id}{SNAPSHOT_SUFFIX}")
+
+    def _discard_snapshot(self, room_id):
+        info = self._dormant.pop(room_id, None)
+        if info is not None:
+            self.stats['snapshot_bytes'] -= info['bytes']
+            if os.path.exists(info['path']):
+                os.remove(info['path'])
+
+    def _clear_snapshots(self):
+        # 上一個行程留下的快照無法使用 (事件介面與排程器已不存在)
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(SNAPSHOT_SUFFIX) or name.endswith(SNAPSHOT_SUFFIX + '.tmp'):
+                os.remove(os.path.join(self.directory, name))
+
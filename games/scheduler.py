@@ -0,0 +1,198 @@
+# games/scheduler.py
+"""
+所有房間共用的計時器排程器。
+
+以一個 heap (依到期時間排序) 加上一條 greenthread 處理整個行程的遊戲計時器，
+取代每個玩家各自 eventlet.spawn_after 一條 greenthread 的做法:
+    - 新增計時器只是一次 heappush，取消只是設旗標 (延遲刪除)，不會配置 greenlet。
+    - 取消時立即釋放回呼的參考，已刪除的房間不會被尚未到期的計時器留在記憶體中。
+    - 回呼的例外會被記錄下來，不會中斷排程迴圈。
+
+無頭模擬或測試可使用 ManualScheduler，以 advance() 手動推進虛擬時間。
+"""
+import heapq
+import itertools
+import time
+import traceback
+
+import eventlet
+from eventlet.queue import LightQueue, Empty
+
+
+class TimerHandle:
+    """call_later 的回傳值，可用 cancel() 取消尚未觸發的計時器。"""
+    __slots__ = ('deadline', 'seq', 'label', 'callback', 'args', 'cancelled', 'fired', '_scheduler')
+
+    def __init__(self, scheduler, deadline, seq, label, callback, args):
+        self._scheduler = scheduler
+        self.deadline = deadline
+        self.seq = seq
+        self.label = label
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self.fired = False
+
+    def __lt__(self, other):
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+    @property
+    def pending(self):
+        return not self.cancelled and not self.fired
+
+    def cancel(self):
+        """取消計時器。已觸發或已取消時不做任何事。"""
+        if self.pending:
+            self.cancelled = True
+            self.callback = None
+            self.args = ()
+            self._scheduler._on_cancel()
+
+    def remaining(self):
+        """距離到期的秒數 (已到期為 0)。"""
+        return max(0.0, self.deadline - self._scheduler.now())
+
+
+class Scheduler:
+    """以單一 greenthread 執行所有到期回呼的 heap 排程器。"""
+
+    # 已取消但仍在 heap 中的計時器超過此比例時重建 heap
+    COMPACT_RATIO = 0.5
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._heap = []
+        self._seq = itertools.count()
+        self._pending = 0
+        self._cancelled_in_heap = 0
+        self._wakeups = LightQueue()
+        self._runner = None
+        self.fired_count = 0
+        self.error_count = 0
+
+    def now(self):
+        return self._clock()
+
+    def pending_count(self):
+        """尚未觸發也未取消的計時器數。"""
+        return self._pending
+
+    def call_later(self, delay, callback, *args, label=None):
+        """
+        在 delay 秒後呼叫 callback(*args)。
+        Args:
+            delay (float): 延遲秒數。
+            callback (callable): 到期時呼叫的函式。
+            label (str, optional): 用於除錯輸出的名稱。
+        Returns:
+            TimerHandle
+        """
+        handle = TimerHandle(self, self.now() + max(0.0, delay), next(self._seq), label, callback, args)
+        was_earliest = not self._heap or handle < self._heap[0]
+        heapq.heappush(self._heap, handle)
+        self._pending += 1
+        self._ensure_runner()
+        if was_earliest:
+            self._wake()
+        return handle
+
+    def _on_cancel(self):
+        self._pending -= 1
+        self._cancelled_in_heap += 1
+        if self._cancelled_in_heap > len(self._heap) * self.COMPACT_RATIO:
+            # 原地壓縮: run_due 可能正在執行回呼 (回呼裡取消其他計時器)，它持有的是同一個 list
+            heap = self._heap
+            heap[:] = [handle for handle in heap if not handle.cancelled]
+            heapq.heapify(heap)
+            self._cancelled_in_heap = 0
+
+    def run_due(self):
+        """
+        執行所有已到期的回呼。
+        Returns:
+            float | None: 距離下一個計時器到期的秒數，沒有計時器時為 None。
+        """
+        heap = self._heap
+        while heap:
+            handle = heap[0]
+            if handle.cancelled:
+                heapq.heappop(heap)
+                self._cancelled_in_heap -= 1
+                continue
+            delay = handle.deadline - self.now()
+            if delay > 0:
+                return delay
+            heapq.heappop(heap)
+            self._pending -= 1
+            handle.fired = True
+            callback, args = handle.callback, handle.args
+            handle.callback = None
+            handle.args = ()
+            self.fired_count += 1
+            try:
+                callback(*args)
+            except Exception:
+                self.error_count += 1
+                print(f"[排程器] 計時器 {handle.label or callback} 執行時發生錯誤:\n{traceback.format_exc()}")
+        return None
+
+    def _ensure_runner(self):
+        if self._runner is None or self._runner.dead:
+            self._runner = eventlet.spawn(self._run)
+
+    def _wake(self):
+        if self._runner is not None and self._wakeups.qsize() == 0:
+            self._wakeups.put(None)
+
+    def _run(self):
+        while True:
+            timeout = self.run_due()
+            try:
+                # 沒有計時器時無限期等待；有新的最早計時器加入時會被喚醒重新計算
+                self._wakeups.get(timeout=timeout)
+            except Empty:
+                pass
+
+
+class ManualScheduler(Scheduler):
+    """以虛擬時間運作、不需要 eventlet hub 的排程器，供無頭模擬與測試使用。"""
+
+    def __init__(self, start=0.0):
+        self._virtual_now = start
+        super().__init__(clock=lambda: self._virtual_now)
+
+    def _ensure_runner(self):
+        pass
+
+    def _wake(self):
+        pass
+
+    def advance(self, seconds):
+        """推進虛擬時間並依到期順序執行回呼 (回呼中新增的已到期計時器也會執行)。"""
+        target = self._virtual_now + seconds
+        while self._heap:
+            next_deadline = self.next_deadline()
+            if next_deadline is None or next_deadline > target:
+                break
+            self._virtual_now = max(self._virtual_now, next_deadline)
+            self.run_due()
+        self._virtual_now = target
+
+    def next_deadline(self):
+        heap = self._heap
+        while heap and heap[0].cancelled:
+            heapq.heappop(heap)
+            self._cancelled_in_heap -= 1
+        return heap[0].deadline if heap else None
+
+
+_default_scheduler = None
+
+
+def get_scheduler():
+    """返回行程共用的 Scheduler (第一次呼叫時建立)。"""
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = Scheduler()
+    return _default_scheduler
+
@@ -0,0 +1,166 @@
+# games/texas_holdem/evaluator.py
+"""
+以牌碼 (games/cards.py 的 card.code) 計算牌力的快速評估器與蒙地卡羅勝率估計。
+
+utils.evaluate_hand 逐一列舉 21 種五張組合並回傳顯示用的 dict，適合攤牌時算一次；
+機器人每次決策要評估上千手牌，因此這裡直接對 5 ~ 7 張牌做一次掃描:
+    - 每個點數一個位元 (rank_mask)，每種花色一個點數位元遮罩，
+    - 同花/順子用位元運算判斷，對子/三條/四條由點數計數決定，
+並把 (牌型, 比較用點數...) 壓成一個整數，整數越大牌越大，與 evaluate_hand 的
+(value, tie_breaker_ranks) 排序一致 (見 tests/test_evaluator.py)。
+"""
+import random
+
+from games.cards import CARDS_PER_DECK, RANKS
+
+from .utils import (FLUSH, FOUR_OF_A_KIND, FULL_HOUSE, HIGH_CARD, ONE_PAIR, ROYAL_FLUSH, STRAIGHT,
+                    STRAIGHT_FLUSH, THREE_OF_A_KIND, TWO_PAIR, RANK_ORDER)
+
+# 牌碼 -> 點數 (2..14) 與花色索引
+CODE_VALUE = tuple(RANK_ORDER[RANKS[code % len(RANKS)]] for code in range(CARDS_PER_DECK))
+CODE_SUIT = tuple(code // len(RANKS) for code in range(CARDS_PER_DECK))
+
+_ACE_BIT = 1 << 14
+_WHEEL_BIT = 1 << 1  # A 當作 1 的位元 (A-2-3-4-5)
+
+
+def _straight_high(mask):
+    """點數位元遮罩中最大的順子的最高點，沒有順子時為 0。"""
+    if mask & _ACE_BIT:
+        mask |= _WHEEL_BIT
+    for high in range(14, 4, -1):
+        if (mask >> (high - 4)) & 0b11111 == 0b11111:
+            return high
+    return 0
+
+
+def _top_values(mask, count):
+    values = []
+    value = 14
+    while len(values) < count and value >= 2:
+        if mask >> value & 1:
+            values.append(value)
+        value -= 1
+    return values
+
+
+def _encode(category, values):
+    # 牌型佔最高位，其後每個比較用點數 4 位元 (最多 5 個)
+    strength = category
+    for index in range(5):
+        strength = (strength << 4) | (values[index] if index < len(values) else 0)
+    return strength
+
+
+def hand_strength(codes):
+    """
+    5 ~ 7 張牌中最好的五張的牌力。
+    Args:
+        codes (iterable[int]): 牌碼。
+    Returns:
+        int: 越大越好；相同代表平手。
+    """
+    counts = [0] * 15
+    rank_mask = 0
+    suit_masks = [0, 0, 0, 0]
+    suit_counts = [0, 0, 0, 0]
+    for code in codes:
+        value = CODE_VALUE[code]
+        suit = CODE_SUIT[code]
+        counts[value] += 1
+        rank_mask |= 1 << value
+        suit_masks[suit] |= 1 << value
+        suit_counts[suit] += 1
+
+    flush_mask = 0
+    for suit in range(4):
+        if suit_counts[suit] >= 5:
+            flush_mask = suit_masks[suit]
+            break
+    if flush_mask:
+        high = _straight_high(flush_mask)
+        if high:
+            return _encode(ROYAL_FLUSH if high == 14 else STRAIGHT_FLUSH, [high])
+
+    quads, trips, pairs, singles = [], [], [], []
+    for value in range(14, 1, -1):
+        count = counts[value]
+        if count == 4:
+            quads.append(value)
+        elif count == 3:
+            trips.append(value)
+        elif count == 2:
+            pairs.append(value)
+        elif count == 1:
+            singles.append(value)
+
+    if quads:
+        kicker = max(trips[:1] + pairs[:1] + singles[:1] + quads[1:2])
+        return _encode(FOUR_OF_A_KIND, [quads[0], kicker])
+    if trips and (len(trips) > 1 or pairs):
+        pair = max(trips[1:2] + pairs[:1])
+        return _encode(FULL_HOUSE, [trips[0], pair])
+    if flush_mask:
+        return _encode(FLUSH, _top_values(flush_mask, 5))
+    high = _straight_high(rank_mask)
+    if high:
+        return _encode(STRAIGHT, [high])
+    if trips:
+        return _encode(THREE_OF_A_KIND, [trips[0]] + singles[:2])
+    if len(pairs) >= 2:
+        kicker = max(pairs[2:3] + singles[:1])
+        return _encode(TWO_PAIR, [pairs[0], pairs[1], kicker])
+    if pairs:
+        return _encode(ONE_PAIR, [pairs[0]] + singles[:3])
+    return _encode(HIGH_CARD, singles[:5])
+
+
+def hand_category(strength):
+    """hand_strength 的牌型常數 (與 utils.evaluate_hand 的 'value' 相同)。"""
+    return strength >> 20
+
+
+def estimate_equity(hole_codes, board_codes, num_opponents, iterations=500, seed=None):
+    """
+    以蒙地卡羅模擬估計手牌對 num_opponents 位隨機手牌的勝率 (平手依人數分攤)。
+    Args:
+        hole_codes (list[int]): 兩張手牌的牌碼。
+        board_codes (list[int]): 已發出的公共牌 (0 ~ 5 張)。
+        num_opponents (int): 仍在局中的對手人數。
+        iterations (int): 模擬次數。
+        seed (optional): 亂數種子 (相同的種子得到相同的估計)。
+    Returns:
+        float: 0 ~ 1。
+    """
+    num_opponents = max(1, int(num_opponents))
+    known = set(hole_codes) | set(board_codes)
+    remaining = [code for code in range(CARDS_PER_DECK) if code not in known]
+    board_needed = 5 - len(board_codes)
+    draw = board_needed + 2 * num_opponents
+    rng = random.Random(seed)
+    sample = rng.sample
+    hole = list(hole_codes)
+    board = list(board_codes)
+
+    share = 0.0
+    for _ in range(iterations):
+        drawn = sample(remaining, draw)
+        full_board = board + drawn[:board_needed]
+        mine = hand_strength(hole + full_board)
+        best_other = 0
+        ties = 0
+        for index in range(board_needed, draw, 2):
+            other = hand_strength(drawn[index:index + 2] + full_board)
+            if other > best_other:
+                best_other = other
+                ties = 0
+            if other == mine:
+                ties += 1
+            if best_other > mine:
+                break
+        if mine > best_other:
+            share += 1.0
+        elif mine == best_other:
+            share += 1.0 / (ties + 1)
+    return share / iterations
+
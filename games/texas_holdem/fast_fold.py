@@ -0,0 +1,277 @@
+# games/texas_holdem/fast_fold.py
+"""
+德州撲克快速棄牌 (fast-fold) 玩家池。
+
+一般牌桌上棄牌的玩家要等整局結束；玩家池中棄牌 (包含超時自動棄牌) 的玩家立刻離開這一局、
+帶著剩下的籌碼回到等待佇列，由配對器和其他等待中的玩家一起發進新的一局。
+
+    - 佇列是 deque，入列/出列都是 O(1)；離開玩家池的玩家只做標記，出列時才略過 (延遲刪除)。
+    - 配對器每 match_interval 秒批次執行一次 (共用排程器)，一次把佇列切成多張滿桌；
+      剩下不滿一桌的玩家最久等待超過 max_wait_seconds 後，至少 min_table_players 人就開一張短桌。
+      每位玩家每次入座只花常數時間，數千位玩家的池子每次配對也只是數毫秒。
+    - 牌桌物件在一局結束後清空並放回閒置列表重複使用，不會每局建立新的 TexasHoldemGame。
+    - 棄牌的玩家在原牌桌上保留為「已離開」的紀錄直到該局結束 (不影響行動順序與牌局紀錄的重播)，
+      籌碼則立即交還給玩家池。
+
+牌桌的 room_id 為 <pool_id>-t<編號>；app.py 透過 on_table_opened / on_seat_change 替玩家換 Socket.IO 房間。
+"""
+import random
+import time
+from collections import deque
+
+from games.event_sink import as_event_sink
+from games.hand_history import HISTORY_ENABLED
+from games.scheduler import get_scheduler
+
+from .logic import TexasHoldemGame, TexasPlayer
+
+
+class FastFoldPlayer(TexasPlayer):
+    FIELDS = dict(TexasPlayer.FIELDS, fast_folded=False)  # 已棄牌並交還給玩家池
+    __slots__ = ('fast_folded',)
+
+
+class FastFoldTable(TexasHoldemGame):
+    """玩家池使用的牌桌: 玩家棄牌後立刻交還給玩家池。"""
+
+    player_class = FastFoldPlayer
+
+    def __init__(self, room_id, players_sids, event_sink, options=None, pool=None):
+        super().__init__(room_id, players_sids, event_sink, options)
+        self.pool = pool
+
+    def handle_action(self, player_sid, action_type, data=None):
+        result = super().handle_action(player_sid, action_type, data)
+        if action_type == 'fold':
+            self._release_if_folded(player_sid)
+        return result
+
+    def _auto_fold_player(self, player_sid_to_fold, expected_instance_id):
+        super()._auto_fold_player(player_sid_to_fold, expected_instance_id)
+        self._release_if_folded(player_sid_to_fold)
+
+    def _release_if_folded(self, player_sid):
+        player = self.players.get(player_sid)
+        if self.pool is None or not self.is_game_in_progress or player is None \
+                or player.is_active_in_round or player.fast_folded:
+            return  # 這一局已經結束 (由 hand_end_listeners 處理) 或玩家並沒有棄牌
+        player.fast_folded = True
+        self.pool._player_folded(self, player_sid, player.chips)
+
+
+class FastFoldPool:
+    def __init__(self, pool_id, event_sink, options=None, scheduler=None,
+                 on_table_opened=None, on_seat_change=None):
+        """
+        Args:
+            pool_id (str): 玩家池 ID，也是牌桌 room_id 的前綴。
+            event_sink (EventSink): 事件介面 (無頭執行可用 NullSink)。
+            options (dict, optional): table_size、min_table_players、small_blind、big_blind、buy_in、
+                timeout_seconds、match_interval、max_wait_seconds、seed、hand_history。
+            scheduler (Scheduler, optional): 配對器與各桌計時器使用的排程器。
+            on_table_opened (callable, optional): on_table_opened(pool, table)。
+            on_seat_change (callable, optional): on_seat_change(pool, player_sid, 舊 room_id, 新 room_id)。
+        """
+        self.pool_id = pool_id
+        self.events = as_event_sink(event_sink)
+        self.options = options if options is not None else {}
+        self.scheduler = scheduler or get_scheduler()
+        self.on_table_opened = on_table_opened
+        self.on_seat_change = on_seat_change
+
+        self.table_size = int(self.options.get('table_size', 6))
+        self.min_table_players = int(self.options.get('min_table_players', 2))
+        if not 2 <= self.min_table_players <= self.table_size <= 10:
+            raise ValueError("需要 2 <= min_table_players <= table_size <= 10。")
+        self.buy_in = self.options.get('buy_in', 1000)
+        self.match_interval = float(self.options.get('match_interval', 0.5))
+        self.max_wait_seconds = float(self.options.get('max_wait_seconds', 3))
+        seed = self.options.get('seed')
+        self.rng = random.Random(seed) if seed is not None else random.SystemRandom()
+
+        self.players = {}      # sid: {'name', 'chips', 'table_id', 'queued', 'hands', 'joined_at'}
+        self.queue = deque()   # (sid, 入列時間)；離開玩家池的玩家在出列時略過
+        self.queued_count = 0
+        self.tables = {}       # room_id: FastFoldTable
+        self.idle_tables = []  # 一局結束後清空、等待重複使用的牌桌
+        self.table_counter = 0
+        self.match_timer = None
+        self.hands_dealt = 0
+        self.seatings = 0      # 累計入座人次 (= 玩家參與的局數)
+        self.busted = 0
+
+    # --- 玩家進出 ---
+
+    def join(self, player_sid, player_name, chips=None):
+        """
+        加入玩家池並排入佇列。
+        Returns:
+            tuple: (成功與否, 訊息)
+        """
+        if player_sid in self.players:
+            return False, "您已在玩家池中。"
+        chips = self.buy_in if chips is None else chips
+        if chips <= 0:
+            return False, "籌碼不足。"
+        self.players[player_sid] = {'name': player_name, 'chips': chips, 'table_id': None, 'queued': False,
+                                    'hands': 0, 'joined_at': self.scheduler.now()}
+        self._enqueue(player_sid)
+        return True, f"已加入玩家池，目前 {len(self.players)} 人。"
+
+    def leave(self, player_sid):
+        """
+        離開玩家池。正在進行中的一局視為離開牌桌 (已下注的籌碼留在底池)。
+        Returns:
+            籌碼數，不在玩家池中時為 None。
+        """
+        state = self.players.pop(player_sid, None)
+        if state is None:
+            return None
+        if state['queued']:
+            state['queued'] = False
+            self.queued_count -= 1
+        table = self.tables.get(state['table_id'])
+        if table is not None and player_sid in table.players and not table.players[player_sid].fast_folded:
+            chips = table.players[player_sid].chips
+            table.remove_player(player_sid)
+            if self.on_seat_change:
+                self.on_seat_change(self, player_sid, table.room_id, None)
+            return chips
+        return state['chips']
+
+    def _enqueue(self, player_sid):
+        state = self.players[player_sid]
+        state['table_id'] = None
+        state['queued'] = True
+        self.queued_count += 1
+        self.queue.append((player_sid, self.scheduler.now()))
+        if self.match_timer is None:
+            self.match_timer = self.scheduler.call_later(self.match_interval, self._run_matcher,
+                                                         label=f"{self.pool_id}:match")
+
+    def _return_player(self, player_sid, chips):
+        """玩家離開一局 (棄牌或該局結束) 後帶著籌碼回到佇列；籌碼歸零就離開玩家池。"""
+        state = self.players.get(player_sid)
+        if state is None:
+            return
+        state['chips'] = chips
+        if chips > 0:
+            self._enqueue(player_sid)
+        else:
+            del self.players[player_sid]
+            self.busted += 1
+            self.events.emit('fast_fold_busted', {'pool_id': self.pool_id}, to=player_sid)
+
+    def _player_folded(self, table, player_sid, chips):
+        if self.on_seat_change:
+            self.on_seat_change(self, player_sid, table.room_id, None)
+        self._return_player(player_sid, chips)
+
+    # --- 配對 ---
+
+    def _run_matcher(self):
+        self.match_timer = None
+        now = self.scheduler.now()
+        queue = self.queue
+        while queue and not self.players.get(queue[0][0], {}).get('queued'):
+            queue.popleft()  # 已離開玩家池或已入座的玩家
+        # 滿桌: 依入列順序一次切出
+        while self.queued_count >= self.table_size:
+            self._seat_batch(self._pop_batch(self.table_size))
+        # 不滿一桌: 最久等待的玩家等太久時開短桌
+        if self.queued_count >= self.min_table_players and queue and now - queue[0][1] >= self.max_wait_seconds:
+            self._seat_batch(self._pop_batch(self.queued_count))
+        if self.queued_count > 0 and self.match_timer is None:
+            self.match_timer = self.scheduler.call_later(self.match_interval, self._run_matcher,
+                                                         label=f"{self.pool_id}:match")
+
+    def _pop_batch(self, size):
+        batch = []
+        queue = self.queue
+        while len(batch) < size and queue:
+            player_sid, _ = queue.popleft()
+            state = self.players.get(player_sid)
+            if state is None or not state['queued']:
+                continue
+            state['queued'] = False
+            self.queued_count -= 1
+            batch.append(player_sid)
+        return batch
+
+    def _seat_batch(self, batch):
+        if not batch:
+            return
+        self.rng.shuffle(batch)  # 座位 (與按鈕位置) 不依棄牌先後決定
+        table = self.idle_tables.pop() if self.idle_tables else self._open_table()
+        for player_sid in batch:
+            state = self.players[player_sid]
+            table.add_player(player_sid, {'name': state['name'], 'chips': state['chips']})
+            state['table_id'] = table.room_id
+            state['hands'] += 1
+            if self.on_seat_change:
+                self.on_seat_change(self, player_sid, None, table.room_id)
+        self.seatings += len(batch)
+        self.hands_dealt += 1
+        if not table.start_game(None):
+            # 不應發生 (每位玩家都有籌碼)；把玩家放回佇列
+            for player_sid in list(table.players):
+                self._return_player(player_sid, table.players[player_sid].chips)
+            self._reset_table(table)
+
+    def _open_table(self):
+        self.table_counter += 1
+        room_id = f"{self.pool_id}-t{self.table_counter}"
+        table_options = {
+            'fast_fold_pool_id': self.pool_id,
+            'small_blind': self.options.get('small_blind', 10),
+            'big_blind': self.options.get('big_blind', 20),
+            'buy_in': self.buy_in,
+            'timeout_seconds': self.options.get('timeout_seconds', 30),
+            'hand_history': self.options.get('hand_history', HISTORY_ENABLED),
+            'outcome_hints': self.options.get('outcome_hints', True),
+        }
+        seed = self.options.get('seed')
+        if seed is not None:
+            table_options['seed'] = f"{seed}:{room_id}"
+        table = FastFoldTable(room_id, [], self.events, table_options, pool=self)
+        table.scheduler = self.scheduler
+        table.hand_end_listeners.append(self._on_hand_end)
+        self.tables[room_id] = table
+        if self.on_table_opened:
+            self.on_table_opened(self, table)
+        return table
+
+    def _on_hand_end(self, table, results):
+        # 還在桌上的玩家帶著結算後的籌碼回到佇列；已棄牌離開的玩家籌碼早已交還
+        for player_sid, player in list(table.players.items()):
+            if not player.fast_folded:
+                self._return_player(player_sid, player.chips)
+        self._reset_table(table)
+
+    def _reset_table(self, table):
+        # 在 end_game 之中不能立刻開下一局 (呼叫端之後還會修改 game_state)，等下一次配對再使用
+        table.players.clear()
+        table.game_state['round_active_players_sids_in_order'] = []
+        self.idle_tables.append(table)
+
+    # --- 狀態 ---
+
+    def get_summary(self):
+        now = self.scheduler.now()
+        player_hours = sum(now - state['joined_at'] for state in self.players.values()) / 3600
+        return {
+            'pool_id': self.pool_id,
+            'players': len(self.players),
+            'queued': self.queued_count,
+            'tables': len(self.tables),
+            'busy_tables': len(self.tables) - len(self.idle_tables),
+            'table_size': self.table_size,
+            'small_blind': self.options.get('small_blind', 10),
+            'big_blind': self.options.get('big_blind', 20),
+            'buy_in': self.buy_in,
+            'hands_dealt': self.hands_dealt,
+            'busted': self.busted,
+            'hands_per_hour_per_player': (sum(state['hands'] for state in self.players.values()) / player_hours
+                                          if player_hours > 0 else 0.0),
+        }
+
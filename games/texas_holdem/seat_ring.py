@@ -0,0 +1,173 @@
+# games/texas_holdem/seat_ring.py
+"""
+德州撲克一條街 (street) 內的座位環與增量計數。
+
+TexasHoldemGame 原本在每個動作後重建活躍玩家列表、呼叫 list.index，
+再對所有玩家做最多三次掃描來判斷下注回合是否結束與下一位行動者。
+SeatRing 在每條街開始時依行動順序建立一次，之後每個動作只更新該玩家:
+    - 尚未行動的玩家 (活躍、未 All-in、本街未行動) 以雙向環狀鏈結串起，
+      離開鏈結的座位保留「當時的下一位」指標 (查詢時做路徑壓縮)，
+      因此「某座位之後的下一位待行動者」為攤銷 O(1)。
+    - 計數: 活躍人數、可下注人數 (活躍、未 All-in、有籌碼)、待行動人數，
+      以及可下注玩家本街下注額的分布；未跟到 current_street_bet_to_match 的人數
+      = 可下注人數 - 分布[目標額]，目標額改變時不必重掃。
+只有下注/加注 (本來就要重設所有人的行動狀態) 與新街道會 O(n) 重建。
+"""
+
+
+class SeatRing:
+    def __init__(self):
+        self.order = []
+        self._pos = {}
+        self._players = {}
+        self._seat_state = {}    # sid: (活躍, 可下注, 待行動, 本街下注額)
+        self._next = {}          # 待行動座位的環狀鏈結
+        self._prev = {}
+        self._skip = {}          # 非待行動座位: 其位置之後的第一個待行動座位 (可能過期，查詢時壓縮)
+        self._head = None        # 順序上第一個待行動座位
+        self.target_bet = 0
+        self.active_count = 0
+        self.can_bet_count = 0
+        self.to_act_count = 0
+        self._bet_counts = {}    # 本街下注額: 可下注玩家人數
+
+    @staticmethod
+    def _classify(player):
+        if player is None or not player.is_active_in_round:
+            return (False, False, False, 0)
+        all_in = player.is_all_in
+        can_bet = not all_in and player.chips > 0
+        pending = not all_in and not player.has_acted_this_street
+        return (True, can_bet, pending, player.bet_in_current_street)
+
+    def reset(self, order, players, target_bet):
+        """
+        依新的行動順序重建 (每條街開始、或大量狀態改變後呼叫)。
+        Args:
+            order (list): round_active_players_sids_in_order。
+            players (dict): TexasHoldemGame.players (共用參考，之後以 update() 通知改變)。
+            target_bet (int): current_street_bet_to_match。
+        """
+        self.order = list(order)
+        self._pos = {sid: i for i, sid in enumerate(self.order)}
+        self._players = players
+        self.target_bet = target_bet
+        self._seat_state = {}
+        self.active_count = self.can_bet_count = self.to_act_count = 0
+        self._bet_counts = {}
+        for sid in self.order:
+            state = self._classify(players.get(sid))
+            self._seat_state[sid] = state
+            self._count(state, 1)
+        self._relink()
+
+    def refresh(self):
+        """重新讀取所有座位的狀態 (下注/加注重設其他人的行動狀態後呼叫)。"""
+        self.reset(self.order, self._players, self.target_bet)
+
+    def set_target(self, target_bet):
+        self.target_bet = target_bet
+
+    def _count(self, state, delta):
+        active, can_bet, pending, bet = state
+        if active:
+            self.active_count += delta
+        if can_bet:
+            self.can_bet_count += delta
+            self._bet_counts[bet] = self._bet_counts.get(bet, 0) + delta
+        if pending:
+            self.to_act_count += delta
+
+    def _relink(self):
+        self._next = {}
+        self._prev = {}
+        self._skip = {}
+        pending = [sid for sid in self.order if self._seat_state[sid][2]]
+        self._head = pending[0] if pending else None
+        for i, sid in enumerate(pending):
+            self._next[sid] = pending[(i + 1) % len(pending)]
+            self._prev[sid] = pending[i - 1]
+        # 由後往前找出每個非待行動座位之後的第一個待行動座位 (環狀)
+        following = self._head
+        for sid in reversed(self.order):
+            if sid in self._next:
+                following = sid
+            else:
+                self._skip[sid] = following
+
+    def _unlink(self, sid):
+        nxt = self._next.pop(sid)
+        prv = self._prev.pop(sid)
+        if nxt == sid:
+            self._head = None
+            self._skip[sid] = None
+            return
+        self._next[prv] = nxt
+        self._prev[nxt] = prv
+        if self._head == sid:
+            self._head = nxt
+        self._skip[sid] = nxt
+
+    def update(self, sid):
+        """某位玩家的狀態 (活躍、All-in、籌碼、已行動、本街下注) 改變後呼叫，O(1)。"""
+        old = self._seat_state.get(sid)
+        if old is None:
+            return
+        new = self._classify(self._players.get(sid))
+        if new == old:
+            return
+        self._count(old, -1)
+        self._count(new, 1)
+        self._seat_state[sid] = new
+        if old[2] and not new[2]:
+            self._unlink(sid)
+        elif new[2] and not old[2]:
+            self._relink()  # 重新變成待行動只會發生在少見的情況，直接重建
+
+    def remove(self, sid):
+        """玩家離開牌桌時呼叫 (調用前應已從行動順序移除)。"""
+        state = self._seat_state.pop(sid, None)
+        if state is None:
+            return
+        self._count(state, -1)
+        self.order.remove(sid)
+        self._pos = {s: i for i, s in enumerate(self.order)}
+        self._relink()
+
+    def is_round_over(self):
+        """本街的下注回合是否結束 (TexasHoldemGame._is_betting_round_over 的唯一規則)。"""
+        if self.active_count == 0:
+            return True
+        if self.can_bet_count < 2 and self.active_count > 1:
+            return True
+        if self.to_act_count > 0:
+            return False
+        return self.unmatched_count() == 0
+
+    def unmatched_count(self):
+        """可下注玩家中本街下注額不等於目標額的人數。"""
+        return self.can_bet_count - self._bet_counts.get(self.target_bet, 0)
+
+    def next_to_act(self, after_sid):
+        """
+        順序上 after_sid 之後 (環狀，最後才是 after_sid 自己) 第一位待行動的玩家。
+        after_sid 不在順序中時從頭開始找。
+        Returns:
+            str | None
+        """
+        if self._head is None:
+            return None
+        if after_sid not in self._pos:
+            return self._head
+        if after_sid in self._next:
+            return self._next[after_sid]
+        # 沿著 skip 指標找到仍在鏈結中的座位，並把路徑壓縮到該座位
+        path = []
+        sid = after_sid
+        while sid not in self._next:
+            path.append(sid)
+            sid = self._skip[sid]
+        for visited in path:
+            self._skip[visited] = sid
+        return sid
+
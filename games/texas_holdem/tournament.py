@@ -0,0 +1,374 @@
+# games/texas_holdem/tournament.py
+"""
+多桌德州撲克錦標賽。
+
+Tournament 管理一組 TexasHoldemGame 牌桌 (每桌仍是一般房間，玩家以原本的 game_action 行動):
+    - 開賽時把報名者隨機、平均地分配到 ceil(人數 / table_size) 張桌子。
+    - 盲注依 blind_schedule 每 level_seconds 秒升一級 (共用排程器的計時器)，
+      各桌在下一局開始前套用新的盲注。
+    - 每張桌子一局結束時 (BaseGame.hand_end_listeners) 一次處理這張桌子:
+        1. 淘汰籌碼歸零或已離開的玩家並記錄名次 (同一局被淘汰的玩家並列較好的名次)。
+        2. 剩餘人數坐得進少一張桌子時拆掉這張桌子，把玩家分散到空位最多的桌子。
+        3. 否則若這張桌子比最少人的桌子多兩人以上，把多出的玩家搬到最少人的桌子。
+      只會從剛打完一局的桌子搬出玩家 (其他桌子可能正在進行中)；搬入的玩家從下一局開始參與。
+      每次處理只掃描一次各桌人數，數千位參賽者 (數百張桌子) 的開銷也只有微秒等級。
+    - 剩下一位玩家時比賽結束。
+
+牌桌的 room_id 為 <tournament_id>-t<編號>；app.py 透過 on_table_opened / on_seat_change / on_table_closed
+把牌桌加入 active_rooms、替玩家換 Socket.IO 房間。
+"""
+import math
+import random
+import time
+
+from games.event_sink import as_event_sink
+from games.hand_history import HISTORY_ENABLED
+from games.scheduler import get_scheduler
+
+from .logic import TexasHoldemGame
+
+# (小盲, 大盲)；超過最後一級後維持最後一級
+DEFAULT_BLIND_SCHEDULE = (
+    (10, 20), (15, 30), (25, 50), (50, 100), (75, 150), (100, 200), (150, 300), (200, 400),
+    (300, 600), (400, 800), (500, 1000), (700, 1400), (1000, 2000), (1500, 3000), (2000, 4000),
+)
+
+
+class Tournament:
+    def __init__(self, tournament_id, event_sink, options=None, scheduler=None,
+                 on_table_opened=None, on_seat_change=None, on_table_closed=None):
+        """
+        Args:
+            tournament_id (str): 錦標賽 ID，也是牌桌 room_id 的前綴。
+            event_sink (EventSink): 事件介面 (無頭執行可用 NullSink)。
+            options (dict, optional): table_size、starting_chips、level_seconds、blind_schedule、
+                timeout_seconds、auto_deal_delay、seed、hand_history。
+            scheduler (Scheduler, optional): 盲注計時器與各桌計時器使用的排程器。
+            on_table_opened (callable, optional): on_table_opened(tournament, table)。
+            on_seat_change (callable, optional): on_seat_change(tournament, player_sid, 舊 room_id, 新 room_id)，
+                淘汰時新 room_id 為 None。
+            on_table_closed (callable, optional): on_table_closed(tournament, table)。
+        """
+        self.tournament_id = tournament_id
+        self.events = as_event_sink(event_sink)
+        self.options = options if options is not None else {}
+        self.scheduler = scheduler or get_scheduler()
+        self.on_table_opened = on_table_opened
+        self.on_seat_change = on_seat_change
+        self.on_table_closed = on_table_closed
+
+        self.table_size = int(self.options.get('table_size', 9))
+        if not 2 <= self.table_size <= 10:
+            raise ValueError("table_size 必須介於 2 與 10 之間。")
+        self.starting_chips = int(self.options.get('starting_chips', 10000))
+        self.level_seconds = float(self.options.get('level_seconds', 600))
+        self.blind_schedule = [tuple(level) for level in self.options.get('blind_schedule', DEFAULT_BLIND_SCHEDULE)]
+        if not self.blind_schedule or any(len(level) != 2 or not 0 < level[0] <= level[1] for level in self.blind_schedule):
+            raise ValueError("blind_schedule 必須是非空的 (小盲, 大盲) 列表。")
+        seed = self.options.get('seed')
+        self.rng = random.Random(seed) if seed is not None else random.SystemRandom()
+
+        self.status = 'registering'  # 'registering' -> 'running' -> 'finished'
+        self.entrants = {}           # sid: {'name', 'table_id', 'finish_position', 'eliminated_at'}
+        self.tables = {}             # room_id: TexasHoldemGame
+        self.table_seats = {}        # room_id: 分配到該桌、尚未淘汰的參賽者 sid (每局只檢查這些人)
+        self.table_counter = 0
+        self.remaining = 0
+        self.level = 0
+        self.level_started_at = None
+        self.level_timer = None
+        self.started_at = None
+        self.finished_at = None
+        self.eliminations = []       # 依淘汰順序: (sid, 名次)
+        self.moves = 0               # 累計換桌次數
+
+    # --- 報名與開賽 ---
+
+    def register(self, player_sid, player_name):
+        """
+        報名 (開賽前)。
+        Returns:
+            tuple: (成功與否, 訊息)
+        """
+        if self.status != 'registering':
+            return False, "錦標賽已開始，不接受報名。"
+        if player_sid in self.entrants:
+            return False, "您已經報名。"
+        self.entrants[player_sid] = {'name': player_name, 'table_id': None, 'finish_position': None, 'eliminated_at': None}
+        return True, f"報名成功，目前 {len(self.entrants)} 人。"
+
+    def unregister(self, player_sid):
+        if self.status != 'registering' or player_sid not in self.entrants:
+            return False
+        del self.entrants[player_sid]
+        return True
+
+    def start(self):
+        """
+        分配座位、開出所有牌桌並啟動盲注計時器。
+        Returns:
+            tuple: (成功與否, 訊息)
+        """
+        if self.status != 'registering':
+            return False, "錦標賽已經開始。"
+        if len(self.entrants) < 2:
+            return False, "至少需要 2 位參賽者。"
+        self.status = 'running'
+        self.started_at = time.time()
+        self.remaining = len(self.entrants)
+
+        # 隨機抽座位，再輪流發到各桌，使各桌人數最多相差一人
+        draw = list(self.entrants)
+        self.rng.shuffle(draw)
+        num_tables = math.ceil(len(draw) / self.table_size)
+        tables = [self._open_table() for _ in range(num_tables)]
+        for i, player_sid in enumerate(draw):
+            self._seat(player_sid, tables[i % num_tables], self.starting_chips)
+
+        self.level_started_at = self.scheduler.now()
+        self._schedule_level()
+        for table in tables:
+            self._deal_if_idle(table)
+        print(f"[錦標賽 {self.tournament_id}] 開賽: {len(draw)} 位參賽者，{num_tables} 張桌子，盲注 {self.current_blinds()}。")
+        self._broadcast_update(f"錦標賽開始！共 {len(draw)} 位參賽者。")
+        return True, f"錦標賽開始，共 {num_tables} 張桌子。"
+
+    def _open_table(self):
+        self.table_counter += 1
+        room_id = f"{self.tournament_id}-t{self.table_counter}"
+        small_blind, big_blind = self.current_blinds()
+        seed = self.options.get('seed')
+        table_options = {
+            'tournament_id': self.tournament_id,
+            'small_blind': small_blind,
+            'big_blind': big_blind,
+            'buy_in': self.starting_chips,
+            'timeout_seconds': self.options.get('timeout_seconds', 30),
+            'auto_deal': True,
+            'auto_deal_delay': self.options.get('auto_deal_delay', 5),
+            'hand_history': self.options.get('hand_history', HISTORY_ENABLED),
+            'outcome_hints': self.options.get('outcome_hints', True),
+        }
+        if seed is not None:
+            table_options['seed'] = f"{seed}:{room_id}"
+        table = TexasHoldemGame(room_id, [], self.events, table_options)
+        table.scheduler = self.scheduler
+        table.hand_end_listeners.append(self._on_hand_end)
+        self.tables[room_id] = table
+        self.table_seats[room_id] = set()
+        if self.on_table_opened:
+            self.on_table_opened(self, table)
+        return table
+
+    def _close_table(self, table):
+        table.stop_auto_deal()
+        table.hand_end_listeners.remove(self._on_hand_end)
+        self.tables.pop(table.room_id, None)
+        self.table_seats.pop(table.room_id, None)
+        print(f"[錦標賽 {self.tournament_id}] 拆桌 {table.room_id}，剩 {len(self.tables)} 張桌子。")
+        if self.on_table_closed:
+            self.on_table_closed(self, table)
+
+    def _seat(self, player_sid, table, chips):
+        entrant = self.entrants[player_sid]
+        old_table_id = entrant['table_id']
+        table.add_player(player_sid, {'name': entrant['name'], 'chips': chips})
+        if old_table_id in self.table_seats:
+            self.table_seats[old_table_id].discard(player_sid)
+        self.table_seats[table.room_id].add(player_sid)
+        entrant['table_id'] = table.room_id
+        if self.on_seat_change:
+            self.on_seat_change(self, player_sid, old_table_id, table.room_id)
+
+    def _move(self, player_sid, source, destination):
+        chips = source.players[player_sid]['chips']
+        source.remove_player(player_sid)
+        self._seat(player_sid, destination, chips)
+        self.moves += 1
+        self.events.emit('tournament_table_move', {
+            'tournament_id': self.tournament_id, 'from_room_id': source.room_id, 'room_id': destination.room_id,
+        }, to=player_sid)
+
+    def _deal_if_idle(self, table):
+        """人數足夠、但沒有在進行也沒有排定下一局的桌子 (例如剛收到搬來的玩家) 重新開始發牌。"""
+        if self.status == 'running' and not table.is_game_in_progress and table.auto_deal_timer is None \
+                and table.get_player_count() >= 2:
+            table._schedule_next_hand()
+
+    # --- 盲注 ---
+
+    def current_blinds(self):
+        return self.blind_schedule[min(self.level, len(self.blind_schedule) - 1)]
+
+    def _schedule_level(self):
+        if self.level_seconds > 0:
+            self.level_timer = self.scheduler.call_later(self.level_seconds, self._advance_level,
+                                                         label=f"{self.tournament_id}:blind_level")
+
+    def _advance_level(self):
+        self.level_timer = None
+        if self.status != 'running':
+            return
+        self.level += 1
+        self.level_started_at = self.scheduler.now()
+        small_blind, big_blind = self.current_blinds()
+        print(f"[錦標賽 {self.tournament_id}] 盲注升級到第 {self.level + 1} 級: {small_blind}/{big_blind}。")
+        # 進行中的桌子在這局結束時才套用 (見 _on_hand_end)
+        for table in self.tables.values():
+            if not table.is_game_in_progress:
+                self._apply_blinds(table)
+        self._schedule_level()
+        self._broadcast_update(f"盲注升級為 {small_blind}/{big_blind}。")
+
+    def _apply_blinds(self, table):
+        small_blind, big_blind = self.current_blinds()
+        table.game_state['small_blind'] = small_blind
+        table.game_state['big_blind'] = big_blind
+
+    # --- 每局結束後的處理 ---
+
+    def _on_hand_end(self, table, results):
+        if self.status != 'running' or table.room_id not in self.tables:
+            return
+        self._eliminate_busted(table)
+        if self.remaining <= 1:
+            self._finish()
+            return
+        self._apply_blinds(table)
+        self._rebalance(table)
+
+    def _eliminate_busted(self, table):
+        # 籌碼歸零，或在局中離開牌桌 (remove_player) 的參賽者都視為淘汰
+        seats = self.table_seats[table.room_id]
+        busted = [sid for sid in seats if sid not in table.players or table.players[sid].get('chips', 0) <= 0]
+        if not busted:
+            return
+        # 同一局被淘汰的玩家並列 (剩餘人數 - 本局淘汰人數 + 1) 名
+        position = self.remaining - len(busted) + 1
+        now = time.time()
+        for player_sid in busted:
+            entrant = self.entrants[player_sid]
+            entrant['finish_position'] = position
+            entrant['eliminated_at'] = now
+            entrant['table_id'] = None
+            seats.discard(player_sid)
+            self.eliminations.append((player_sid, position))
+            if player_sid in table.players:
+                table.remove_player(player_sid)
+            if self.on_seat_change:
+                self.on_seat_change(self, player_sid, table.room_id, None)
+            self.events.emit('tournament_eliminated', {
+                'tournament_id': self.tournament_id, 'finish_position': position,
+                'entrants': len(self.entrants),
+            }, to=player_sid)
+            print(f"[錦標賽 {self.tournament_id}] {entrant['name']} 被淘汰，名次 {position}。")
+        self.remaining -= len(busted)
+
+    def _rebalance(self, table):
+        """只搬動剛打完一局的這張桌子的玩家。"""
+        if len(self.tables) <= 1:
+            return
+        sizes = {room_id: other.get_player_count() for room_id, other in self.tables.items()}
+        # 剩下的人坐得進少一張桌子: 拆掉這張桌子
+        if self.remaining <= (len(self.tables) - 1) * self.table_size:
+            del sizes[table.room_id]
+            for player_sid in list(table.players):
+                destination_id = min(sizes, key=sizes.get)
+                self._move(player_sid, table, self.tables[destination_id])
+                sizes[destination_id] += 1
+            self._close_table(table)
+            for room_id in sizes:
+                self._deal_if_idle(self.tables[room_id])
+            return
+        # 比最少人的桌子多兩人以上: 把多出的玩家搬過去 (從座位順序的最後面開始)
+        moved_to = set()
+        for player_sid in reversed(list(table.players)):
+            smallest_id = min(sizes, key=sizes.get)
+            if sizes[table.room_id] - sizes[smallest_id] <= 1:
+                break
+            self._move(player_sid, table, self.tables[smallest_id])
+            sizes[table.room_id] -= 1
+            sizes[smallest_id] += 1
+            moved_to.add(smallest_id)
+        for room_id in moved_to:
+            self._deal_if_idle(self.tables[room_id])
+
+    def _finish(self):
+        self.status = 'finished'
+        self.finished_at = time.time()
+        if self.level_timer is not None:
+            self.level_timer.cancel()
+            self.level_timer = None
+        winner_sid = next((sid for sid, entrant in self.entrants.items() if entrant['finish_position'] is None), None)
+        if winner_sid is not None:
+            self.entrants[winner_sid]['finish_position'] = 1
+            self.eliminations.append((winner_sid, 1))
+        for table in self.tables.values():
+            table.auto_deal = False  # 這個回呼之後 end_game 不會再排程下一局
+            table.stop_auto_deal()
+        winner_name = self.entrants[winner_sid]['name'] if winner_sid else None
+        print(f"[錦標賽 {self.tournament_id}] 比賽結束，冠軍: {winner_name}。")
+        self.events.emit('tournament_finished', {
+            'tournament_id': self.tournament_id, 'winner_sid': winner_sid, 'winner_name': winner_name,
+            'standings': self.get_standings(limit=10)['standings'],
+        })
+
+    # --- 狀態 ---
+
+    def get_standings(self, limit=None):
+        """
+        返回名次表: 尚未淘汰的玩家依籌碼排序在前，已淘汰的玩家依名次在後。
+        Args:
+            limit (int, optional): 只返回前幾名。
+        """
+        alive = []
+        for room_id, table in self.tables.items():
+            for player_sid, player in table.players.items():
+                entrant = self.entrants.get(player_sid)
+                if entrant and entrant['finish_position'] is None:
+                    alive.append({'sid': player_sid, 'name': entrant['name'], 'chips': player.get('chips', 0),
+                                  'room_id': room_id, 'finish_position': None})
+        alive.sort(key=lambda row: -row['chips'])
+        finished = sorted(
+            ({'sid': sid, 'name': entrant['name'], 'chips': 0, 'room_id': None,
+              'finish_position': entrant['finish_position']}
+             for sid, entrant in self.entrants.items() if entrant['finish_position'] is not None),
+            key=lambda row: row['finish_position'])
+        if self.status == 'finished' and finished and finished[0]['finish_position'] == 1:
+            winner_sid = finished[0]['sid']
+            winner_table = self.tables.get(self.entrants[winner_sid]['table_id'] or '')
+            if winner_table and winner_sid in winner_table.players:
+                finished[0]['chips'] = winner_table.players[winner_sid]['chips']
+        standings = alive + finished
+        return {'standings': standings[:limit] if limit else standings}
+
+    def get_summary(self):
+        small_blind, big_blind = self.current_blinds()
+        level_remaining = None
+        if self.level_timer is not None:
+            level_remaining = self.level_timer.remaining()
+        return {
+            'tournament_id': self.tournament_id,
+            'status': self.status,
+            'entrants': len(self.entrants),
+            'remaining': self.remaining if self.status != 'registering' else len(self.entrants),
+            'tables': sorted(self.tables),
+            'table_size': self.table_size,
+            'starting_chips': self.starting_chips,
+            'level': self.level + 1,
+            'small_blind': small_blind,
+            'big_blind': big_blind,
+            'level_seconds': self.level_seconds,
+            'level_remaining_seconds': level_remaining,
+            'moves': self.moves,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+    def _broadcast_update(self, message=None):
+        summary = self.get_summary()
+        if message:
+            summary['message'] = message
+        for room_id in list(self.tables):
+            self.events.emit('tournament_update', summary, to=room_id)
+
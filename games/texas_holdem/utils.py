@@ -1,6 +1,8 @@
 import itertools
 import random # Only used for your shuffle_deck, not in evaluate_hand
 
+from games.cards import CARD_TABLE
+
 # --- Poker Hand Constants (higher value is better) ---
 ROYAL_FLUSH = 9
 STRAIGHT_FLUSH = 8
@@ -262,13 +264,12 @@ def evaluate_hand(hole_cards, community_cards):
 
 # --- Example Usage (using your provided deck functions for context) ---
 def create_deck(): 
-    # Using '10' for Ten as in your example
-    ranks = ['A','2','3','4','5','6','7','8','9','T','J','Q','K']
-    suits = ['H','D','C','S'] # Hearts, Diamonds, Clubs, Spades
-    return [{'rank': r, 'suit': s} for s in suits for r in ranks]
+    # 預建的不可變牌 (games/cards.py)，順序為 花色 H,D,C,S × 點數 A..K；牌局中請改用 cards.Deck
+    return list(CARD_TABLE)
 
-def shuffle_deck(deck):
-    random.shuffle(deck)
+def shuffle_deck(deck, rng=None):
+    # rng: 本局專用的 random.Random (以種子建立，可重播)；未提供時使用全域 random
+    (rng or random).shuffle(deck)
     return deck
 
 def deal_cards(deck, num_cards):
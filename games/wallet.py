@@ -0,0 +1,352 @@
+# games/wallet.py
+"""
+玩家的籌碼錢包，以 SQLite (WAL 模式) 永久保存。
+
+過去籌碼只存在各牌桌的 players 中，每次 add_player 都以 buy_in 重新買入，離開牌桌就消失。
+錢包把籌碼分成兩部分:
+    - 餘額 (wallets): 不在任何牌桌上的籌碼；新玩家第一次使用時發放 STARTING_BALANCE。
+    - 牌桌籌碼 (stacks): (玩家, 房間) 目前在桌上的籌碼，買入時從餘額移入，每局結算時更新，離桌時移回餘額。
+每筆異動 (買入、離桌、每局結算、發放) 都是帶有冪等鍵的一筆 ledger 紀錄: 同一個鍵只會生效一次，
+重送或重複的結算不會重複入帳。冪等鍵只由穩定的識別碼組成，行程重新啟動後同一筆異動仍得到同一個鍵:
+    - 買入: buy_in:<房間>:<玩家>:<請求 ID> (請求 ID 由用戶端隨加入請求送出，重送同一個請求不會再買入一次)
+    - 每局結算: hand:<房間>:<局數>:<發牌種子>:<玩家> (64 位元的種子讓重複的房間 ID 不會撞鍵)
+    - 離桌: cash_out:<房間>:<玩家>:<買入的請求 ID>
+
+寫入在遊戲的熱路徑上只更新記憶體中的快取並排入佇列 (不等待磁碟)；一條 OS 執行緒
+(不受 eventlet monkey_patch 影響，與牌局紀錄的寫入相同) 每 flush_interval 秒或累積 batch_size 筆時，
+在一個交易中寫出整批紀錄。WAL 模式下寫入不阻擋讀取，每個交易只需一次 fsync，每秒可以處理數萬筆結算。
+
+已提交的交易在行程崩潰後仍然存在；崩潰時只遺失佇列中尚未提交的紀錄，也就是最後 flush_interval 秒
+(預設 FLUSH_INTERVAL = 0.05，可用 WALLET_FLUSH_INTERVAL 調整) 且不超過 batch_size 筆的異動:
+    - 遺失的買入: 餘額沒有扣除，也沒有牌桌籌碼，等於沒有買入。
+    - 遺失的每局結算與離桌: 牌桌籌碼停留在最後一次提交的數值。
+房間不會跨行程保存，因此啟動時 (recover) 把所有仍在牌桌上的籌碼 (最後提交的數值) 退回餘額。
+因此崩潰最多讓玩家回到約 50 ms 前的籌碼，不會憑空產生或消失籌碼。
+金額以 1/100 籌碼為單位存成整數 (21點的 3:2 賠率可能產生小數)。
+"""
+import atexit
+import os
+import sqlite3
+import time
+import uuid
+
+from eventlet import patcher
+
+_real_threading = patcher.original('threading')
+
+WALLET_DB = os.getenv('WALLET_DB', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'wallet.sqlite3'))
+STARTING_BALANCE = float(os.getenv('WALLET_STARTING_BALANCE', 10000))
+CHIP_SCALE = 100
+FLUSH_INTERVAL = float(os.getenv('WALLET_FLUSH_INTERVAL', 0.05))
+BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wallets (
+    user TEXT PRIMARY KEY,
+    balance INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stacks (
+    user TEXT NOT NULL,
+    room_id TEXT NOT NULL,
+    chips INTEGER NOT NULL,
+    PRIMARY KEY (user, room_id)
+);
+CREATE TABLE IF NOT EXISTS ledger (
+    key TEXT PRIMARY KEY,
+    user TEXT NOT NULL,
+    room_id TEXT,
+    kind TEXT NOT NULL,
+    balance_delta INTEGER NOT NULL,
+    stack_delta INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def to_units(chips):
+    return int(round(chips * CHIP_SCALE))
+
+
+def from_units(units):
+    value = units / CHIP_SCALE
+    return int(value) if value == int(value) else value
+
+
+class Wallet:
+    def __init__(self, path=None, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE, starting_balance=STARTING_BALANCE):
+        """
+        Args:
+            path (str, optional): SQLite 檔案 (預設為 WALLET_DB)。
+            flush_interval (float): 批次提交的間隔 (秒)。
+            batch_size (int): 累積多少筆時立即提交。
+            starting_balance (float): 新玩家的初始餘額。
+        """
+        self.path = path or WALLET_DB
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.starting_units = to_units(starting_balance)
+
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')  # WAL 下每次提交仍寫入日誌，行程崩潰不會遺失已提交的交易
+        self._conn.executescript(SCHEMA)
+        # 讀取使用另一條連線: WAL 模式下讀取不會等待寫入中的交易
+        self._read_conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+
+        self._lock = _real_threading.Lock()          # 保護快取與佇列 (持有時間很短)
+        self._commit_lock = _real_threading.Lock()   # 同一時間只有一個交易
+        self._wakeup = _real_threading.Event()
+        self._thread = None
+        self._pending = []        # (key, user, room_id, kind, balance_delta, stack_delta, created_at)
+        self._pending_keys = set()
+        self.balances = {}        # user -> 餘額 (單位)，讀取過的玩家
+        self.stacks = {}          # (user, room_id) -> 牌桌籌碼 (單位)
+        self.stack_requests = {}  # (user, room_id) -> 買入的請求 ID (離桌的冪等鍵)
+        self.room_users = {}      # room_id -> {user}
+        self.commit_count = 0
+        self.committed_ops = 0
+        self.duplicate_ops = 0
+        self.error_count = 0
+        self.recover()
+
+    # --- 查詢 ---
+
+    def balance(self, user):
+        """不在牌桌上的籌碼。"""
+        with self._lock:
+            return from_units(self._balance_units(user))
+
+    def table_chips(self, user):
+        """{room_id: 牌桌籌碼}"""
+        with self._lock:
+            return {room_id: from_units(units) for (stack_user, room_id), units in self.stacks.items() if stack_user == user}
+
+    def _balance_units(self, user):
+        # 呼叫端持有 _lock；第一次讀到的玩家從資料庫載入 (只有一個主鍵查詢)
+        units = self.balances.get(user)
+        if units is None:
+            row = self._read_conn.execute('SELECT balance FROM wallets WHERE user = ?', (user,)).fetchone()
+            if row is None:
+                self._enqueue(f"grant:{user}", user, None, 'grant', self.starting_units, 0)
+                units = self.starting_units
+            else:
+                units = row[0]
+            self.balances[user] = units
+        return units
+
+    # --- 異動 ---
+
+    def buy_in(self, user, room_id, amount, request_id=None):
+        """
+        從餘額買入 amount 到牌桌 (餘額不足時買入全部餘額)。
+        Args:
+            request_id (str, optional): 用戶端送出的請求 ID；同一個請求重送時不會再買入一次。
+                沒有提供時產生新的 ID (每次呼叫都是一次新的買入)。
+        Returns:
+            實際買入的籌碼；重送的請求傳回目前在這張牌桌上的籌碼。
+        """
+        request_id = request_id or uuid.uuid4().hex
+        key = f"buy_in:{room_id}:{user}:{request_id}"
+        with self._lock:
+            if key in self._pending_keys or self._committed(key):
+                self.duplicate_ops += 1
+                return from_units(self.stacks.get((user, room_id), 0))
+            units = min(to_units(amount), self._balance_units(user))
+            if units <= 0:
+                return 0
+            self._enqueue(key, user, room_id, 'buy_in', -units, units)
+            self._apply(user, room_id, -units, units, 'buy_in')
+            self.stack_requests.setdefault((user, room_id), request_id)
+            return from_units(units)
+
+    def settle_hand(self, room_id, hand_key, chips_by_user):
+        """
+        一局結束: 把有在錢包買入的玩家的牌桌籌碼更新為 chips_by_user 中的數值 (沒有買入的玩家略過)。
+        Args:
+            hand_key (str): 這一局的穩定識別碼 (例如局數與發牌種子；同一局重複結算只生效一次)。
+        """
+        with self._lock:
+            for user, chips in chips_by_user.items():
+                current = self.stacks.get((user, room_id))
+                if current is None:
+                    continue
+                delta = to_units(chips) - current
+                if delta and self._enqueue(f"hand:{room_id}:{hand_key}:{user}", user, room_id, 'hand', 0, delta):
+                    self._apply(user, room_id, 0, delta, 'hand')
+
+    def cash_out(self, user, room_id, chips=None):
+        """
+        離開牌桌: 把牌桌籌碼 (chips，預設為最後結算的數值) 移回餘額。
+        Returns:
+            移回的籌碼，沒有在這張牌桌買入時為 None。
+        """
+        with self._lock:
+            current = self.stacks.get((user, room_id))
+            if current is None:
+                return None
+            units = current if chips is None else to_units(chips)
+            key = f"cash_out:{room_id}:{user}:{self.stack_requests.get((user, room_id))}"
+            self._enqueue(key, user, room_id, 'cash_out', units, -current)
+            self._apply(user, room_id, units, -current, 'cash_out')
+            return from_units(units)
+
+    def close_room(self, room_id):
+        """房間被刪除: 仍在桌上的玩家以最後結算的籌碼離桌。"""
+        for user in list(self.room_users.get(room_id, ())):
+            self.cash_out(user, room_id)
+
+    def _committed(self, key):
+        # 呼叫端持有 _lock；主鍵查詢，讀取連線不會等待寫入中的交易
+        return self._read_conn.execute('SELECT 1 FROM ledger WHERE key = ?', (key,)).fetchone() is not None
+
+    def _enqueue(self, key, user, room_id, kind, balance_delta, stack_delta):
+        # 呼叫端持有 _lock；佇列中已有相同的鍵時略過 (已提交的重複鍵由資料庫的主鍵擋下)
+        if key in self._pending_keys:
+            self.duplicate_ops += 1
+            return False
+        self._pending_keys.add(key)
+        self._pending.append((key, user, room_id, kind, balance_delta, stack_delta, time.time()))
+        if self._thread is None:
+            self._thread = _real_threading.Thread(target=self._run, name='wallet-writer', daemon=True)
+            self._thread.start()
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _apply(self, user, room_id, balance_delta, stack_delta, kind):
+        # 呼叫端持有 _lock；kind 為 'revert' 時撤銷一筆已套用在快取上的紀錄
+        if balance_delta:
+            self.balances[user] = self.balances.get(user, 0) + balance_delta
+        if room_id is None:
+            return
+        key = (user, room_id)
+        stack = self.stacks.get(key, 0) + stack_delta
+        if kind == 'cash_out' or kind == 'revert' and stack == 0:
+            self.stacks.pop(key, None)
+            self.stack_requests.pop(key, None)
+            users = self.room_users.get(room_id)
+            if users is not None:
+                users.discard(user)
+                if not users:
+                    del self.room_users[room_id]
+        else:
+            self.stacks[key] = stack
+            self.room_users.setdefault(room_id, set()).add(user)
+
+    # --- 寫入 ---
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """在一個交易中寫出目前佇列中的所有紀錄。Returns: int: 寫出的筆數。"""
+        with self._commit_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._pending_keys = set()
+            if not batch:
+                return 0
+            try:
+                duplicates = self._commit(batch)
+            except sqlite3.Error as e:
+                # 放回佇列前端，下次再試 (遊戲不受影響)
+                self.error_count += 1
+                print(f"[錢包] 寫入 {len(batch)} 筆紀錄失敗，稍後重試: {e}")
+                with self._lock:
+                    self._pending[:0] = batch
+                    self._pending_keys.update(op[0] for op in batch)
+                return 0
+            if duplicates:
+                # 已經提交過的冪等鍵: 撤銷快取中多算的部分
+                with self._lock:
+                    for _, user, room_id, _, balance_delta, stack_delta, _ in duplicates:
+                        self._apply(user, room_id, -balance_delta, -stack_delta, 'revert')
+                self.duplicate_ops += len(duplicates)
+            self.commit_count += 1
+            self.committed_ops += len(batch) - len(duplicates)
+            return len(batch)
+
+    def _commit(self, batch):
+        conn = self._conn
+        duplicates = []
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for op in batch:
+                key, user, room_id, kind, balance_delta, stack_delta, created_at = op
+                if conn.execute('INSERT OR IGNORE INTO ledger VALUES (?, ?, ?, ?, ?, ?, ?)', op).rowcount == 0:
+                    duplicates.append(op)
+                    continue
+                if balance_delta:
+                    conn.execute('INSERT INTO wallets (user, balance) VALUES (?, ?) '
+                                 'ON CONFLICT (user) DO UPDATE SET balance = balance + excluded.balance',
+                                 (user, balance_delta))
+                if stack_delta:
+                    conn.execute('INSERT INTO stacks (user, room_id, chips) VALUES (?, ?, ?) '
+                                 'ON CONFLICT (user, room_id) DO UPDATE SET chips = chips + excluded.chips',
+                                 (user, room_id, stack_delta))
+                if kind == 'cash_out':
+                    conn.execute('DELETE FROM stacks WHERE user = ? AND room_id = ?', (user, room_id))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return duplicates
+
+    def recover(self):
+        """
+        把上一個行程留在牌桌上的籌碼退回餘額 (房間不會跨行程保存)。
+        退款與刪除 stacks 在同一個交易中，不會重複退款；冪等鍵以目前 ledger 的筆數區分每一次啟動。
+        Returns:
+            int: 退回的筆數。
+        """
+        with self._commit_lock:
+            rows = self._conn.execute('SELECT user, room_id, chips FROM stacks').fetchall()
+            if not rows:
+                return 0
+            now = time.time()
+            mark = self._conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM ledger').fetchone()[0]
+            self._conn.execute('BEGIN IMMEDIATE')
+            for user, room_id, chips in rows:
+                self._conn.execute('INSERT OR IGNORE INTO ledger VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                   (f"recover:{room_id}:{user}:{mark}", user, room_id, 'recover', chips, -chips, now))
+                self._conn.execute('UPDATE wallets SET balance = balance + ? WHERE user = ?', (chips, user))
+            self._conn.execute('DELETE FROM stacks')
+            self._conn.execute('COMMIT')
+        print(f"[錢包] 已把上次執行時留在 {len(rows)} 個座位上的籌碼退回餘額。")
+        return len(rows)
+
+    def stats(self):
+        return {
+            'pending': len(self._pending),
+            'commits': self.commit_count,
+            'committed_ops': self.committed_ops,
+            'duplicates': self.duplicate_ops,
+            'errors': self.error_count,
+            'cached_users': len(self.balances),
+            'open_stacks': len(self.stacks),
+        }
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+        self._read_conn.close()
+
+
+_default_wallet = None
+
+
+def configure_wallet(path=None, **kwargs):
+    """建立行程共用的錢包 (app.py 啟動時呼叫)；之後建立的牌桌透過 get_wallet() 買入與結算。"""
+    global _default_wallet
+    _default_wallet = Wallet(path, **kwargs)
+    atexit.register(_default_wallet.flush)
+    return _default_wallet
+
+
+def get_wallet():
+    """行程共用的錢包；沒有設定時為 None (模擬、重播、基準測試不使用錢包)。"""
+    return _default_wallet
+
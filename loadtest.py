@@ -0,0 +1,371 @@
+# loadtest.py
+"""
+Socket.IO 壓力測試: 在一個行程中模擬數千位同時連線的玩家，部署前量測伺服器的容量。
+
+每位模擬玩家:
+    1. 以 /dev/login 登入 (伺服器必須以 DEV_LOGIN=1 啟動；離線環境無法使用 Google OAuth)，
+    2. 以 Socket.IO 連線，每 room_size 人一組: 第一位以 POST /api/rooms 開房 (自動發牌)，
+       其他人以 POST /api/rooms/<id>/join 加入，全員到齊後由房主送出 start_game_request，
+    3. 收到狀態更新且輪到自己時，思考 think_time 秒後以 game_action 行動 (整局玩完，之後自動發下一局)，
+    4. 依 drop_rate 隨機斷線，reconnect_delay 秒後重新連線 (伺服器會自動讓玩家回到原本的房間)。
+
+報告內容:
+    - 行動到更新的延遲 p50/p99: 送出 game_action 到收到下一個狀態更新的時間，
+    - 客戶端每秒收到的事件數，以及伺服器每秒 emit 數與封包數 (抓取 /metrics 的前後差值)，
+    - 伺服器 CPU 使用率與常駐記憶體 (cnl_process_cpu_seconds / cnl_process_resident_memory_bytes)。
+
+用法:
+    DEV_LOGIN=1 python app.py                       # 另一個終端機
+    python loadtest.py --clients 2000 --room-size 6 --duration 300 --json loadtest.json
+"""
+import eventlet
+
+eventlet.monkey_patch()  # 數千個客戶端都是 greenthread；必須在匯入 requests / socketio 之前
+
+import argparse
+import json
+import logging
+import random
+import time
+
+import requests
+import socketio
+
+
+# 沒有安裝 websocket-client 時每個客戶端都會警告一次 (改用 polling)
+logging.getLogger('engineio.client').setLevel(logging.ERROR)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def scrape_metrics(url):
+    """讀取伺服器 /metrics，返回 {指標名稱: 所有標籤的合計}。"""
+    totals = {}
+    response = requests.get(f"{url}/metrics", timeout=10)
+    response.raise_for_status()
+    for line in response.text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        name_and_labels, _, value = line.rpartition(' ')
+        name = name_and_labels.split('{', 1)[0]
+        totals[name] = totals.get(name, 0.0) + float(value)
+    return totals
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies = []
+        self.events_received = 0
+        self.actions_sent = 0
+        self.hands_seen = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.errors = 0
+        self.error_samples = []
+
+    def error(self, message):
+        self.errors += 1
+        if len(self.error_samples) < 20:
+            self.error_samples.append(message)
+
+
+class RoomGroup:
+    """同一張牌桌的一組模擬玩家: 房主開房後通知其他人加入，全員到齊後開始。"""
+
+    def __init__(self, size):
+        self.size = size
+        self.room_id = None
+        self.created = eventlet.event.Event()
+        self.waiting = size - 1  # 房主以外尚未完成加入的人數
+        self.all_finished = eventlet.event.Event()
+        if self.waiting == 0:
+            self.all_finished.send(True)
+
+    def member_finished(self):
+        # 加入成功或失敗都算，房主才不會因為某個人失敗而永遠等下去
+        self.waiting -= 1
+        if self.waiting == 0:
+            self.all_finished.send(True)
+
+
+class SimulatedPlayer:
+    def __init__(self, index, args, group, is_host, stats, rng):
+        self.index = index
+        self.args = args
+        self.url = args.url
+        self.email = f"load-{args.run_id}-{index}@loadtest.local"
+        self.group = group
+        self.is_host = is_host
+        self.stats = stats
+        self.rng = rng
+        self.http = requests.Session()
+        self.sio = None
+        self.pending_key = None   # 已決定要行動的局面，避免同一個局面 (房間內每份狀態) 重複行動
+        self.action_sent_at = None
+        self.acting = False
+
+    # --- 連線 ---
+
+    def _connect(self):
+        sio = socketio.Client(http_session=self.http, reconnection=False)
+        update_event = f"{self.args.game}_update"
+        sio.on(update_event, self._on_update)
+        sio.on(f"{self.args.game}_game_over", self._on_game_over)
+        sio.on('error_message', lambda data: self.stats.error(f"{self.email}: {data}"))
+        sio.on('*', self._on_any)
+        sio.connect(self.url, wait_timeout=30)
+        self.sio = sio
+        self.stats.connects += 1
+
+    def _on_any(self, event, data=None):
+        self.stats.events_received += 1
+
+    def _on_game_over(self, data):
+        self.stats.events_received += 1
+        self.pending_key = None  # 下一局可能出現和上一局相同的局面
+        if self.is_host:
+            self.stats.hands_seen += 1
+
+    def run(self, deadline):
+        try:
+            response = self.http.post(f"{self.url}/dev/login", json={'email': self.email, 'name': f"Load{self.index}"},
+                                      timeout=30)
+            if response.status_code != 200:
+                raise RuntimeError(f"/dev/login 失敗 ({response.status_code})，伺服器是否以 DEV_LOGIN=1 啟動？")
+            self._connect()
+            self._join_room()
+        except Exception as e:
+            self.stats.error(f"{self.email} 無法加入: {e}")
+            if self.is_host and not self.group.created.ready():
+                self.group.created.send(None)  # 同組的其他人不必再等
+            return
+        finally:
+            if not self.is_host:
+                self.group.member_finished()
+
+        while time.time() < deadline:
+            eventlet.sleep(max(0, min(self.rng.uniform(5, 15), deadline - time.time())))
+            if time.time() >= deadline:
+                break
+            if self.rng.random() < self.args.drop_rate:
+                self._drop_and_reconnect()
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+    def _join_room(self):
+        if self.is_host:
+            response = self.http.post(f"{self.url}/api/rooms", json={
+                'game_type': self.args.game,
+                'options': {'auto_deal': True, 'auto_deal_delay': self.args.auto_deal_delay,
+                            'timeout_seconds': self.args.turn_timeout, 'hand_history': False},
+            }, timeout=30)
+            body = response.json()
+            if response.status_code != 201:
+                raise RuntimeError(f"開房失敗: {body}")
+            self.group.room_id = body['room_id']
+            self.group.created.send(body['room_id'])
+        else:
+            if self.group.created.wait() is None:
+                raise RuntimeError("房主開房失敗")
+            response = self.http.post(f"{self.url}/api/rooms/{self.group.room_id}/join", timeout=30)
+            if response.status_code != 200:
+                raise RuntimeError(f"加入房間失敗: {response.text}")
+        if self.is_host:
+            self.group.all_finished.wait()
+            self.sio.emit('start_game_request', {'room_id': self.group.room_id})
+
+    def _drop_and_reconnect(self):
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+        self.pending_key = None
+        self.action_sent_at = None
+        eventlet.sleep(self.rng.uniform(*self.args.reconnect_delay))
+        try:
+            self._connect()
+            self.stats.reconnects += 1
+        except Exception as e:
+            self.stats.error(f"{self.email} 重新連線失敗: {e}")
+
+    # --- 遊戲 ---
+
+    def _on_update(self, state):
+        self.stats.events_received += 1
+        if not state:
+            return
+        if self.action_sent_at is not None:
+            # 送出動作後收到的第一個狀態更新
+            self.stats.latencies.append(time.perf_counter() - self.action_sent_at)
+            self.action_sent_at = None
+        if not state.get('is_game_in_progress') or self.acting:
+            return
+        decision = self._decide(state)
+        if decision is None:
+            return
+        key, action_type, payload = decision
+        if key == self.pending_key:
+            return
+        self.pending_key = key
+        self.acting = True
+        eventlet.spawn_after(self.rng.uniform(*self.args.think_time), self._send_action, action_type, payload)
+
+    def _send_action(self, action_type, payload):
+        self.acting = False
+        if not self.sio.connected:
+            return  # 模擬斷線中；重新連線後會收到新的狀態
+        try:
+            self.action_sent_at = time.perf_counter()
+            self.sio.emit('game_action', {'room_id': self.group.room_id, 'action_type': action_type,
+                                          'payload': payload})
+            self.stats.actions_sent += 1
+        except Exception as e:
+            self.action_sent_at = None
+            self.stats.error(f"{self.email} 行動失敗: {e}")
+
+    def _me(self, state):
+        for player in state.get('players', []):
+            if player.get('sid') == self.email:
+                return player
+        return None
+
+    def _decide(self, state):
+        me = self._me(state)
+        if me is None:
+            return None
+        phase = state.get('game_phase')
+        if self.args.game == 'texas_holdem':
+            if state.get('current_turn_sid') != self.email:
+                return None
+            key = (phase, len(state.get('community_cards', [])), state.get('current_street_bet_to_match'),
+                   me.get('bet_in_current_street'), state.get('pot'))
+            to_call = state.get('current_street_bet_to_match', 0) - me.get('bet_in_current_street', 0)
+            roll = self.rng.random()
+            if to_call > 0 and roll < 0.15:
+                return key, 'fold', {}
+            if roll > 0.93 and me.get('chips', 0) > to_call + 2 * state.get('min_next_raise_increment', 0):
+                amount = state.get('current_street_bet_to_match', 0) + state.get('min_next_raise_increment', 0)
+                return key, ('raise' if state.get('current_street_bet_to_match', 0) > 0 else 'bet'), {'amount': amount}
+            return key, ('call' if to_call > 0 else 'check'), {}
+
+        # 21點
+        if phase == 'betting':
+            if me.get('bet', 0) > 0:
+                return None
+            return (phase,), 'bet', {'amount': state.get('min_bet', 10)}
+        if phase == 'insurance':
+            if me.get('has_insurance') is not None or not me.get('is_active_in_round'):
+                return None
+            return (phase,), 'decline_insurance', {}
+        if phase == 'player_turns' and state.get('current_turn_sid') == self.email:
+            key = (phase, len(me.get('hand', [])), me.get('hand_value'))
+            return key, ('hit' if me.get('hand_value', 0) < 17 else 'stand'), {}
+        return None
+
+
+def run(args):
+    stats = LoadStats()
+    rng = random.Random(args.seed)
+    before = scrape_metrics(args.url)
+    started = time.time()
+    deadline = started + args.ramp_up + args.duration
+
+    players = []
+    group = None
+    for index in range(args.clients):
+        if index % args.room_size == 0:
+            group = RoomGroup(min(args.room_size, args.clients - index))
+        players.append(SimulatedPlayer(index, args, group, index % args.room_size == 0, stats,
+                                       random.Random(rng.getrandbits(64))))
+
+    pool = eventlet.GreenPool(args.clients + 10)
+    peak_memory = [0.0]
+
+    def sample_server():
+        while time.time() < deadline:
+            eventlet.sleep(5)
+            try:
+                peak_memory[0] = max(peak_memory[0], scrape_metrics(args.url).get('cnl_process_resident_memory_bytes', 0))
+            except Exception as e:
+                stats.error(f"抓取 /metrics 失敗: {e}")
+
+    pool.spawn(sample_server)
+    for player in players:
+        pool.spawn(player.run, deadline)
+        eventlet.sleep(args.ramp_up / max(1, args.clients))  # 在 ramp_up 秒內逐步連線
+    measure_started = time.time()
+    measured_events = stats.events_received
+    pool.waitall()
+    measure_seconds = max(time.time() - measure_started, 1e-9)
+    elapsed = time.time() - started
+
+    after = scrape_metrics(args.url)
+    latencies = sorted(stats.latencies)
+    cpu_seconds = after.get('cnl_process_cpu_seconds', 0) - before.get('cnl_process_cpu_seconds', 0)
+    report = {
+        'clients': args.clients,
+        'game': args.game,
+        'room_size': args.room_size,
+        'seconds': round(elapsed, 1),
+        'connects': stats.connects,
+        'reconnects': stats.reconnects,
+        'errors': stats.errors,
+        'actions_sent': stats.actions_sent,
+        'hands_completed': stats.hands_seen,
+        'latency_p50_ms': round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+        'latency_p99_ms': round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+        'latency_max_ms': round(latencies[-1] * 1000, 1) if latencies else None,
+        'client_events_per_second': round((stats.events_received - measured_events) / measure_seconds, 1),
+        'server_emits_per_second': round((after.get('cnl_socketio_emits_total', 0)
+                                          - before.get('cnl_socketio_emits_total', 0)) / elapsed, 1),
+        'server_packets_per_second': round((after.get('cnl_socketio_packets_sent_total', 0)
+                                            - before.get('cnl_socketio_packets_sent_total', 0)) / elapsed, 1),
+        'server_cpu_percent': round(cpu_seconds / elapsed * 100, 1),
+        'server_memory_mb': round(after.get('cnl_process_resident_memory_bytes', 0) / 2 ** 20, 1),
+        'server_peak_memory_mb': round(max(peak_memory[0], after.get('cnl_process_resident_memory_bytes', 0)) / 2 ** 20, 1),
+        'error_samples': stats.error_samples,
+    }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Socket.IO 壓力測試 (伺服器須以 DEV_LOGIN=1 啟動)")
+    parser.add_argument('--url', default='http://127.0.0.1:4000')
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--room-size', type=int, default=6)
+    parser.add_argument('--game', choices=('texas_holdem', 'black_jack'), default='texas_holdem')
+    parser.add_argument('--duration', type=float, default=120, help="全部連線後持續的秒數")
+    parser.add_argument('--ramp-up', type=float, default=30, help="在幾秒內逐步建立所有連線")
+    parser.add_argument('--think-time', type=float, nargs=2, default=(0.3, 1.5), metavar=('MIN', 'MAX'))
+    parser.add_argument('--drop-rate', type=float, default=0.02, help="每 5 ~ 15 秒斷線一次的機率")
+    parser.add_argument('--reconnect-delay', type=float, nargs=2, default=(0.5, 3.0), metavar=('MIN', 'MAX'))
+    parser.add_argument('--auto-deal-delay', type=float, default=2)
+    parser.add_argument('--turn-timeout', type=float, default=20)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--run-id', default=None, help="email 前綴，讓同一台伺服器上的多次測試不互相干擾")
+    parser.add_argument('--json', default=None, help="把報告另存為 JSON (部署前後比較用)")
+    args = parser.parse_args(argv)
+    args.run_id = args.run_id or format(random.getrandbits(24), '06x')
+    if args.room_size < 2:
+        parser.error("--room-size 至少為 2")
+
+    report = run(args)
+    for key, value in report.items():
+        if key != 'error_samples':
+            print(f"{key}: {value}")
+    for sample in report['error_samples']:
+        print(f"  錯誤: {sample}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
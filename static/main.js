@@ -90,7 +90,8 @@ function updateBlackjackUI(gameState) {
     });
     
     const phase = gameState.game_phase;
-    const isMyTurn = gameState.current_turn_sid === socket.id;
+    // 下注階段所有玩家同時下注，由伺服器的 can_act 決定
+    const isMyTurn = phase === 'betting' ? !!gameState.can_act : gameState.current_turn_sid === socket.id;
     
     if (!isMyTurn) return;
     
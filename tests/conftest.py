@@ -0,0 +1,35 @@
+# tests/conftest.py
+"""
+測試共用設定。
+
+所有會寫入磁碟的模組 (牌局紀錄、房間快照、錢包、排行榜、21點策略表快取) 在匯入前就把預設路徑指向暫存目錄，
+測試不會在專案目錄留下檔案；每個測試使用新的 ManualScheduler 作為行程共用的排程器，
+計時器只在測試呼叫 advance() 時觸發。
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_DATA_DIR = tempfile.mkdtemp(prefix='cnl-tests-')
+os.environ.setdefault('HAND_HISTORY_DIR', os.path.join(_DATA_DIR, 'hand_history'))
+os.environ.setdefault('ROOM_SNAPSHOT_DIR', os.path.join(_DATA_DIR, 'room_snapshots'))
+os.environ.setdefault('WALLET_DB', os.path.join(_DATA_DIR, 'wallet.sqlite3'))
+os.environ.setdefault('LEADERBOARD_PATH', os.path.join(_DATA_DIR, 'leaderboards.json'))
+os.environ.setdefault('BLACKJACK_TABLE_DIR', os.path.join(_DATA_DIR, 'blackjack_tables'))
+
+import pytest
+
+from games import scheduler as scheduler_module
+from games.scheduler import ManualScheduler
+
+
+@pytest.fixture(autouse=True)
+def manual_scheduler(monkeypatch):
+    """行程共用的排程器換成虛擬時間的 ManualScheduler。"""
+    scheduler = ManualScheduler()
+    monkeypatch.setattr(scheduler_module, '_default_scheduler', scheduler)
+    return scheduler
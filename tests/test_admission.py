@@ -0,0 +1,69 @@
+import pytest
+
+from games.admission import RETRY_QUEUED, AdmissionControl, Decision, seat_limit
+from games.event_sink import NullSink
+from games.texas_holdem.logic import TexasHoldemGame
+
+
+@pytest.fixture
+def rooms():
+    return {}
+
+
+@pytest.fixture
+def control(rooms):
+    control = AdmissionControl(lambda: len(rooms), max_rooms=3, max_rooms_per_user=2, queue_size=2, max_waiting=3)
+    # r1、r2 屬於 a (r1 只有 2 個座位)，r3 屬於 b
+    for room_id, owner, options in (('r1', 'a', {'max_players': 2}), ('r2', 'a', {'max_players': 2}), ('r3', 'b', {})):
+        assert control.admit_room(owner).status == 200
+        rooms[room_id] = TexasHoldemGame(room_id, [], NullSink(), dict(options, hand_history=False))
+        control.room_opened(room_id, owner)
+    return control
+
+
+def test_room_quotas(control, rooms):
+    assert control.admit_room('c').status == 503  # 整個行程的上限
+    assert control.admit_room('c').retry_after > 0
+    control.room_closed('r3')
+    del rooms['r3']
+    assert control.admit_room('a').status == 429  # 每位使用者的額度
+    assert control.admit_room('c').status == 200
+    control.room_closed('r1')
+    del rooms['r1']
+    assert control.admit_room('a').status == 200
+
+
+def test_join_queue_order(control, rooms):
+    game = rooms['r1']
+    assert seat_limit(game) == 2 and seat_limit(rooms['r3']) == 9
+    for user in ('p1', 'p2'):
+        assert control.admit_join('r1', user, game).status == 200
+        game.add_player(user, {'name': user})
+    assert control.admit_join('r1', 'p1', game).status == 200  # 已在牌桌上
+    assert control.admit_join('r1', 'w1', game, {'name': 'W1'}) == Decision(202, "牌桌已滿，您是第 1 位候補。", RETRY_QUEUED, 1)
+    assert control.admit_join('r1', 'w2', game).position == 2
+    assert control.admit_join('r1', 'w3', game).status == 429
+    assert control.admit_join('r2', 'w3', rooms['r2']).status == 200  # 其他桌有空位
+
+    # 有人離座: 候補依序入座，取消後重新候補的人排到最後
+    control.leave_queue('w1')
+    assert control.admit_join('r1', 'w1', game).position == 2
+    control.leave_queue('w1')
+    assert control.admit_join('r1', 'w2', game).position == 1
+    game.remove_player('p2')
+    assert control.admit_join('r1', 'x', game).status == 202  # 空位留給排在前面的候補
+    assert control.next_waiting('r1') == ('w2', None) and control.next_waiting('r1')[0] == 'x'
+    assert control.next_waiting('r1') is None and not control.waiting_info
+    assert control.waiting_count == 0 and control.stats()['rooms_with_queue'] == 0
+
+
+def test_process_waiting_limit_and_closing_rooms(control, rooms):
+    for room_id in ('r1', 'r2'):
+        for user in ('s1', 's2'):
+            rooms[room_id].add_player(f"{room_id}-{user}", {'name': user})
+    for user in ('q1', 'q2'):
+        assert control.admit_join('r1', user, rooms['r1']).status == 202
+    assert control.admit_join('r2', 'q3', rooms['r2']).status == 202
+    assert control.admit_join('r2', 'q4', rooms['r2']).status == 503
+    assert control.room_closed('r1') == ['q1', 'q2'] and control.waiting_count == 1
+    assert control.position('r2', 'q3') == 1
@@ -0,0 +1,79 @@
+from games.black_jack.logic import BlackJackGame
+from games.event_sink import RecordingSink
+
+
+def _game(**options):
+    game = BlackJackGame('auto-deal', [], RecordingSink(),
+                         dict({'hand_history': False, 'outcome_hints': False, 'auto_deal': True}, **options))
+    game.add_player('p0', {'name': 'P0'})
+    return game
+
+
+def _play_hand(game):
+    game.handle_action('p0', 'bet', {'amount': 10})
+    while game.is_game_in_progress:
+        if game.game_state['game_phase'] == 'insurance':
+            game.handle_action('p0', 'decline_insurance')
+        else:
+            game.handle_action('p0', 'stand')
+
+
+def test_next_hand_starts_after_the_delay(manual_scheduler):
+    game = _game(auto_deal_delay=3)
+    game.start_game('p0')
+    _play_hand(game)
+    assert game.auto_deal_timer is not None and game.next_hand_at is not None
+    manual_scheduler.advance(2.9)
+    assert not game.is_game_in_progress
+    manual_scheduler.advance(0.1)
+    assert game.is_game_in_progress and game.game_state['game_phase'] == 'betting'
+    assert game.get_table_stats()['hands_per_hour'] > 0
+
+
+def test_auto_deal_off_waits_for_the_host(manual_scheduler):
+    game = _game(auto_deal=False)
+    game.start_game('p0')
+    _play_hand(game)
+    assert game.auto_deal_timer is None
+    manual_scheduler.advance(60)
+    assert not game.is_game_in_progress
+
+
+def test_aborted_hand_does_not_schedule_the_next_one(manual_scheduler):
+    game = _game(auto_deal_delay=1)
+    game.start_game('p0')
+    game.abort_game('測試中止')
+    manual_scheduler.advance(10)
+    assert not game.is_game_in_progress
+    assert game.get_active_timer_count() == 0
+
+
+def test_suspend_cancels_and_resume_reschedules(manual_scheduler):
+    game = _game(auto_deal_delay=2)
+    game.start_game('p0')
+    _play_hand(game)
+    game.suspend()
+    manual_scheduler.advance(10)
+    assert not game.is_game_in_progress
+    game.resume()
+    manual_scheduler.advance(2)
+    assert game.is_game_in_progress
+
+
+def test_round_without_bets_schedules_the_next_one(manual_scheduler):
+    game = _game(auto_deal_delay=2, betting_seconds=5)
+    game.start_game('p0')
+    manual_scheduler.advance(5)
+    assert not game.is_game_in_progress and game.auto_deal_timer is not None
+    assert game.events.last('black_jack_game_over')['aborted'] is True
+    manual_scheduler.advance(2)
+    assert game.is_game_in_progress and game.game_state['game_phase'] == 'betting'
+
+
+def test_round_without_bets_pauses_when_nobody_can_bet(manual_scheduler):
+    game = _game(auto_deal_delay=2, betting_seconds=5)
+    game.start_game('p0')
+    game.disconnect_player('p0')  # 唯一的玩家斷線: 下注階段立即結束
+    assert not game.is_game_in_progress and game.auto_deal_timer is None
+    manual_scheduler.advance(100)
+    assert not game.is_game_in_progress
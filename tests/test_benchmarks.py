@@ -0,0 +1,20 @@
+import pytest
+
+from benchmarks.__main__ import compare
+from benchmarks.cases import BENCHMARKS
+
+
+@pytest.mark.parametrize('name', sorted(BENCHMARKS))
+def test_benchmark_cases_run(name, capsys):
+    # 只確認每個項目可以執行 (計時由 python -m benchmarks 負責)
+    setup, ops = BENCHMARKS[name]
+    assert ops >= 1
+    run = setup()
+    for _ in range(3):
+        run()
+    capsys.readouterr()
+
+
+def test_compare_reports_relative_change():
+    rows = compare({'a': 1.5, 'b': 1.0, 'new': 2.0}, {'a': 1.0, 'b': 2.0})
+    assert rows == [('a', 1.5, 1.0, 0.5), ('b', 1.0, 2.0, -0.5)]
@@ -0,0 +1,110 @@
+import pytest
+
+from games.black_jack.logic import BlackJackGame
+from games.event_sink import RecordingSink
+from games.metrics import HANDS_ABORTED_TOTAL, HANDS_COMPLETED_TOTAL
+
+
+def _game(manual_scheduler, num_players=2, **options):
+    options.setdefault('hand_history', False)
+    options.setdefault('outcome_hints', False)
+    game = BlackJackGame('bj-test', [], RecordingSink(), options)
+    assert game.scheduler is manual_scheduler
+    for i in range(num_players):
+        game.add_player(f"p{i}", {'name': f"P{i}"})
+    return game
+
+
+def test_betting_waits_for_every_player(manual_scheduler):
+    game = _game(manual_scheduler)
+    assert game.start_game('p0')
+    assert game.game_state['current_turn_sid'] is None
+    game.handle_action('p1', 'bet', {'amount': 10})  # 不需要輪到自己
+    assert game.game_state['game_phase'] == 'betting'
+    game.handle_action('p0', 'bet', {'amount': 20})
+    assert game.game_state['game_phase'] != 'betting'
+    assert game.game_state['round_active_players_sids_in_order'] == ['p0', 'p1']
+    assert all(len(game.players[sid].hand) == 2 for sid in ('p0', 'p1'))
+
+
+def test_betting_deadline_sits_out_players_without_a_bet(manual_scheduler):
+    game = _game(manual_scheduler, betting_seconds=15)
+    game.start_game('p0')
+    game.handle_action('p0', 'bet', {'amount': 10})
+    manual_scheduler.advance(14.9)
+    assert game.game_state['game_phase'] == 'betting'
+    manual_scheduler.advance(0.2)
+    assert game.game_state['round_active_players_sids_in_order'] == ['p0']
+    assert not game.players['p1'].is_active_in_round
+    assert game.players['p1'].hand == []
+
+
+def test_no_bets_cancels_the_round(manual_scheduler):
+    game = _game(manual_scheduler, betting_seconds=5)
+    game.start_game('p0')
+    manual_scheduler.advance(5)
+    assert not game.is_game_in_progress
+    assert game.game_state['game_phase'] is None
+    assert manual_scheduler.pending_count() == 0
+
+
+def test_no_bets_aborts_the_hand(manual_scheduler):
+    aborted = HANDS_ABORTED_TOTAL.labels('black_jack')
+    completed = HANDS_COMPLETED_TOTAL.labels('black_jack')
+    before = (aborted.value, completed.value)
+    game = _game(manual_scheduler, betting_seconds=5, hand_history=True)
+    game.start_game('p0')
+    manual_scheduler.advance(5)
+    assert game.hand_history._hand is None
+    assert (aborted.value - before[0], completed.value - before[1]) == (1, 0)
+    assert game.events.last('black_jack_game_over')['aborted'] is True
+    assert game.hand_start_chips == {}
+
+
+@pytest.mark.parametrize('amount', [0, 'abc', 10 ** 9])
+def test_invalid_bets_are_rejected(manual_scheduler, amount):
+    game = _game(manual_scheduler, num_players=1)
+    game.start_game('p0')
+    assert not game.place_bet('p0', amount)
+    assert game.players['p0'].bet == 0
+
+
+def _finish_round(game):
+    while game.is_game_in_progress:
+        if game.game_state['game_phase'] == 'insurance':
+            for sid in game.game_state['round_active_players_sids_in_order']:
+                if game.players[sid].has_insurance is None:
+                    game.handle_action(sid, 'decline_insurance')
+        else:
+            game.handle_action(game.game_state['current_turn_sid'], 'stand')
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_player_leaving_mid_round_is_dropped_from_turn_order(manual_scheduler, seed):
+    game = _game(manual_scheduler, num_players=3, seed=seed)
+    game.start_game('p0')
+    for sid in ('p0', 'p1', 'p2'):
+        game.handle_action(sid, 'bet', {'amount': 10})
+    if not game.is_game_in_progress:
+        return  # 莊家自然21點，發牌時已結算
+    if game.game_state['current_turn_sid'] == 'p2':
+        game.handle_action('p2', 'stand')
+    leaving = 'p2' if game.game_state['current_turn_sid'] != 'p2' else 'p1'
+    game.remove_player(leaving)
+    assert leaving not in game.game_state['round_active_players_sids_in_order']
+    _finish_round(game)
+    assert not game.is_game_in_progress and game.get_active_timer_count() == 0
+
+
+def test_current_player_leaving_passes_the_turn(manual_scheduler):
+    for seed in range(40):
+        game = _game(manual_scheduler, num_players=3, seed=seed)
+        game.start_game('p0')
+        for sid in ('p0', 'p1', 'p2'):
+            game.handle_action(sid, 'bet', {'amount': 10})
+        if game.game_state['game_phase'] == 'player_turns' and game.game_state['current_turn_sid'] == 'p0':
+            break
+    game.remove_player('p0')
+    assert game.game_state['current_turn_sid'] in ('p1', 'p2') or not game.is_game_in_progress
+    _finish_round(game)
+    assert not game.is_game_in_progress
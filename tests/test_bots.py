@@ -0,0 +1,52 @@
+import pytest
+
+from games import bots
+from games.event_sink import NullSink
+from games.profiler import SLOW_ACTIONS
+from games.texas_holdem.logic import TexasHoldemGame
+
+
+@pytest.fixture(autouse=True)
+def slow_action_threshold_is_restored():
+    # 批次執行只在 batch_run 區塊內暫停慢動作紀錄，結束後伺服器的門檻不變
+    threshold = SLOW_ACTIONS.threshold
+    yield
+    assert SLOW_ACTIONS.threshold == threshold
+
+
+@pytest.mark.parametrize('game_type,strategy', [
+    ('texas_holdem', 'random'), ('texas_holdem', 'rule'), ('texas_holdem', 'equity'),
+    ('black_jack', 'random'), ('black_jack', 'rule'), ('black_jack', 'equity'),
+])
+def test_bot_tables_keep_playing(game_type, strategy):
+    summary = bots.run_soak(game_type, tables=2, bots_per_table=3, strategy=strategy, seconds=60, seed=1)
+    assert summary['hands'] >= 2
+    assert summary['decisions'] > 0 and summary['errors'] == 0
+
+
+def test_inline_soak_is_reproducible():
+    first = bots.run_soak('texas_holdem', tables=2, bots_per_table=3, seconds=120, seed=4)
+    second = bots.run_soak('texas_holdem', tables=2, bots_per_table=3, seconds=120, seed=4)
+    assert (first['hands'], first['decisions']) == (second['hands'], second['decisions'])
+
+
+def test_thread_executor_applies_decisions(manual_scheduler):
+    runner = bots.BotRunner(manual_scheduler, executor='thread', workers=2, seed=2)
+    game = TexasHoldemGame('bots-thread', [], NullSink(), {'hand_history': False, 'auto_deal': True, 'auto_deal_delay': 1})
+    runner.fill_table(game, 3)
+    game.host_sid = next(iter(game.players))
+    game.start_game(None)
+    while manual_scheduler.now() < 60:
+        deadline = manual_scheduler.now() + runner.tick_interval
+        runner.wait_for_decisions(deadline)
+        manual_scheduler.advance(runner.tick_interval)
+    runner.stop()
+    assert runner.stats['decisions'] > 0 and runner.stats['errors'] == 0
+
+
+def test_rejects_unknown_strategy_and_executor(manual_scheduler):
+    with pytest.raises(ValueError):
+        bots.BotRunner(manual_scheduler, executor='gpu')
+    runner = bots.BotRunner(manual_scheduler, executor='inline')
+    with pytest.raises(ValueError):
+        runner.add_bot(TexasHoldemGame('bots-bad', [], NullSink(), {'hand_history': False}), 'b1', strategy='psychic')
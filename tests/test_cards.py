@@ -0,0 +1,48 @@
+import copy
+import json
+import pickle
+import random
+
+import pytest
+
+from games.cards import CARD_TABLE, CARDS_PER_DECK, Deck, card_code, validate_generator
+from games.texas_holdem.utils import create_deck, deal_cards, shuffle_deck
+
+
+def test_cards_are_immutable_shared_dicts():
+    card = CARD_TABLE[0]
+    assert card == {'rank': 'A', 'suit': 'H'} and json.loads(json.dumps(card)) == {'rank': 'A', 'suit': 'H'}
+    assert copy.deepcopy([card])[0] is card and pickle.loads(pickle.dumps(card)) is card
+    with pytest.raises(TypeError):
+        card['rank'] = 'K'
+    assert card_code({'rank': card['rank'], 'suit': card['suit']}) == card_code(card) == 0
+
+
+def test_fast_deck_deals_like_the_old_deck():
+    for seed in range(200):
+        old_deck = shuffle_deck(create_deck(), random.Random(seed))
+        deck = Deck('fast')
+        deck.shuffle(seed)
+        assert deck.deal(2) + deck.deal(3) + deck.deal(1) == \
+            deal_cards(old_deck, 2) + deal_cards(old_deck, 3) + deal_cards(old_deck, 1)
+
+
+def test_secure_shuffle_is_a_deterministic_permutation():
+    a, b = Deck('secure'), Deck('secure')
+    a.shuffle(12345)
+    b.shuffle(12345)
+    assert a.order == b.order and sorted(a.order) == list(range(CARDS_PER_DECK))
+
+
+def test_secure_shuffle_first_card_is_roughly_uniform():
+    counts = [0] * CARDS_PER_DECK
+    deck = Deck('secure')
+    for seed in range(26000):
+        deck.shuffle(seed)
+        counts[deck.order[0]] += 1
+    assert max(counts) < 600 and min(counts) > 400, (min(counts), max(counts))
+
+
+def test_rejects_unknown_generator():
+    with pytest.raises(ValueError):
+        validate_generator('mersenne')
@@ -0,0 +1,38 @@
+import random
+
+from games.cards import CARD_TABLE, CARDS_PER_DECK
+from games.texas_holdem.evaluator import estimate_equity, hand_category, hand_strength
+from games.texas_holdem.utils import evaluate_hand
+
+
+def reference(codes):
+    result = evaluate_hand([CARD_TABLE[c] for c in codes[:2]], [CARD_TABLE[c] for c in codes[2:]])
+    return (result['value'], result['tie_breaker_ranks'])
+
+
+def test_ordering_matches_evaluate_hand():
+    rng = random.Random(41)
+    hands = [rng.sample(range(CARDS_PER_DECK), rng.choice([5, 6, 7])) for _ in range(3000)]
+    fast = [hand_strength(h) for h in hands]
+    slow = [reference(h) for h in hands]
+    for i in range(len(hands) - 1):
+        # 每一對相鄰手牌的大小關係必須和 evaluate_hand 相同
+        assert (fast[i] > fast[i + 1]) == (slow[i] > slow[i + 1]), (hands[i], hands[i + 1])
+        assert (fast[i] == fast[i + 1]) == (slow[i] == slow[i + 1]), (hands[i], hands[i + 1])
+        assert hand_category(fast[i]) == slow[i][0]
+
+
+def test_wheel_is_the_lowest_straight():
+    codes = {f"{card['rank']}{card['suit']}": code for code, card in enumerate(CARD_TABLE)}
+    wheel = hand_strength([codes[c] for c in ('AH', '2D', '3C', '4S', '5H', 'KD', 'QC')])
+    six_high = hand_strength([codes[c] for c in ('6H', '2D', '3C', '4S', '5H', 'KD', 'QC')])
+    assert hand_category(wheel) == hand_category(six_high)
+    assert wheel < six_high
+
+
+def test_known_preflop_equities():
+    # AA 對一手隨機牌約 85%，72o 約 35%
+    aa = estimate_equity([0, 13], [], 1, iterations=4000, seed=1)
+    seven_two = estimate_equity([6, 14], [], 1, iterations=4000, seed=1)
+    assert 0.82 < aa < 0.88 and 0.30 < seven_two < 0.38, (aa, seven_two)
+    assert estimate_equity([0, 13], [], 1, iterations=200, seed=7) == estimate_equity([0, 13], [], 1, iterations=200, seed=7)
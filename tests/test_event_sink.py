@@ -0,0 +1,53 @@
+from games.event_sink import NullSink, RecordingSink, SocketIOSink, as_event_sink
+from games.texas_holdem.logic import TexasHoldemGame
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event, data=None, to=None, namespace=None):
+        self.emitted.append((event, data, to, namespace))
+
+
+def test_recording_sink_filters_events():
+    sink = RecordingSink(events={'texas_holdem_game_over'})
+    sink.emit('texas_holdem_update', {'pot': 10}, to='room')
+    sink.emit('texas_holdem_game_over', {'winners': []}, to='room')
+    assert sink.of('texas_holdem_game_over') == [{'winners': []}]
+    assert sink.last('texas_holdem_update') is None
+    sink.clear()
+    assert sink.records == []
+
+
+def test_as_event_sink():
+    sink = RecordingSink()
+    assert as_event_sink(sink) is sink
+    assert isinstance(as_event_sink(None), NullSink) and as_event_sink(None).discards_broadcasts
+    socketio = FakeSocketIO()
+    wrapped = as_event_sink(socketio)
+    assert isinstance(wrapped, SocketIOSink)
+    wrapped.emit('hello', {'x': 1}, to='sid')
+    assert socketio.emitted == [('hello', {'x': 1}, 'sid', '/')]
+
+
+def test_games_emit_through_the_sink():
+    sink = RecordingSink()
+    game = TexasHoldemGame('sink', [], sink, {'hand_history': False})
+    game.add_player('a', {'name': 'A'})
+    game.add_player('b', {'name': 'B'})
+    sink.clear()
+    game.start_game('a')
+    updates = [(data, to) for name, data, to in sink.records if name == 'texas_holdem_update']
+    # 每次廣播為每位玩家組裝一份狀態
+    assert updates and len(updates) % 2 == 0
+    assert all(to == 'sink' and data['room_id'] == 'sink' for data, to in updates)
+
+
+def test_recording_sink_can_skip_broadcasts():
+    sink = RecordingSink(broadcasts=False)
+    game = TexasHoldemGame('quiet', [], sink, {'hand_history': False})
+    game.add_player('a', {'name': 'A'})
+    game.add_player('b', {'name': 'B'})
+    game.start_game('a')
+    assert sink.of('texas_holdem_update') == []
@@ -0,0 +1,103 @@
+import random
+
+from games.event_sink import NullSink
+from games.texas_holdem.fast_fold import FastFoldPool
+from games.texas_holdem.logic import TexasHoldemGame
+
+BUY_IN = 100000
+
+
+def bot_action(table, sid, rng):
+    if not table.is_game_in_progress or table.game_state.get('current_turn_sid') != sid:
+        return
+    player = table.players[sid]
+    to_call = table.game_state['current_street_bet_to_match'] - player['bet_in_current_street']
+    roll = rng.random()
+    if roll < 0.55 and to_call > 0:
+        table.handle_action(sid, 'fold')
+    elif roll < 0.62 and player['chips'] > to_call + table.game_state['big_blind'] * 3:
+        table.handle_action(sid, 'raise', {'amount': table.game_state['current_street_bet_to_match'] + table.game_state['big_blind'] * 3})
+    else:
+        table.handle_action(sid, 'call' if to_call > 0 else 'check')
+
+
+def drive(scheduler, tables_fn, rng, seconds, capsys):
+    """機器人每次行動花 1 ~ 4 秒，推進虛擬時間 seconds 秒。"""
+    pending = {}
+    while scheduler.now() < seconds:
+        for table in tables_fn():
+            sid = table.game_state.get('current_turn_sid') if table.is_game_in_progress else None
+            # 每次輪到玩家時計時器編號都會遞增，用來分辨同一位玩家的不同回合
+            turn = (sid, table.player_timer_instance_ids.get(sid))
+            if sid and pending.get(table.room_id) != turn:
+                pending[table.room_id] = turn
+                scheduler.call_later(rng.uniform(1, 4), bot_action, table, sid, rng)
+        deadline = scheduler.next_deadline()
+        scheduler.advance(max(deadline - scheduler.now(), 0) if deadline is not None else 1)
+        capsys.readouterr()
+
+
+def _pool(manual_scheduler, pool_id='ff', **options):
+    return FastFoldPool(pool_id, NullSink(), dict({'table_size': 6, 'seed': 40, 'hand_history': False,
+                                                   'outcome_hints': False, 'buy_in': BUY_IN}, **options),
+                        scheduler=manual_scheduler)
+
+
+def _pool_chips(pool):
+    total = 0
+    for sid, state in pool.players.items():
+        table = pool.tables.get(state['table_id'])
+        if table is None or sid not in table.players or table.players[sid].get('fast_folded'):
+            total += state['chips']
+    for table in pool.tables.values():
+        if table.is_game_in_progress:
+            total += table.game_state['pot'] + sum(p['chips'] for p in table.players.values() if not p.get('fast_folded'))
+    return total
+
+
+def test_pool_conserves_chips_and_plays_more_hands_than_ring_tables(manual_scheduler, capsys):
+    rng = random.Random(40)
+    num_players = 24
+    seconds = 900
+    pool = _pool(manual_scheduler)
+    for i in range(num_players):
+        pool.join(f"p{i}", f"P{i}")
+    drive(manual_scheduler, lambda: list(pool.tables.values()), rng, seconds, capsys)
+    assert _pool_chips(pool) == num_players * BUY_IN and pool.busted == 0
+    pool_hands = pool.seatings
+
+    ring_tables = []
+    ring_hands = []
+    start = manual_scheduler.now()
+    for t in range(num_players // 6):
+        table = TexasHoldemGame(f"ring-{t}", [], NullSink(), {'auto_deal': True, 'auto_deal_delay': 5, 'buy_in': BUY_IN,
+                                                              'hand_history': False, 'outcome_hints': False})
+        table.hand_end_listeners.append(lambda game, results: ring_hands.append(game.room_id))
+        for i in range(6):
+            table.add_player(f"r{t}-{i}", {'name': f"R{i}"})
+        table.start_game(None)
+        ring_tables.append(table)
+    drive(manual_scheduler, lambda: ring_tables, rng, start + seconds, capsys)
+    # 棄牌的玩家立刻進入下一局，每位玩家參與的局數明顯較多
+    assert pool_hands > len(ring_hands) * 6 * 1.5
+
+
+def test_matcher_fills_whole_tables(manual_scheduler, capsys):
+    pool = _pool(manual_scheduler, 'bulk', seed=1)
+    for i in range(600):
+        pool.join(f"b{i}", f"B{i}")
+    pool._run_matcher()
+    capsys.readouterr()
+    assert pool.queued_count == 600 % 6 and len(pool.tables) == 600 // 6
+    assert all(table.get_player_count() == 6 for table in pool.tables.values())
+
+
+def test_join_and_leave(manual_scheduler):
+    pool = _pool(manual_scheduler)
+    assert pool.join('a', 'A')[0]
+    assert not pool.join('a', 'A')[0]
+    assert not pool.join('broke', 'B', chips=0)[0]
+    assert pool.queued_count == 1
+    assert pool.leave('a') == BUY_IN
+    assert pool.leave('a') is None
+    assert pool.queued_count == 0
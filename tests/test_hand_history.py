@@ -0,0 +1,73 @@
+import os
+
+from games.black_jack.logic import BlackJackGame
+from games.event_sink import NullSink
+from games.hand_history import HandHistoryLog, HandHistoryReader, HandHistoryWriter, decode_varint, encode_varint
+from games.texas_holdem.logic import TexasHoldemGame
+
+
+def _log(tmp_path, **kwargs):
+    return HandHistoryLog('texas_holdem', 'room/1', directory=str(tmp_path),
+                          writer=HandHistoryWriter(flush_interval=3600), **kwargs)
+
+
+def _write_hand(log, seed, actions=3):
+    log.begin_hand([('a', 'Alice', 100), ('b', 'Bob', 50.5)], seed=seed, table={'big_blind': 20})
+    for i in range(actions):
+        log.record('a' if i % 2 == 0 else 'b', 'call', 20)
+    log.record('stranger', 'fold')  # 不在座位上，忽略
+    log.finish_hand({'winner': 'a'})
+
+
+def test_varint_round_trip():
+    out = bytearray()
+    values = [0, 1, 127, 128, 300, 2 ** 40]
+    for value in values:
+        encode_varint(value, out)
+    pos = 0
+    for value in values:
+        decoded, pos = decode_varint(out, pos)
+        assert decoded == value
+    assert pos == len(out)
+
+
+def test_hands_round_trip_through_the_index(tmp_path):
+    log = _log(tmp_path)
+    for seed in range(5):
+        _write_hand(log, seed)
+    log.discard_hand()
+    log.begin_hand([('a', 'Alice', 100)], seed=99)
+    log.discard_hand()
+    log.finish_hand({})  # 已丟棄，不寫入
+    log.flush()
+    assert os.path.basename(log.log_path) == 'room_1.hhl'
+    reader = HandHistoryReader(log.log_path)
+    assert len(reader) == 5
+    hand = reader.read_hand(3)
+    assert hand['seed'] == 3
+    assert [(seat['name'], seat['chips']) for seat in hand['seats']] == [('Alice', 100), ('Bob', 50.5)]
+    assert [action['sid'] for action in hand['actions']] == ['a', 'b', 'a']
+    assert len(hand['actions']) == 3
+    assert hand['table'] == {'big_blind': 20} and hand['results'] == {'winner': 'a'}
+    assert [h['seed'] for h in reader] == list(range(5))
+
+
+def test_rotates_and_keeps_a_bounded_number_of_files(tmp_path):
+    log = _log(tmp_path, max_bytes=400, keep_rotated=2)
+    for seed in range(40):
+        _write_hand(log, seed)
+        if seed % 7 == 0:
+            log.flush()
+    log.flush()
+    files = sorted(os.listdir(os.path.dirname(log.log_path)))
+    assert files == ['room_1.1.hhl', 'room_1.1.idx', 'room_1.2.hhl', 'room_1.2.idx', 'room_1.hhl', 'room_1.idx']
+    seeds = []
+    for path in (log.rotated_paths(2)[0], log.rotated_paths(1)[0], log.log_path):
+        assert os.path.getsize(path) <= 400
+        seeds.extend(hand['seed'] for hand in HandHistoryReader(path))
+    assert seeds == list(range(40 - len(seeds), 40))
+
+
+def test_disabled_by_default(tmp_path):
+    assert TexasHoldemGame('t', [], NullSink()).hand_history is None
+    assert BlackJackGame('b', [], NullSink(), {'hand_history': True}).hand_history is not None
@@ -0,0 +1,112 @@
+import bisect
+import random
+
+import pytest
+
+from games.event_sink import RecordingSink
+from games.leaderboard import BOARDS, Leaderboards, SkipList
+from games.scheduler import ManualScheduler
+from games.texas_holdem.logic import TexasHoldemGame
+
+
+def test_skip_list_matches_sorted_list():
+    rng = random.Random(7)
+    skip, reference = SkipList(seed=1), []
+    for _ in range(20000):
+        key = rng.randrange(5000)
+        index = bisect.bisect_left(reference, key)
+        if reference[index:index + 1] == [key]:
+            assert skip.remove(key)
+            reference.remove(key)
+        else:
+            skip.insert(key)
+            bisect.insort(reference, key)
+    assert len(skip) == len(reference)
+    for _ in range(500):
+        index = rng.randrange(len(reference))
+        assert skip.rank(reference[index]) == index + 1
+        assert skip.slice(index, 7) == reference[index:index + 7]
+    assert skip.rank(-1) is None and not skip.remove(-1) and skip.slice(len(reference), 3) == []
+
+
+@pytest.fixture
+def boards(tmp_path):
+    scheduler = ManualScheduler()
+    boards = Leaderboards(str(tmp_path / 'leaderboards.json'), checkpoint_interval=60, page_size=3, scheduler=scheduler)
+    boards.start()
+    boards.record_hand({'a': 150, 'b': -100, 'c': -50}, {'a': 250}, {'a': 'A', 'b': 'B', 'c': 'C'})
+    boards.record_hand({'a': -30, 'b': 60, 'c': -30}, {'b': 90})
+    boards.record_hand({'c': 400, 'd': -400}, {'c': 800}, {'d': 'D'})
+    yield boards
+    boards.stop()
+
+
+def test_pages_and_standings(boards):
+    assert [(e['name'], e['score']) for e in boards.page('net_chips')['entries']] == [('C', 320), ('A', 120), ('B', -40)]
+    assert boards.page('net_chips', 1)['entries'] == [{'rank': 4, 'name': 'D', 'score': -400}]
+    assert boards.standing('biggest_pot', 'a') == {'rank': 2, 'score': 250, 'page': 0}
+    assert boards.standing('hands_won', 'd') is None and boards.page('hands_won')['total'] == 3
+
+
+def test_cached_page_until_expiry(boards):
+    boards.page('net_chips', 1)
+    boards.record_hand({'d': 1000}, {'d': 1000})
+    assert boards.page('net_chips', 1)['entries'][0]['name'] == 'D'
+    boards._page_cache.clear()
+    assert boards.page('net_chips')['entries'][0] == {'rank': 1, 'name': 'D', 'score': 600}
+
+
+def test_checkpoint_and_reload(boards, tmp_path):
+    boards.scheduler.advance(61)
+    boards._writer.join()
+    assert boards.checkpoint_count == 1 and not boards.dirty and not boards.checkpoint()
+    restored = Leaderboards(str(tmp_path / 'leaderboards.json'), scheduler=ManualScheduler())
+    for name in BOARDS:
+        assert restored.boards[name].top(0, 10) == boards.boards[name].top(0, 10)
+    assert restored.names == boards.names and restored.hands_recorded == 3
+
+
+def test_bulk_updates_keep_boards_sorted(tmp_path):
+    rng = random.Random(3)
+    big = Leaderboards(str(tmp_path / 'big.json'), scheduler=ManualScheduler())
+    users = [f"user{i}" for i in range(2000)]
+    for _ in range(3000):
+        winner, loser = rng.sample(users, 2)
+        amount = rng.randint(1, 500)
+        big.record_hand({winner: amount, loser: -amount}, {winner: amount})
+    scores = sorted(big.boards['net_chips'].scores.items(), key=lambda item: (-item[1], item[0]))
+    assert [(user, score) for _, user, score in big.boards['net_chips'].top(100, 20)] == scores[100:120]
+    big.flush()
+    assert big.checkpoint_count == 1
+
+
+def play_folded_hand(options, seats, monkeypatch, tmp_path):
+    boards = Leaderboards(str(tmp_path / 'table.json'), scheduler=ManualScheduler())
+    monkeypatch.setattr('games.leaderboard._default_leaderboards', boards)
+    game = TexasHoldemGame('r1', [], RecordingSink(), dict({'hand_history': False, 'buy_in': 200}, **options))
+    for sid, info in seats.items():
+        game.add_player(sid, dict({'name': sid}, **info))
+    game.start_game(next(iter(seats)))
+    game.handle_action(game.game_state['current_turn_sid'], 'fold', {})
+    return boards
+
+
+def test_table_records_wallet_funded_players(monkeypatch, tmp_path):
+    boards = play_folded_hand({}, {'a': {}, 'b': {}}, monkeypatch, tmp_path)
+    assert boards.hands_recorded == 1
+    assert set(boards.boards['net_chips'].scores) == {'a', 'b'}
+
+
+def test_bots_are_not_ranked(monkeypatch, tmp_path):
+    boards = play_folded_hand({}, {'a': {}, 'bot-1': {'chips': 200}}, monkeypatch, tmp_path)
+    assert set(boards.boards['net_chips'].scores) == {'a'}
+    assert 'bot-1' not in boards.boards['hands_won'].scores
+
+    boards = play_folded_hand({}, {'bot-1': {'chips': 200}, 'bot-2': {'chips': 200}}, monkeypatch, tmp_path)
+    assert boards.hands_recorded == 0
+
+
+@pytest.mark.parametrize('options', [{'tournament_id': 't1'}, {'fast_fold_pool_id': 'pool-1'}])
+def test_tournament_and_pool_tables_are_skipped(options, monkeypatch, tmp_path):
+    boards = play_folded_hand(options, {'a': {}, 'b': {}}, monkeypatch, tmp_path)
+    assert boards.hands_recorded == 0 and not boards.boards['net_chips'].scores
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from games.admission import seat_limit
+from games.event_sink import NullSink
+from games.matchmaking import STAKE_LADDER, TABLE_SIZE, Matchmaker, stake_of
+from games.texas_holdem.logic import TexasHoldemGame
+
+
+@pytest.fixture
+def rooms():
+    return {}
+
+
+@pytest.fixture
+def seated():
+    return {}
+
+
+@pytest.fixture
+def matchmaker(rooms, seated, manual_scheduler):
+    return Matchmaker(NullSink(), rooms.get, {'hand_history': False, 'seed': 1}, manual_scheduler,
+                      on_table_opened=lambda mm, game: rooms.__setitem__(game.room_id, game),
+                      on_seated=lambda mm, sid, game: seated.__setitem__(sid, game.room_id))
+
+
+def test_fills_lobby_tables_then_opens_short_tables(matchmaker, rooms, seated, manual_scheduler):
+    # 大廳中 big_blind 20、3 人的牌桌先被補滿 (9 個座位)
+    lobby = TexasHoldemGame('lobby', [], NullSink(), {'hand_history': False, 'big_blind': 20, 'small_blind': 10})
+    for i in range(3):
+        lobby.add_player(f"l{i}", {'name': f"L{i}"})
+    rooms['lobby'] = lobby
+    matchmaker.offer_table('lobby', lobby)
+    assert matchmaker.enqueue('x', 'X', 'poker', 1, 2).status == 400
+    assert matchmaker.enqueue('x', 'X', 'texas_holdem', 3, 3).status == 400
+    for i in range(8):
+        assert matchmaker.enqueue(f"p{i}", f"P{i}", 'texas_holdem', 10, 50).status == 202
+    assert matchmaker.enqueue('p0', 'P0', 'texas_holdem', 10, 50).status == 409
+    manual_scheduler.advance(matchmaker.match_interval)
+    assert [seated[f"p{i}"] for i in range(6)] == ['lobby'] * 6 and lobby.get_player_count() == 9
+    # 剩下 2 人排在範圍內等待最多的級別 (平手取低的: 10)，超過等待時間後開短桌並開局
+    assert matchmaker.get_summary()['waiting_by_stake'] == {'texas_holdem:10': 2}
+    manual_scheduler.advance(matchmaker.max_wait_seconds + matchmaker.match_interval)
+    table = rooms[seated['p6']]
+    assert seated['p7'] == table.room_id and table.game_state['big_blind'] == 10 and table.is_game_in_progress
+
+
+def test_cancel_and_refill_matchmaker_tables(matchmaker, rooms, seated, manual_scheduler):
+    # 取消的玩家不會入座；21點單人也會開桌
+    matchmaker.enqueue('b0', 'B0', 'black_jack', 25, 25)
+    matchmaker.enqueue('b1', 'B1', 'black_jack', 25, 25)
+    assert matchmaker.cancel('b1') and not matchmaker.cancel('b1')
+    manual_scheduler.advance(matchmaker.max_wait_seconds + 2 * matchmaker.match_interval)
+    assert 'b1' not in seated and rooms[seated['b0']].game_state['min_bet'] == 25
+    assert rooms[seated['b0']].game_state['game_phase'] == 'betting'
+
+    # 新玩家先補進配對器開的同級別牌桌
+    matchmaker.enqueue('p8', 'P8', 'black_jack', 10, 100)
+    manual_scheduler.advance(matchmaker.match_interval)
+    assert seated['p8'] == seated['b0']
+
+
+def test_many_players_with_random_stake_ranges(matchmaker, rooms, seated, manual_scheduler, capsys):
+    rng = random.Random(7)
+    ladder = STAKE_LADDER['texas_holdem']
+    count = 2000
+    ranges = {}
+    for i in range(count):
+        low = rng.randrange(len(ladder))
+        ranges[f"q{i}"] = (ladder[low], ladder[min(len(ladder) - 1, low + rng.randrange(3))])
+        matchmaker.enqueue(f"q{i}", f"Q{i}", 'texas_holdem', *ranges[f"q{i}"])
+    manual_scheduler.advance(matchmaker.match_interval)
+    capsys.readouterr()
+    summary = matchmaker.get_summary()
+    assert len(seated) + summary['queued'] == count
+    assert summary['queued'] < len(ladder) * TABLE_SIZE['texas_holdem']
+    for sid, room_id in seated.items():
+        low, high = ranges[sid]
+        table = rooms[room_id]
+        assert low <= stake_of(table) <= high and table.get_player_count() <= seat_limit(table)
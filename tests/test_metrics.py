@@ -0,0 +1,65 @@
+import pytest
+
+from games.event_sink import NullSink
+from games.metrics import (
+    HANDS_ABORTED_TOTAL, HANDS_COMPLETED_TOTAL, HANDS_STARTED_TOTAL, Registry, action_label,
+)
+from games.texas_holdem.logic import TexasHoldemGame
+
+
+def _texas(room_id):
+    game = TexasHoldemGame(room_id, [], NullSink(), {'hand_history': False})
+    game.add_player('a', {'name': 'A'})
+    game.add_player('b', {'name': 'B'})
+    return game
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram('t_seconds', '測試', buckets=(1, 2))
+    for value in (0.5, 1.5, 5):
+        histogram.observe(value)
+    lines = registry.render().splitlines()
+    assert 't_seconds_bucket{le="1"} 1' in lines
+    assert 't_seconds_bucket{le="2"} 2' in lines
+    assert 't_seconds_bucket{le="+Inf"} 3' in lines
+    assert 't_seconds_sum 7' in lines and 't_seconds_count 3' in lines
+
+
+def test_labels_are_cached_and_checked():
+    counter = Registry().counter('t_total', '測試', ('game_type',))
+    assert counter.labels('texas_holdem') is counter.labels('texas_holdem')
+    with pytest.raises(ValueError):
+        counter.labels('texas_holdem', 'extra')
+
+
+def test_registry_keeps_existing_metric_on_reregister():
+    registry = Registry()
+    first = registry.counter('t_total', '測試')
+    first.inc(3)
+    assert registry.counter('t_total', '測試') is first
+    with pytest.raises(ValueError):
+        registry.histogram('t_total', '測試')
+
+
+def test_unknown_actions_share_one_label():
+    assert action_label('raise') == 'raise'
+    assert action_label('<script>') == 'other'
+
+
+def test_only_settled_hands_count_as_completed():
+    started = HANDS_STARTED_TOTAL.labels('texas_holdem')
+    completed = HANDS_COMPLETED_TOTAL.labels('texas_holdem')
+    aborted = HANDS_ABORTED_TOTAL.labels('texas_holdem')
+    before = (started.value, completed.value, aborted.value)
+
+    game = _texas('metrics-1')
+    assert game.start_game('a')
+    game.handle_action(game.game_state['current_turn_sid'], 'fold')
+    assert not game.is_game_in_progress
+
+    game = _texas('metrics-2')
+    assert game.start_game('a')
+    game.abort_game("測試中止")
+
+    assert (started.value - before[0], completed.value - before[1], aborted.value - before[2]) == (2, 1, 1)
@@ -0,0 +1,99 @@
+from fractions import Fraction
+
+import pytest
+
+from games.black_jack.logic import BlackJackGame
+from games.black_jack.odds import OUTCOMES, dealer_outcome_distribution, dealer_outcome_vector, insurance_odds
+from games.black_jack.shoe import SINGLE_DECK_RANK_COUNTS
+from games.event_sink import NullSink
+
+
+def _brute_force(up_class, counts):
+    """逐張列舉莊家的牌 (不使用快取與剪枝)，作為對照。"""
+    def value(classes):
+        total = sum(c + 1 for c in classes)
+        return total + 10 if 0 in classes and total + 10 <= 21 else total
+
+    def walk(classes, counts, probability, result):
+        best = value(classes)
+        if len(classes) == 2 and set(classes) == {0, 9}:
+            result['blackjack'] += probability
+        elif best > 21:
+            result['bust'] += probability
+        elif best >= 17:
+            result[str(best)] += probability
+        else:
+            remaining = sum(counts)
+            for rank_class, count in enumerate(counts):
+                if count:
+                    next_counts = counts[:rank_class] + (count - 1,) + counts[rank_class + 1:]
+                    walk(classes + [rank_class], next_counts, probability * Fraction(count, remaining), result)
+
+    result = {outcome: Fraction(0) for outcome in OUTCOMES}
+    walk([up_class], counts, Fraction(1), result)
+    return result
+
+
+@pytest.mark.parametrize('up_class', [0, 4, 9])
+def test_matches_brute_force_on_a_small_shoe(up_class):
+    counts = (1, 1, 1, 2, 1, 1, 1, 1, 1, 3)
+    expected = _brute_force(up_class, counts)
+    vector = dealer_outcome_vector(up_class, counts)
+    for outcome, p in zip(OUTCOMES, vector):
+        assert p == pytest.approx(float(expected[outcome]), abs=1e-12)
+
+
+def test_peeked_distribution_excludes_blackjack():
+    distribution = dealer_outcome_distribution({'rank': 'A', 'suit': 'S'}, SINGLE_DECK_RANK_COUNTS * 1, peeked=True)
+    assert distribution['blackjack'] == 0
+    assert sum(distribution.values()) == pytest.approx(1, abs=1e-5)
+
+
+def test_insurance_odds():
+    assert insurance_odds((0,) * 9 + (5,))['recommended']
+    single_deck = insurance_odds(SINGLE_DECK_RANK_COUNTS)
+    assert single_deck['dealer_blackjack_probability'] == pytest.approx(16 / 52, abs=1e-6)
+    assert not single_deck['recommended']
+
+
+def _card(rank, suit='S'):
+    return {'rank': rank, 'suit': suit}
+
+
+def _table(phase, dealer, hands):
+    game = BlackJackGame('odds', [], NullSink(), {'hand_history': False})
+    for sid, hand in hands.items():
+        game.add_player(sid, {'name': sid})
+        game.players[sid].hand = list(hand)
+        game.players[sid].is_active_in_round = True
+    game.is_game_in_progress = True
+    game.game_state['game_phase'] = phase
+    game.game_state['dealer_hand'] = list(dealer)
+    return game
+
+
+def _hints(game, sid):
+    state = game.get_state_for_player(sid)
+    return state['insurance_hint'], state['dealer_outcome_probabilities']
+
+
+@pytest.mark.parametrize('phase,up', [('insurance', 'A'), ('player_turns', '6')])
+def test_hints_only_use_cards_the_player_can_see(phase, up):
+    hands = {'me': [_card('9'), _card('7')], 'other': [_card('5'), _card('K')]}
+    base = _hints(_table(phase, [_card(up), _card('T')], hands), 'me')
+    assert base != (None, None)
+    # 莊家暗牌與其他玩家的第二張牌 (這位玩家看不到) 不影響提示
+    assert _hints(_table(phase, [_card(up), _card('2')], hands), 'me') == base
+    assert _hints(_table(phase, [_card(up), _card('T')], dict(hands, other=[_card('5'), _card('4')])), 'me') == base
+    # 自己的手牌與其他玩家的明牌會影響提示
+    assert _hints(_table(phase, [_card(up), _card('T')], dict(hands, me=[_card('9'), _card('Q')])), 'me') != base
+    assert _hints(_table(phase, [_card(up), _card('T')], dict(hands, other=[_card('J'), _card('K')])), 'me') != base
+
+
+def test_players_with_the_same_view_share_one_computation():
+    game = _table('player_turns', [_card('6'), _card('T')],
+                  {'a': [_card('9'), _card('7')], 'b': [_card('9'), _card('7', 'H')], 'c': [_card('2'), _card('3')]})
+    assert _hints(game, 'a') == _hints(game, 'b')
+    assert len(game._outcome_hint_cache) == 1
+    _hints(game, 'c')
+    assert len(game._outcome_hint_cache) == 2
@@ -0,0 +1,67 @@
+import copy
+import pickle
+import sys
+
+import pytest
+
+from games.black_jack.logic import BlackJackPlayer
+from games.texas_holdem.fast_fold import FastFoldPlayer
+from games.texas_holdem.logic import TexasPlayer
+
+
+def test_attribute_and_item_access_share_the_same_fields():
+    player = TexasPlayer(name='Alice', chips=100)
+    player.chips -= 20
+    assert player['chips'] == 80 and player.get('chips') == 80
+    player['is_all_in'] = True
+    assert player.is_all_in and 'is_all_in' in player and 'nope' not in player
+    assert set(player.keys()) == set(TexasPlayer.FIELDS)
+
+
+def test_unknown_fields_raise():
+    player = TexasPlayer()
+    with pytest.raises(KeyError):
+        player['chps']
+    with pytest.raises(KeyError):
+        player.get('chps', 0)
+    with pytest.raises(KeyError):
+        player['chps'] = 1
+    with pytest.raises(AttributeError):
+        player.chps = 1
+
+
+def test_list_defaults_are_not_shared():
+    a, b = TexasPlayer(), TexasPlayer()
+    a.hand.append({'rank': 'A', 'suit': 'S'})
+    assert b.hand == [] and TexasPlayer.FIELDS['hand'] == []
+
+
+def test_copy_pickle_and_equality():
+    player = BlackJackPlayer(name='Bob', chips=50, hand=[{'rank': 'T', 'suit': 'H'}])
+    for clone in (pickle.loads(pickle.dumps(player)), copy.deepcopy(player)):
+        assert clone == player and clone is not player
+        assert clone.to_dict() == player.to_dict()
+    assert player != BlackJackPlayer(name='Bob', chips=51)
+    with pytest.raises(TypeError):
+        hash(player)
+
+
+def test_subclass_adds_fields():
+    player = FastFoldPlayer(name='C')
+    assert player.fast_folded is False and player['current_bet'] == 0
+    assert 'fast_folded' not in TexasPlayer()
+
+
+def test_reset_round_and_public_view():
+    player = BlackJackPlayer(name='D', chips=100, bet=10, hand=[{'rank': 'A', 'suit': 'S'}], is_busted=True)
+    player.reset_round(True)
+    assert player.hand == [] and player.bet == 0 and not player.is_busted
+    assert player.has_insurance is None and player.is_active_in_round
+    view = player.public_view('sid-d', [])
+    assert view['sid'] == 'sid-d' and view['chips'] == 100 and view['hand'] == []
+    assert TexasPlayer(name=' ').public_view('abcdef', False)['name'] == '玩家_abcd'
+
+
+def test_records_are_smaller_than_dicts():
+    player = TexasPlayer(name='E', chips=1000)
+    assert sys.getsizeof(player) < sys.getsizeof(player.to_dict())
@@ -0,0 +1,70 @@
+import sys
+import time
+
+import pytest
+
+from games.profiler import SLOW_ACTIONS, SamplingProfiler, SlowActionRecorder, batch_run, collapse_stack, profile_for
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_collapse_stack_lists_root_first():
+    def inner():
+        return collapse_stack(sys._getframe())
+    stack = inner()
+    assert stack.endswith('test_profiler.py:test_collapse_stack_lists_root_first;test_profiler.py:inner')
+    assert collapse_stack(sys._getframe(), max_depth=1) == 'test_profiler.py:test_collapse_stack_lists_root_first'
+
+
+def test_sampling_profiler_sees_busy_function():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    _busy(0.1)
+    profiler.stop()
+    assert profiler.sample_count > 0
+    assert '_busy' in profiler.to_collapsed()
+
+
+def test_profile_for_rejects_concurrent_runs(monkeypatch):
+    import games.profiler as profiler_module
+    monkeypatch.setattr(profiler_module, '_profile_in_progress', True)
+    with pytest.raises(RuntimeError):
+        profile_for(0.01)
+
+
+def test_slow_actions_are_recorded_with_profile():
+    recorder = SlowActionRecorder(threshold_ms=20, capacity=2, sample_interval=0.001)
+    with recorder.track('room', 'fast'):
+        pass
+    for _ in range(3):
+        with recorder.track('room', 'slow'):
+            with recorder.track('room', 'nested'):  # 巢狀呼叫只由最外層記錄
+                _busy(0.03)
+    records = recorder.snapshot()
+    assert len(records) == 2 and {r['action_type'] for r in records} == {'slow'}
+    assert records[0]['duration_ms'] >= 20 and '_busy' in records[0]['profile']
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = SlowActionRecorder(threshold_ms=0)
+    with recorder.track('room', 'slow'):
+        _busy(0.01)
+    assert not recorder.enabled and recorder.snapshot() == []
+
+
+def test_batch_run_pauses_and_restores_slow_actions(monkeypatch, capsys):
+    monkeypatch.setattr(SLOW_ACTIONS, 'threshold', 0.2)
+    with pytest.raises(RuntimeError):
+        with batch_run():
+            assert not SLOW_ACTIONS.enabled
+            print("遊戲輸出")
+            raise RuntimeError
+    assert SLOW_ACTIONS.threshold == 0.2
+    assert capsys.readouterr().out == ''
+    with batch_run(quiet=False):
+        print("遊戲輸出")
+    assert capsys.readouterr().out == "遊戲輸出\n"
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from games.black_jack.logic import BlackJackGame
+from games.event_sink import NullSink
+from games.hand_history import HandHistoryReader
+from games.profiler import SLOW_ACTIONS
+from games.replay import replay_file, replay_hand
+from games.texas_holdem.logic import TexasHoldemGame
+
+
+@pytest.fixture(autouse=True)
+def slow_action_threshold_is_restored():
+    # 批次執行只在 batch_run 區塊內暫停慢動作紀錄，結束後伺服器的門檻不變
+    threshold = SLOW_ACTIONS.threshold
+    yield
+    assert SLOW_ACTIONS.threshold == threshold
+
+
+def _record_texas(room_id, rng, manual_scheduler, hands=30):
+    game = TexasHoldemGame(room_id, [], NullSink(), {'hand_history': True, 'timeout_seconds': 10})
+    for i in range(rng.randint(2, 6)):
+        game.add_player(f"p{i}", {'name': f"P{i}"})
+    game.host_sid = 'p0'
+    for _ in range(hands):
+        if not game.start_game('p0'):
+            break
+        while game.is_game_in_progress:
+            sid = game.game_state['current_turn_sid']
+            if rng.random() < 0.05:
+                manual_scheduler.advance(10)  # 超時自動棄牌
+                continue
+            player = game.players[sid]
+            action = rng.choice(['fold', 'check', 'call', 'call', 'bet', 'raise'])
+            if action == 'check' and game.game_state['current_street_bet_to_match'] > player['bet_in_current_street']:
+                action = 'call'
+            amount = rng.choice([20, 40, 100, player['chips'] + player['bet_in_current_street']])
+            if not game.handle_action(sid, action, {'amount': amount}):
+                game.handle_action(sid, 'fold', {})
+    game.hand_history.flush()
+    return game.hand_history.log_path
+
+
+def _record_black_jack(room_id, rng, manual_scheduler, hands=30):
+    game = BlackJackGame(room_id, [], NullSink(), {'hand_history': True, 'outcome_hints': False,
+                                                   'betting_seconds': 15, 'timeout_seconds': 10})
+    sids = [f"p{i}" for i in range(rng.randint(1, 4))]
+    for sid in sids:
+        game.add_player(sid, {'name': sid.upper()})
+    for _ in range(hands):
+        if not game.start_game('p0'):
+            break
+        for sid in sids:
+            if rng.random() < 0.9:
+                game.handle_action(sid, 'bet', {'amount': rng.choice([10, 20, 50])})
+        if game.game_state['game_phase'] == 'betting':
+            manual_scheduler.advance(15)
+        while game.is_game_in_progress:
+            phase = game.game_state['game_phase']
+            if phase == 'insurance':
+                for sid in game.game_state['round_active_players_sids_in_order']:
+                    if rng.random() < 0.7:
+                        game.handle_action(sid, rng.choice(['insurance', 'decline_insurance']), {'take': True})
+                if game.game_state['game_phase'] == 'insurance':
+                    manual_scheduler.advance(10)
+            elif rng.random() < 0.1:
+                manual_scheduler.advance(10)  # 超時自動停牌
+            else:
+                game.handle_action(game.game_state['current_turn_sid'], rng.choice(['hit', 'stand', 'double']))
+    game.hand_history.flush()
+    return game.hand_history.log_path
+
+
+@pytest.mark.parametrize('record', [_record_texas, _record_black_jack])
+def test_recorded_hands_replay_to_the_same_results(record, manual_scheduler, capsys):
+    rng = random.Random(37)
+    paths = [record(f"replay-{record.__name__}-{table}", rng, manual_scheduler) for table in range(3)]
+    capsys.readouterr()
+    for path in paths:
+        summary = replay_file(path)
+        assert summary['hands'] == len(HandHistoryReader(path)) > 0
+        assert summary['mismatches'] == []
+
+
+def test_detects_a_changed_result(manual_scheduler, capsys):
+    path = _record_texas('replay-tampered', random.Random(5), manual_scheduler, hands=3)
+    hand = HandHistoryReader(path).read_hand(0)
+    assert replay_hand(hand)['ok']
+    hand['seed'] ^= 1  # 不同的牌序
+    assert not replay_hand(hand)['ok']
@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+from games.black_jack.logic import BlackJackGame
+from games.event_sink import RecordingSink
+from games.room_store import RoomStore
+from games.scheduler import ManualScheduler
+from games.texas_holdem.logic import TexasHoldemGame
+
+
+class MembersSink(RecordingSink):
+    def __init__(self):
+        super().__init__(broadcasts=False)
+        self.members = {}
+
+    def room_members(self, room_id):
+        return self.members.get(room_id, ())
+
+
+def texas_step(game):
+    sid = game.game_state['current_turn_sid']
+    player = game.players[sid]
+    to_call = game.game_state['current_street_bet_to_match'] - player.bet_in_current_street
+    game.handle_action(sid, 'call' if to_call > 0 else 'check', {})
+
+
+def chips(game):
+    return {sid: player.chips for sid, player in game.players.items()}
+
+
+@pytest.fixture
+def events():
+    return MembersSink()
+
+
+@pytest.fixture
+def store(events, manual_scheduler, tmp_path):
+    store = RoomStore(events, str(tmp_path), idle_seconds=600, max_resident=3, sweep_interval=60,
+                      scheduler=manual_scheduler)
+    store.start()
+    yield store
+    store.stop()
+
+
+def _texas(room_id, events, scheduler, **options):
+    game = TexasHoldemGame(room_id, [], events, dict({'hand_history': False}, **options))
+    game.scheduler = scheduler
+    return game
+
+
+def test_idle_rooms_sleep_and_resume_mid_hand(store, events, manual_scheduler):
+    # 德州撲克: 翻牌前休眠，喚醒後從同一個狀態繼續，並和沒有休眠的同一副牌得到相同的結果
+    options = {'seed': 7, 'auto_deal': True, 'timeout_seconds': 3600}
+    reference = _texas('ref', events, ManualScheduler(), **options)  # 不在 store 中，也不受 advance 影響
+    texas = _texas('t1', events, manual_scheduler, **options)
+    for game in (reference, texas):
+        for i in range(3):
+            game.add_player(f"p{i}", {'name': f"P{i}"})
+        game.host_sid = 'p0'
+        game.start_game(None)
+        texas_step(game)
+    busy = _texas('busy', events, manual_scheduler)
+    busy.add_player('p1', {'name': 'P1'})
+    store['busy'] = busy
+    store['t1'] = texas
+    events.members['busy'] = {'p1-socket'}  # 有人連線的房間不會休眠
+    blackjack = BlackJackGame('b1', [], events, {'hand_history': False, 'outcome_hints': False, 'seed': 3,
+                                                'betting_seconds': 3600, 'timeout_seconds': 3600})
+    blackjack.add_player('p0', {'name': 'P0'})
+    blackjack.start_game('p0')
+    store['b1'] = blackjack
+
+    manual_scheduler.advance(30)  # 還沒有閒置
+    assert len(store) == 3 and store.dormant_count() == 0
+    manual_scheduler.advance(600)
+    assert set(store.keys()) == {'busy'} and store.dormant_count() == 2
+    assert 't1' in store and store.game_types()['t1'] == 'texas_holdem' and store.rooms_of('p1') == ['busy', 't1']
+    assert manual_scheduler.pending_count() == 1  # 休眠的房間沒有留下計時器 (只剩 sweep)
+
+    texas = store['t1']
+    assert texas.events is events and texas.scheduler is manual_scheduler
+    assert texas.player_action_timers  # 輪到的玩家重新開始計時
+    while texas.is_game_in_progress:
+        texas_step(texas)
+    while reference.is_game_in_progress:
+        texas_step(reference)
+    assert chips(texas) == chips(reference)
+
+    # 21點: 下注階段休眠，喚醒後重新開始下注期限
+    blackjack = store['b1']
+    assert blackjack.game_state['game_phase'] == 'betting' and blackjack.phase_timer is not None
+    blackjack.handle_action('p0', 'bet', {'amount': 10})
+    assert blackjack.game_state['game_phase'] != 'betting'
+
+
+def test_lru_limit_evicts_the_least_recently_used_room(store, events, manual_scheduler, tmp_path):
+    busy = _texas('busy', events, manual_scheduler)
+    store['busy'] = busy
+    events.members['busy'] = {'socket'}
+    for index in range(4):
+        store[f"x{index}"] = _texas(f"x{index}", events, manual_scheduler)
+        manual_scheduler.advance(1)
+    assert len(store) == 3 and 'busy' in store.keys()
+    assert store.dormant_count() == 2
+    assert len(os.listdir(tmp_path)) == store.dormant_count()
+    # 讀取休眠的房間會喚醒它
+    assert store['x0'].room_id == 'x0'
+    assert 'x0' in store.keys()
+
+
+def test_deleting_a_dormant_room_removes_its_snapshot(store, events, manual_scheduler, tmp_path):
+    store['t1'] = _texas('t1', events, manual_scheduler)
+    manual_scheduler.advance(700)
+    assert store.dormant_count() == 1 and len(os.listdir(tmp_path)) == 1
+    del store['t1']
+    assert 't1' not in store and store.dormant_count() == 0
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(KeyError):
+        store['t1']
@@ -0,0 +1,74 @@
+from games.scheduler import ManualScheduler, Scheduler
+
+
+def test_fires_in_deadline_order_including_chained_timers():
+    scheduler = ManualScheduler()
+    fired = []
+    scheduler.call_later(3, fired.append, 'c')
+    a = scheduler.call_later(1, fired.append, 'a')
+    scheduler.call_later(2, lambda: scheduler.call_later(0, fired.append, 'b-chained'))
+    scheduler.call_later(2, fired.append, 'b')
+    a.cancel()
+    assert scheduler.pending_count() == 3
+    scheduler.advance(2.5)
+    assert fired == ['b', 'b-chained']
+    scheduler.advance(1)
+    assert fired == ['b', 'b-chained', 'c']
+    assert scheduler.pending_count() == 0
+
+
+def test_cancel_releases_the_callback():
+    scheduler = ManualScheduler()
+    handle = scheduler.call_later(5, print, 'x')
+    handle.cancel()
+    handle.cancel()
+    assert handle.callback is None and handle.args == ()
+    assert scheduler.pending_count() == 0
+
+
+def test_compacts_after_many_cancels():
+    scheduler = ManualScheduler()
+    fired = []
+    handles = [scheduler.call_later(10 + i, fired.append, i) for i in range(1000)]
+    for handle in handles[:900]:
+        handle.cancel()
+    assert len(scheduler._heap) < 1000 and scheduler.pending_count() == 100
+    scheduler.advance(2000)
+    assert fired == list(range(900, 1000))
+
+
+def test_callback_cancelling_timers_while_draining():
+    # 回呼在 run_due 迴圈中取消多個計時器觸發 heap 壓縮，同時到期的計時器仍只觸發一次
+    scheduler = ManualScheduler()
+    fired = []
+    others = []
+    scheduler.call_later(1, lambda: [handle.cancel() for handle in others])
+    survivor = scheduler.call_later(1, fired.append, 'survivor')
+    others.extend(scheduler.call_later(5, fired.append, i) for i in range(4))
+    scheduler.advance(1)
+    assert fired == ['survivor']
+    assert survivor.fired
+    assert scheduler.pending_count() == 0
+    assert scheduler.error_count == 0
+    scheduler.advance(10)
+    assert fired == ['survivor']
+    assert scheduler._heap == []
+
+
+def test_callback_errors_are_counted_and_do_not_stop_the_loop():
+    scheduler = ManualScheduler()
+    fired = []
+    scheduler.call_later(1, lambda: 1 / 0)
+    scheduler.call_later(1, fired.append, 'after')
+    scheduler.advance(1)
+    assert scheduler.error_count == 1 and fired == ['after']
+
+
+def test_run_due_reports_the_next_delay():
+    now = [100.0]
+    scheduler = Scheduler(clock=lambda: now[0])
+    scheduler._ensure_runner = lambda: None
+    scheduler.call_later(3, lambda: None)
+    assert scheduler.run_due() == 3
+    now[0] += 3
+    assert scheduler.run_due() is None
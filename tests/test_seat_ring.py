@@ -0,0 +1,81 @@
+"""性質測試: 隨機打很多局，每個動作後比較 SeatRing 與原本逐一掃描的結果。"""
+import random
+
+import pytest
+
+from games.event_sink import NullSink
+from games.texas_holdem.logic import TexasHoldemGame
+
+
+def reference_is_round_over(game):
+    order = [sid for sid in game.game_state.get('round_active_players_sids_in_order', [])
+             if sid in game.players and game.players[sid].get('is_active_in_round', False)]
+    if not order:
+        return True
+    can_bet = sum(1 for sid in order if not game.players[sid].get('is_all_in', False) and game.players[sid].get('chips', 0) > 0)
+    if can_bet < 2 and len(order) > 1:
+        return True
+    for sid in order:
+        if not game.players[sid].get('is_all_in', False) and not game.players[sid].get('has_acted_this_street', False):
+            return False
+    target = game.game_state.get('current_street_bet_to_match', 0)
+    for sid in order:
+        player = game.players[sid]
+        if not player.get('is_all_in', False) and player.get('chips', 0) > 0 and player.get('bet_in_current_street', 0) != target:
+            return False
+    return True
+
+
+def reference_next_to_act(game, after_sid):
+    order = game.game_state.get('round_active_players_sids_in_order', [])
+    start = order.index(after_sid) if after_sid in order else -1
+    for i in range(1, len(order) + 1):
+        sid = order[(start + i) % len(order)]
+        player = game.players.get(sid)
+        if player and player.get('is_active_in_round') and not player.get('is_all_in', False) \
+                and not player.get('has_acted_this_street', False):
+            return sid
+    return None
+
+
+def check(game):
+    ring = game.seat_ring
+    assert ring.is_round_over() == reference_is_round_over(game)
+    for sid in game.game_state.get('round_active_players_sids_in_order', []) + ['nobody']:
+        assert ring.next_to_act(sid) == reference_next_to_act(game, sid), (sid, ring.order)
+
+
+@pytest.mark.parametrize('seed', [20240601, 1, 2, 3])
+def test_seat_ring_matches_linear_scan(seed, capsys):
+    rng = random.Random(seed)
+    checks = 0
+    for hand in range(100):
+        game = TexasHoldemGame(f"prop-{hand}", [], NullSink(), {'timeout_seconds': 10, 'hand_history': False})
+        num_players = rng.randint(2, 8)
+        for i in range(num_players):
+            game.add_player(f"p{i}", {'name': f"P{i}"})
+            game.players[f"p{i}"]['chips'] = rng.choice([15, 40, 100, 1000])
+        game.host_sid = 'p0'
+        game.start_game('p0')
+        for _ in range(200):
+            if not game.is_game_in_progress:
+                break
+            check(game)
+            checks += 1
+            sid = game.game_state['current_turn_sid']
+            roll = rng.random()
+            if roll < 0.05:
+                game.scheduler.advance(10)  # 超時自動棄牌
+                continue
+            if roll < 0.08 and len(game.players) > 2:
+                game.remove_player(rng.choice(list(game.players)))
+                continue
+            player = game.players[sid]
+            to_call = game.game_state['current_street_bet_to_match'] - player['bet_in_current_street']
+            action = rng.choice(['fold', 'check', 'call', 'bet', 'raise'])
+            amount = rng.choice([20, 40, 80, 500, player['chips'] + player['bet_in_current_street']])
+            if action == 'check' and to_call > 0:
+                action = 'call'
+            game.handle_action(sid, action, {'amount': amount})
+        capsys.readouterr()  # 遊戲邏輯大量 print，不累積在記憶體中
+    assert checks > 500
@@ -0,0 +1,67 @@
+from collections import Counter
+
+import pytest
+
+from games.black_jack.shoe import CARD_TABLE, CARDS_PER_DECK, CODE_TO_RANK_CLASS, RANK_CLASS, Shoe
+
+
+def _rank_counts(codes):
+    counts = [0] * 10
+    for code in codes:
+        counts[CODE_TO_RANK_CLASS[code]] += 1
+    return tuple(counts)
+
+
+def test_every_card_appears_num_decks_times():
+    shoe = Shoe(num_decks=6, seed=1)
+    assert len(shoe) == 6 * CARDS_PER_DECK
+    assert set(Counter(shoe.cards).values()) == {6}
+
+
+def test_same_seed_gives_same_order():
+    assert Shoe(seed=42).cards == Shoe(seed=42).cards
+    assert Shoe(seed=42).cards != Shoe(seed=43).cards
+
+
+def test_deal_tracks_remaining_rank_counts():
+    shoe = Shoe(num_decks=2, seed=7)
+    dealt = shoe.deal(30)
+    assert len(dealt) == 30 and shoe.remaining == 2 * CARDS_PER_DECK - 30
+    assert shoe.remaining_rank_counts() == _rank_counts(shoe.cards[shoe.position:])
+    assert [RANK_CLASS[card['rank']] for card in dealt] == [CODE_TO_RANK_CLASS[c] for c in shoe.dealt_this_round()]
+
+
+def test_reshuffles_after_cut_card():
+    shoe = Shoe(num_decks=1, cut_card=20, seed=3)
+    shoe.begin_round()
+    shoe.deal(20)
+    assert shoe.needs_shuffle
+    assert shoe.begin_round()
+    assert shoe.position == 0 and shoe.shuffle_count == 2
+
+
+def test_running_out_mid_round_keeps_cards_in_play():
+    shoe = Shoe(num_decks=1, cut_card=CARDS_PER_DECK, seed=5)
+    shoe.deal(48)
+    shoe.begin_round()
+    in_play = shoe.deal(3)
+    more = shoe.deal(3)  # 只剩 1 張，棄牌洗回
+    assert [CARD_TABLE[code] for code in shoe.dealt_this_round()] == in_play + more
+    assert len(in_play + more) == 6
+    assert sorted(shoe.cards) == sorted(range(CARDS_PER_DECK))
+    assert shoe.remaining_rank_counts() == _rank_counts(shoe.cards[shoe.position:])
+    assert shoe.needs_shuffle
+
+
+def test_from_seed_rebuilds_the_position():
+    shoe = Shoe(num_decks=6, seed=99)
+    shoe.deal(37)
+    rebuilt = Shoe.from_seed(99, position=37)
+    assert rebuilt.deal(10) == shoe.deal(10)
+    assert rebuilt.remaining_rank_counts() == shoe.remaining_rank_counts()
+
+
+@pytest.mark.parametrize('kwargs', [{'num_decks': 0}, {'num_decks': 9}, {'penetration': 0}, {'cut_card': 1000}])
+def test_rejects_invalid_configuration(kwargs):
+    with pytest.raises(ValueError):
+        Shoe(**kwargs)
@@ -0,0 +1,38 @@
+import pytest
+
+from games.black_jack import simulate as sim
+from games.profiler import SLOW_ACTIONS
+
+
+@pytest.fixture(autouse=True)
+def slow_action_threshold_is_restored():
+    # 批次執行只在 batch_run 區塊內暫停慢動作紀錄，結束後伺服器的門檻不變
+    threshold = SLOW_ACTIONS.threshold
+    yield
+    assert SLOW_ACTIONS.threshold == threshold
+
+
+def test_same_seed_gives_same_result():
+    first = sim.simulate(300, strategy='basic', workers=1, seed=11, chunk_size=100)
+    second = sim.simulate(300, strategy='basic', workers=1, seed=11, chunk_size=100)
+    assert first['rounds'] == 300
+    assert (first['ev'], first['variance']) == (second['ev'], second['variance'])
+
+
+def test_chunks_use_independent_streams():
+    assert sim.derive_seed(1, 0) != sim.derive_seed(1, 1)
+    assert sim.derive_seed(1, 0) == sim.derive_seed(1, 0)
+
+
+def test_play_round_reports_net_units():
+    game = sim.create_simulation_game({'min_bet': 10, 'max_bet': 10, 'buy_in': sim.SIM_CHIPS,
+                                       'betting_seconds': 0, 'timeout_seconds': 0,
+                                       'outcome_hints': False, 'hand_history': False}, seed=5)
+    chips = game.players[sim.SIM_SID]['chips']
+    total = sum(sim.play_round(game, sim.strategy_always_stand, 10) for _ in range(50))
+    assert game.players[sim.SIM_SID]['chips'] - chips == total * 10
+
+
+def test_rejects_unknown_strategy():
+    with pytest.raises(ValueError):
+        sim.simulate(10, strategy='martingale', workers=1)
@@ -0,0 +1,65 @@
+import pytest
+
+from games.black_jack import strategy
+from games.black_jack.shoe import RANK_CLASS
+
+
+@pytest.fixture(scope='module')
+def table():
+    return strategy.build_strategy_table(6)
+
+
+# 與公開的 6 副牌、莊家軟 17 停牌基本策略比對幾個代表性的格子
+@pytest.mark.parametrize('total,soft,up,can_double,expected', [
+    (16, False, 'T', True, 'hit'),
+    (16, False, '6', True, 'stand'),
+    (12, False, '2', True, 'hit'),
+    (12, False, '4', True, 'stand'),
+    (11, False, 'T', True, 'double'),
+    (11, False, 'A', True, 'hit'),
+    (10, False, '9', True, 'double'),
+    (9, False, '3', True, 'double'),
+    (9, False, '2', True, 'hit'),
+    (18, True, '9', True, 'hit'),
+    (18, True, '7', True, 'stand'),
+    (18, True, '4', True, 'double'),
+    (18, True, '4', False, 'stand'),
+    (17, True, '3', True, 'double'),
+    (13, True, '6', True, 'double'),
+    (19, True, '6', True, 'stand'),
+    (17, False, 'A', True, 'stand'),
+])
+def test_matches_published_basic_strategy(table, total, soft, up, can_double, expected):
+    assert table.action(total, soft, RANK_CLASS[up], can_double=can_double) == expected
+
+
+def test_round_ev_is_a_small_house_edge(table):
+    # 策略表不含分牌，莊家優勢比完整基本策略略高；牌副數越少對玩家越有利
+    assert -0.02 < table.round_ev < 0
+    assert strategy.build_strategy_table(1).round_ev > table.round_ev
+
+
+def test_recommend_reads_hands(table):
+    hand = [{'rank': 'T', 'suit': 'S'}, {'rank': '6', 'suit': 'H'}]
+    assert table.recommend(hand, {'rank': 'K', 'suit': 'D'}) == 'hit'
+    assert table.recommend(hand, {'rank': '6', 'suit': 'D'}) == 'stand'
+
+
+def test_disk_cache_round_trip(table, tmp_path, monkeypatch):
+    monkeypatch.setattr(strategy, 'TABLE_DIR', str(tmp_path))
+    monkeypatch.setattr(strategy, '_loaded_tables', {})
+    built = strategy.get_strategy_table(6)
+    monkeypatch.setattr(strategy, '_loaded_tables', {})
+    loaded = strategy.get_strategy_table(6)
+    assert loaded is not built
+    assert loaded.evs == built.evs and loaded.actions == built.actions and loaded.round_ev == built.round_ev
+    assert list(tmp_path.iterdir())
+
+
+def test_corrupt_cache_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(strategy, 'TABLE_DIR', str(tmp_path))
+    monkeypatch.setattr(strategy, '_loaded_tables', {})
+    path = strategy._table_path(6, 1.5)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * 10)
+    assert strategy.get_strategy_table(6).action(16, False, RANK_CLASS['T']) == 'hit'
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from games.event_sink import NullSink
+from games.texas_holdem.tournament import Tournament
+
+
+def _tournament(manual_scheduler, entrants, **options):
+    tournament = Tournament('sim', NullSink(), dict({
+        'table_size': 9, 'starting_chips': 1500, 'level_seconds': 120, 'auto_deal_delay': 2,
+        'timeout_seconds': 10, 'seed': 39, 'hand_history': False, 'outcome_hints': False,
+    }, **options), scheduler=manual_scheduler)
+    for i in range(entrants):
+        tournament.register(f"p{i}", f"P{i}")
+    return tournament
+
+
+def _act_randomly(table, rng):
+    sid = table.game_state['current_turn_sid']
+    player = table.players[sid]
+    to_call = table.game_state['current_street_bet_to_match'] - player['bet_in_current_street']
+    roll = rng.random()
+    if roll < 0.02:
+        return False  # 讓這位玩家超時自動棄牌
+    if roll < 0.04:
+        action, amount = 'raise', player['chips'] + player['bet_in_current_street']
+    elif roll < 0.10:
+        action, amount = 'raise', table.game_state['current_street_bet_to_match'] + table.game_state['big_blind'] * 3
+    elif roll < 0.45:
+        action, amount = 'fold', 0
+    else:
+        action, amount = ('call' if to_call > 0 else 'check'), 0
+    if action == 'raise' and player['chips'] + player['bet_in_current_street'] <= table.game_state['current_street_bet_to_match']:
+        action = 'call'
+    table.handle_action(sid, action, {'amount': amount})
+    return True
+
+
+@pytest.mark.parametrize('entrants', [2, 23, 60])
+def test_simulated_tournament_conserves_chips_and_ranks_everyone(manual_scheduler, capsys, entrants):
+    """無頭模擬一場錦標賽: 機器人隨機行動，檢查籌碼守恆、各桌人數與名次。"""
+    rng = random.Random(entrants)
+    tournament = _tournament(manual_scheduler, entrants)
+    total_chips = entrants * tournament.starting_chips
+    assert tournament.start()[0]
+    while tournament.status == 'running':
+        acted = False
+        for table in list(tournament.tables.values()):
+            if table.is_game_in_progress:
+                acted = _act_randomly(table, rng) or acted
+        if tournament.status == 'running':
+            tables = tournament.tables.values()
+            chips_in_play = sum(p['chips'] + (p['current_bet'] if t.is_game_in_progress else 0)
+                                for t in tables for p in t.players.values())
+            assert chips_in_play == total_chips
+            sizes = [table.get_player_count() for table in tables]
+            assert sum(sizes) == tournament.remaining
+            assert max(sizes) <= tournament.table_size
+        if not acted:
+            deadline = manual_scheduler.next_deadline()
+            assert deadline is not None, "沒有進行中的桌子也沒有計時器"
+            manual_scheduler.advance(deadline - manual_scheduler.now())
+        capsys.readouterr()
+
+    standings = tournament.get_standings()['standings']
+    positions = sorted(row['finish_position'] for row in standings)
+    # 同一局被淘汰的玩家名次相同
+    assert len(positions) == entrants and positions.count(1) == 1 and positions[-1] <= entrants
+    assert standings[0]['chips'] == total_chips
+    assert len(tournament.tables) == 1
+
+
+def test_registration_rules(manual_scheduler):
+    tournament = _tournament(manual_scheduler, 1)
+    assert not tournament.register('p0', 'again')[0]
+    assert not tournament.start()[0]  # 至少需要 2 位參賽者
+    tournament.register('p1', 'P1')
+    assert tournament.unregister('p1')
+    tournament.register('p1', 'P1')
+    assert tournament.start()[0]
+    assert not tournament.register('late', 'Late')[0]
+    assert not tournament.unregister('p0')
+
+
+def test_seats_are_balanced_at_start(manual_scheduler):
+    tournament = _tournament(manual_scheduler, 30)
+    tournament.start()
+    sizes = sorted(table.get_player_count() for table in tournament.tables.values())
+    assert sizes == [7, 7, 8, 8]
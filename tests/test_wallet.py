@@ -0,0 +1,140 @@
+import pytest
+
+from games.event_sink import RecordingSink
+from games.texas_holdem.logic import TexasHoldemGame
+from games.wallet import Wallet
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'wallet.sqlite3')
+
+
+@pytest.fixture
+def wallet(path):
+    wallet = Wallet(path, starting_balance=1000)
+    yield wallet
+    wallet.close()
+
+
+def ledger_kinds(wallet):
+    return dict(wallet._conn.execute('SELECT kind, COUNT(*) FROM ledger GROUP BY kind').fetchall())
+
+
+def test_buy_in_moves_balance_to_table(wallet):
+    assert wallet.balance('a') == 1000
+    assert wallet.buy_in('a', 'r1', 300) == 300 and wallet.balance('a') == 700
+    assert wallet.buy_in('b', 'r1', 5000) == 1000 and wallet.balance('b') == 0  # 餘額不足時買入全部
+    assert wallet.buy_in('b', 'r2', 10) == 0
+    assert wallet.table_chips('a') == {'r1': 300}
+
+
+def test_retried_buy_in_request_applies_once(wallet):
+    assert wallet.buy_in('a', 'r1', 300, 'req-1') == 300
+    assert wallet.buy_in('a', 'r1', 300, 'req-1') == 300  # 佇列中的重送
+    wallet.flush()
+    assert wallet.buy_in('a', 'r1', 300, 'req-1') == 300  # 已提交後的重送
+    assert wallet.balance('a') == 700 and wallet.duplicate_ops == 2
+    wallet.flush()
+    assert ledger_kinds(wallet) == {'grant': 1, 'buy_in': 1}
+
+
+def test_keys_are_stable_across_processes(path):
+    wallet = Wallet(path, starting_balance=1000)
+    wallet.buy_in('a', 'r1', 300, 'req-1')
+    wallet.settle_hand('r1', '1:42', {'a': 350})
+    wallet.cash_out('a', 'r1')
+    wallet.close()
+
+    # 新的行程重送同樣的請求與結算: 都是重複的鍵，不會再入帳
+    wallet = Wallet(path, starting_balance=1000)
+    assert wallet.buy_in('a', 'r1', 300, 'req-1') == 0
+    wallet.flush()
+    keys = {row[0] for row in wallet._conn.execute('SELECT key FROM ledger')}
+    assert keys == {'grant:a', 'buy_in:r1:a:req-1', 'hand:r1:1:42:a', 'cash_out:r1:a:req-1'}
+    assert wallet.balance('a') == 1050
+    wallet.close()
+
+
+def test_duplicate_settlement_applies_once(wallet):
+    wallet.buy_in('a', 'r1', 300)
+    wallet.buy_in('b', 'r1', 1000)
+    wallet.settle_hand('r1', 1, {'a': 450, 'b': 850, 'bot': 99})
+    wallet.settle_hand('r1', 1, {'a': 0, 'b': 0})
+    assert wallet.table_chips('a') == {'r1': 450} and wallet.table_chips('bot') == {}
+    wallet.flush()
+    wallet.settle_hand('r1', 1, {'a': 10})
+    assert wallet.table_chips('a') == {'r1': 10}  # 快取先套用，提交時發現重複再撤銷
+    wallet.flush()
+    assert wallet.table_chips('a') == {'r1': 450} and wallet.duplicate_ops == 3
+
+
+def test_cash_out_and_close_room(wallet):
+    wallet.buy_in('a', 'r1', 300)
+    wallet.buy_in('b', 'r1', 1000)
+    wallet.settle_hand('r1', 1, {'a': 460.5, 'b': 839.5})
+    assert wallet.cash_out('a', 'r1') == 460.5 and wallet.balance('a') == 1160.5
+    assert wallet.cash_out('a', 'r1') is None
+    wallet.close_room('r1')
+    assert wallet.balance('b') == 839.5 and wallet.table_chips('b') == {}
+    wallet.flush()
+    assert wallet._conn.execute('SELECT COUNT(*) FROM stacks').fetchone()[0] == 0
+
+
+def test_crash_loses_only_uncommitted_records(path):
+    wallet = Wallet(path, starting_balance=1000)
+    wallet.buy_in('a', 'r1', 300)
+    wallet.settle_hand('r1', 1, {'a': 400})
+    wallet.flush()
+    wallet.settle_hand('r1', 2, {'a': 900})
+    wallet._pending.clear()
+    wallet._conn.close()
+
+    # 已提交的牌桌籌碼 (400) 在重新啟動時退回餘額；沒有提交的結算遺失
+    wallet = Wallet(path, starting_balance=1000)
+    assert wallet.balance('a') == 1100 and not wallet.stacks
+    assert ledger_kinds(wallet) == {'grant': 1, 'buy_in': 1, 'hand': 1, 'recover': 1}
+    assert wallet.recover() == 0
+    wallet.close()
+
+
+def test_recover_keys_do_not_collide_across_restarts(path):
+    for _ in range(2):
+        wallet = Wallet(path, starting_balance=1000)
+        wallet.buy_in('a', 'r1', 100)
+        wallet.flush()
+        wallet._conn.close()
+    wallet = Wallet(path, starting_balance=1000)
+    assert ledger_kinds(wallet)['recover'] == 2
+    assert wallet.balance('a') == 1000
+    wallet.close()
+
+
+def test_bulk_settlement_matches_database(wallet):
+    seats = [(f"room-{table}", [f"user-{table}-{seat}" for seat in range(6)]) for table in range(50)]
+    for room_id, users in seats:
+        for user in users:
+            wallet.buy_in(user, room_id, 500)
+    wallet.flush()
+    for hand in range(5):
+        for room_id, users in seats:
+            wallet.settle_hand(room_id, hand, {user: 500 + (hand + seat) % 7 - 3 for seat, user in enumerate(users)})
+    wallet.flush()
+    total = wallet._conn.execute('SELECT SUM(chips) FROM stacks').fetchone()[0]
+    assert total == sum(wallet.stacks.values())
+    assert wallet.stats()['pending'] == 0
+
+
+def test_table_settles_with_hand_number_and_seed(wallet):
+    game = TexasHoldemGame('r1', [], RecordingSink(), {'hand_history': False, 'buy_in': 200})
+    game.wallet = wallet
+    game.add_player('a', {'name': 'a', 'request_id': 'join-a'})
+    game.add_player('b', {'name': 'b', 'request_id': 'join-b'})
+    assert wallet.balance('a') == 800 and wallet.table_chips('b') == {'r1': 200}
+    game.start_game('a')
+    seed = game.current_hand_seed
+    game.handle_action(game.game_state['current_turn_sid'], 'fold', {})
+    wallet.flush()
+    keys = {row[0] for row in wallet._conn.execute("SELECT key FROM ledger WHERE kind = 'hand'")}
+    assert keys == {f"hand:r1:1:{seed}:a", f"hand:r1:1:{seed}:b"}
+    assert sum(wallet.table_chips(user)['r1'] for user in 'ab') == 400